@@ -0,0 +1,61 @@
+import timeit
+
+import numpy as np
+import pandas as pd
+from pandas._testing import assert_frame_equal
+
+from nempy.historical_inputs import units
+
+# Compares the fused FCAS bid scaling and filtering (units._process_bids) with applying each step in turn
+# (units._process_bids_in_steps), on synthetic inputs about the size of a NEM dispatch interval.
+
+rng = np.random.default_rng(1)
+n_units = 500
+duids = ['U{}'.format(unit) for unit in range(n_units)]
+bid_types = ['ENERGY', 'RAISEREG', 'LOWERREG', 'RAISE1SEC', 'RAISE6SEC', 'RAISE60SEC', 'RAISE5MIN', 'LOWER1SEC',
+             'LOWER6SEC', 'LOWER60SEC', 'LOWER5MIN']
+
+BIDPEROFFER_D = pd.DataFrame([(duid, bid_type) for duid in duids for bid_type in bid_types
+                              if bid_type == 'ENERGY' or rng.random() < 0.3], columns=['DUID', 'BIDTYPE'])
+n_bids = len(BIDPEROFFER_D)
+enablement_min = rng.choice([0.0, 10.0, 50.0], n_bids)
+BIDPEROFFER_D['MAXAVAIL'] = rng.choice([0.0, 10.0, 30.0], n_bids)
+BIDPEROFFER_D['ENABLEMENTMIN'] = enablement_min
+BIDPEROFFER_D['LOWBREAKPOINT'] = enablement_min + rng.choice([0.0, 20.0], n_bids)
+BIDPEROFFER_D['HIGHBREAKPOINT'] = BIDPEROFFER_D['LOWBREAKPOINT'] + rng.choice([100.0, 200.0], n_bids)
+BIDPEROFFER_D['ENABLEMENTMAX'] = BIDPEROFFER_D['HIGHBREAKPOINT'] + rng.choice([0.0, 20.0], n_bids)
+for band in range(1, 11):
+    BIDPEROFFER_D['BANDAVAIL{}'.format(band)] = rng.choice([0.0, 5.0], n_bids)
+
+BIDDAYOFFER_D = BIDPEROFFER_D.loc[:, ['DUID', 'BIDTYPE']].copy()
+for band in range(1, 11):
+    BIDDAYOFFER_D['PRICEBAND{}'.format(band)] = band * 10.0
+
+agc_enablement_limits = pd.DataFrame({
+    'DUID': duids,
+    'RAISEREGENABLEMENTMAX': rng.choice([0.0, 200.0, 300.0], n_units),
+    'RAISEREGENABLEMENTMIN': rng.choice([0.0, 20.0], n_units),
+    'LOWERREGENABLEMENTMAX': rng.choice([0.0, 200.0, 300.0], n_units),
+    'LOWERREGENABLEMENTMIN': rng.choice([0.0, 20.0], n_units)})
+initial_conditions = pd.DataFrame({
+    'DUID': duids,
+    'INITIALMW': rng.choice([0.0, 60.0, 150.0], n_units),
+    'RAMPUPRATE': rng.choice([0.0, 120.0, 600.0, np.nan], n_units),
+    'RAMPDOWNRATE': rng.choice([0.0, 120.0, 600.0, np.nan], n_units),
+    'AGCSTATUS': rng.choice([0.0, 1.0], n_units)})
+uigf_units = duids[:100]
+uigf_values = pd.DataFrame({'DUID': uigf_units, 'UIGF': rng.choice([50.0, 150.0], len(uigf_units))})
+unit_availability = pd.DataFrame({'unit': duids, 'capacity': rng.choice([40.0, 300.0], n_units)})
+
+inputs = [BIDPEROFFER_D, BIDDAYOFFER_D, agc_enablement_limits, initial_conditions, uigf_values, unit_availability]
+
+fused_volume_bids, fused_price_bids = units._process_bids(*inputs)
+step_volume_bids, step_price_bids = units._process_bids_in_steps(*inputs)
+assert_frame_equal(fused_volume_bids, step_volume_bids.loc[:, fused_volume_bids.columns])
+assert_frame_equal(fused_price_bids, step_price_bids)
+
+repeats = 20
+fused_time = timeit.timeit(lambda: units._process_bids(*inputs), number=repeats) / repeats
+step_time = timeit.timeit(lambda: units._process_bids_in_steps(*inputs), number=repeats) / repeats
+print('{} bids, in steps {:.1f} ms, fused {:.1f} ms, speed up {:.1f}x'.format(
+    n_bids, step_time * 1000, fused_time * 1000, step_time / fused_time))
@@ -0,0 +1,15 @@
+import gc
+
+import pandas as pd
+import pytest
+
+# Examples in the docstrings print pd.DataFrames at full width.
+pd.set_option('display.width', None)
+
+
+@pytest.fixture(autouse=True)
+def collect_solver_models():
+    # mip models release their solver in __del__, if the garbage collector runs this while cffi is parsing a type,
+    # e.g. during Model.add_sos, cffi deadlocks. Collecting between tests keeps finalisers out of the solver calls.
+    yield
+    gc.collect()
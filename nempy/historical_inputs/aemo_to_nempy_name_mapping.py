@@ -1,3 +1,6 @@
+import numpy as np
+import pandas as pd
+
 
 name_map = {'TOTALCLEARED': 'energy',
             'RAISEREG': 'raise_reg',
@@ -47,7 +50,82 @@ def map_aemo_column_names_to_nempy_names(dataframe):
     return dataframe.rename(columns=name_map)
 
 
+# Code tables shared by the modules that format AEMO inputs. Each maps AEMO codes to nempy names, or, for the trade
+# types used in NEMDE XML files, to the bid types used in the MMS database.
+
+# Bid types, as used in BIDDAYOFFER_D and BIDPEROFFER_D, to nempy service names.
+service_name_map = {'ENERGY': 'energy', 'RAISEREG': 'raise_reg', 'LOWERREG': 'lower_reg', 'RAISE6SEC': 'raise_6s',
+                    'RAISE1SEC': 'raise_1s', 'RAISE60SEC': 'raise_60s', 'RAISE5MIN': 'raise_5min',
+                    'LOWER6SEC': 'lower_6s', 'LOWER1SEC': 'lower_1s', 'LOWER60SEC': 'lower_60s',
+                    'LOWER5MIN': 'lower_5min'}
+
+# Trade types, as used in NEMDE XML files, to bid types.
+xml_bid_type_map = dict(ENOF='ENERGY', LDOF='ENERGY', DROF='ENERGY', L5RE='LOWERREG', R5RE='RAISEREG',
+                        R5MI='RAISE5MIN', L5MI='LOWER5MIN', R60S='RAISE60SEC', L60S='LOWER60SEC', R6SE='RAISE6SEC',
+                        L6SE='LOWER6SEC', R1SE='RAISE1SEC', L1SE='LOWER1SEC')
+
+# Trade types, as used in NEMDE XML files, to nempy service names.
+xml_service_name_map = {trade_type: service_name_map[bid_type] for trade_type, bid_type in xml_bid_type_map.items()}
+
+# Unit dispatch types, as used in DUDETAILSUMMARY, to nempy names.
+dispatch_type_map = {'GENERATOR': 'generator', 'LOAD': 'load'}
+
+# Generic constraint types to nempy constraint types.
+constraint_type_map = {'LE': '<=', 'EQ': '=', 'GE': '>='}
+
+
+def map_values(values, mapping, description='value'):
+    """Map the values of a pd.Series to new values using a code table.
+
+    The mapping is vectorised: values are converted to codes, their positions among the keys of mapping, with a
+    pd.Categorical, and the new values are looked up by code. If any values aren't in the mapping, a single error
+    reports every unmapped value and how many times it occurs.
+
+    Examples
+    --------
+
+    >>> bid_types = pd.Series(['ENERGY', 'RAISEREG', 'ENERGY'])
+
+    >>> map_values(bid_types, service_name_map, 'service')
+    0       energy
+    1    raise_reg
+    2       energy
+    dtype: object
+
+    >>> map_values(pd.Series(['ENERGY', 'RAISE10SEC', 'LOWER10SEC', 'RAISE10SEC']), service_name_map, 'service')
+    Traceback (most recent call last):
+    ...
+    ValueError: No service mapping available for 'RAISE10SEC' (2 rows), 'LOWER10SEC' (1 rows).
+
+    Parameters
+    ----------
+    values : pd.Series
+    mapping : dict
+        The code table, from current values to new values.
+    description : str
+        The kind of value being mapped, used in the error message, default 'value'.
+
+    Returns
+    -------
+    pd.Series
+        The new values, with the index and name of values.
+
+    Raises
+    ------
+    ValueError
+        If any values aren't in the mapping.
+    """
+    codes = pd.Categorical(values, categories=list(mapping)).codes
+    unmapped = codes == -1
+    if unmapped.any():
+        counts = values[unmapped].value_counts(dropna=False, sort=False)
+        raise ValueError('No {} mapping available for {}.'.format(
+            description, ', '.join("'{}' ({} rows)".format(value, count) for value, count in counts.items())))
+    new_values = np.asarray(list(mapping.values()), dtype=object)
+    return pd.Series(new_values[codes], index=values.index, name=values.name, dtype=object)
+
+
 def map_aemo_column_values_to_nempy_name(dataframe, column):
-    dataframe[column] = dataframe[column].apply(lambda x: name_map[x])
+    dataframe[column] = map_values(dataframe[column], name_map, column)
     return dataframe
 
@@ -1,5 +1,7 @@
 import pandas as pd
 
+from nempy.historical_inputs import aemo_to_nempy_name_mapping as an
+
 
 def _test_setup():
     import sqlite3
@@ -67,17 +69,14 @@ class ConstraintData:
         self.generic_rhs = self.raw_inputs_loader.get_constraint_rhs()
         self.generic_type = self.raw_inputs_loader.get_constraint_type()
         self.generic_rhs = pd.merge(self.generic_rhs, self.generic_type.loc[:, ['set', 'type']], on='set')
-        type_map = {'LE': '<=', 'EQ': '=', 'GE': '>='}
-        self.generic_rhs['type'] = self.generic_rhs['type'].apply(lambda x: type_map[x])
-
-        bid_type_map = dict(ENOF='energy', LDOF='energy', DROF='energy', L5RE='lower_reg', R5RE='raise_reg',
-                            R5MI='raise_5min', L5MI='lower_5min', R60S='raise_60s', L60S='lower_60s', R6SE='raise_6s',
-                            L6SE='lower_6s', R1SE='raise_1s', L1SE='lower_1s')
+        self.generic_rhs['type'] = an.map_values(self.generic_rhs['type'], an.constraint_type_map, 'constraint type')
 
         self.unit_generic_lhs = self.raw_inputs_loader.get_constraint_unit_lhs()
-        self.unit_generic_lhs['service'] = self.unit_generic_lhs['service'].apply(lambda x: bid_type_map[x])
+        self.unit_generic_lhs['service'] = an.map_values(self.unit_generic_lhs['service'], an.xml_service_name_map,
+                                                         'bid type')
         self.region_generic_lhs = self.raw_inputs_loader.get_constraint_region_lhs()
-        self.region_generic_lhs['service'] = self.region_generic_lhs['service'].apply(lambda x: bid_type_map[x])
+        self.region_generic_lhs['service'] = an.map_values(self.region_generic_lhs['service'],
+                                                           an.xml_service_name_map, 'bid type')
 
         self.interconnector_generic_lhs = self.raw_inputs_loader.get_constraint_interconnector_lhs()
 
@@ -1,3 +1,12 @@
+import copy
+import queue
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from nempy.historical_inputs import mms_db
+
+
 class RawInputsLoader:
     """Provides single interface for accessing raw historical inputs.
 
@@ -213,3 +222,309 @@ class RawInputsLoader:
 
         """
         return 'OCD' in self.xml.get_file_name()
+
+
+class PrefetchingRawInputsLoader(RawInputsLoader):
+    """Provides the RawInputsLoader interface, loading the inputs for upcoming intervals on a background thread.
+
+    Given the ordered list of intervals that will be dispatched, a background thread loads the XML file and queries
+    the database for each interval, so that inputs are ready by the time the interval is set. At most prefetch_count
+    intervals are held in memory ahead of the interval being dispatched. The background thread uses its own copy of
+    the XML cache manager and its own connection to the database file, so the database can't be in memory.
+
+    Examples
+    --------
+
+    >>> import sqlite3
+
+    >>> from nempy.historical_inputs import mms_db
+    >>> from nempy.historical_inputs import xml_cache
+
+    >>> con = sqlite3.connect('market_management_system.db')
+    >>> mms_db_manager = mms_db.DBManager(connection=con)
+    >>> xml_cache_manager = xml_cache.XMLCacheManager('test_nemde_cache')
+
+    >>> intervals = ['2019/01/01 00:00:00', '2019/01/01 00:05:00']
+
+    The loader is used as a context manager so the background thread is always stopped.
+
+    >>> with PrefetchingRawInputsLoader(xml_cache_manager, mms_db_manager, intervals) as inputs_loader:  # doctest: +SKIP
+    ...     for interval in intervals:
+    ...         inputs_loader.set_interval(interval)
+    ...         volume_bids = inputs_loader.get_unit_volume_bids()
+
+    Parameters
+    ----------
+    nemde_xml_cache_manager : nempy.historical_inputs.xml_cache.XMLCacheManager
+    market_management_system_database : nempy.historical_inputs.mms_db.DBManager
+    intervals : list[str]
+        The intervals that will be set, in order, in the format '%Y/%m/%d %H:%M:%S'.
+    prefetch_count : int
+        The maximum number of intervals to load ahead of the current interval, default 2.
+    """
+
+    # Methods of the RawInputsLoader that are evaluated on the background thread.
+    _prefetched_methods = ['get_unit_initial_conditions', 'get_unit_volume_bids', 'get_unit_price_bids',
+                           'get_unit_details', 'get_agc_enablement_limits', 'get_UIGF_values', 'get_violations',
+                           'get_constraint_violation_prices', 'get_constraint_rhs', 'get_constraint_type',
+                           'get_constraint_region_lhs', 'get_constraint_unit_lhs', 'get_constraint_interconnector_lhs',
+                           'get_market_interconnectors', 'get_market_interconnector_link_bid_availability',
+                           'get_interconnector_constraint_parameters', 'get_interconnector_definitions',
+                           'get_regional_loads', 'get_interconnector_loss_segments',
+                           'get_interconnector_loss_parameters', 'get_unit_fast_start_parameters',
+                           'is_over_constrained_dispatch_rerun']
+
+    def __init__(self, nemde_xml_cache_manager, market_management_system_database, intervals, prefetch_count=2):
+        RawInputsLoader.__init__(self, nemde_xml_cache_manager, market_management_system_database)
+        if prefetch_count < 1:
+            raise ValueError('prefetch_count must be at least 1.')
+        database_file = market_management_system_database.con.execute('PRAGMA database_list').fetchone()[2]
+        if database_file == '':
+            raise ValueError('Inputs can only be prefetched from a database stored in a file.')
+        self._database_file = database_file
+        self._intervals = list(intervals)
+        self._next_interval_index = 0
+        self._inputs = None
+        self._queue = queue.Queue(maxsize=prefetch_count)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._prefetch, daemon=True)
+        self._thread.start()
+
+    def _prefetch(self):
+        """Load the inputs for each interval in order, blocking while the queue of loaded intervals is full."""
+        con = sqlite3.connect(self._database_file)
+        loader = RawInputsLoader(copy.copy(self.xml), mms_db.DBManager(connection=con))
+        try:
+            for interval in self._intervals:
+                if self._stop.is_set():
+                    break
+                try:
+                    loader.set_interval(interval)
+                    inputs = _load_inputs(loader)
+                except Exception as error:
+                    # Errors are raised when the interval is set, as they would be by the RawInputsLoader.
+                    inputs = error
+                while not self._stop.is_set():
+                    try:
+                        self._queue.put((interval, inputs), timeout=0.1)
+                        break
+                    except queue.Full:
+                        continue
+        finally:
+            con.close()
+
+    def set_interval(self, interval):
+        """Set the interval to load inputs for.
+
+        If the interval is one of the upcoming intervals the prefetched inputs are used, any intervals skipped over
+        are discarded. Otherwise the inputs are loaded in the same way as the RawInputsLoader.
+
+        Parameters
+        ----------
+        interval : str
+            In the format '%Y/%m/%d %H:%M:%S'
+
+        Raises
+        ------
+        MissingDataError
+            If the data for an interval is not in the cache and cannot be downloaded from NEMWeb.
+        """
+        self.interval = interval
+        if interval not in self._intervals[self._next_interval_index:] or self._stop.is_set():
+            self._inputs = None
+            self.xml.load_interval(interval)
+            return
+        while True:
+            try:
+                prefetched_interval, inputs = self._queue.get(timeout=0.1)
+            except queue.Empty:
+                if not self._thread.is_alive():
+                    # The background thread has stopped, so fall back to loading inputs directly.
+                    self._inputs = None
+                    self.xml.load_interval(interval)
+                    return
+                continue
+            self._next_interval_index += 1
+            if prefetched_interval == interval:
+                break
+        if isinstance(inputs, Exception):
+            self._inputs = None
+            raise inputs
+        self._inputs = inputs
+
+    def close(self):
+        """Stop the background thread and discard any prefetched inputs."""
+        self._stop.set()
+        while self._thread.is_alive():
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                pass
+            self._thread.join(timeout=0.1)
+        self._inputs = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class LoadedRawInputs(RawInputsLoader):
+    """Provides the RawInputsLoader interface for a single interval whose inputs have already been loaded.
+
+    Returned by :meth:`AsyncRawInputsLoader.load_interval`, the get methods return copies of the loaded inputs without
+    reading the XML cache or the database, so they can be called from asyncio code without blocking.
+
+    Parameters
+    ----------
+    interval : str
+        In the format '%Y/%m/%d %H:%M:%S'
+    inputs : dict
+        The result of each of the RawInputsLoader get methods for the interval, keyed by method name.
+    """
+
+    def __init__(self, interval, inputs):
+        RawInputsLoader.__init__(self, nemde_xml_cache_manager=None, market_management_system_database=None)
+        self.interval = interval
+        self._inputs = inputs
+
+    def set_interval(self, interval):
+        """Check the interval is the one that was loaded, as the inputs for other intervals are not available.
+
+        Raises
+        ------
+        ValueError
+            If interval is not the loaded interval.
+        """
+        if interval != self.interval:
+            raise ValueError('Only the inputs for {} are loaded, not {}.'.format(self.interval, interval))
+
+
+class AsyncRawInputsLoader:
+    """Loads the raw historical inputs for intervals from asyncio code, without blocking the event loop.
+
+    Each interval's XML file is loaded and the database queried on a pool of worker threads, at most max_concurrent
+    intervals at once, with further requests waiting their turn. Each worker thread uses its own copy of the XML
+    cache manager and its own connection to the database file, so the database can't be in memory. If the awaiting
+    task is cancelled before its interval starts loading the load never runs.
+
+    Examples
+    --------
+
+    >>> import asyncio
+    >>> import sqlite3
+
+    >>> from nempy.historical_inputs import mms_db
+    >>> from nempy.historical_inputs import xml_cache
+
+    >>> con = sqlite3.connect('market_management_system.db')
+    >>> mms_db_manager = mms_db.DBManager(connection=con)
+    >>> xml_cache_manager = xml_cache.XMLCacheManager('test_nemde_cache')
+
+    >>> intervals = ['2019/01/01 00:00:00', '2019/01/01 00:05:00']
+
+    Load the inputs for both intervals concurrently, the loaded inputs are used in the same way as a RawInputsLoader
+    which has had its interval set.
+
+    >>> async def load(intervals):
+    ...     with AsyncRawInputsLoader(xml_cache_manager, mms_db_manager) as loader:
+    ...         return await asyncio.gather(*[loader.load_interval(interval) for interval in intervals])
+
+    >>> interval_inputs = asyncio.run(load(intervals))  # doctest: +SKIP
+
+    >>> volume_bids = interval_inputs[0].get_unit_volume_bids()  # doctest: +SKIP
+
+    Parameters
+    ----------
+    nemde_xml_cache_manager : nempy.historical_inputs.xml_cache.XMLCacheManager
+    market_management_system_database : nempy.historical_inputs.mms_db.DBManager
+    max_concurrent : int
+        The maximum number of intervals loaded at once, default 4.
+    """
+
+    def __init__(self, nemde_xml_cache_manager, market_management_system_database, max_concurrent=4):
+        if max_concurrent < 1:
+            raise ValueError('max_concurrent must be at least 1.')
+        database_file = market_management_system_database.con.execute('PRAGMA database_list').fetchone()[2]
+        if database_file == '':
+            raise ValueError('Inputs can only be loaded asynchronously from a database stored in a file.')
+        self.xml = nemde_xml_cache_manager
+        self._database_file = database_file
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrent)
+        self._thread_loaders = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+
+    async def load_interval(self, interval):
+        """Load the inputs for an interval on a worker thread.
+
+        Parameters
+        ----------
+        interval : str
+            In the format '%Y/%m/%d %H:%M:%S'
+
+        Returns
+        -------
+        LoadedRawInputs
+
+        Raises
+        ------
+        MissingDataError
+            If the data for an interval is not in the cache and cannot be downloaded from NEMWeb.
+        """
+        import asyncio
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self._load_interval, interval)
+
+    def _load_interval(self, interval):
+        loader = getattr(self._thread_loaders, 'loader', None)
+        if loader is None:
+            # Connections are only used by the thread that creates them, but are closed from the thread calling close.
+            con = sqlite3.connect(self._database_file, check_same_thread=False)
+            with self._connections_lock:
+                self._connections.append(con)
+            loader = RawInputsLoader(copy.copy(self.xml), mms_db.DBManager(connection=con))
+            self._thread_loaders.loader = loader
+        loader.set_interval(interval)
+        return LoadedRawInputs(interval, _load_inputs(loader))
+
+    def close(self):
+        """Wait for intervals being loaded to finish, then stop the worker threads and close their connections."""
+        self._executor.shutdown(wait=True)
+        with self._connections_lock:
+            for con in self._connections:
+                con.close()
+            self._connections = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def _load_inputs(loader):
+    """Call each of the RawInputsLoader get methods, for the interval the loader has set."""
+    return {method: getattr(loader, method)() for method in PrefetchingRawInputsLoader._prefetched_methods}
+
+
+def _make_prefetched_method(method):
+    raw_method = getattr(RawInputsLoader, method)
+
+    def prefetched_method(self):
+        if self._inputs is None:
+            return raw_method(self)
+        result = self._inputs[method]
+        # Copies are returned so callers modifying results doesn't change the prefetched inputs.
+        return result.copy() if hasattr(result, 'copy') else result
+
+    prefetched_method.__name__ = method
+    prefetched_method.__doc__ = 'Prefetched version of :func:`RawInputsLoader.{method} ' \
+                                '<nempy.historical_inputs.loaders.RawInputsLoader.{method}>`'.format(method=method)
+    return prefetched_method
+
+
+for _method in PrefetchingRawInputsLoader._prefetched_methods:
+    setattr(PrefetchingRawInputsLoader, _method, _make_prefetched_method(_method))
+    setattr(LoadedRawInputs, _method, _make_prefetched_method(_method))
@@ -1,11 +1,14 @@
-import requests
 import zipfile
 import io
+import json
+import hashlib
+import bisect
+import numpy as np
 import pandas as pd
+from pathlib import Path
+from collections import OrderedDict
 from datetime import datetime, timedelta
 
-pd.set_option('display.width', None)
-
 
 class DBManager:
     """Constructs and manages a sqlite database for accessing historical inputs for NEM spot market dispatch.
@@ -112,6 +115,7 @@ class DBManager:
 
     def __init__(self, connection):
         self.con = connection
+        self._window_cache = None
         self.DISPATCHREGIONSUM = InputsBySettlementDate(
             table_name='DISPATCHREGIONSUM', table_columns=['SETTLEMENTDATE', 'REGIONID', 'TOTALDEMAND',
                                                            'DEMANDFORECAST', 'INITIALSUPPLY'],
@@ -241,6 +245,177 @@ class DBManager:
         for name, attribute in self.__dict__.items():
             if hasattr(attribute, 'create_table_in_sqlite_db'):
                 attribute.create_table_in_sqlite_db()
+        if self._window_cache is not None:
+            self._window_cache.clear()
+
+    def enable_window_cache(self, window_hours=24, max_memory_mb=512):
+        """Serve interval keyed tables from windows of data held in memory.
+
+        On the first request for an interval the whole window of the table containing the interval is loaded with one
+        query, later requests for intervals in the window are sliced from memory. Windows start at midnight, and when
+        the memory used by the cache exceeds max_memory_mb the least recently used windows are dropped. The cache
+        applies to the tables retrieved by SETTLEMENTDATE, INTERVAL_DATETIME or by matching DISPATCHCONSTRAINT, and is
+        cleared when data is added to any table through this DBManager.
+
+        Examples
+        --------
+
+        >>> import sqlite3
+        >>> import os
+
+        >>> con = sqlite3.connect('historical.db')
+        >>> historical = DBManager(con)
+        >>> historical.create_tables()
+
+        Add some example data directly to the database.
+
+        >>> data = pd.DataFrame({
+        ...   'SETTLEMENTDATE': ['2019/01/01 11:55:00', '2019/01/01 12:00:00'],
+        ...   'REGIONID': ['NSW1', 'NSW1'],
+        ...   'TOTALDEMAND': [7000.0, 7100.0]})
+
+        >>> _ = data.to_sql('DISPATCHREGIONSUM', con=con, if_exists='append', index=False)
+
+        >>> historical.enable_window_cache(window_hours=24)
+
+        The first call loads the whole day into memory, the second is served from memory.
+
+        >>> print(historical.DISPATCHREGIONSUM.get_data('2019/01/01 11:55:00'))
+                SETTLEMENTDATE REGIONID  TOTALDEMAND DEMANDFORECAST INITIALSUPPLY
+        0  2019/01/01 11:55:00     NSW1       7000.0           None          None
+
+        >>> print(historical.DISPATCHREGIONSUM.get_data('2019/01/01 12:00:00'))
+                SETTLEMENTDATE REGIONID  TOTALDEMAND DEMANDFORECAST INITIALSUPPLY
+        0  2019/01/01 12:00:00     NSW1       7100.0           None          None
+
+        >>> con.close()
+        >>> os.remove('historical.db')
+
+        Parameters
+        ----------
+        window_hours : int
+            The length of the window of data loaded at once, in hours, should divide a day evenly, default 24.
+        max_memory_mb : float
+            The memory the cache can use before windows are dropped, in megabytes, default 512.
+
+        Returns
+        -------
+        None
+        """
+        self._window_cache = _WindowCache(timedelta(hours=window_hours), max_memory_mb * 1e6)
+        for attribute in self.__dict__.values():
+            if hasattr(attribute, 'get_window_data'):
+                attribute.window_cache = self._window_cache
+
+    def disable_window_cache(self):
+        """Stop using the window cache, and release the memory it used."""
+        for attribute in self.__dict__.values():
+            if hasattr(attribute, 'get_window_data'):
+                attribute.window_cache = None
+        self._window_cache = None
+
+    def export_reference_snapshot(self, directory):
+        """Save the tables that change rarely as a snapshot of column files that worker processes can memory map.
+
+        The tables saved are those retrieved by START_DATE and END_DATE, by EFFECTIVEDATE and VERSIONNO, or without a
+        filter. Each column is saved as a numpy file, so processes that attach the snapshot with
+        :func:`attach_reference_snapshot <nempy.historical_inputs.mms_db.DBManager.attach_reference_snapshot>` share
+        one copy of the data through the operating system's page cache, rather than each querying and holding their
+        own copy. The snapshot is given a version, a hash of its contents.
+
+        Examples
+        --------
+
+        >>> import sqlite3
+        >>> import os
+        >>> import shutil
+
+        >>> con = sqlite3.connect('historical.db')
+        >>> historical = DBManager(con)
+        >>> historical.create_tables()
+
+        >>> data = pd.DataFrame({
+        ...   'DUID': ['X', 'X'],
+        ...   'START_DATE': ['2019/01/01 00:00:00', '2019/02/01 00:00:00'],
+        ...   'END_DATE': ['2019/02/01 00:00:00', '2019/03/01 00:00:00'],
+        ...   'REGIONID': ['NSW1', 'VIC1']})
+
+        >>> _ = data.to_sql('DUDETAILSUMMARY', con=con, if_exists='append', index=False)
+
+        >>> version = historical.export_reference_snapshot('reference_snapshot')
+
+        In a worker process, attach the snapshot to a database manager, tables in the snapshot are then no longer
+        queried from the database.
+
+        >>> worker = DBManager(con)
+        >>> worker.attach_reference_snapshot('reference_snapshot')
+
+        >>> print(worker.DUDETAILSUMMARY.get_data('2019/02/10 12:00:00').loc[:, ['DUID', 'START_DATE', 'REGIONID']])
+          DUID           START_DATE REGIONID
+        0    X  2019/02/01 00:00:00     VIC1
+
+        >>> con.close()
+        >>> os.remove('historical.db')
+        >>> shutil.rmtree('reference_snapshot')
+
+        Parameters
+        ----------
+        directory : str or pathlib.Path
+            The directory to save the snapshot in, created if it doesn't exist.
+
+        Returns
+        -------
+        str
+            The version of the snapshot.
+        """
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        manifest = {'tables': {}}
+        content_hash = hashlib.sha256()
+        for attribute in self.__dict__.values():
+            if not hasattr(attribute, 'snapshot_resolution'):
+                continue
+            data = pd.read_sql_query("Select * from {table}".format(table=attribute.table_name), con=self.con)
+            columns = {}
+            for column in data.columns:
+                file_name = '{}.{}.npy'.format(attribute.table_name, column)
+                values, is_null = _column_to_array(data[column])
+                np.save(directory / file_name, values)
+                content_hash.update(values.tobytes())
+                null_file_name = None
+                if is_null is not None:
+                    null_file_name = '{}.{}.null.npy'.format(attribute.table_name, column)
+                    np.save(directory / null_file_name, is_null)
+                    content_hash.update(is_null.tobytes())
+                columns[column] = {'file': file_name, 'null_file': null_file_name}
+            manifest['tables'][attribute.table_name] = {
+                'resolution': attribute.snapshot_resolution,
+                'id_columns': [col for col in attribute.table_primary_keys if col not in ['EFFECTIVEDATE', 'VERSIONNO']],
+                'columns': columns}
+        manifest['version'] = content_hash.hexdigest()[:16]
+        with open(directory / 'manifest.json', 'w') as file:
+            json.dump(manifest, file, indent=2)
+        return manifest['version']
+
+    def attach_reference_snapshot(self, directory):
+        """Serve the tables in a snapshot saved by export_reference_snapshot from the memory mapped snapshot.
+
+        For an example see :func:`export_reference_snapshot
+        <nempy.historical_inputs.mms_db.DBManager.export_reference_snapshot>`.
+
+        Parameters
+        ----------
+        directory : str or pathlib.Path
+            The directory the snapshot was saved in.
+
+        Returns
+        -------
+        None
+        """
+        snapshot = ReferenceSnapshot(directory)
+        for attribute in self.__dict__.values():
+            if hasattr(attribute, 'snapshot_resolution') and attribute.table_name in snapshot.tables:
+                attribute.snapshot = snapshot
 
     def _create_sample_database(self, date_time):
         for name, attribute in self.__dict__.items():
@@ -355,6 +530,7 @@ def _download_to_df(url, table_name, year, month):
     """
     # Insert the table_name, year and month into the url.
     url = url.format(table=table_name, year=year, month=str(month).zfill(2))
+    import requests
     # Download the file.
     r = requests.get(url)
     if r.status_code != 200:
@@ -373,6 +549,157 @@ def _download_to_df(url, table_name, year, month):
     return data
 
 
+class ReferenceSnapshot:
+    """Memory mapped tables saved by :func:`export_reference_snapshot
+    <nempy.historical_inputs.mms_db.DBManager.export_reference_snapshot>`.
+
+    Results only change at the START_DATE, END_DATE or EFFECTIVEDATE values in a table, so the rows for each period
+    between these dates are found once and indexed, later requests for a date_time in the same period reuse them.
+
+    Parameters
+    ----------
+    directory : str or pathlib.Path
+        The directory the snapshot was saved in.
+    """
+
+    def __init__(self, directory):
+        directory = Path(directory)
+        with open(directory / 'manifest.json') as file:
+            manifest = json.load(file)
+        self.version = manifest['version']
+        self.tables = {}
+        for table_name, definition in manifest['tables'].items():
+            columns = {}
+            for column, files in definition['columns'].items():
+                values = np.load(directory / files['file'], mmap_mode='r')
+                is_null = None
+                if files['null_file'] is not None:
+                    is_null = np.load(directory / files['null_file'], mmap_mode='r')
+                columns[column] = (values, is_null)
+            self.tables[table_name] = {'resolution': definition['resolution'], 'id_columns': definition['id_columns'],
+                                       'columns': columns, 'change_dates': self._get_change_dates(definition, columns),
+                                       'rows_by_period': {}}
+
+    @staticmethod
+    def _get_change_dates(definition, columns):
+        if definition['resolution'] == 'start_and_end':
+            dates = np.concatenate([columns['START_DATE'][0], columns['END_DATE'][0]])
+        elif definition['resolution'] == 'effective_date':
+            dates = columns['EFFECTIVEDATE'][0]
+        else:
+            dates = np.array([], dtype=str)
+        return sorted(set(dates.tolist()))
+
+    def get_data(self, table, date_time=None):
+        """Get the rows of a table that apply at date_time, in the same form as the table's get_data method."""
+        snapshot_table = self.tables[table.table_name]
+        period = 0 if date_time is None else bisect.bisect_right(snapshot_table['change_dates'], date_time)
+        if period not in snapshot_table['rows_by_period']:
+            snapshot_table['rows_by_period'][period] = self._find_rows(snapshot_table, date_time)
+        rows = snapshot_table['rows_by_period'][period]
+        data = {}
+        for column, (values, is_null) in snapshot_table['columns'].items():
+            column_values = np.asarray(values[rows])
+            if column_values.dtype.kind == 'U':
+                column_values = column_values.astype(object)
+            if is_null is not None:
+                column_values = column_values.astype(object)
+                column_values[np.asarray(is_null[rows])] = None
+            data[column] = column_values
+        return _none_for_empty_columns(pd.DataFrame(data, columns=list(snapshot_table['columns'])))
+
+    @staticmethod
+    def _find_rows(snapshot_table, date_time):
+        columns = snapshot_table['columns']
+        resolution = snapshot_table['resolution']
+        if resolution == 'no_filter':
+            return np.arange(len(next(iter(columns.values()))[0]))
+        if resolution == 'start_and_end':
+            start, end = columns['START_DATE'][0], columns['END_DATE'][0]
+            return np.flatnonzero((start <= date_time) & (end > date_time))
+        # For each id, keep the rows with the latest EFFECTIVEDATE before date_time, and then the highest VERSIONNO.
+        effective_date = np.asarray(columns['EFFECTIVEDATE'][0])
+        rows = np.flatnonzero(effective_date <= date_time)
+        candidates = pd.DataFrame({column: np.asarray(columns[column][0][rows])
+                                   for column in snapshot_table['id_columns'] + ['EFFECTIVEDATE', 'VERSIONNO']})
+        candidates['row'] = rows
+        id_columns = snapshot_table['id_columns']
+        latest_date = candidates.groupby(id_columns)['EFFECTIVEDATE'].transform('max')
+        candidates = candidates[candidates['EFFECTIVEDATE'] == latest_date]
+        latest_version = candidates.groupby(id_columns)['VERSIONNO'].transform('max')
+        candidates = candidates[candidates['VERSIONNO'] == latest_version]
+        return np.sort(candidates['row'].to_numpy())
+
+
+def _column_to_array(column):
+    """Convert a column to a numpy array that can be memory mapped, and a mask of null values for text columns."""
+    if column.dtype == object:
+        is_null = column.isna().to_numpy()
+        values = np.array(column.where(~is_null, '').astype(str).tolist(), dtype=str)
+        return values, is_null if is_null.any() else None
+    return column.to_numpy(), None
+
+
+def _none_for_empty_columns(data):
+    """Columns with no values are returned as None, as they are by pd.read_sql_query."""
+    for column in data.columns[data.isna().all().to_numpy()]:
+        data[column] = pd.Series([None] * len(data), dtype=object)
+    return data
+
+
+class _WindowCache:
+    """Holds windows of interval keyed tables in memory, evicting the least recently used windows over a memory cap.
+
+    Each window is loaded with a single query and then indexed by its interval key, so the data for an interval can
+    be sliced out without querying the database.
+    """
+
+    def __init__(self, window_length, max_memory):
+        self.window_length = window_length
+        self.max_memory = max_memory
+        self.memory = 0
+        self._windows = OrderedDict()
+
+    def get_data(self, table, date_time):
+        """Get the data for an interval from the cached window containing it, loading the window if needed."""
+        window_start = self._get_window_start(date_time)
+        key = (table.table_name, window_start)
+        if key in self._windows:
+            self._windows.move_to_end(key)
+        else:
+            self._windows[key] = self._load_window(table, window_start)
+            self.memory += self._windows[key][2]
+            self._evict()
+        data, positions, _ = self._windows[key]
+        data = data.iloc[positions.get(date_time, [])].reset_index(drop=True)
+        if table.window_key_alias is not None:
+            data = data.drop(columns=table.window_key_alias)
+        return _none_for_empty_columns(data)
+
+    def _get_window_start(self, date_time):
+        date_time = datetime.strptime(date_time, '%Y/%m/%d %H:%M:%S')
+        day_start = datetime(date_time.year, date_time.month, date_time.day)
+        return day_start + ((date_time - day_start) // self.window_length) * self.window_length
+
+    def _load_window(self, table, window_start):
+        window_end = window_start + self.window_length
+        data = table.get_window_data(window_start.strftime('%Y/%m/%d %H:%M:%S'),
+                                     window_end.strftime('%Y/%m/%d %H:%M:%S'))
+        key_column = table.window_key_alias or table.window_key
+        positions = data.groupby(key_column, sort=False).indices
+        return data, positions, data.memory_usage(deep=True).sum()
+
+    def _evict(self):
+        # The most recently loaded window is always kept, even if it is larger than the memory cap on its own.
+        while self.memory > self.max_memory and len(self._windows) > 1:
+            _, (_, _, memory) = self._windows.popitem(last=False)
+            self.memory -= memory
+
+    def clear(self):
+        self._windows.clear()
+        self.memory = 0
+
+
 class _MissingData(Exception):
     """Raise for nemweb not returning status 200 for file request."""
 
@@ -422,6 +749,10 @@ class _MMSTable:
         self.table_name = table_name
         self.table_columns = table_columns
         self.table_primary_keys = table_primary_keys
+        # Set by DBManager.enable_window_cache for tables keyed by interval.
+        self.window_cache = None
+        # Set by DBManager.attach_reference_snapshot for tables that change rarely.
+        self.snapshot = None
         # url that sub classes will use to pull MMS tables from nemweb.
         self.url = 'http://nemweb.com.au/Data_Archive/Wholesale_Electricity/MMSDM/{year}/MMSDM_{year}_{month}/' + \
                    'MMSDM_Historical_Data_SQLLoader/DATA/PUBLIC_DVD_{table}_{year}{month}010000.zip'
@@ -679,6 +1010,8 @@ class _MultiDataSource(_MMSTable):
         with self.con:
             data.to_sql(self.table_name, con=self.con, if_exists='append', index=False)
             self.con.commit()
+        if self.window_cache is not None:
+            self.window_cache.clear()
 
 
 class _AllHistDataSource(_MMSTable):
@@ -752,6 +1085,8 @@ class _AllHistDataSource(_MMSTable):
         ------
         None
         """
+        if self.window_cache is not None:
+            self.window_cache.clear()
         cumulative_data = pd.DataFrame()
         for y in range(year, 2009, -1):
             for m in range(12, 0, -1):
@@ -782,6 +1117,9 @@ class _AllHistDataSource(_MMSTable):
 class InputsBySettlementDate(_MultiDataSource):
     """Manages retrieving dispatch inputs by SETTLEMENTDATE."""
 
+    window_key = 'SETTLEMENTDATE'
+    window_key_alias = None
+
     def __init__(self, table_name, table_columns, table_primary_keys, con):
         _MMSTable.__init__(self, table_name, table_columns, table_primary_keys, con)
 
@@ -837,14 +1175,25 @@ class InputsBySettlementDate(_MultiDataSource):
         pd.DataFrame
 
         """
+        if self.window_cache is not None:
+            return self.window_cache.get_data(self, date_time)
         query = "Select * from {table} where SETTLEMENTDATE == '{datetime}'"
         query = query.format(table=self.table_name, datetime=date_time)
         return pd.read_sql_query(query, con=self.con)
 
+    def get_window_data(self, start, end):
+        """Retrieves data for all intervals from start up to but not including end."""
+        query = "Select * from {table} where SETTLEMENTDATE >= '{start}' and SETTLEMENTDATE < '{end}'"
+        query = query.format(table=self.table_name, start=start, end=end)
+        return pd.read_sql_query(query, con=self.con)
+
 
 class InputsByIntervalDateTime(_MultiDataSource):
     """Manages retrieving dispatch inputs by INTERVAL_DATETIME."""
 
+    window_key = 'INTERVAL_DATETIME'
+    window_key_alias = None
+
     def __init__(self, table_name, table_columns, table_primary_keys, con):
         _MMSTable.__init__(self, table_name, table_columns, table_primary_keys, con)
 
@@ -900,10 +1249,18 @@ class InputsByIntervalDateTime(_MultiDataSource):
         pd.DataFrame
 
         """
+        if self.window_cache is not None:
+            return self.window_cache.get_data(self, date_time)
         query = "Select * from {table} where INTERVAL_DATETIME == '{datetime}'"
         query = query.format(table=self.table_name, datetime=date_time)
         return pd.read_sql_query(query, con=self.con)
 
+    def get_window_data(self, start, end):
+        """Retrieves data for all intervals from start up to but not including end."""
+        query = "Select * from {table} where INTERVAL_DATETIME >= '{start}' and INTERVAL_DATETIME < '{end}'"
+        query = query.format(table=self.table_name, start=start, end=end)
+        return pd.read_sql_query(query, con=self.con)
+
 
 class InputsByDay(_MultiDataSource):
     """Manages retrieving dispatch inputs by SETTLEMENTDATE, where inputs are stored on a daily basis."""
@@ -999,6 +1356,8 @@ class InputsByDay(_MultiDataSource):
 class InputsStartAndEnd(_SingleDataSource):
     """Manages retrieving dispatch inputs by START_DATE and END_DATE."""
 
+    snapshot_resolution = 'start_and_end'
+
     def __init__(self, table_name, table_columns, table_primary_keys, con):
         _MMSTable.__init__(self, table_name, table_columns, table_primary_keys, con)
 
@@ -1070,6 +1429,8 @@ class InputsStartAndEnd(_SingleDataSource):
         pd.DataFrame
         """
 
+        if self.snapshot is not None:
+            return self.snapshot.get_data(self, date_time)
         query = "Select * from {table} where START_DATE <= '{datetime}' and END_DATE > '{datetime}'"
         query = query.format(table=self.table_name, datetime=date_time)
         return pd.read_sql_query(query, con=self.con)
@@ -1078,6 +1439,10 @@ class InputsStartAndEnd(_SingleDataSource):
 class InputsByMatchDispatchConstraints(_AllHistDataSource):
     """Manages retrieving dispatch inputs by matching against the DISPATCHCONSTRAINTS table"""
 
+    window_key = 'SETTLEMENTDATE'
+    # The settlement date of the matching DISPATCHCONSTRAINT row is selected under an alias so it can be dropped.
+    window_key_alias = 'WINDOW_SETTLEMENTDATE'
+
     def __init__(self, table_name, table_columns, table_primary_keys, con):
         _MMSTable.__init__(self, table_name, table_columns, table_primary_keys, con)
 
@@ -1155,6 +1520,8 @@ class InputsByMatchDispatchConstraints(_AllHistDataSource):
         -------
         pd.DataFrame
         """
+        if self.window_cache is not None:
+            return self.window_cache.get_data(self, date_time)
         columns = ','.join(['{}'.format(col) for col in self.table_columns])
         query = """Select {columns} from (
                         {table} 
@@ -1166,10 +1533,25 @@ class InputsByMatchDispatchConstraints(_AllHistDataSource):
         query = query.format(columns=columns, table=self.table_name, datetime=date_time)
         return pd.read_sql_query(query, con=self.con)
 
+    def get_window_data(self, start, end):
+        """Retrieves data for all intervals from start up to but not including end."""
+        columns = ','.join(['{}'.format(col) for col in self.table_columns])
+        query = """Select {columns}, SETTLEMENTDATE as {alias} from (
+                        {table}
+                    inner join
+                        (Select * from DISPATCHCONSTRAINT where SETTLEMENTDATE >= '{start}' and SETTLEMENTDATE < '{end}')
+                    on GENCONID == CONSTRAINTID
+                    and EFFECTIVEDATE == GENCONID_EFFECTIVEDATE
+                    and VERSIONNO == GENCONID_VERSIONNO);"""
+        query = query.format(columns=columns, alias=self.window_key_alias, table=self.table_name, start=start, end=end)
+        return pd.read_sql_query(query, con=self.con)
+
 
 class InputsByEffectiveDateVersionNoAndDispatchInterconnector(_SingleDataSource):
     """Manages retrieving dispatch inputs by EFFECTTIVEDATE and VERSIONNO."""
 
+    snapshot_resolution = 'effective_date'
+
     def __init__(self, table_name, table_columns, table_primary_keys, con):
         _MMSTable.__init__(self, table_name, table_columns, table_primary_keys, con)
 
@@ -1247,6 +1629,11 @@ class InputsByEffectiveDateVersionNoAndDispatchInterconnector(_SingleDataSource)
         -------
         pd.DataFrame
         """
+        if self.snapshot is not None:
+            data = self.snapshot.get_data(self, date_time).loc[:, self.table_columns]
+            query = "Select INTERCONNECTORID from DISPATCHINTERCONNECTORRES where SETTLEMENTDATE == '{datetime}'"
+            interconnectors = pd.read_sql_query(query.format(datetime=date_time), con=self.con)
+            return data[data['INTERCONNECTORID'].isin(interconnectors['INTERCONNECTORID'])].reset_index(drop=True)
         id_columns = ','.join([col for col in self.table_primary_keys if col not in ['EFFECTIVEDATE', 'VERSIONNO']])
         return_columns = ','.join(self.table_columns)
         with self.con:
@@ -1295,6 +1682,8 @@ class InputsByEffectiveDateVersionNoAndDispatchInterconnector(_SingleDataSource)
 class InputsByEffectiveDateVersionNo(_SingleDataSource):
     """Manages retrieving dispatch inputs by EFFECTTIVEDATE and VERSIONNO."""
 
+    snapshot_resolution = 'effective_date'
+
     def __init__(self, table_name, table_columns, table_primary_keys, con):
         _MMSTable.__init__(self, table_name, table_columns, table_primary_keys, con)
 
@@ -1364,6 +1753,8 @@ class InputsByEffectiveDateVersionNo(_SingleDataSource):
         -------
         pd.DataFrame
         """
+        if self.snapshot is not None:
+            return self.snapshot.get_data(self, date_time).loc[:, self.table_columns]
         id_columns = ','.join([col for col in self.table_primary_keys if col not in ['EFFECTIVEDATE', 'VERSIONNO']])
         return_columns = ','.join(self.table_columns)
         with self.con:
@@ -1407,6 +1798,8 @@ class InputsByEffectiveDateVersionNo(_SingleDataSource):
 class InputsNoFilter(_SingleDataSource):
     """Manages retrieving dispatch inputs where no filter is require."""
 
+    snapshot_resolution = 'no_filter'
+
     def __init__(self, table_name, table_columns, table_primary_keys, con):
         _MMSTable.__init__(self, table_name, table_columns, table_primary_keys, con)
 
@@ -1459,6 +1852,8 @@ class InputsNoFilter(_SingleDataSource):
         pd.DataFrame
         """
 
+        if self.snapshot is not None:
+            return self.snapshot.get_data(self)
         return pd.read_sql_query("Select * from {table}".format(table=self.table_name), con=self.con)
 
 
@@ -63,14 +63,13 @@ class UnitData:
     [218 rows x 2 columns]
     """
 
-    def __init__(self, raw_input_loader):
+    service_name_mapping = an.service_name_map
+
+    def __init__(self, raw_input_loader, bid_store=None):
         self.raw_input_loader = raw_input_loader
+        self.bid_store = bid_store
         self.dispatch_interval = 5  # minutes
-        self.dispatch_type_name_map = {'GENERATOR': 'generator', 'LOAD': 'load'}
-        self.service_name_mapping = {'ENERGY': 'energy', 'RAISEREG': 'raise_reg', 'LOWERREG': 'lower_reg',
-                                     'RAISE6SEC': 'raise_6s', 'RAISE1SEC': 'raise_1s',
-                                     'RAISE60SEC': 'raise_60s', 'RAISE5MIN': 'raise_5min', 'LOWER6SEC': 'lower_6s',
-                                     'LOWER1SEC': 'lower_1s', 'LOWER60SEC': 'lower_60s', 'LOWER5MIN': 'lower_5min'}
+        self.dispatch_type_name_map = an.dispatch_type_map
 
         self.volume_bids = self.raw_input_loader.get_unit_volume_bids()
         self.fast_start_profiles = self.raw_input_loader.get_unit_fast_start_parameters()
@@ -725,6 +724,8 @@ class UnitData:
         ----------------
         volume_bids : pd.DataFrame
 
+            If the UnitData instance was created with a :class:`BidStore` the rows are ordered as in the raw bids.
+
             ================  ========================================
             Columns:          Description:
             unit              unique identifier for units, (as `str`)
@@ -758,11 +759,12 @@ class UnitData:
         unit_availability = self._get_unit_availability()
 
         agc_enablement_limits = self.raw_input_loader.get_agc_enablement_limits()
-        BIDPEROFFER_D = _scaling_for_agc_enablement_limits(BIDPEROFFER_D, agc_enablement_limits)
-        BIDPEROFFER_D = _scaling_for_agc_ramp_rates(BIDPEROFFER_D, initial_conditions)
-        BIDPEROFFER_D = _scaling_for_uigf(BIDPEROFFER_D, self.uigf_values)
-        self.BIDPEROFFER_D, BIDDAYOFFER_D = _enforce_preconditions_for_enabling_fcas(
-            BIDPEROFFER_D, BIDDAYOFFER_D, initial_conditions, unit_availability)
+        if self.bid_store is not None:
+            process_bids = self.bid_store.process_bids
+        else:
+            process_bids = _process_bids
+        self.BIDPEROFFER_D, BIDDAYOFFER_D = process_bids(BIDPEROFFER_D, BIDDAYOFFER_D, agc_enablement_limits,
+                                                         initial_conditions, self.uigf_values, unit_availability)
 
         volume_bids = _format_volume_bids(self.BIDPEROFFER_D, self.service_name_mapping)
         price_bids = _format_price_bids(BIDDAYOFFER_D, self.service_name_mapping)
@@ -851,7 +853,15 @@ class UnitData:
 
         if self.BIDPEROFFER_D is None:
             raise MethodCallOrderError('Call get_processed_bids before add_fcas_trapezium_constraints.')
-        self.fcas_trapeziums = _format_fcas_trapezium_constraints(self.BIDPEROFFER_D, self.service_name_mapping)
+        self._set_fcas_trapeziums(_format_fcas_trapezium_constraints(self.BIDPEROFFER_D, self.service_name_mapping))
+
+    def _set_fcas_trapeziums(self, fcas_trapeziums):
+        # The inputs for each type of FCAS constraint are split from the trapeziums once, for all the getters.
+        self.fcas_trapeziums = fcas_trapeziums
+        is_regulation = fcas_trapeziums['service'].isin(['raise_reg', 'lower_reg']).to_numpy()
+        self._fcas_max_availability = fcas_trapeziums.loc[:, ['unit', 'service', 'max_availability']]
+        self._fcas_regulation_trapeziums = fcas_trapeziums[is_regulation]
+        self._contingency_services = fcas_trapeziums[~is_regulation]
 
     def get_fcas_max_availability(self):
         """Get the unit bid maximum availability of each service.
@@ -904,7 +914,7 @@ class UnitData:
         """
         if self.fcas_trapeziums is None:
             raise MethodCallOrderError('Call add_fcas_trapezium_constraints before get_fcas_max_availability.')
-        return self.fcas_trapeziums.loc[:, ['unit', 'service', 'max_availability']]
+        return self._fcas_max_availability
 
     def get_fcas_regulation_trapeziums(self):
         """Get the unit bid FCAS trapeziums for regulation services.
@@ -975,7 +985,7 @@ class UnitData:
         """
         if self.fcas_trapeziums is None:
             raise MethodCallOrderError('Call add_fcas_trapezium_constraints before get_fcas_max_availability.')
-        return self.fcas_trapeziums[self.fcas_trapeziums['service'].isin(['raise_reg', 'lower_reg'])]
+        return self._fcas_regulation_trapeziums
 
     def _get_scada_ramp_up_rates(self):
         initial_cons = self.initial_conditions.loc[:, ['DUID', 'INITIALMW', 'RAMPUPRATE']]
@@ -1204,9 +1214,296 @@ class UnitData:
 
         if self.fcas_trapeziums is None:
             raise MethodCallOrderError('Call add_fcas_trapezium_constraints before get_contingency_services.')
-        return self.fcas_trapeziums[~self.fcas_trapeziums['service'].isin(['raise_reg', 'lower_reg'])]
+        return self._contingency_services
+
+
+class BidStore:
+    """Reuses processed bids across dispatch intervals for units whose inputs have not changed.
+
+    Within a day most units only change their bids when they rebid. The bid store hashes the rows of each unit's
+    inputs to the bid processing, and in each interval only the units whose hash has changed since the last interval
+    are processed, the processed bids of the other units are reused. Units with only energy bids are not affected
+    by AGC, SCADA, UIGF or capacity values, so for these units only the bids are hashed.
+
+    Examples
+    --------
+
+    The same bid store is given to the UnitData instance of each interval.
+
+    >>> bid_store = BidStore()
+
+    >>> for interval in ['2019/01/10 12:05:00', '2019/01/10 12:10:00']:  # doctest: +SKIP
+    ...     inputs_loader.set_interval(interval)
+    ...     unit_data = UnitData(inputs_loader, bid_store=bid_store)
+    ...     volume_bids, price_bids = unit_data.get_processed_bids()
+
+    Attributes
+    ----------
+    units_processed : int
+        The number of units processed in the last interval.
+    units_reused : int
+        The number of units with processed bids reused in the last interval.
+    """
+
+    def __init__(self):
+        self.units_processed = 0
+        self.units_reused = 0
+        self._unit_keys = pd.Series([], dtype=np.uint64)
+        self._volume_bids = None
+        self._price_bids = None
+
+    def process_bids(self, BIDPEROFFER_D, BIDDAYOFFER_D, agc_enablement_limits, initial_conditions, uigf_values,
+                     unit_availability):
+        """Process bids as :func:`_process_bids`, reusing the results for units unchanged since the last call.
+
+        Returns
+        -------
+        BIDPEROFFER_D : pd.DataFrame
+
+        BIDDAYOFFER_D : pd.DataFrame
+        """
+        unit_keys = self._hash_units(BIDPEROFFER_D, BIDDAYOFFER_D, agc_enablement_limits, initial_conditions,
+                                     uigf_values, unit_availability)
+        unchanged = unit_keys.index[unit_keys.isin(self._unit_keys.to_numpy())]
+        changed = unit_keys.index.difference(unchanged)
+
+        volume_bids = [self._units_in(self._volume_bids, 'DUID', unchanged)]
+        price_bids = [self._units_in(self._price_bids, 'DUID', unchanged)]
+        if len(changed) > 0:
+            processed_volume_bids, processed_price_bids = _process_bids(
+                self._units_in(BIDPEROFFER_D, 'DUID', changed), self._units_in(BIDDAYOFFER_D, 'DUID', changed),
+                self._units_in(agc_enablement_limits, 'DUID', changed),
+                self._units_in(initial_conditions, 'DUID', changed), self._units_in(uigf_values, 'DUID', changed),
+                self._units_in(unit_availability, 'unit', changed))
+            volume_bids.append(processed_volume_bids)
+            price_bids.append(processed_price_bids)
+
+        self._volume_bids = self._in_input_order(pd.concat(volume_bids), BIDPEROFFER_D)
+        self._price_bids = self._in_input_order(pd.concat(price_bids), BIDDAYOFFER_D)
+        self._unit_keys = unit_keys
+        self.units_processed = len(changed)
+        self.units_reused = len(unchanged)
+        return self._volume_bids.copy(), self._price_bids.copy()
+
+    @staticmethod
+    def _units_in(table, unit_column, units):
+        if table is None:
+            return None
+        return table[table[unit_column].isin(units)]
+
+    @staticmethod
+    def _hash_rows_by_unit(table, unit_column, columns):
+        rows = table.loc[:, [unit_column] + columns]
+        # Including the position of each row within its unit makes the hash sensitive to row order.
+        rows['row'] = rows.groupby(unit_column).cumcount()
+        row_hashes = pd.util.hash_pandas_object(rows, index=False)
+        return row_hashes.groupby(rows[unit_column].to_numpy()).sum()
+
+    def _hash_units(self, BIDPEROFFER_D, BIDDAYOFFER_D, agc_enablement_limits, initial_conditions, uigf_values,
+                    unit_availability):
+        units = pd.Index(BIDPEROFFER_D['DUID']).union(pd.Index(BIDDAYOFFER_D['DUID'])).unique()
+        # Only FCAS bids are processed using the unit conditions.
+        uses_conditions = units.isin(BIDPEROFFER_D['DUID'][BIDPEROFFER_D['BIDTYPE'] != 'ENERGY'])
+        input_hashes = [
+            (BIDPEROFFER_D, 'DUID', list(BIDPEROFFER_D.columns.drop('DUID')), False),
+            (BIDDAYOFFER_D, 'DUID', list(BIDDAYOFFER_D.columns.drop('DUID')), False),
+            (agc_enablement_limits, 'DUID', ['RAISEREGENABLEMENTMAX', 'RAISEREGENABLEMENTMIN',
+                                             'LOWERREGENABLEMENTMAX', 'LOWERREGENABLEMENTMIN'], True),
+            (initial_conditions, 'DUID', ['INITIALMW', 'RAMPUPRATE', 'RAMPDOWNRATE', 'AGCSTATUS'], True),
+            (uigf_values, 'DUID', ['UIGF'], True),
+            (unit_availability, 'unit', ['capacity'], True)]
+        hashes = pd.DataFrame(index=units)
+        for i, (table, unit_column, columns, is_condition) in enumerate(input_hashes):
+            table_hashes = self._hash_rows_by_unit(table, unit_column, columns).reindex(units, fill_value=0)
+            if is_condition:
+                table_hashes = table_hashes.where(uses_conditions, 0)
+            hashes[i] = table_hashes.astype(np.uint64)
+        return pd.Series(pd.util.hash_pandas_object(hashes, index=True).to_numpy(), index=units)
+
+    @staticmethod
+    def _in_input_order(processed, inputs):
+        positions = inputs.loc[:, ['DUID', 'BIDTYPE']].drop_duplicates()
+        positions['position'] = np.arange(len(positions))
+        processed = pd.merge(processed, positions, 'left', on=['DUID', 'BIDTYPE'])
+        processed = processed.sort_values('position', kind='stable')
+        return processed.drop(columns=['position']).reset_index(drop=True)
+
+
+
+class UnitDataRange:
+    """Loads and processes the unit inputs for a block of dispatch intervals at once.
+
+    The inputs of each interval are stacked into long tables with an interval key, and the bid processing (scaling
+    for AGC enablement limits, AGC ramp rates and UIGF, enforcing the preconditions for enabling FCAS, and formatting)
+    is run once over the whole block. Within the block each unit is identified by an integer key combining the
+    interval and DUID, so the processing steps work on the block exactly as they do on a single interval. The
+    :class:`UnitData` of each interval is then a view on the block, which returns the processed bids and FCAS
+    trapeziums from the block results.
+
+    Examples
+    --------
+
+    Load and process a block of intervals, then get the UnitData of each interval.
+
+    >>> intervals = ['2019/01/10 12:05:00', '2019/01/10 12:10:00']
+
+    >>> unit_data_range = UnitDataRange(inputs_loader, intervals)  # doctest: +SKIP
+
+    >>> for interval in intervals:  # doctest: +SKIP
+    ...     unit_data = unit_data_range.get_unit_data(interval)
+    ...     volume_bids, price_bids = unit_data.get_processed_bids()
+
+    Parameters
+    ----------
+    raw_input_loader : loaders.RawInputsLoader
+
+    intervals : list[str]
+        In the format '%Y/%m/%d %H:%M:%S'
+    """
+
+    _loader_methods = ['get_unit_volume_bids', 'get_unit_fast_start_parameters', 'get_unit_initial_conditions',
+                       'get_UIGF_values', 'get_unit_price_bids', 'get_unit_details', 'get_agc_enablement_limits']
+
+    def __init__(self, raw_input_loader, intervals):
+        self.intervals = list(intervals)
+        self._positions = {interval: position for position, interval in enumerate(self.intervals)}
+        inputs = {method: [] for method in self._loader_methods}
+        for interval in self.intervals:
+            raw_input_loader.set_interval(interval)
+            for method in self._loader_methods:
+                inputs[method].append(getattr(raw_input_loader, method)())
+        self._inputs = {method: _stack_intervals(tables) for method, tables in inputs.items()}
+        self._processed = self._process_bids()
+
+    def get_unit_data(self, interval):
+        """Get the :class:`UnitData` of an interval in the block.
+
+        The methods of the returned UnitData work as for a UnitData created with a RawInputsLoader, except the
+        processed bids and FCAS trapeziums come from the block and have a RangeIndex.
+
+        Parameters
+        ----------
+        interval : str
+            In the format '%Y/%m/%d %H:%M:%S'
+
+        Returns
+        -------
+        UnitData
+
+        Raises
+        ------
+            ValueError
+                If the interval is not in the block.
+        """
+        if interval not in self._positions:
+            raise ValueError("Interval {} is not in the block of intervals.".format(interval))
+        return _IntervalUnitData(self, self._positions[interval])
+
+    def _process_bids(self):
+        inputs = self._inputs
+        units = pd.Index(pd.concat([inputs[method]['DUID'] for method in self._loader_methods
+                                    if 'DUID' in inputs[method].columns])).unique().sort_values()
+
+        volume_bids = _key_units(inputs['get_unit_volume_bids'], units)
+        price_bids = _key_units(inputs['get_unit_price_bids'], units)
+        initial_conditions = _key_units(inputs['get_unit_initial_conditions'], units)
+        uigf_values = _key_units(inputs['get_UIGF_values'], units)
+        agc_enablement_limits = _key_units(inputs['get_agc_enablement_limits'], units)
+        unit_details = _key_units(inputs['get_unit_details'], units)
+
+        unit_info = pd.DataFrame({
+            'unit': unit_details['DUID'].to_numpy(),
+            'loss_factor': (unit_details['TRANSMISSIONLOSSFACTOR'] *
+                            unit_details['DISTRIBUTIONLOSSFACTOR']).to_numpy()})
+
+        # Unit availability as in UnitData._get_unit_availability.
+        bid_availability = volume_bids.loc[volume_bids['BIDTYPE'] == 'ENERGY', ['DUID', 'MAXAVAIL']]
+        bid_availability = bid_availability[~bid_availability['DUID'].isin(uigf_values['DUID'])]
+        unit_availability = pd.concat([an.map_aemo_column_names_to_nempy_names(bid_availability),
+                                       an.map_aemo_column_names_to_nempy_names(uigf_values)])
+
+        BIDPEROFFER_D, BIDDAYOFFER_D = _process_bids(volume_bids.drop(['RAMPDOWNRATE', 'RAMPUPRATE'], axis=1),
+                                                     price_bids, agc_enablement_limits, initial_conditions,
+                                                     uigf_values, unit_availability)
+
+        formatted_volume_bids = _format_volume_bids(BIDPEROFFER_D, UnitData.service_name_mapping)
+        formatted_price_bids = _format_price_bids(BIDDAYOFFER_D, UnitData.service_name_mapping)
+        formatted_volume_bids = formatted_volume_bids[formatted_volume_bids['unit'].isin(unit_info['unit'])]
+        formatted_price_bids = formatted_price_bids[formatted_price_bids['unit'].isin(unit_info['unit'])]
+        formatted_price_bids = UnitData._unscale_price_bids(formatted_price_bids, unit_info)
+        fcas_trapeziums = _format_fcas_trapezium_constraints(BIDPEROFFER_D, UnitData.service_name_mapping)
+
+        return {'BIDPEROFFER_D': _unkey_units(BIDPEROFFER_D, units, 'DUID'),
+                'volume_bids': _unkey_units(formatted_volume_bids, units, 'unit'),
+                'price_bids': _unkey_units(formatted_price_bids, units, 'unit'),
+                'fcas_trapeziums': _unkey_units(fcas_trapeziums, units, 'unit')}
+
+
+class _IntervalUnitData(UnitData):
+    """The UnitData of one interval of a UnitDataRange."""
+
+    def __init__(self, unit_data_range, position):
+        self._unit_data_range = unit_data_range
+        self._position = position
+        super().__init__(_IntervalInputs(unit_data_range._inputs, position))
+
+    def _get_processed(self, name):
+        table = _interval_view(self._unit_data_range._processed[name], self._position)
+        return table.reset_index(drop=True)
+
+    def get_processed_bids(self):
+        self.BIDPEROFFER_D = self._get_processed('BIDPEROFFER_D')
+        return self._get_processed('volume_bids'), self._get_processed('price_bids')
+
+    def add_fcas_trapezium_constraints(self):
+        if self.BIDPEROFFER_D is None:
+            raise MethodCallOrderError('Call get_processed_bids before add_fcas_trapezium_constraints.')
+        self._set_fcas_trapeziums(self._get_processed('fcas_trapeziums'))
+
+
+class _IntervalInputs:
+    """Stands in for the RawInputsLoader, returning the inputs of one interval from the tables of a UnitDataRange."""
+
+    def __init__(self, inputs, position):
+        self._inputs = inputs
+        self._position = position
+
+    def __getattr__(self, name):
+        if name.startswith('_') or name not in self._inputs:
+            raise AttributeError(name)
+        return lambda: _interval_view(self._inputs[name], self._position)
+
+
+def _stack_intervals(tables):
+    """Stack the tables of each interval into one table, with the position of each table's interval as a key."""
+    stacked = pd.concat(tables)
+    stacked['interval'] = np.repeat(np.arange(len(tables)), [len(table) for table in tables])
+    return stacked
+
+
+def _interval_view(table, position):
+    """Get the rows of one interval from a table sorted by interval position."""
+    start, end = np.searchsorted(table['interval'].to_numpy(), [position, position + 1])
+    return table.iloc[start:end].drop(columns=['interval'])
+
+
+def _key_units(table, units, unit_column='DUID'):
+    """Replace the unit ids in a stacked table with integer keys unique to each interval and unit."""
+    keyed = table.drop(columns=['interval'])
+    keyed[unit_column] = table['interval'].to_numpy() * max(len(units), 1) + units.get_indexer(table[unit_column])
+    return keyed
 
 
+def _unkey_units(table, units, unit_column):
+    """Restore the unit ids and interval positions of a keyed table, and sort it by interval."""
+    keys = table[unit_column].to_numpy(dtype=np.int64)
+    intervals = keys // max(len(units), 1)
+    order = np.argsort(intervals, kind='stable')
+    table = table.iloc[order].copy()
+    table[unit_column] = units[keys % max(len(units), 1)][order]
+    table['interval'] = intervals[order]
+    return table
+
 def _format_fcas_trapezium_constraints(BIDPEROFFER_D, service_name_mapping):
     """
     Examples
@@ -1235,7 +1532,7 @@ def _format_fcas_trapezium_constraints(BIDPEROFFER_D, service_name_mapping):
                                            'HIGHBREAKPOINT', 'ENABLEMENTMAX']]
     trapezium_cons.columns = ['unit', 'service', 'max_availability', 'enablement_min', 'low_break_point',
                               'high_break_point', 'enablement_max']
-    trapezium_cons['service'] = trapezium_cons['service'].apply(lambda x: service_name_mapping[x])
+    trapezium_cons['service'] = an.map_values(trapezium_cons['service'], service_name_mapping, 'service')
     return trapezium_cons
 
 
@@ -1302,7 +1599,7 @@ def _format_volume_bids(BIDPEROFFER_D, service_name_mapping):
                                         'BANDAVAIL5', 'BANDAVAIL6', 'BANDAVAIL7', 'BANDAVAIL8', 'BANDAVAIL9',
                                         'BANDAVAIL10']]
     volume_bids.columns = ['unit', 'service', '1', '2', '3', '4', '5', '6', '7', '8', '9', '10']
-    volume_bids['service'] = volume_bids['service'].apply(lambda x: service_name_mapping[x])
+    volume_bids['service'] = an.map_values(volume_bids['service'], service_name_mapping, 'service')
     return volume_bids
 
 
@@ -1366,7 +1663,7 @@ def _format_price_bids(BIDDAYOFFER_D, service_name_mapping):
                                        'PRICEBAND5', 'PRICEBAND6', 'PRICEBAND7', 'PRICEBAND8', 'PRICEBAND9',
                                        'PRICEBAND10']]
     price_bids.columns = ['unit', 'service', '1', '2', '3', '4', '5', '6', '7', '8', '9', '10']
-    price_bids['service'] = price_bids['service'].apply(lambda x: service_name_mapping[x])
+    price_bids['service'] = an.map_values(price_bids['service'], service_name_mapping, 'service')
     return price_bids
 
 
@@ -1428,10 +1725,181 @@ def _format_unit_info(DUDETAILSUMMARY, dispatch_type_name_map):
                                     DUDETAILSUMMARY['DISTRIBUTIONLOSSFACTOR']
     unit_info = DUDETAILSUMMARY.loc[:, ['DUID', 'DISPATCHTYPE', 'CONNECTIONPOINTID', 'REGIONID', 'LOSSFACTOR']]
     unit_info.columns = ['unit', 'dispatch_type', 'connection_point', 'region', 'loss_factor']
-    unit_info['dispatch_type'] = unit_info['dispatch_type'].apply(lambda x: dispatch_type_name_map[x])
+    unit_info['dispatch_type'] = an.map_values(unit_info['dispatch_type'], dispatch_type_name_map, 'dispatch type')
     return unit_info
 
 
+def _process_bids(BIDPEROFFER_D, BIDDAYOFFER_D, agc_enablement_limits, initial_conditions, uigf_values,
+                  unit_availability):
+    """Scale FCAS bids for AGC enablement limits, AGC ramp rates and UIGF, then filter out FCAS bids that can't be
+    enabled.
+
+    The unit conditions are aligned to the rows of BIDPEROFFER_D and the scaling and filtering is done in a single
+    pass by :func:`_scale_and_filter_fcas_bids`. The rows returned, their order and index are the same as from
+    :func:`_process_bids_in_steps`, which applies each step to the tables in turn.
+    """
+    duids = BIDPEROFFER_D['DUID']
+    bid_types = BIDPEROFFER_D['BIDTYPE'].to_numpy()
+    is_energy = bid_types == 'ENERGY'
+    is_raise_reg = bid_types == 'RAISEREG'
+    is_lower_reg = bid_types == 'LOWERREG'
+
+    has_agc_limits, agc = _align_to_bids(agc_enablement_limits, 'DUID', duids,
+                                         ['RAISEREGENABLEMENTMIN', 'RAISEREGENABLEMENTMAX', 'LOWERREGENABLEMENTMIN',
+                                          'LOWERREGENABLEMENTMAX'])
+    has_initial_conditions, ic = _align_to_bids(initial_conditions, 'DUID', duids,
+                                                ['RAMPUPRATE', 'RAMPDOWNRATE', 'INITIALMW', 'AGCSTATUS'])
+    has_uigf, uigf = _align_to_bids(uigf_values, 'DUID', duids, ['UIGF'])
+    _, capacity = _align_to_bids(unit_availability, 'unit', duids, ['capacity'])
+
+    # Raise regulation bids use the raise AGC limits and ramp up rate, other bids the lower limits and ramp down rate.
+    ramp_rate = np.where(is_raise_reg, ic['RAMPUPRATE'], ic['RAMPDOWNRATE'])
+    bands = [band for band in ['BANDAVAIL{}'.format(band_number) for band_number in range(1, 11)]
+             if band in BIDPEROFFER_D.columns]
+    scaled = _scale_and_filter_fcas_bids(
+        is_energy=is_energy, is_raise_reg=is_raise_reg, is_lower_reg=is_lower_reg,
+        max_avail=BIDPEROFFER_D['MAXAVAIL'].to_numpy(dtype=float),
+        enablement_min=BIDPEROFFER_D['ENABLEMENTMIN'].to_numpy(dtype=float),
+        low_break_point=BIDPEROFFER_D['LOWBREAKPOINT'].to_numpy(dtype=float),
+        high_break_point=BIDPEROFFER_D['HIGHBREAKPOINT'].to_numpy(dtype=float),
+        enablement_max=BIDPEROFFER_D['ENABLEMENTMAX'].to_numpy(dtype=float),
+        band_avail=BIDPEROFFER_D.loc[:, bands].to_numpy(dtype=float),
+        has_agc_limits=has_agc_limits,
+        agc_enablement_min=np.where(is_raise_reg, agc['RAISEREGENABLEMENTMIN'], agc['LOWERREGENABLEMENTMIN']),
+        agc_enablement_max=np.where(is_raise_reg, agc['RAISEREGENABLEMENTMAX'], agc['LOWERREGENABLEMENTMAX']),
+        has_initial_conditions=has_initial_conditions, ramp_rate=ramp_rate, uigf=uigf['UIGF'],
+        initial_mw=ic['INITIALMW'], agc_status=ic['AGCSTATUS'], capacity=capacity['capacity'])
+
+    # Order the rows as the sequence of splits and concatenations in the individual steps would.
+    has_scada_ramp_rate = ~np.isnan(ramp_rate) & (ramp_rate != 0.0)
+    agc_limit_order = np.select([is_lower_reg, is_raise_reg], [1, 2], 0)
+    ramp_rate_order = np.select([is_raise_reg & ~has_scada_ramp_rate, is_lower_reg & ~has_scada_ramp_rate,
+                                 is_lower_reg, is_raise_reg], [1, 2, 3, 4], 0)
+    uigf_order = np.where(is_energy, 0, np.where(has_uigf, 2, 1))
+    order = np.lexsort((np.arange(len(BIDPEROFFER_D)), agc_limit_order, ramp_rate_order, uigf_order, ~is_energy))
+
+    # Energy bids keep their index, FCAS bids are indexed by their position after the merge with initial conditions.
+    merged_with_initial_conditions = (scaled['is_offered'] & has_initial_conditions)[order]
+    index = BIDPEROFFER_D.index.to_numpy()[order]
+    index = np.where(is_energy[order], index, np.cumsum(merged_with_initial_conditions) - 1)
+    keep = (is_energy | scaled['is_enabled'])[order]
+
+    BIDPEROFFER_D = BIDPEROFFER_D.copy()
+    for column in ['MAXAVAIL', 'ENABLEMENTMIN', 'LOWBREAKPOINT', 'HIGHBREAKPOINT', 'ENABLEMENTMAX']:
+        BIDPEROFFER_D[column] = scaled[column]
+    BIDPEROFFER_D = BIDPEROFFER_D.iloc[order[keep]]
+    BIDPEROFFER_D.index = pd.Index(index[keep].astype(BIDPEROFFER_D.index.dtype))
+
+    # Filter the fcas price bids using the remaining volume bids.
+    enabled_bids = pd.MultiIndex.from_arrays([duids[scaled['is_enabled']], bid_types[scaled['is_enabled']]])
+    price_bid_ids = pd.MultiIndex.from_frame(BIDDAYOFFER_D.loc[:, ['DUID', 'BIDTYPE']])
+    is_energy_price_bid = (BIDDAYOFFER_D['BIDTYPE'] == 'ENERGY').to_numpy()
+    fcas_price_bids = BIDDAYOFFER_D[~is_energy_price_bid & price_bid_ids.isin(enabled_bids)]
+    BIDDAYOFFER_D = pd.concat([BIDDAYOFFER_D[is_energy_price_bid], fcas_price_bids.reset_index(drop=True)])
+
+    return BIDPEROFFER_D, BIDDAYOFFER_D
+
+
+def _process_bids_in_steps(BIDPEROFFER_D, BIDDAYOFFER_D, agc_enablement_limits, initial_conditions, uigf_values,
+                           unit_availability):
+    """Process bids as :func:`_process_bids`, applying each scaling and filtering step to the tables in turn."""
+    BIDPEROFFER_D = _scaling_for_agc_enablement_limits(BIDPEROFFER_D, agc_enablement_limits)
+    BIDPEROFFER_D = _scaling_for_agc_ramp_rates(BIDPEROFFER_D, initial_conditions)
+    BIDPEROFFER_D = _scaling_for_uigf(BIDPEROFFER_D, uigf_values)
+    return _enforce_preconditions_for_enabling_fcas(BIDPEROFFER_D, BIDDAYOFFER_D, initial_conditions,
+                                                    unit_availability)
+
+
+def _align_to_bids(table, unit_column, duids, columns):
+    """Get the values of a unit level table for the unit of each bid, and whether each bid's unit is in the table."""
+    table = table.drop_duplicates(unit_column).set_index(unit_column)
+    aligned = table.loc[:, columns].reindex(duids)
+    return duids.isin(table.index).to_numpy(), {column: aligned[column].to_numpy(dtype=float) for column in columns}
+
+
+def _scale_and_filter_fcas_bids(is_energy, is_raise_reg, is_lower_reg, max_avail, enablement_min, low_break_point,
+                                high_break_point, enablement_max, band_avail, has_agc_limits, agc_enablement_min,
+                                agc_enablement_max, has_initial_conditions, ramp_rate, uigf, initial_mw, agc_status,
+                                capacity):
+    """Scale FCAS trapeziums and find the FCAS bids that can be enabled, in one pass over arrays aligned to the bids.
+
+    Applies the scaling of :func:`_scaling_for_agc_enablement_limits`, :func:`_scaling_for_agc_ramp_rates` and
+    :func:`_scaling_for_uigf`, and the criteria of :func:`_enforce_preconditions_for_enabling_fcas`. Regulation bids
+    of units without AGC enablement limits or initial conditions can't be scaled and are not enabled. Missing unit
+    values are given as NaN.
+
+    Examples
+    --------
+
+    A raise regulation bid limited by the unit's AGC enablement max and ramp up rate.
+
+    >>> scaled = _scale_and_filter_fcas_bids(
+    ...   is_energy=np.array([False]), is_raise_reg=np.array([True]), is_lower_reg=np.array([False]),
+    ...   max_avail=np.array([20.0]), enablement_min=np.array([20.0]), low_break_point=np.array([40.0]),
+    ...   high_break_point=np.array([80.0]), enablement_max=np.array([100.0]), band_avail=np.array([[20.0]]),
+    ...   has_agc_limits=np.array([True]), agc_enablement_min=np.array([0.0]),
+    ...   agc_enablement_max=np.array([90.0]), has_initial_conditions=np.array([True]),
+    ...   ramp_rate=np.array([120.0]), uigf=np.array([np.nan]), initial_mw=np.array([50.0]),
+    ...   agc_status=np.array([1.0]), capacity=np.array([100.0]))
+
+    >>> for column in ['MAXAVAIL', 'ENABLEMENTMIN', 'LOWBREAKPOINT', 'HIGHBREAKPOINT', 'ENABLEMENTMAX', 'is_enabled']:
+    ...     print(column, scaled[column])
+    MAXAVAIL [10.]
+    ENABLEMENTMIN [20.]
+    LOWBREAKPOINT [30.]
+    HIGHBREAKPOINT [80.]
+    ENABLEMENTMAX [90.]
+    is_enabled [ True]
+
+    Returns
+    -------
+    dict
+        The scaled 'MAXAVAIL', 'ENABLEMENTMIN', 'LOWBREAKPOINT', 'HIGHBREAKPOINT' and 'ENABLEMENTMAX' values, then
+        'is_offered', True for FCAS bids that pass the criteria based on the bid and unit capacity, and 'is_enabled',
+        True for FCAS bids that pass all the criteria.
+    """
+    is_reg = is_raise_reg | is_lower_reg
+
+    # Scale for AGC enablement limits.
+    agc_min_limited = is_reg & (agc_enablement_min > enablement_min) & (agc_enablement_min > 0.0)
+    low_break_point = np.where(agc_min_limited, low_break_point + (agc_enablement_min - enablement_min),
+                               low_break_point)
+    enablement_min = np.where(agc_min_limited, agc_enablement_min, enablement_min)
+    agc_max_limited = is_reg & (agc_enablement_max < enablement_max) & (agc_enablement_max > 0.0)
+    high_break_point = np.where(agc_max_limited, high_break_point - (enablement_max - agc_enablement_max),
+                                high_break_point)
+    enablement_max = np.where(agc_max_limited, agc_enablement_max, enablement_max)
+
+    # Scale for AGC ramp rates, keeping the slopes of the trapezium sides the same.
+    ramp_max = ramp_rate * (5 / 60)
+    ramp_limited = is_reg & ~np.isnan(ramp_rate) & (ramp_rate != 0.0) & (max_avail > ramp_max)
+    lower_slope_width = low_break_point - enablement_min
+    upper_slope_width = enablement_max - high_break_point
+    with np.errstate(divide='ignore', invalid='ignore'):
+        low_break_point = np.where(ramp_limited & (lower_slope_width != 0.0),
+                                   ramp_max / (max_avail / lower_slope_width) + enablement_min, low_break_point)
+        high_break_point = np.where(ramp_limited & (upper_slope_width != 0.0),
+                                    enablement_max - ramp_max / (max_avail / upper_slope_width), high_break_point)
+    max_avail = np.where(ramp_limited, ramp_max, max_avail)
+
+    # Scale for UIGF.
+    uigf_limited = ~is_energy & (enablement_max > uigf)
+    high_break_point = np.where(uigf_limited, high_break_point - (enablement_max - uigf), high_break_point)
+    enablement_max = np.where(uigf_limited, uigf, enablement_max)
+
+    # Preconditions for enabling FCAS, initial output is rounded to the precision of the enablement limits.
+    is_offered = (~is_energy & (~is_reg | (has_agc_limits & has_initial_conditions)) & (max_avail > 0.0) &
+                  (band_avail > 0.0).any(axis=1) & ((capacity >= enablement_min) | np.isnan(capacity)) &
+                  (enablement_max >= 0.0))
+    initial_mw = np.round(np.where(initial_mw < 0.0, 0.0, initial_mw), 5)
+    is_enabled = (is_offered & has_initial_conditions & (enablement_max >= initial_mw) &
+                  (enablement_min <= initial_mw) & ~(is_reg & (agc_status == 0.0)))
+
+    return {'MAXAVAIL': max_avail, 'ENABLEMENTMIN': enablement_min, 'LOWBREAKPOINT': low_break_point,
+            'HIGHBREAKPOINT': high_break_point, 'ENABLEMENTMAX': enablement_max, 'is_offered': is_offered,
+            'is_enabled': is_enabled}
+
+
 def _scaling_for_agc_enablement_limits(BIDPEROFFER_D, DISPATCHLOAD):
     """Scale regulating FCAS enablement and break points where AGC enablement limits are more restrictive than offers.
 
@@ -1705,31 +2173,17 @@ def _scaling_for_agc_ramp_rates(BIDPEROFFER_D, DISPATCHLOAD):
 
     reg = pd.concat([lower_reg, raise_reg])
 
-    def get_new_low_break_point(old_max, ramp_max, low_break_point, enablement_min):
-        if old_max > ramp_max and (low_break_point - enablement_min) != 0.0:
-            # Get slope of trapezium
-            m = old_max / (low_break_point - enablement_min)
-            # Substitute new_max into the slope equation and re-arrange to find the new break point needed to keep the
-            # slope the same.
-            low_break_point = ramp_max / m + enablement_min
-        return low_break_point
-
-    def get_new_high_break_point(old_max, ramp_max, high_break_point, enablement_max):
-        if old_max > ramp_max and (enablement_max - high_break_point) != 0.0:
-            # Get slope of trapezium
-            m = old_max / (enablement_max - high_break_point)
-            # Substitute new_max into the slope equation and re-arrange to find the new break point needed to keep the
-            # slope the same.
-            high_break_point = enablement_max - (ramp_max / m)
-        return high_break_point
-
-    # Scale break points to maintain slopes.
-    reg['LOWBREAKPOINT'] = reg.apply(lambda x: get_new_low_break_point(x['MAXAVAIL'], x['RAMPMAX'], x['LOWBREAKPOINT'],
-                                                                       x['ENABLEMENTMIN']),
-                                     axis=1)
-    reg['HIGHBREAKPOINT'] = reg.apply(lambda x: get_new_high_break_point(x['MAXAVAIL'], x['RAMPMAX'],
-                                                                         x['HIGHBREAKPOINT'], x['ENABLEMENTMAX']),
-                                      axis=1)
+    # Scale break points to maintain slopes. The slope of each trapezium side is kept the same by substituting the
+    # new max into the slope equation and re-arranging to find the new break point.
+    needs_scaling = reg['MAXAVAIL'] > reg['RAMPMAX']
+    lower_slope_width = reg['LOWBREAKPOINT'] - reg['ENABLEMENTMIN']
+    upper_slope_width = reg['ENABLEMENTMAX'] - reg['HIGHBREAKPOINT']
+    reg['LOWBREAKPOINT'] = np.where(needs_scaling & (lower_slope_width != 0.0),
+                                    reg['RAMPMAX'] / (reg['MAXAVAIL'] / lower_slope_width) + reg['ENABLEMENTMIN'],
+                                    reg['LOWBREAKPOINT'])
+    reg['HIGHBREAKPOINT'] = np.where(needs_scaling & (upper_slope_width != 0.0),
+                                     reg['ENABLEMENTMAX'] - reg['RAMPMAX'] / (reg['MAXAVAIL'] / upper_slope_width),
+                                     reg['HIGHBREAKPOINT'])
 
     # Adjust max FCAS availability.
     reg['MAXAVAIL'] = np.where(reg['MAXAVAIL'] > reg['RAMPMAX'], reg['RAMPMAX'], reg['MAXAVAIL'])
@@ -1795,17 +2249,13 @@ def _scaling_for_uigf(BIDPEROFFER_D, ugif_values):
     fcas_semi_scheduled = pd.merge(fcas_semi_scheduled, ugif_values.loc[:, ['DUID', 'UIGF']],
                                    'inner', on='DUID')
 
-    def get_new_high_break_point(availability, high_break_point, enablement_max):
-        if enablement_max > availability:
-            high_break_point = high_break_point - (enablement_max - availability)
-        return high_break_point
-
     if not fcas_semi_scheduled.empty:
         # Scale high break points.
         fcas_semi_scheduled['HIGHBREAKPOINT'] = \
-            fcas_semi_scheduled.apply(lambda x: get_new_high_break_point(x['UIGF'], x['HIGHBREAKPOINT'],
-                                                                         x['ENABLEMENTMAX']),
-                                      axis=1)
+            np.where(fcas_semi_scheduled['ENABLEMENTMAX'] > fcas_semi_scheduled['UIGF'],
+                     fcas_semi_scheduled['HIGHBREAKPOINT'] -
+                     (fcas_semi_scheduled['ENABLEMENTMAX'] - fcas_semi_scheduled['UIGF']),
+                     fcas_semi_scheduled['HIGHBREAKPOINT'])
 
         # Adjust ENABLEMENTMAX.
         fcas_semi_scheduled['ENABLEMENTMAX'] = \
@@ -0,0 +1,250 @@
+import collections
+import multiprocessing
+import os
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from nempy.historical_inputs import loaders, mms_db, xml_cache
+
+# Modules imported once by the forkserver process, so workers forked from it start with them loaded.
+_PRELOADED_MODULES = ['nempy.markets', 'nempy.historical_inputs.loaders', 'nempy.historical_inputs.units',
+                      'nempy.historical_inputs.interconnectors', 'nempy.historical_inputs.constraints',
+                      'nempy.historical_inputs.demand']
+
+# Set in each worker process by _initialise_worker.
+_worker_state = None
+
+
+class IntervalWorkerPool:
+    """Pool of worker processes, initialised once, that dispatch historical intervals.
+
+    When intervals are cheap to dispatch, most of the time taken by a process pool can be spent starting the workers,
+    i.e. importing nempy, loading the solver library, connecting to the database and loading reference tables, and
+    passing pickled pd.DataFrames back. In this pool each worker is set up once when the pool is created and then
+    reused for every interval. Workers are forked from a server process that has already imported nempy (the
+    'forkserver' start method, or 'spawn' where forkserver isn't available). Each worker loads the solver library,
+    opens its own connection to the database file, attaches the reference snapshot and enables the window cache if
+    they are given, and creates a RawInputsLoader.
+
+    Tasks sent to workers are just the interval to dispatch. The worker calls dispatch_interval with its
+    RawInputsLoader and the interval, and dispatch_interval returns the results as a dict of pd.DataFrames. Results
+    are written into a block of shared memory as numpy arrays, and copied out of it by this process, rather than
+    being pickled and sent through a pipe. Text columns are sent as integer codes, with the list of distinct values
+    sent alongside. Results are returned with a default index.
+
+    dispatch_interval must be importable by the workers, i.e. defined at the top level of a module rather than in a
+    script's __main__ or interactively. Errors raised by dispatch_interval are raised in this process, if a worker
+    dies the pool is broken and concurrent.futures.process.BrokenProcessPool is raised.
+
+    Examples
+    --------
+    In a module, say replay.py, define the function that dispatches an interval.
+
+    >>> def dispatch_interval(raw_inputs_loader, interval):
+    ...     raw_inputs_loader.set_interval(interval)
+    ...     market = build_market(raw_inputs_loader)
+    ...     market.dispatch()
+    ...     return {'unit_dispatch': market.get_unit_dispatch(), 'energy_prices': market.get_energy_prices()}
+
+    Then dispatch a sequence of intervals with a pool of four workers.
+
+    >>> from replay import dispatch_interval  # doctest: +SKIP
+
+    >>> intervals = ['2019/01/01 00:00:00', '2019/01/01 00:05:00']
+
+    >>> with IntervalWorkerPool(dispatch_interval, 'test_nemde_cache', 'market_management_system.db',
+    ...                         workers=4) as pool:  # doctest: +SKIP
+    ...     for interval, results in zip(intervals, pool.map(intervals)):
+    ...         print(results['energy_prices'])
+
+    Parameters
+    ----------
+    dispatch_interval : callable
+        Called by workers as dispatch_interval(raw_inputs_loader, interval), returning a dict[str, pd.DataFrame].
+    nemde_cache_folder : str or pathlib.Path
+        The folder of the XMLCacheManager used by each worker.
+    database_file : str or pathlib.Path
+        The market management system database file.
+    workers : int
+        The number of worker processes, default None, the number of CPUs.
+    solver_name : str
+        The solver whose library is loaded by each worker at start up, 'CBC', 'GUROBI' or 'HIGHS', default 'CBC'.
+    reference_snapshot : str or pathlib.Path
+        A directory saved by :func:`DBManager.export_reference_snapshot
+        <nempy.historical_inputs.mms_db.DBManager.export_reference_snapshot>` for workers to attach, default None.
+    window_cache_hours : int
+        If given, workers enable the database window cache with windows of this many hours, default None.
+    xml_storage : str
+        The storage of the XMLCacheManager, 'extracted' or 'zip', default 'extracted'.
+    start_method : str
+        The multiprocessing start method, 'forkserver' or 'spawn', default None, forkserver where available.
+    """
+
+    def __init__(self, dispatch_interval, nemde_cache_folder, database_file, workers=None, solver_name='CBC',
+                 reference_snapshot=None, window_cache_hours=None, xml_storage='extracted', start_method=None):
+        if start_method is None:
+            start_method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+        if start_method not in ('forkserver', 'spawn'):
+            raise ValueError("start_method must be 'forkserver' or 'spawn', not {}.".format(start_method))
+        self.workers = workers if workers is not None else (os.cpu_count() or 1)
+        context = multiprocessing.get_context(start_method)
+        if start_method == 'forkserver':
+            context.set_forkserver_preload(_PRELOADED_MODULES)
+        settings = {'dispatch_interval': dispatch_interval, 'nemde_cache_folder': str(nemde_cache_folder),
+                    'database_file': str(database_file), 'solver_name': solver_name,
+                    'reference_snapshot': None if reference_snapshot is None else str(reference_snapshot),
+                    'window_cache_hours': window_cache_hours, 'xml_storage': xml_storage}
+        self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=context,
+                                             initializer=_initialise_worker, initargs=(settings,))
+        # Start and initialise every worker now, so set up errors are raised here and the first intervals don't wait.
+        for future in [self._executor.submit(os.getpid) for _ in range(self.workers)]:
+            future.result()
+
+    def dispatch(self, interval):
+        """Dispatch an interval on a worker, and return the results of dispatch_interval.
+
+        Parameters
+        ----------
+        interval : str
+            In the format '%Y/%m/%d %H:%M:%S'
+
+        Returns
+        -------
+        dict[str, pd.DataFrame]
+        """
+        return _read_shared_frames(self._executor.submit(_dispatch_interval, interval).result())
+
+    def map(self, intervals):
+        """Dispatch intervals on the workers, yielding the results of dispatch_interval in the order of intervals.
+
+        At most twice as many intervals as there are workers are dispatched ahead of the results being used, so
+        results waiting in shared memory are limited.
+
+        Parameters
+        ----------
+        intervals : iterable[str]
+            In the format '%Y/%m/%d %H:%M:%S'
+
+        Yields
+        ------
+        dict[str, pd.DataFrame]
+        """
+        intervals = iter(intervals)
+        pending = collections.deque()
+        try:
+            for interval in intervals:
+                pending.append(self._executor.submit(_dispatch_interval, interval))
+                if len(pending) >= 2 * self.workers:
+                    yield _read_shared_frames(pending.popleft().result())
+            while pending:
+                yield _read_shared_frames(pending.popleft().result())
+        finally:
+            # If iteration stopped early, free the shared memory of results that won't be read.
+            for future in pending:
+                if not future.cancel() and future.exception() is None:
+                    _unlink_shared_memory(future.result()['name'])
+
+    def close(self):
+        """Stop the worker processes."""
+        self._executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def _initialise_worker(settings):
+    """Load the solver library, open the database and create the RawInputsLoader used by a worker."""
+    global _worker_state
+    from nempy.spot_markert_backend import solver_backends
+    solver_backends.create_backend(settings['solver_name'])
+    con = sqlite3.connect(settings['database_file'])
+    mms_db_manager = mms_db.DBManager(connection=con)
+    if settings['reference_snapshot'] is not None:
+        mms_db_manager.attach_reference_snapshot(settings['reference_snapshot'])
+    if settings['window_cache_hours'] is not None:
+        mms_db_manager.enable_window_cache(window_hours=settings['window_cache_hours'])
+    xml_cache_manager = xml_cache.XMLCacheManager(settings['nemde_cache_folder'], storage=settings['xml_storage'])
+    _worker_state = {'dispatch_interval': settings['dispatch_interval'],
+                     'raw_inputs_loader': loaders.RawInputsLoader(xml_cache_manager, mms_db_manager)}
+
+
+def _dispatch_interval(interval):
+    frames = _worker_state['dispatch_interval'](_worker_state['raw_inputs_loader'], interval)
+    return _write_shared_frames(frames)
+
+
+def _write_shared_frames(frames):
+    """Write the columns of pd.DataFrames into a new block of shared memory, returns a manifest to read them with.
+
+    Examples
+    --------
+    >>> manifest = _write_shared_frames({'prices': pd.DataFrame({'region': ['NSW', 'VIC'], 'price': [50.0, 60.0]})})
+
+    >>> print(_read_shared_frames(manifest)['prices'])
+      region  price
+    0    NSW   50.0
+    1    VIC   60.0
+    """
+    arrays, manifest_frames = [], {}
+    offset = 0
+    for frame_name, frame in frames.items():
+        columns = []
+        for column_name, column in frame.items():
+            values = column.to_numpy()
+            categories = None
+            if values.dtype.kind == 'O':
+                categorical = pd.Categorical(column)
+                values, categories = categorical.codes, categorical.categories.tolist()
+            # Keep each array aligned to 8 bytes.
+            offset = -(-offset // 8) * 8
+            columns.append({'name': column_name, 'dtype': values.dtype.str, 'offset': offset,
+                            'categories': categories})
+            arrays.append((offset, values))
+            offset += values.nbytes
+        manifest_frames[frame_name] = {'length': len(frame), 'columns': columns}
+    memory = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+    for array_offset, values in arrays:
+        view = np.ndarray(values.shape, dtype=values.dtype, buffer=memory.buf, offset=array_offset)
+        view[:] = values
+        del view
+    name = memory.name
+    memory.close()
+    return {'name': name, 'frames': manifest_frames}
+
+
+def _read_shared_frames(manifest):
+    """Copy the pd.DataFrames written by _write_shared_frames out of shared memory, and free the shared memory."""
+    memory = shared_memory.SharedMemory(name=manifest['name'])
+    try:
+        frames = {}
+        for frame_name, frame in manifest['frames'].items():
+            data = {}
+            for column in frame['columns']:
+                view = np.ndarray((frame['length'],), dtype=np.dtype(column['dtype']), buffer=memory.buf,
+                                  offset=column['offset'])
+                values = view.copy()
+                del view
+                if column['categories'] is not None:
+                    is_null = values == -1
+                    values = np.asarray(pd.Categorical.from_codes(values, column['categories']), dtype=object)
+                    values[is_null] = None
+                data[column['name']] = values
+            frames[frame_name] = pd.DataFrame(data, columns=[column['name'] for column in frame['columns']],
+                                              index=pd.RangeIndex(frame['length']))
+    finally:
+        memory.close()
+        memory.unlink()
+    return frames
+
+
+def _unlink_shared_memory(name):
+    memory = shared_memory.SharedMemory(name=name)
+    memory.close()
+    memory.unlink()
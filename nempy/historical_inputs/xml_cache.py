@@ -1,6 +1,4 @@
-import xmltodict
 import pandas as pd
-import requests
 import zipfile
 import io
 import os
@@ -9,7 +7,7 @@ from pathlib import Path
 from datetime import datetime, timedelta, time
 from time import sleep
 
-pd.set_option('display.width', None)
+from nempy.historical_inputs import aemo_to_nempy_name_mapping as an
 
 
 class XMLCacheManager:
@@ -22,17 +20,45 @@ class XMLCacheManager:
 
     >>> manager = XMLCacheManager('test_nemde_cache')
 
+    To save disk space the daily zip files downloaded from NEMWeb can be kept as is, instead of being extracted. The
+    file for each interval is then read straight from the archive.
+
+    >>> manager = XMLCacheManager('test_nemde_cache', storage='zip')
+
     Parameters
     ----------
     cache_folder : str
+    storage : str
+        'extracted' (default) to store one XML file per interval, or 'zip' to store the daily archives from NEMWeb.
+        Archives recompressed with LZMA (as zip files) can also be read when storage is 'zip'.
     """
 
-    def __init__(self, cache_folder):
+    def __init__(self, cache_folder, storage='extracted'):
+        if storage not in ('extracted', 'zip'):
+            raise ValueError("storage must be 'extracted' or 'zip', not {}.".format(storage))
         self.cache_folder = cache_folder
+        self.storage = storage
         self.interval = None
         self.xml = None
+        self._archive = None
+        self._archive_path = None
         Path(cache_folder).mkdir(parents=False, exist_ok=True)
 
+    def __copy__(self):
+        # Copies, e.g. used on other threads, open their own archive handle.
+        new = self.__class__.__new__(self.__class__)
+        new.__dict__.update(self.__dict__)
+        new._archive = None
+        new._archive_path = None
+        return new
+
+    def close(self):
+        """Close the open daily archive, if one is open."""
+        if self._archive is not None:
+            self._archive.close()
+        self._archive = None
+        self._archive_path = None
+
     def populate(self, start_year, start_month, end_year, end_month, verbose=True):
         """Download data to the cache from the AEMO website. Data downloaded is inclusive of the start and end month."""
 
@@ -90,9 +116,13 @@ class XMLCacheManager:
                 raise MissingDataError(
                     'File not downloaded, check internet connection and that NEMWeb contains data for interval {}.'.format(
                         self.interval))
-        with open(self.get_file_path()) as file:
-            read = file.read()
-            self.xml = xmltodict.parse(read)
+        if self.storage == 'zip':
+            read = self._get_archive().read(self.get_file_name())
+        else:
+            with open(self.get_file_path()) as file:
+                read = file.read()
+        import xmltodict
+        self.xml = xmltodict.parse(read)
 
     def interval_inputs_in_cache(self):
         """Check if the cache contains the data for the loaded interval, primarily for debugging.
@@ -111,6 +141,9 @@ class XMLCacheManager:
         -------
         bool
         """
+        if self.storage == 'zip':
+            archive = self._get_archive()
+            return archive is not None and self.get_file_name() in archive.NameToInfo
         return os.path.exists(self.get_file_path())
 
     def get_file_path(self):
@@ -129,7 +162,11 @@ class XMLCacheManager:
 
         >>> manager.get_file_path().parts
         ('test_nemde_cache', 'NEMSPDOutputs_2018123124000.loaded')
+
+        When storage is 'zip' the path is to the daily archive containing the interval's file.
         """
+        if self.storage == 'zip':
+            return self._get_archive_path()
         return Path(self.cache_folder) / self.get_file_name()
 
     def get_file_name(self):
@@ -150,6 +187,11 @@ class XMLCacheManager:
         name = base_name.format(year=year, month=month, day=day, interval_number=interval_number)
         path_name = Path(self.cache_folder) / name
         name_OCD = name.replace('.loaded', '_OCD.loaded')
+        if self.storage == 'zip':
+            archive = self._get_archive()
+            if archive is not None and name not in archive.NameToInfo and name_OCD in archive.NameToInfo:
+                return name_OCD
+            return name
         path_name_OCD = Path(self.cache_folder) / name_OCD
         if os.path.exists(path_name):
             return name
@@ -158,18 +200,45 @@ class XMLCacheManager:
         else:
             return name
 
+    def _get_archive_path(self):
+        year, month, day = self._get_market_year_month_day_as_str()
+        name = "NemSpdOutputs_{year}{month}{day}_loaded.zip".format(year=year, month=month, day=day)
+        return Path(self.cache_folder) / name
+
+    def _get_archive(self):
+        """Get the handle to the loaded interval's daily archive, or None if the archive is not in the cache.
+
+        The handle is kept open until an interval from a different day is loaded, so the archive's central directory
+        is only read once per day.
+        """
+        archive_path = self._get_archive_path()
+        if archive_path != self._archive_path:
+            self.close()
+            if not os.path.exists(archive_path):
+                return None
+            self._archive = zipfile.ZipFile(archive_path)
+            self._archive_path = archive_path
+        return self._archive
+
     def _download_xml_from_nemweb(self):
+        import requests
         year, month, day = self._get_market_year_month_day_as_str()
         base_url = "https://www.nemweb.com.au/Data_Archive/Wholesale_Electricity/NEMDE/{year}/NEMDE_{year}_{month}/NEMDE_Market_Data/NEMDE_Files/NemSpdOutputs_{year}{month}{day}_loaded.zip"
         url = base_url.format(year=year, month=month, day=day)
         try:
             r = requests.get(url)
             z = zipfile.ZipFile(io.BytesIO(r.content))
-            z.extractall(self.cache_folder)
         except zipfile.BadZipFile:
             sleep(200)
             r = requests.get(url)
             z = zipfile.ZipFile(io.BytesIO(r.content))
+        if self.storage == 'zip':
+            archive_path = self._get_archive_path()
+            partial_path = archive_path.with_suffix('.partial')
+            with open(partial_path, 'wb') as file:
+                file.write(r.content)
+            os.replace(partial_path, archive_path)
+        else:
             z.extractall(self.cache_folder)
 
     def _get_market_year_month_day(self):
@@ -452,10 +521,8 @@ class XMLCacheManager:
                             value = 0.0
                         trades_by_unit_and_type[our_name].append(value)
         trades_by_unit_and_type = pd.DataFrame(trades_by_unit_and_type)
-        bid_type_map = dict(ENOF='ENERGY', LDOF='ENERGY', DROF='ENERGY', L5RE='LOWERREG', R5RE='RAISEREG',
-                            R5MI='RAISE5MIN', L5MI='LOWER5MIN', R60S='RAISE60SEC', L60S='LOWER60SEC', R6SE='RAISE6SEC',
-                            L6SE='LOWER6SEC', R1SE='RAISE1SEC', L1SE='LOWER1SEC')
-        trades_by_unit_and_type["BIDTYPE"] = trades_by_unit_and_type["BIDTYPE"].apply(lambda x: bid_type_map[x])
+        trades_by_unit_and_type["BIDTYPE"] = an.map_values(trades_by_unit_and_type["BIDTYPE"], an.xml_bid_type_map,
+                                                           'trade type')
         return trades_by_unit_and_type
 
     def get_unit_price_bids(self):
@@ -542,10 +609,8 @@ class XMLCacheManager:
                             value = 0.0
                         trades_by_unit_and_type[our_name].append(value)
         trades_by_unit_and_type = pd.DataFrame(trades_by_unit_and_type)
-        bid_type_map = dict(ENOF='ENERGY', LDOF='ENERGY', DROF='ENERGY', L5RE='LOWERREG', R5RE='RAISEREG',
-                            R5MI='RAISE5MIN', L5MI='LOWER5MIN', R60S='RAISE60SEC', L60S='LOWER60SEC', R6SE='RAISE6SEC',
-                            L6SE='LOWER6SEC', R1SE='RAISE1SEC', L1SE='LOWER1SEC')
-        trades_by_unit_and_type["BIDTYPE"] = trades_by_unit_and_type["BIDTYPE"].apply(lambda x: bid_type_map[x])
+        trades_by_unit_and_type["BIDTYPE"] = an.map_values(trades_by_unit_and_type["BIDTYPE"], an.xml_bid_type_map,
+                                                           'trade type')
         return trades_by_unit_and_type
 
     def get_UIGF_values(self):
@@ -1,12 +1,43 @@
+import copy
+import functools
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+
 import numpy as np
 import pandas as pd
 
 from nempy.help_functions import helper_functions as hf
 from nempy.spot_markert_backend import elastic_constraints, fcas_constraints, interconnectors as inter, \
-    market_constraints, objective_function, solver_interface, unit_constraints, variable_ids, check, \
-    dataframe_validator as dv
+    market_constraints, merit_order, model_files, objective_function, solver_interface, unit_constraints, \
+    variable_ids, check, dataframe_validator as dv
+
+
+def _flatten_frames(frames, key):
+    """Yield each pd.DataFrame in a dict of pd.DataFrames, which may be nested, with a tuple of the keys to reach it."""
+    for name, value in frames.items():
+        if isinstance(value, dict):
+            yield from _flatten_frames(value, key + (name,))
+        else:
+            yield key + (name,), value
 
-pd.set_option('display.width', None)
+
+def _dispatch_market(market, dispatch_kwargs):
+    """Dispatch a market and return it, so a market dispatched in another process can be copied back."""
+    market.dispatch(**dispatch_kwargs)
+    return market
+
+
+def _invalidates_results(func):
+    """Clear the cached dispatch results of the market when a method changes the model, which must not be released."""
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        self._check_model_not_released()
+        self._results = {}
+        return func(self, *args, **kwargs)
+    return wrapper
 
 
 # noinspection PyProtectedMember
@@ -60,9 +91,23 @@ class SpotMarket:
     Attributes
     ----------
     solver_name : str
-        The solver to use must be one of solver options of the mip-python package that is used to interface to solvers.
-        Currently the only support solvers are CBC and Gurobi, so allowed solver names are 'CBC' and 'GUROBI'. Default
-        value is CBC, CBC works out of the box after installing Nempy, but Gurobi must be installed separately.
+        The solver to use, allowed solver names are 'CBC', 'GUROBI' and 'HIGHS'. Default value is CBC, CBC works out
+        of the box after installing Nempy, but Gurobi must be installed separately. 'CBC' and 'GUROBI' are accessed
+        through the mip-python package. 'HIGHS' uses highspy, or scipy if highspy is not installed, and does not
+        support the special ordered sets used by interconnector loss models.
+
+    solver_process_pool : solver_backends.SolverProcessPool
+        If set, solves are run in the pool's worker processes, with a wall clock time limit and retries, so a solve
+        that hangs or crashes raises a SolveError instead of blocking or ending the calling process. Default None,
+        solves run in the calling process.
+
+    diagnose_infeasibility : bool
+        If True, when the model is infeasible a bounded search is run for a set of constraints that can't be
+        satisfied together, these are listed in the SolveError raised. Default False.
+
+    after_dispatch : callable
+        If set, called with the market after each dispatch, e.g. to write the results to a
+        :class:`nempy.results_store.ResultsWriter`. Default None.
 
     Raises
     ------
@@ -107,7 +152,13 @@ class SpotMarket:
         self._allowed_regulation_fcas_services = ['raise_reg', 'lower_reg']
         self._allowed_constraint_types = ['<=', '=', '>=']
         self.solver_name = 'CBC'
+        self.solver_process_pool = None
+        self.diagnose_infeasibility = False
+        self.after_dispatch = None
         self.objective_value = None
+        self._results = {}
+        self._model_released = False
+        self._categorical_result_columns = {}
 
         if 'dispatch_type' not in unit_info.columns:
             unit_info['dispatch_type'] = 'generator'
@@ -129,6 +180,7 @@ class SpotMarket:
                                           not_negative=True))
         schema.validate(unit_info)
 
+    @_invalidates_results
     def set_unit_volume_bids(self, volume_bids):
         """Creates the decision variables corresponding to unit bids.
 
@@ -253,6 +305,7 @@ class SpotMarket:
                                               not_negative=True), optional=True)
         schema.validate(volume_bids)
 
+    @_invalidates_results
     def set_unit_price_bids(self, price_bids):
         """Creates the objective function costs corresponding to energy bids.
 
@@ -374,6 +427,7 @@ class SpotMarket:
         if 'bids' not in self._decision_variables:
             raise ModelBuildError('Price bids cannot be set before setting volume bids.')
 
+    @_invalidates_results
     def set_unit_bid_capacity_constraints(self, unit_limits):
         """Creates constraints that limit unit output based on their bid in max capacity. If a unit bids in zero
         volume then a constraint is not created.
@@ -476,6 +530,7 @@ class SpotMarket:
         schema.add_column(dv.SeriesSchema(name='capacity', data_type=np.float64))
         schema.validate(unit_limits)
 
+    @_invalidates_results
     def set_unconstrained_intermitent_generation_forecast_constraint(self, unit_limits):
         """Creates constraints that limit unit output based on their forecast output.
 
@@ -571,6 +626,7 @@ class SpotMarket:
         self._constraint_to_variable_map['unit_level']['uigf_capacity'] = variable_map
         self._next_constraint_id = max(rhs_and_type['constraint_id']) + 1
 
+    @_invalidates_results
     def set_unit_ramp_up_constraints(self, ramp_details):
         """Creates constraints on unit output based on ramp up rate.
 
@@ -676,6 +732,7 @@ class SpotMarket:
         schema.add_column(dv.SeriesSchema(name='ramp_up_rate', data_type=np.float64, must_be_real_number=True))
         schema.validate(ramp_details)
 
+    @_invalidates_results
     def set_unit_ramp_down_constraints(self, ramp_details):
         """Creates constraints on unit output based on ramp down rate.
 
@@ -783,6 +840,7 @@ class SpotMarket:
                                           not_negative=True))
         schema.validate(ramp_details)
 
+    @_invalidates_results
     def set_fast_start_constraints(self, fast_start_profiles):
         """Create the constraints on fast start units dispatch, :download:`see AEMO doc <../../docs/pdfs/Fast_Start_Unit_Inflexibility_Profile_Model_October_2014.pdf>`
 
@@ -910,6 +968,7 @@ class SpotMarket:
                                           not_negative=True))
         schema.validate(fast_start_profiles)
 
+    @_invalidates_results
     def set_demand_constraints(self, demand):
         """Creates constraints that force supply to equal to demand.
 
@@ -993,6 +1052,7 @@ class SpotMarket:
         schema.add_column(dv.SeriesSchema(name='demand', data_type=np.float64, must_be_real_number=True))
         schema.validate(demand)
 
+    @_invalidates_results
     def set_fcas_requirements_constraints(self, fcas_requirements):
         """Creates constraints that force FCAS supply to equal requirements.
 
@@ -1096,6 +1156,7 @@ class SpotMarket:
                           optional=True)
         schema.validate(fcas_requirements)
 
+    @_invalidates_results
     def set_fcas_max_availability(self, fcas_max_availability):
         """Creates constraints to ensure fcas dispatch is limited to the availability specified in the FCAS trapezium.
 
@@ -1185,6 +1246,7 @@ class SpotMarket:
                                           not_negative=True))
         schema.validate(fcas_max_availability)
 
+    @_invalidates_results
     def set_joint_ramping_constraints_raise_reg(self, ramp_details):
         """Create constraints that ensure the provision of energy and fcas raise are within unit ramping capabilities.
 
@@ -1280,6 +1342,7 @@ class SpotMarket:
         self._constraint_to_variable_map['unit_level']['joint_ramping_raise_reg'] = variable_map
         self._next_constraint_id = max(rhs_and_type['constraint_id']) + 1
 
+    @_invalidates_results
     def set_joint_ramping_constraints_lower_reg(self, ramp_details):
         """Create constraints that ensure the provision of energy and fcas are within unit ramping capabilities.
 
@@ -1374,6 +1437,7 @@ class SpotMarket:
         self._constraint_to_variable_map['unit_level']['joint_ramping_lower_reg'] = variable_map
         self._next_constraint_id = max(rhs_and_type['constraint_id']) + 1
 
+    @_invalidates_results
     def set_joint_capacity_constraints(self, contingency_trapeziums):
         """Creates constraints to ensure there is adequate capacity for contingency, regulation and energy dispatch.
 
@@ -1500,6 +1564,7 @@ class SpotMarket:
         schema.add_column(dv.SeriesSchema(name='enablement_max', data_type=np.float64, must_be_real_number=True))
         schema.validate(contingency_trapeziums)
 
+    @_invalidates_results
     def set_energy_and_regulation_capacity_constraints(self, regulation_trapeziums):
         """Creates constraints to ensure there is adequate capacity for regulation and energy dispatch targets.
 
@@ -1625,6 +1690,7 @@ class SpotMarket:
         schema.add_column(dv.SeriesSchema(name='enablement_max', data_type=np.float64, must_be_real_number=True))
         schema.validate(contingency_trapeziums)
 
+    @_invalidates_results
     def set_interconnectors(self, interconnector_directions_and_limits):
         """Create lossless links between specified regions.
 
@@ -1758,6 +1824,7 @@ class SpotMarket:
                                           not_negative=True))
         schema.validate(interconnector_directions_and_limits)
 
+    @_invalidates_results
     def set_interconnector_losses(self, loss_functions, interpolation_break_points):
         """Creates linearised loss functions for interconnectors.
 
@@ -2025,6 +2092,7 @@ class SpotMarket:
         schema.add_column(dv.SeriesSchema(name='break_point', data_type=np.float64, must_be_real_number=True))
         schema.validate(interpolation_break_points)
 
+    @_invalidates_results
     def set_generic_constraints(self, generic_constraint_parameters):
         """Creates a set of generic constraints, adding the constraint type, rhs.
 
@@ -2349,6 +2417,7 @@ class SpotMarket:
         schema.add_column(dv.SeriesSchema(name='coefficient', data_type=np.float64, must_be_real_number=True))
         schema.validate(interconnector_coefficients)
 
+    @_invalidates_results
     def make_constraints_elastic(self, constraints_key, violation_cost):
         """Make a set of constraints elastic, so they can be violated at a predefined cost.
 
@@ -2485,11 +2554,14 @@ class SpotMarket:
         schema.validate(violation_cost)
 
     def get_elastic_constraints_violation_degree(self, constraints_key):
+        if self._model_released:
+            return self._results['elastic_constraints_violation_degree'].get(constraints_key, 0.0)
         if constraints_key + '_deficit' in self._decision_variables:
             return self._decision_variables[constraints_key + '_deficit']['value'].sum()
         else:
             return 0.0
 
+    @_invalidates_results
     def set_tie_break_constraints(self, cost):
         """Creates a cost that attempts to balance the energy dispatch of equally priced bids within a region.
 
@@ -2588,13 +2660,34 @@ class SpotMarket:
         self._next_constraint_id = rhs['constraint_id'].max() + 1
         self.make_constraints_elastic('tie_break', violation_cost=cost)
 
+    @_invalidates_results
     def dispatch(self, energy_market_ceiling_price=None, energy_market_floor_price=None, fcas_market_ceiling_price=None,
-                 allow_over_constrained_dispatch_re_run=False):
+                 allow_over_constrained_dispatch_re_run=False, lazy_generic_constraints=False,
+                 generic_constraint_working_set=None, presolve_generic_constraints=False, decompose=False,
+                 decomposition_workers=1, method='lp'):
         """Combines the elements of the linear program and solves to find optimal dispatch.
 
         If allow_over_constrained_dispatch_re_run is set to True then constraints will be relaxed when market ceiling
         or floor prices are violated.
 
+        If lazy_generic_constraints is set to True then the generic constraints are added to the linear program using
+        row generation. The first solve only includes the generic constraints whose sets are in
+        generic_constraint_working_set (none if not provided), the remaining generic constraints are then checked
+        against the solution and any that are violated are added and the model re-solved, this repeats until no
+        generic constraints are violated. Generic constraints never added to the linear program have their slack
+        calculated from the final solution. A good working set is the sets that were binding in the previous dispatch
+        interval, i.e. the sets with zero slack.
+
+        If presolve_generic_constraints is set to True then generic constraints that can never be violated given the
+        bounds on the decision variables are removed before the linear program is built, along with their deficit
+        variables. The slack of removed constraints is calculated from the optimal solution.
+
+        If decompose is set to True then the linear program is split into independent components, sets of variables
+        that share no constraints, and each component is solved as a separate, smaller, problem. For example, regions
+        connected only by interconnectors limited to zero flow, and not sharing generic constraints, are solved
+        separately. Components can be solved in parallel threads by setting decomposition_workers above 1. Results
+        are the same as for the combined problem.
+
         Examples
         --------
         Define the unit information data set needed to initialise the market.
@@ -2659,6 +2752,27 @@ class SpotMarket:
           region  price
         0    NSW  130.0
 
+        Parameters
+        ----------
+        energy_market_ceiling_price : float
+        energy_market_floor_price : float
+        fcas_market_ceiling_price : float
+        allow_over_constrained_dispatch_re_run : bool
+        lazy_generic_constraints : bool
+            Use row generation to add generic constraints to the linear program, default False.
+        generic_constraint_working_set : list[str]
+            The generic constraint sets to include in the first solve when lazy_generic_constraints is True.
+        presolve_generic_constraints : bool
+            Remove generic constraints that can never be violated before solving, default False.
+        decompose : bool
+            Solve independent components of the linear program separately, default False.
+        decomposition_workers : int
+            The number of threads used to solve components when decompose is True, default 1.
+        method : str
+            'lp' to solve the linear program, 'merit_order' to dispatch bids in price order without a linear program,
+            or 'auto' to use merit order dispatch when the market only has energy bids, demand, unit capacity and tie
+            break constraints, default 'lp'.
+
         Returns
         -------
         None
@@ -2666,8 +2780,22 @@ class SpotMarket:
         Raises
         ------
             ModelBuildError
-                If a model build process is incomplete, i.e. there are energy bids but not energy demand set.
+                If a model build process is incomplete, i.e. there are energy bids but not energy demand set, or if
+                method is 'merit_order' and the market has components that merit order dispatch does not support.
         """
+        if method not in ['lp', 'merit_order', 'auto']:
+            raise ValueError("method must be one of 'lp', 'merit_order' or 'auto'.")
+
+        if method == 'merit_order' and not self._merit_order_dispatch_supported():
+            raise check.ModelBuildError('Merit order dispatch only supports energy bids, demand, unit bid capacity '
+                                        'and tie break constraints.')
+
+        if method in ['merit_order', 'auto'] and self._merit_order_dispatch_supported():
+            self._dispatch_in_merit_order()
+            if self.after_dispatch is not None:
+                self.after_dispatch(self)
+            return
+
         if allow_over_constrained_dispatch_re_run:
             if (energy_market_ceiling_price is None or energy_market_floor_price is None or
                     fcas_market_ceiling_price is None):
@@ -2675,152 +2803,95 @@ class SpotMarket:
                                     be provided for energy_market_ceiling_price, energy_market_floor_price, and \n
                                     fcas_market_ceiling_price.""")
 
-        # Create a data frame containing all fully defined components of the constraint matrix lhs. If there are none
-        # then just create a place holder empty pd.DataFrame.
-        if len(self._lhs_coefficients.values()) > 0:
-            constraints_lhs = pd.concat(list(self._lhs_coefficients.values()))
-        else:
-            constraints_lhs = pd.DataFrame()
-
-        # Get a pd.DataFrame mapping the generic constraint sets to their constraint ids.
-        generic_constraint_ids = solver_interface.create_mapping_of_generic_constraint_sets_to_constraint_ids(
-            self._constraints_rhs_and_type, self._market_constraints_rhs_and_type)
-
-        # If there are any generic constraints create their lhs definitions.
-        if generic_constraint_ids is not None:
-            generic_lhs = []
-            # If units have been added to the generic lhs then find the relevant variable ids and map them to the
-            # constraint.
-            if 'unit' in self._generic_constraint_lhs and 'bids' in self._variable_to_constraint_map['unit_level']:
-                generic_constraint_units = self._generic_constraint_lhs['unit']
-                unit_bids_to_constraint_map = self._variable_to_constraint_map['unit_level']['bids']
-                unit_lhs = solver_interface.create_unit_level_generic_constraint_lhs(generic_constraint_units,
-                                                                                     generic_constraint_ids,
-                                                                                     unit_bids_to_constraint_map)
-                generic_lhs.append(unit_lhs)
-            # If regions have been added to the generic lhs then find the relevant variable ids and map them to the
-            # constraint.
-            if 'region' in self._generic_constraint_lhs and 'bids' in self._variable_to_constraint_map['regional']:
-                generic_constraint_region = self._generic_constraint_lhs['region']
-                unit_bids_to_constraint_map = self._variable_to_constraint_map['regional']['bids']
-                regional_lhs = solver_interface.create_region_level_generic_constraint_lhs(generic_constraint_region,
-                                                                                           generic_constraint_ids,
-                                                                                           unit_bids_to_constraint_map)
-                generic_lhs.append(regional_lhs)
-            # If interconnectors have been added to the generic lhs then find the relevant variable ids and map them
-            # to the constraint.
-            if 'interconnectors' in self._generic_constraint_lhs and 'interconnectors' in self._decision_variables:
-                generic_constraint_interconnectors = self._generic_constraint_lhs['interconnectors']
-                interconnector_bids_to_constraint_map = self._decision_variables['interconnectors']
-                interconnector_lhs = solver_interface.create_interconnector_generic_constraint_lhs(
-                    generic_constraint_interconnectors, generic_constraint_ids, interconnector_bids_to_constraint_map)
-                generic_lhs.append(interconnector_lhs)
-            # Add the generic lhs definitions the cumulative lhs pd.DataFrame.
-            constraints_lhs = pd.concat([constraints_lhs] + generic_lhs)
-
-        # If there are constraints that have been defined on a regional basis then create the constraints lhs
-        # definition by mapping to all the variables that have been defined for the corresponding region and service.
-        if len(self._constraint_to_variable_map['regional']) > 0:
-            constraints = pd.concat(list(self._constraint_to_variable_map['regional'].values()))
-            decision_variables = pd.concat(list(self._variable_to_constraint_map['regional'].values()))
-            regional_constraints_lhs = solver_interface.create_lhs(constraints, decision_variables,
-                                                                   ['region', 'service'])
-            # Add the lhs definitions the cumulative lhs pd.DataFrame.
-            constraints_lhs = pd.concat([constraints_lhs, regional_constraints_lhs])
-
-        # If there are constraints that have been defined on a unit basis then create the constraints lhs
-        # definition by mapping to all the variables that have been defined for the corresponding unit and service.
-        if len(self._constraint_to_variable_map['unit_level']) > 0:
-            constraints = pd.concat(list(self._constraint_to_variable_map['unit_level'].values()))
-            decision_variables = pd.concat(list(self._variable_to_constraint_map['unit_level'].values()))
-            unit_constraints_lhs = solver_interface.create_lhs(constraints, decision_variables, ['unit', 'service'])
-            # Add the lhs definitions the cumulative lhs pd.DataFrame.
-            constraints_lhs = pd.concat([constraints_lhs, unit_constraints_lhs])
+        constraints_lhs = self._create_constraints_lhs()
+        variable_definitions = self._create_variable_definitions()
+        objective_function_definition = self._create_objective_function_definition()
+        constraints_rhs_and_type = self._create_constraints_rhs_and_type()
+
+        # Remove generic constraints that can never be violated, and the deficit variables that relax them.
+        redundant_ids, removed_variable_ids = [], []
+        if presolve_generic_constraints and 'generic' in self._constraints_rhs_and_type:
+            redundant_ids = solver_interface.find_redundant_constraints(
+                constraints_lhs, self._constraints_rhs_and_type['generic'], variable_definitions)
+            if 'generic_deficit' in self._lhs_coefficients:
+                deficit_lhs = self._lhs_coefficients['generic_deficit']
+                removed_variable_ids = deficit_lhs[deficit_lhs['constraint_id'].isin(redundant_ids)]['variable_id']
+            variable_definitions = variable_definitions[~variable_definitions['variable_id'].isin(removed_variable_ids)]
+            redundant_lhs = constraints_lhs[constraints_lhs['constraint_id'].isin(redundant_ids)]
+            constraints_lhs = constraints_lhs[~constraints_lhs['constraint_id'].isin(redundant_ids)]
 
         # Create the interface to the solver.
-        si = solver_interface.InterfaceToSolver(self.solver_name)
-        if self._decision_variables:
-            # Combine dictionary of pd.DataFrames into a single pd.DataFrame for processing by the interface.
-            variable_definitions = pd.concat(self._decision_variables)
-            si.add_variables(variable_definitions)
+        if decompose:
+            si = solver_interface.DecomposedInterfaceToSolver(self.solver_name, decomposition_workers,
+                                                              self.solver_process_pool, self.diagnose_infeasibility)
         else:
-            raise check.ModelBuildError('The market could not be dispatch because no variables have been created')
+            si = solver_interface.InterfaceToSolver(self.solver_name, self.solver_process_pool,
+                                                    self.diagnose_infeasibility)
+        si.add_variables(variable_definitions)
 
         # If Costs have been defined for bids or constraints then add an objective function.
-        if self._objective_function_components:
-            # Combine components of objective function into a single pd.DataFrame
-            objective_function_definition = pd.concat(self._objective_function_components)
+        if objective_function_definition is not None:
+            objective_function_definition = objective_function_definition[
+                ~objective_function_definition['variable_id'].isin(removed_variable_ids)]
             si.add_objective_function(objective_function_definition)
 
-        # Collect all constraint rhs and type definitions into a single pd.DataFrame.
-        constraints_rhs_and_type = []
-        if self._constraints_rhs_and_type:
-            constraints_rhs_and_type.append(pd.concat(self._constraints_rhs_and_type))
-        if self._market_constraints_rhs_and_type:
-            constraints_rhs_and_type.append(pd.concat(self._market_constraints_rhs_and_type))
-        if self._constraints_dynamic_rhs_and_type:
-            constraints_dynamic_rhs_and_type = pd.concat(self._constraints_dynamic_rhs_and_type)
-            # Create the rhs for the dynamic constraints.
-            constraints_dynamic_rhs_and_type['rhs'] = constraints_dynamic_rhs_and_type. \
-                apply(lambda x: si.variables[x['rhs_variable_id']], axis=1)
-            constraints_rhs_and_type.append(constraints_dynamic_rhs_and_type)
-
-        if len(constraints_rhs_and_type) > 0:
-            constraints_rhs_and_type = pd.concat(constraints_rhs_and_type)
+        # Place holders for generic constraints not yet added to the model when using row generation.
+        lazy_lhs, lazy_rhs_and_type = None, None
+
+        if constraints_rhs_and_type is not None:
+            is_redundant = constraints_rhs_and_type['constraint_id'].isin(redundant_ids)
+            redundant_rhs_and_type = constraints_rhs_and_type[is_redundant]
+            constraints_rhs_and_type = constraints_rhs_and_type[~is_redundant]
+            if lazy_generic_constraints and 'generic' in self._constraints_rhs_and_type:
+                generic_constraints = self._constraints_rhs_and_type['generic']
+                if generic_constraint_working_set is None:
+                    generic_constraint_working_set = []
+                lazy_ids = generic_constraints[~generic_constraints['set'].isin(generic_constraint_working_set)]
+                lazy_ids = lazy_ids['constraint_id']
+                is_lazy_lhs = constraints_lhs['constraint_id'].isin(lazy_ids)
+                is_lazy_rhs = constraints_rhs_and_type['constraint_id'].isin(lazy_ids)
+                lazy_lhs = constraints_lhs[is_lazy_lhs]
+                lazy_rhs_and_type = constraints_rhs_and_type[is_lazy_rhs]
+                constraints_lhs = constraints_lhs[~is_lazy_lhs]
+                constraints_rhs_and_type = constraints_rhs_and_type[~is_lazy_rhs]
+                if decompose:
+                    # Lazy constraints may be added after decomposition, so their variables must share a component.
+                    si.link_variables(lazy_lhs)
             si.add_constraints(constraints_lhs, constraints_rhs_and_type)
 
         # If interconnectors with losses are being used, create special ordered sets for modelling losses.
-        if 'interpolation_weights' in self._decision_variables:
-            special_ordered_sets = self._decision_variables['interpolation_weights']
-            si.add_sos_type_2(special_ordered_sets, sos_id_columns=['interconnector', 'link'],
-                              position_column='loss_segment')
-
-        if 'interconnectors' in self._decision_variables:
-            special_ordered_sets = self._decision_variables['interconnectors']
-            special_ordered_sets = special_ordered_sets[
-                special_ordered_sets['interconnector'] != special_ordered_sets['link']]
-            if not special_ordered_sets.empty:
-                special_ordered_sets = special_ordered_sets.rename(columns={'interconnector': 'sos_id'})
-                si.add_sos_type_1(special_ordered_sets)
+        self._add_special_ordered_sets(si)
 
         si.optimize()
 
+        if lazy_rhs_and_type is not None:
+            lazy_lhs, lazy_rhs_and_type = self._add_violated_lazy_constraints(si, lazy_lhs, lazy_rhs_and_type)
+
         # Find the slack in constraints.
-        if self._constraints_rhs_and_type:
-            for constraint_group in self._constraints_rhs_and_type:
-                self._constraints_rhs_and_type[constraint_group]['slack'] = \
-                    si.get_slack_in_constraints(self._constraints_rhs_and_type[constraint_group])
-        if self._market_constraints_rhs_and_type:
-            for constraint_group in self._market_constraints_rhs_and_type:
-                self._market_constraints_rhs_and_type[constraint_group]['slack'] = \
-                    si.get_slack_in_constraints(self._market_constraints_rhs_and_type[constraint_group])
-        if self._constraints_dynamic_rhs_and_type:
-            for constraint_group in self._constraints_dynamic_rhs_and_type:
-                self._constraints_dynamic_rhs_and_type[constraint_group]['slack'] = \
-                    si.get_slack_in_constraints(self._constraints_dynamic_rhs_and_type[constraint_group])
+        self._save_slack_in_constraints(si)
 
         # Get decision variable optimal values
-        for var_group in self._decision_variables:
-            self._decision_variables[var_group]['value'] = \
-                si.get_optimal_values_of_decision_variables(self._decision_variables[var_group])
+        self._save_optimal_values_of_decision_variables(si, variables_not_in_model=removed_variable_ids)
+
+        # Generic constraints never added to the model get their slack from the optimal values.
+        if lazy_rhs_and_type is not None:
+            self._set_slack_of_generic_constraints_not_in_model(lazy_lhs, lazy_rhs_and_type)
+        if len(redundant_ids) > 0:
+            self._set_slack_of_generic_constraints_not_in_model(redundant_lhs, redundant_rhs_and_type)
 
         # Models with interconnectors use binary variables, the model needs to be linearised to allow for shadow prices
         # to be accessed and used to price constraints.
         if 'interconnector_losses' in self._decision_variables:
-            si = self._get_linear_model(si)
-        si.linear_mip_model.optimize()
+            si.disable_variables(self._get_variables_to_disable_in_linear_model())
+        si.optimize_linear()
 
-        for var_group in self._decision_variables:
-            self._decision_variables[var_group]['value_lin'] = \
-                si.get_optimal_values_of_decision_variables_lin(self._decision_variables[var_group])
+        if lazy_rhs_and_type is not None:
+            self._add_violated_lazy_constraints(si, lazy_lhs, lazy_rhs_and_type, linear=True)
+
+        self._save_optimal_values_of_decision_variables(si, linear=True, variables_not_in_model=removed_variable_ids)
 
         # If there are market constraints then calculate their associated prices.
-        if self._market_constraints_rhs_and_type:
-            for constraint_group in self._market_constraints_rhs_and_type:
-                constraints_to_price = list(self._market_constraints_rhs_and_type[constraint_group]['constraint_id'])
-                prices = si.price_constraints(constraints_to_price)
-                self._market_constraints_rhs_and_type[constraint_group]['price'] = \
-                    self._market_constraints_rhs_and_type[constraint_group]['constraint_id'].map(prices)
+        self._save_market_constraint_prices(si)
 
         if allow_over_constrained_dispatch_re_run:
             fcas_ceiling_price_violated = False
@@ -2866,269 +2937,1338 @@ class SpotMarket:
                 variables_and_cons['adjuster'] = (variables_and_cons['value'] + 0.01) * \
                                                  variables_and_cons['coefficient'] * -1
                 variables_and_cons.apply(lambda x: si.update_rhs(x['constraint_id'], x['adjuster']), axis=1)
-                si.linear_mip_model.optimize()
+                si.optimize_linear()
 
                 # If there are market constraints then calculate their associated prices.
-                if self._market_constraints_rhs_and_type:
-                    for constraint_group in self._market_constraints_rhs_and_type:
-                        constraints_to_price = list(
-                            self._market_constraints_rhs_and_type[constraint_group]['constraint_id'])
-                        prices = si.price_constraints(constraints_to_price)
-                        self._market_constraints_rhs_and_type[constraint_group]['price'] = \
-                            self._market_constraints_rhs_and_type[constraint_group]['constraint_id'].map(prices)
-
-        self.objective_value = si.mip_model.objective_value
-
-    def _get_linear_model(self, si):
-        self._remove_unused_interpolation_weights(si)
-        self._disable_unused_link_pair(si)
-        return si
-
-    def _disable_unused_link_pair(self, si):
-        inter_vars = self._decision_variables['interconnectors']
-        inter_vars = inter_vars[inter_vars['interconnector'] != inter_vars['link']]
-        inter_vars_unused = inter_vars[inter_vars['value'] == 0.0]
-        si.disable_variables(inter_vars_unused)
-
-    def _remove_unused_interpolation_weights(self, si):
-        vars = pd.merge(self._decision_variables['interconnectors'].loc[:, ['interconnector', 'link', 'value']],
-                        self._decision_variables['interpolation_weights'].loc[:, ['interconnector', 'link',
-                                                                                  'break_point', 'variable_id']],
-                        on=['interconnector', 'link'])
-        vars['distance'] = (vars['value'] - vars['break_point']).abs()
+                self._save_market_constraint_prices(si)
 
-        def not_closest_three(df):
-            df = df.sort_values('distance')
-            df = df.iloc[3:, :]
-            return df
+        self.objective_value = si.objective_value
+        if self.after_dispatch is not None:
+            self.after_dispatch(self)
 
-        vars_to_remove = vars.groupby(['interconnector', 'link'], as_index=False).apply(not_closest_three)
-        si.disable_variables(vars_to_remove.loc[:, ['variable_id']])
+    async def dispatch_async(self, executor=None, **kwargs):
+        """Dispatch the market from asyncio code, building and solving the linear program on an executor.
 
-    def get_constraint_set_names(self):
-        return list(self._market_constraints_rhs_and_type.keys()) + list(self._constraints_rhs_and_type.keys())
+        The event loop is not blocked while the market is dispatched, so a server can keep handling requests. By default
+        the dispatch runs on the event loop's default thread pool, or executor can be any concurrent.futures executor.
+        With a ProcessPoolExecutor the market is pickled, dispatched in a worker process, and the results copied back
+        to this market, so the market can't have a solver_process_pool. Threads can only solve in parallel when models
+        have no integer variables or special ordered sets (i.e. no interconnector losses), as CBC is not thread safe,
+        alternatively set solver_process_pool so each thread's solve runs in a separate process.
 
-    def get_unit_dispatch(self):
-        """Retrieves the energy dispatch for each unit.
+        If the awaiting task is cancelled before the dispatch starts the dispatch never runs, if it has started it
+        finishes in the background, and the market shouldn't be used until it has. To limit the number of dispatches
+        in flight use an :class:`AsyncDispatcher`.
 
         Examples
         --------
-        Define the unit information data set needed to initialise the market.
+        Define a market with two units and three bid bands, as in the :meth:`dispatch` example.
 
         >>> unit_info = pd.DataFrame({
         ...     'unit': ['A', 'B'],
         ...     'region': ['NSW', 'NSW']})
 
-        Initialise the market instance.
-
         >>> market = SpotMarket(market_regions=['NSW'],
         ...                     unit_info=unit_info)
 
-        Define a set of bids, in this example we have two units called A and B, with three bid bands.
-
         >>> volume_bids = pd.DataFrame({
         ...     'unit': ['A', 'B'],
         ...     '1': [20.0, 50.0],
         ...     '2': [20.0, 30.0],
         ...     '3': [5.0, 10.0]})
 
-        Create energy unit bid decision variables.
-
         >>> market.set_unit_volume_bids(volume_bids)
 
-        Define a set of prices for the bids.
-
         >>> price_bids = pd.DataFrame({
         ...     'unit': ['A', 'B'],
         ...     '1': [50.0, 100.0],
         ...     '2': [100.0, 130.0],
         ...     '3': [100.0, 150.0]})
 
-        Create the objective function components corresponding to the the energy bids.
-
         >>> market.set_unit_price_bids(price_bids)
 
-        Define a demand level in each region.
-
         >>> demand = pd.DataFrame({
         ...     'region': ['NSW'],
         ...     'demand': [100.0]})
 
-        Create unit capacity based constraints.
-
         >>> market.set_demand_constraints(demand)
 
-        Call the dispatch method.
+        Dispatch the market from a coroutine.
 
-        >>> market.dispatch()
+        >>> import asyncio
 
-        Now the market dispatch can be retrieved.
+        >>> asyncio.run(market.dispatch_async())
 
         >>> print(market.get_unit_dispatch())
           unit service  dispatch
         0    A  energy      45.0
         1    B  energy      55.0
 
+        Parameters
+        ----------
+        executor : concurrent.futures.Executor
+            The executor to dispatch on, default None, the event loop's default executor.
+        **kwargs
+            Keyword arguments passed to :meth:`dispatch`.
+
         Returns
         -------
-        pd.DataFrame
-
-        Raises
-        ------
-            ModelBuildError
-                If a model build process is incomplete, i.e. there are energy bids but not energy demand set.
+        None
         """
-        dispatch = self._decision_variables['bids'].loc[:, ['unit', 'service', 'value']]
-        dispatch.columns = ['unit', 'service', 'dispatch']
-        return dispatch.groupby(['unit', 'service'], as_index=False).sum()
+        import asyncio
+        loop = asyncio.get_running_loop()
+        dispatched = await loop.run_in_executor(executor, _dispatch_market, self, kwargs)
+        if dispatched is not self:
+            self.__dict__.update(dispatched.__dict__)
 
-    def get_energy_prices(self):
-        """Retrieves the energy price in each market region.
+    def dispatch_scenarios(self, scenarios, workers=1):
+        """Dispatch the market under a number of scenarios, each a set of changes to the market's linear program.
 
-        Energy prices are the shadow prices of the demand constraint in each market region.
+        The linear program is built once, then for each scenario the changes are applied, the model is re-solved,
+        the results recorded, and the changes undone. This avoids rebuilding the market and model for studies that
+        dispatch the same interval many times with small changes. Changes are given using the ids of the existing
+        variables and constraints, or by region for demand. The market's own results are not changed.
+
+        Scenarios can be split between a number of worker processes by setting workers above 1, each process builds
+        its own copy of the model. Processes are used rather than threads because CBC is not safe to run in parallel
+        threads for models with integer variables or special ordered sets.
 
         Examples
         --------
-        Define the unit information data set needed to initialise the market.
+        Define a market with two units and three bid bands, as in the :meth:`dispatch` example.
 
         >>> unit_info = pd.DataFrame({
         ...     'unit': ['A', 'B'],
         ...     'region': ['NSW', 'NSW']})
 
-        Initialise the market instance.
-
         >>> market = SpotMarket(market_regions=['NSW'],
         ...                     unit_info=unit_info)
 
-        Define a set of bids, in this example we have two units called A and B, with three bid bands.
-
         >>> volume_bids = pd.DataFrame({
         ...     'unit': ['A', 'B'],
         ...     '1': [20.0, 50.0],
         ...     '2': [20.0, 30.0],
         ...     '3': [5.0, 10.0]})
 
-        Create energy unit bid decision variables.
-
         >>> market.set_unit_volume_bids(volume_bids)
 
-        Define a set of prices for the bids.
-
         >>> price_bids = pd.DataFrame({
         ...     'unit': ['A', 'B'],
         ...     '1': [50.0, 100.0],
         ...     '2': [100.0, 130.0],
         ...     '3': [100.0, 150.0]})
 
-        Create the objective function components corresponding to the the energy bids.
-
         >>> market.set_unit_price_bids(price_bids)
 
-        Define a demand level in each region.
-
         >>> demand = pd.DataFrame({
         ...     'region': ['NSW'],
         ...     'demand': [100.0]})
 
-        Create unit capacity based constraints.
-
         >>> market.set_demand_constraints(demand)
 
-        Call the dispatch method.
+        Define two scenarios, one with higher demand, and one where the variable for unit A's second bid band, which
+        has a variable_id of 1, has its upper bound reduced.
 
-        >>> market.dispatch()
+        >>> scenarios = {
+        ...     'high_demand': {'demand': pd.DataFrame({'region': ['NSW'], 'demand': [110.0]})},
+        ...     'less_A': {'bounds': pd.DataFrame({'variable_id': [1], 'lower_bound': [0.0], 'upper_bound': [10.0]})}}
 
-        Now the market prices can be retrieved.
+        >>> results = market.dispatch_scenarios(scenarios)
 
-        >>> print(market.get_energy_prices())
-          region  price
-        0    NSW  130.0
+        >>> print(results['unit_dispatch'])
+              scenario unit service  dispatch
+        0  high_demand    A  energy      45.0
+        1  high_demand    B  energy      65.0
+        2       less_A    A  energy      35.0
+        3       less_A    B  energy      65.0
 
-        Returns
-        -------
-        pd.DateFrame
+        >>> print(results['energy_prices'])
+              scenario region  price
+        0  high_demand    NSW  130.0
+        1       less_A    NSW  130.0
 
-        Raises
-        ------
-            ModelBuildError
-                If a model build process is incomplete, i.e. there are energy bids but not energy demand set.
-        """
-        prices = self._market_constraints_rhs_and_type['demand'].loc[:, ['region', 'price']]
-        return prices
+        Parameters
+        ----------
+        scenarios : dict[str, dict[str, pd.DataFrame]]
+            The scenarios to dispatch, keyed by scenario name. Each scenario is a dict that can contain the following
+            pd.DataFrames.
 
-    def get_fcas_prices(self):
-        """Retrives the price associated with each set of FCAS requirement constraints.
+            bounds, new variable bounds.
+
+            ===========  ================================================
+            Columns:     Description:
+            variable_id  the id of the variable (as `int`)
+            lower_bound  the new lower bound (as `np.float64`)
+            upper_bound  the new upper bound (as `np.float64`)
+            ===========  ================================================
+
+            rhs, new constraint rhs values.
+
+            =============  ================================================
+            Columns:       Description:
+            constraint_id  the id of the constraint (as `int`)
+            rhs            the new rhs value (as `np.float64`)
+            =============  ================================================
+
+            costs, new objective function costs.
+
+            ===========  ================================================
+            Columns:     Description:
+            variable_id  the id of the variable (as `int`)
+            cost         the new cost of the variable (as `np.float64`)
+            ===========  ================================================
+
+            demand, new regional demand.
+
+            ========  ================================================
+            Columns:  Description:
+            region    unique identifier of a region (as `str`)
+            demand    the new demand in the region, in MW (as `np.float64`)
+            ========  ================================================
+
+        workers : int
+            The number of processes used to dispatch scenarios, default 1.
 
         Returns
         -------
-        pd.DateFrame
-        """
-        prices = pd.merge(
-            self._constraint_to_variable_map['regional']['fcas'].loc[:, ['service', 'region', 'constraint_id']],
-            self._market_constraints_rhs_and_type['fcas'].loc[:, ['set', 'price', 'constraint_id']], on='constraint_id')
-        prices = prices.groupby(['region', 'service'], as_index=False).aggregate({'price': 'sum'})
-        return prices
+        dict[str, pd.DataFrame]
+            The results of each scenario stacked into one pd.DataFrame per result type, with the column scenario added
+            to the results of :meth:`get_unit_dispatch`, and where the market has them, :meth:`get_energy_prices`,
+            :meth:`get_fcas_prices` and :meth:`get_interconnector_flows`. Keys are 'unit_dispatch',
+            'energy_prices', 'fcas_prices' and 'interconnector_flows'.
 
-    def get_interconnector_flows(self):
-        """Retrieves the  flows for each interconnector.
+        Raises
+        ------
+            ValueError
+                If a scenario contains an unknown type of change, or a variable or constraint id not in the model.
+        """
+        names = list(scenarios)
+        if workers > 1 and len(names) > 1:
+            chunks = [chunk for chunk in np.array_split(np.arange(len(names)), workers) if len(chunk) > 0]
+            chunks = [{names[i]: scenarios[names[i]] for i in chunk} for chunk in chunks]
+            with ProcessPoolExecutor(max_workers=len(chunks)) as executor:
+                chunk_results = list(executor.map(self.dispatch_scenarios, chunks))
+            return {result: pd.concat([chunk[result] for chunk in chunk_results], ignore_index=True)
+                    for result in chunk_results[0]}
+
+        # Results are saved into the market's pd.DataFrames, so a copy is used to leave this market unchanged.
+        market = copy.deepcopy(self)
+        si, variable_definitions, objective_function_definition, constraints_rhs_and_type = \
+            market._build_model_for_re_solving()
+
+        base_bounds = variable_definitions.loc[:, ['variable_id', 'lower_bound', 'upper_bound']]
+        base_bounds = base_bounds.set_index('variable_id')
+        base_costs = pd.Series(0.0, index=base_bounds.index)
+        if objective_function_definition is not None:
+            base_costs[objective_function_definition['variable_id'].to_numpy()] = \
+                objective_function_definition['cost'].to_numpy()
+        base_rhs = pd.Series(dtype=float)
+        if constraints_rhs_and_type is not None:
+            base_rhs = constraints_rhs_and_type.set_index('constraint_id')['rhs']
+
+        result_getters = {'unit_dispatch': market.get_unit_dispatch}
+        if 'demand' in market._market_constraints_rhs_and_type:
+            result_getters['energy_prices'] = market.get_energy_prices
+        if 'fcas' in market._market_constraints_rhs_and_type:
+            result_getters['fcas_prices'] = market.get_fcas_prices
+        if 'interconnectors' in market._decision_variables:
+            result_getters['interconnector_flows'] = market.get_interconnector_flows
+        results = {result: [] for result in result_getters}
+
+        for name, changes in scenarios.items():
+            bounds, rhs, costs = market._get_scenario_changes(name, changes, base_bounds, base_rhs)
+            si.set_variable_bounds(bounds)
+            si.set_rhs(rhs)
+            si.set_objective_coefficients(costs)
+
+            disabled_variables = market._re_solve_model(si)
+
+            for result, getter in result_getters.items():
+                scenario_result = getter()
+                scenario_result.insert(0, 'scenario', name)
+                results[result].append(scenario_result)
+
+            # Undo the scenario's changes, and the variables disabled in the linear model, before the next scenario.
+            changed_variables = np.union1d(bounds['variable_id'], disabled_variables['variable_id'])
+            si.set_variable_bounds(base_bounds.loc[changed_variables].reset_index())
+            si.set_rhs(pd.DataFrame({'constraint_id': rhs['constraint_id'],
+                                     'rhs': base_rhs.loc[rhs['constraint_id']].to_numpy()}))
+            si.set_objective_coefficients(pd.DataFrame({'variable_id': costs['variable_id'],
+                                                        'cost': base_costs.loc[costs['variable_id']].to_numpy()}))
+
+        return {result: pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+                for result, frames in results.items()}
+
+    def sweep_demand(self, region, min_demand, max_demand, tolerance=1e-6):
+        """Find the price in a region as a function of its demand, i.e. the region's supply curve.
+
+        Rather than dispatching the market at many demand levels, the breakpoints of the supply curve are found
+        directly. The total cost of dispatch is a convex piecewise linear function of demand, with the regional price
+        as its slope. For an interval of demand, the demand where the tangents at each end intersect is dispatched, if
+        the cost there lies on the tangents it is the only breakpoint in the interval, otherwise both sides are searched
+        again. The model is built once and re-solved with a new demand each time, so the curve takes roughly two solves
+        per segment, plus two solves per segment to find its marginal unit. The curve is exact for linear programs, for
+        markets with interconnector losses, which use integer variables, breakpoints may be missed.
+
+        The market's own results are not changed.
 
         Examples
         --------
-        Define the unit information data set needed to initialise the market.
+        Define a market with two units and three bid bands.
 
         >>> unit_info = pd.DataFrame({
         ...     'unit': ['A', 'B'],
         ...     'region': ['NSW', 'NSW']})
 
-        Initialise the market instance.
-
-        >>> market = SpotMarket(market_regions=['NSW', 'VIC'],
+        >>> market = SpotMarket(market_regions=['NSW'],
         ...                     unit_info=unit_info)
 
-        Define a set of bids, in this example we have just one unit that can provide 100 MW in NSW.
-
         >>> volume_bids = pd.DataFrame({
-        ...     'unit': ['A'],
-        ...     '1': [100.0]})
-
-        Create energy unit bid decision variables.
+        ...     'unit': ['A', 'B'],
+        ...     '1': [20.0, 50.0],
+        ...     '2': [20.0, 30.0],
+        ...     '3': [5.0, 10.0]})
 
         >>> market.set_unit_volume_bids(volume_bids)
 
-        Define a set of prices for the bids.
-
         >>> price_bids = pd.DataFrame({
-        ...     'unit': ['A'],
-        ...     '1': [80.0]})
-
-        Create the objective function components corresponding to the the energy bids.
+        ...     'unit': ['A', 'B'],
+        ...     '1': [50.0, 80.0],
+        ...     '2': [100.0, 130.0],
+        ...     '3': [120.0, 150.0]})
 
         >>> market.set_unit_price_bids(price_bids)
 
-        Define a demand level in each region, no power is required in NSW and 90.0 MW is required in VIC.
-
         >>> demand = pd.DataFrame({
-        ...     'region': ['NSW', 'VIC'],
-        ...     'demand': [0.0, 90.0]})
-
-        Create unit capacity based constraints.
+        ...     'region': ['NSW'],
+        ...     'demand': [100.0]})
 
         >>> market.set_demand_constraints(demand)
 
-        Define a an interconnector between NSW and VIC so generator can A can be used to meet demand in VIC.
+        Find the supply curve between 10 MW and 130 MW of demand.
 
-        >>> interconnector = pd.DataFrame({
-        ...     'interconnector': ['inter_one'],
-        ...     'to_region': ['VIC'],
-        ...     'from_region': ['NSW'],
-        ...     'max': [100.0],
-        ...     'min': [-100.0]})
+        >>> print(market.sweep_demand('NSW', 10.0, 130.0))
+          region  demand_start  demand_end  price marginal_unit
+        0    NSW          10.0        20.0   50.0             A
+        1    NSW          20.0        70.0   80.0             B
+        2    NSW          70.0        90.0  100.0             A
+        3    NSW          90.0        95.0  120.0             A
+        4    NSW          95.0       125.0  130.0             B
+        5    NSW         125.0       130.0  150.0             B
 
-        Create the interconnector.
+        Parameters
+        ----------
+        region : str
+            The region whose demand is changed.
+        min_demand : float
+            The lowest demand in the curve, in MW.
+        max_demand : float
+            The highest demand in the curve, in MW.
+        tolerance : float
+            The tolerance used when comparing prices and costs, default 1e-6.
 
-        >>> market.set_interconnectors(interconnector)
+        Returns
+        -------
+        pd.DataFrame
 
-        Call the dispatch method.
+            =============  ================================================================
+            Columns:       Description:
+            region         unique identifier of a market region (as `str`)
+            demand_start   the demand at the start of the segment, in MW (as `np.float64`)
+            demand_end     the demand at the end of the segment, in MW (as `np.float64`)
+            price          the price in the region over the segment, in $/MW/h (as `np.float64`)
+            marginal_unit  the unit whose dispatch changes most with demand over the \n
+                           segment (as `str`)
+            =============  ================================================================
+
+        Raises
+        ------
+            ModelBuildError
+                If the market has no demand constraints.
+            ValueError
+                If the region has no demand constraint, if max_demand is not greater than min_demand, or if the market
+                cannot be dispatched at a demand in the range.
+        """
+        if 'demand' not in self._market_constraints_rhs_and_type:
+            raise check.ModelBuildError('Demand constraints must be set before sweeping demand.')
+        demand_constraints = self._market_constraints_rhs_and_type['demand']
+        if region not in demand_constraints['region'].to_numpy():
+            raise ValueError('Region {} has no demand constraint.'.format(region))
+        if max_demand <= min_demand:
+            raise ValueError('max_demand must be greater than min_demand.')
+        constraint_id = demand_constraints.loc[demand_constraints['region'] == region, 'constraint_id'].iloc[0]
+
+        # Results are saved into the market's pd.DataFrames, so a copy is used to leave this market unchanged.
+        market = copy.deepcopy(self)
+        si, variable_definitions, _, _ = market._build_model_for_re_solving()
+        base_bounds = variable_definitions.loc[:, ['variable_id', 'lower_bound', 'upper_bound']]
+        base_bounds = base_bounds.set_index('variable_id')
+
+        def dispatch_at(demand):
+            si.set_rhs(pd.DataFrame({'constraint_id': [constraint_id], 'rhs': [demand]}))
+            disabled_variables = market._re_solve_model(si)
+            si.set_variable_bounds(base_bounds.loc[disabled_variables['variable_id']].reset_index())
+            prices = market._market_constraints_rhs_and_type['demand']
+            return market.objective_value, prices.loc[prices['constraint_id'] == constraint_id, 'price'].iloc[0]
+
+        demand_tolerance = tolerance * max(1.0, max_demand - min_demand)
+        points = {min_demand: dispatch_at(min_demand), max_demand: dispatch_at(max_demand)}
+        intervals = [(min_demand, max_demand)]
+        while intervals:
+            start, end = intervals.pop()
+            (start_cost, start_price), (end_cost, end_price) = points[start], points[end]
+            if abs(end_price - start_price) <= tolerance:
+                continue
+            # Where the tangents at the start and end of the interval intersect.
+            demand = (end_cost - start_cost + start_price * start - end_price * end) / (start_price - end_price)
+            if demand - start <= demand_tolerance or end - demand <= demand_tolerance:
+                continue
+            points[demand] = dispatch_at(demand)
+            tangent_cost = start_cost + start_price * (demand - start)
+            if abs(points[demand][0] - tangent_cost) > tolerance * max(1.0, abs(tangent_cost)):
+                intervals += [(start, demand), (demand, end)]
+
+        # The price of each segment is the slope of the cost between breakpoints, segments with the same price
+        # are merged.
+        breakpoints = np.array(sorted(points))
+        costs = np.array([points[demand][0] for demand in breakpoints])
+        prices = np.diff(costs) / np.diff(breakpoints)
+        is_new_segment = np.ones(len(prices), dtype=bool)
+        is_new_segment[1:] = np.abs(np.diff(prices)) > tolerance * np.maximum(1.0, np.abs(prices[1:]))
+        segment_starts = np.flatnonzero(is_new_segment)
+        segments = pd.DataFrame({
+            'region': region,
+            'demand_start': breakpoints[segment_starts],
+            'demand_end': np.append(breakpoints[segment_starts[1:]], breakpoints[-1]),
+            'price': prices[segment_starts]})
+
+        # The marginal unit is found by comparing dispatch at two demands within each segment.
+        marginal_units = []
+        for demand_start, demand_end in zip(segments['demand_start'], segments['demand_end']):
+            dispatch = []
+            for demand in [demand_start + (demand_end - demand_start) / 3, demand_end - (demand_end - demand_start) / 3]:
+                dispatch_at(demand)
+                unit_dispatch = market.get_unit_dispatch()
+                unit_dispatch = unit_dispatch[unit_dispatch['service'] == 'energy'].set_index('unit')['dispatch']
+                dispatch.append(unit_dispatch)
+            marginal_units.append((dispatch[1] - dispatch[0]).abs().idxmax())
+        segments['marginal_unit'] = marginal_units
+        return segments
+
+    # The attributes that define a market's model, saved by save_model.
+    _model_frame_attributes = ['_unit_info', '_interconnector_directions', '_interconnector_loss_shares']
+    _model_dict_attributes = ['_decision_variables', '_variable_to_constraint_map', '_constraint_to_variable_map',
+                              '_lhs_coefficients', '_generic_constraint_lhs', '_constraints_rhs_and_type',
+                              '_constraints_dynamic_rhs_and_type', '_market_constraints_rhs_and_type',
+                              '_objective_function_components']
+
+    def save_model(self, path):
+        """Save the market's model to a single compressed binary file, so it can be dispatched without being rebuilt.
+
+        The file holds the variables (bounds, types and unit, service and region metadata), objective function
+        costs, constraint lhs coefficients, rhs values and types (with their set, unit, service and region metadata),
+        and the definitions of the special ordered sets used to model interconnector losses, as the pd.DataFrames
+        the set methods created. A market loaded with :meth:`load_model` can be dispatched with any of the dispatch
+        options, and its results retrieved with the usual get methods. Dispatch results are not saved. The solver
+        and the validate_inputs and check settings are not saved either, so they can be changed between reruns.
+
+        Examples
+        --------
+        Build a market as in the :meth:`dispatch` example.
+
+        >>> unit_info = pd.DataFrame({
+        ...     'unit': ['A', 'B'],
+        ...     'region': ['NSW', 'NSW']})
+
+        >>> market = SpotMarket(market_regions=['NSW'],
+        ...                     unit_info=unit_info)
+
+        >>> market.set_unit_volume_bids(pd.DataFrame({
+        ...     'unit': ['A', 'B'],
+        ...     '1': [20.0, 50.0],
+        ...     '2': [20.0, 30.0],
+        ...     '3': [5.0, 10.0]}))
+
+        >>> market.set_unit_price_bids(pd.DataFrame({
+        ...     'unit': ['A', 'B'],
+        ...     '1': [50.0, 100.0],
+        ...     '2': [100.0, 130.0],
+        ...     '3': [100.0, 150.0]}))
+
+        >>> market.set_demand_constraints(pd.DataFrame({
+        ...     'region': ['NSW'],
+        ...     'demand': [100.0]}))
+
+        Save the model, then load and dispatch it.
+
+        >>> market.save_model('nsw_market.npz')
+
+        >>> loaded_market = SpotMarket.load_model('nsw_market.npz')
+
+        >>> loaded_market.dispatch()
+
+        >>> print(loaded_market.get_unit_dispatch())
+          unit service  dispatch
+        0    A  energy      45.0
+        1    B  energy      55.0
+
+        >>> import os
+        >>> os.remove('nsw_market.npz')
+
+        Parameters
+        ----------
+        path : str or pathlib.Path
+
+        Returns
+        -------
+        None
+
+        Raises
+        ------
+            ModelBuildError
+                If the market's model has been released.
+        """
+        self._check_model_not_released()
+        frames = {}
+        for attribute in self._model_frame_attributes:
+            if getattr(self, attribute) is not None:
+                frames[(attribute,)] = getattr(self, attribute)
+        for attribute in self._model_dict_attributes:
+            for key, frame in _flatten_frames(getattr(self, attribute), (attribute,)):
+                frames[key] = frame.drop(columns=['value', 'value_lin', 'slack', 'price'], errors='ignore')
+        attributes = {'market_regions': list(self._market_regions), 'dispatch_interval': self.dispatch_interval,
+                      'next_variable_id': int(self._next_variable_id),
+                      'next_constraint_id': int(self._next_constraint_id)}
+        model_files.write_frames(path, frames, attributes)
+
+    @classmethod
+    def load_model(cls, path):
+        """Load a market saved by :meth:`save_model`.
+
+        Parameters
+        ----------
+        path : str or pathlib.Path
+
+        Returns
+        -------
+        SpotMarket
+
+        Raises
+        ------
+            ValueError
+                If the file was saved with an incompatible version of nempy's model file format.
+        """
+        frames, attributes = model_files.read_frames(path)
+        market = cls(market_regions=attributes['market_regions'], unit_info=frames.pop(('_unit_info',)),
+                     dispatch_interval=attributes['dispatch_interval'])
+        market._next_variable_id = attributes['next_variable_id']
+        market._next_constraint_id = attributes['next_constraint_id']
+        for key, frame in frames.items():
+            if len(key) == 1:
+                setattr(market, key[0], frame)
+            else:
+                frame_dict = getattr(market, key[0])
+                for sub_key in key[1:-1]:
+                    frame_dict = frame_dict.setdefault(sub_key, {})
+                frame_dict[key[-1]] = frame
+        return market
+
+    def memory_usage(self):
+        """Report the memory used by each of the market's tables, including its cached dispatch results.
+
+        Examples
+        --------
+        Build and dispatch a market as in the :meth:`dispatch` example.
+
+        >>> market = SpotMarket(market_regions=['NSW'],
+        ...                     unit_info=pd.DataFrame({'unit': ['A', 'B'], 'region': ['NSW', 'NSW']}))
+
+        >>> market.set_unit_volume_bids(pd.DataFrame({'unit': ['A', 'B'], '1': [20.0, 50.0], '2': [20.0, 30.0]}))
+
+        >>> market.set_unit_price_bids(pd.DataFrame({'unit': ['A', 'B'], '1': [50.0, 100.0], '2': [100.0, 130.0]}))
+
+        >>> market.set_demand_constraints(pd.DataFrame({'region': ['NSW'], 'demand': [100.0]}))
+
+        >>> market.dispatch()
+
+        >>> usage = market.memory_usage()
+
+        Each model table is listed, along with its size in bytes.
+
+        >>> print(usage.loc[usage['component'] != 'unit_info', ['component', 'table']])
+                                 component            table
+        1               decision_variables             bids
+        2       variable_to_constraint_map    regional/bids
+        3       variable_to_constraint_map  unit_level/bids
+        4       constraint_to_variable_map  regional/demand
+        5  market_constraints_rhs_and_type           demand
+        6    objective_function_components             bids
+
+        Returns
+        -------
+        pd.DataFrame
+
+            =========  ================================================================
+            Columns:   Description:
+            component  the market attribute holding the table, without its leading
+                       underscore, or 'results' for cached dispatch results
+                       (as `str`)
+            table      the key of the table within the component, with nested keys
+                       joined by '/' (as `str`)
+            bytes      the memory used by the table, including the contents of
+                       text columns (as `np.int64`)
+            =========  ================================================================
+        """
+        rows = []
+        for attribute in self._model_frame_attributes:
+            if getattr(self, attribute) is not None:
+                rows.append((attribute[1:], '', getattr(self, attribute)))
+        for attribute in self._model_dict_attributes:
+            for key, frame in _flatten_frames(getattr(self, attribute), ()):
+                rows.append((attribute[1:], '/'.join(key), frame))
+        for name, result in self._results.items():
+            rows.append(('results', name, result))
+        return pd.DataFrame({'component': [row[0] for row in rows], 'table': [row[1] for row in rows],
+                             'bytes': np.array([np.sum(row[2].memory_usage(deep=True)) for row in rows],
+                                               dtype=np.int64)})
+
+    def release_model(self):
+        """Keep only the dispatch results of the market, releasing the memory used by its model.
+
+        Each result that applies to the market, i.e. the result of each get method that reports dispatch results, is
+        calculated and cached, then the tables defining the model, the variables, constraints, lhs coefficients and
+        objective function, are dropped. The get methods then return the cached results. The solver's model isn't
+        kept after dispatch, so only the pd.DataFrames held by the market need to be released. After release the
+        market can't be changed, dispatched again or saved.
+
+        Examples
+        --------
+        Build and dispatch a market as in the :meth:`dispatch` example.
+
+        >>> market = SpotMarket(market_regions=['NSW'],
+        ...                     unit_info=pd.DataFrame({'unit': ['A', 'B'], 'region': ['NSW', 'NSW']}))
+
+        >>> market.set_unit_volume_bids(pd.DataFrame({'unit': ['A', 'B'], '1': [20.0, 50.0], '2': [20.0, 30.0]}))
+
+        >>> market.set_unit_price_bids(pd.DataFrame({'unit': ['A', 'B'], '1': [50.0, 100.0], '2': [100.0, 130.0]}))
+
+        >>> market.set_demand_constraints(pd.DataFrame({'region': ['NSW'], 'demand': [100.0]}))
+
+        >>> market.dispatch()
+
+        >>> market.release_model()
+
+        Only the results are left, and these can still be retrieved.
+
+        >>> print(market.memory_usage()['component'].unique())
+        ['results']
+
+        >>> print(market.get_energy_prices())
+          region  price
+        0    NSW  130.0
+
+        Returns
+        -------
+        None
+
+        Raises
+        ------
+            ModelBuildError
+                If the market has not been dispatched.
+        """
+        if self._model_released:
+            return
+        if self.objective_value is None:
+            raise check.ModelBuildError('The market must be dispatched before its model is released.')
+        for name, calculate in self._get_result_calculations().items():
+            self._get_cached_result(name, calculate)
+        self._results['constraint_set_names'] = pd.Series(self.get_constraint_set_names(), dtype=object)
+        deficit_groups = [group for group in self._decision_variables if group.endswith('_deficit')]
+        self._results['elastic_constraints_violation_degree'] = pd.Series(
+            [self._decision_variables[group]['value'].sum() for group in deficit_groups],
+            index=[group[:-len('_deficit')] for group in deficit_groups], dtype=float)
+        for attribute in self._model_frame_attributes:
+            setattr(self, attribute, None)
+        for attribute in self._model_dict_attributes:
+            setattr(self, attribute, {})
+        self._model_released = True
+
+    def compact(self):
+        """Release the market's model, see :meth:`release_model`, and store text columns of results as categoricals.
+
+        Unit, service and region names are repeated on many rows of the results, storing them as pd.Categorical
+        columns keeps each distinct name once. The get methods convert these columns back, so they return the same
+        pd.DataFrames as before the market was compacted.
+
+        Examples
+        --------
+        Build and dispatch a market as in the :meth:`dispatch` example.
+
+        >>> market = SpotMarket(market_regions=['NSW'],
+        ...                     unit_info=pd.DataFrame({'unit': ['A', 'B'], 'region': ['NSW', 'NSW']}))
+
+        >>> market.set_unit_volume_bids(pd.DataFrame({'unit': ['A', 'B'], '1': [20.0, 50.0], '2': [20.0, 30.0]}))
+
+        >>> market.set_unit_price_bids(pd.DataFrame({'unit': ['A', 'B'], '1': [50.0, 100.0], '2': [100.0, 130.0]}))
+
+        >>> market.set_demand_constraints(pd.DataFrame({'region': ['NSW'], 'demand': [100.0]}))
+
+        >>> market.dispatch()
+
+        >>> market.compact()
+
+        >>> print(market.get_unit_dispatch())
+          unit service  dispatch
+        0    A  energy      40.0
+        1    B  energy      60.0
+
+        Returns
+        -------
+        None
+
+        Raises
+        ------
+            ModelBuildError
+                If the market has not been dispatched.
+        """
+        self.release_model()
+        for name, result in self._results.items():
+            if isinstance(result, pd.DataFrame) and name not in self._categorical_result_columns:
+                columns = [column for column in result.columns if result[column].dtype == object]
+                self._results[name] = result.astype({column: 'category' for column in columns})
+                self._categorical_result_columns[name] = columns
+
+    def get_dispatch_results(self):
+        """The result of each get method that reports dispatch results and applies to the market, keyed by result name.
+
+        Examples
+        --------
+        Build and dispatch a market as in the :meth:`dispatch` example.
+
+        >>> market = SpotMarket(market_regions=['NSW'],
+        ...                     unit_info=pd.DataFrame({'unit': ['A', 'B'], 'region': ['NSW', 'NSW']}))
+
+        >>> market.set_unit_volume_bids(pd.DataFrame({'unit': ['A', 'B'], '1': [20.0, 50.0], '2': [20.0, 30.0]}))
+
+        >>> market.set_unit_price_bids(pd.DataFrame({'unit': ['A', 'B'], '1': [50.0, 100.0], '2': [100.0, 130.0]}))
+
+        >>> market.set_demand_constraints(pd.DataFrame({'region': ['NSW'], 'demand': [100.0]}))
+
+        >>> market.dispatch()
+
+        >>> results = market.get_dispatch_results()
+
+        >>> sorted(results)
+        ['constraint_slack', 'energy_prices', 'region_dispatch_summary', 'unit_dispatch']
+
+        >>> print(results['energy_prices'])
+          region  price
+        0    NSW  130.0
+
+        Returns
+        -------
+        dict[str, pd.DataFrame]
+            The keys are the names of the get methods without the 'get\\_' prefix, e.g. 'unit_dispatch'.
+        """
+        if self._model_released:
+            names = [name for name, result in self._results.items() if isinstance(result, pd.DataFrame)]
+        else:
+            names = list(self._get_result_calculations())
+        return {name: getattr(self, 'get_' + name)() for name in names}
+
+    def _get_result_calculations(self):
+        """The calculation of each cached result that applies to the market, keyed by result name."""
+        calculations = {}
+        if 'bids' in self._decision_variables:
+            calculations['unit_dispatch'] = self._calc_unit_dispatch
+        if 'interconnectors' in self._decision_variables:
+            calculations['interconnector_flows'] = self._calc_interconnector_flows
+        if 'bids' in self._decision_variables:
+            calculations['region_dispatch_summary'] = self._calc_region_dispatch_summary
+        calculations['constraint_slack'] = self._calc_constraint_slack
+        if 'demand' in self._market_constraints_rhs_and_type:
+            calculations['energy_prices'] = self._calc_energy_prices
+        if 'fcas' in self._market_constraints_rhs_and_type:
+            calculations['fcas_prices'] = self._calc_fcas_prices
+        if any(constraint_type in self._constraints_rhs_and_type for constraint_type in self._fcas_availability_types):
+            calculations['fcas_availability'] = self._calc_fcas_availability
+        return calculations
+
+    def _check_model_not_released(self):
+        if self._model_released:
+            raise check.ModelBuildError('The model of this market has been released, only its results can be '
+                                        'retrieved.')
+
+    def _build_model_for_re_solving(self):
+        """Build the linear program once, so it can be modified and re-solved, e.g. for each scenario."""
+        self._check_model_not_released()
+        variable_definitions = self._create_variable_definitions()
+        objective_function_definition = self._create_objective_function_definition()
+        constraints_rhs_and_type = self._create_constraints_rhs_and_type()
+        si = solver_interface.InterfaceToSolver(self.solver_name, self.solver_process_pool, self.diagnose_infeasibility)
+        si.add_variables(variable_definitions)
+        if objective_function_definition is not None:
+            si.add_objective_function(objective_function_definition)
+        if constraints_rhs_and_type is not None:
+            si.add_constraints(self._create_constraints_lhs(), constraints_rhs_and_type)
+        self._add_special_ordered_sets(si)
+        return si, variable_definitions, objective_function_definition, constraints_rhs_and_type
+
+    def _re_solve_model(self, si):
+        """Solve a model built by _build_model_for_re_solving and save the results, as dispatch would.
+
+        Returns the variables disabled in the linear model, so their bounds can be reset before the next solve.
+        """
+        si.optimize()
+        self._save_slack_in_constraints(si)
+        self._save_optimal_values_of_decision_variables(si)
+        disabled_variables = pd.DataFrame({'variable_id': np.array([], dtype=int)})
+        if 'interconnector_losses' in self._decision_variables:
+            disabled_variables = self._get_variables_to_disable_in_linear_model()
+            si.disable_variables(disabled_variables)
+        si.optimize_linear()
+        self._save_optimal_values_of_decision_variables(si, linear=True)
+        self._save_market_constraint_prices(si)
+        self.objective_value = si.objective_value
+        return disabled_variables
+
+    def _get_scenario_changes(self, name, changes, base_bounds, base_rhs):
+        """Convert a scenario's changes into the variable bounds, constraint rhs and costs to set in the model."""
+        unknown_changes = set(changes) - {'bounds', 'rhs', 'costs', 'demand'}
+        if unknown_changes:
+            raise ValueError('Scenario {} has unknown changes {}.'.format(name, sorted(unknown_changes)))
+
+        bounds = changes.get('bounds', pd.DataFrame({'variable_id': [], 'lower_bound': [], 'upper_bound': []}))
+        costs = changes.get('costs', pd.DataFrame({'variable_id': [], 'cost': []}))
+        rhs = [changes.get('rhs', pd.DataFrame({'constraint_id': [], 'rhs': []})).loc[:, ['constraint_id', 'rhs']]]
+        if 'demand' in changes:
+            if 'demand' not in self._market_constraints_rhs_and_type:
+                raise ValueError('Scenario {} changes demand, but the market has no demand constraints.'.format(name))
+            demand = pd.merge(self._market_constraints_rhs_and_type['demand'].loc[:, ['region', 'constraint_id']],
+                              changes['demand'].loc[:, ['region', 'demand']], on='region')
+            rhs.append(demand.loc[:, ['constraint_id', 'demand']].rename(columns={'demand': 'rhs'}))
+        rhs = pd.concat(rhs, ignore_index=True)
+
+        for ids, model_ids, id_type in [(bounds['variable_id'], base_bounds.index, 'variable'),
+                                        (costs['variable_id'], base_bounds.index, 'variable'),
+                                        (rhs['constraint_id'], base_rhs.index, 'constraint')]:
+            unknown_ids = ids[~ids.isin(model_ids)]
+            if not unknown_ids.empty:
+                raise ValueError('Scenario {} has {} ids {} that are not in the model.'.format(
+                    name, id_type, list(unknown_ids)))
+
+        bounds = bounds.astype({'variable_id': int})
+        costs = costs.astype({'variable_id': int})
+        rhs = rhs.astype({'constraint_id': int})
+        return bounds, rhs, costs
+
+    def _merit_order_dispatch_supported(self):
+        """Check if the market only has the components that merit order dispatch can clear."""
+        if 'bids' not in self._decision_variables or 'demand' not in self._market_constraints_rhs_and_type:
+            return False
+        return (set(self._decision_variables) <= {'bids', 'tie_break_deficit'} and
+                (self._decision_variables['bids']['service'] == 'energy').all() and
+                set(self._constraints_rhs_and_type) <= {'unit_bid_capacity', 'tie_break'} and
+                set(self._market_constraints_rhs_and_type) == {'demand'} and
+                len(self._constraints_dynamic_rhs_and_type) == 0 and
+                len(self._generic_constraint_lhs) == 0 and
+                set(self._lhs_coefficients) <= {'tie_break', 'tie_break_deficit'} and
+                set(self._variable_to_constraint_map['regional']) <= {'bids'} and
+                set(self._variable_to_constraint_map['unit_level']) <= {'bids'})
+
+    def _dispatch_in_merit_order(self):
+        """Dispatch energy bids in price order and save results in the same places as the linear program would."""
+        bid_variables = self._decision_variables['bids']
+        bids = pd.merge(bid_variables.loc[:, ['variable_id', 'unit', 'lower_bound', 'upper_bound']],
+                        self._variable_to_constraint_map['regional']['bids'].loc[:, ['variable_id', 'region',
+                                                                                     'coefficient']],
+                        on='variable_id')
+        bids = pd.merge(bids, self._objective_function_components['bids'].loc[:, ['variable_id', 'cost']],
+                        on='variable_id')
+        unit_capacity = self._constraints_rhs_and_type.get('unit_bid_capacity')
+        values, prices = merit_order.clear_energy_market(bids, self._market_constraints_rhs_and_type['demand'],
+                                                         unit_capacity)
+        values = dict(zip(values['variable_id'], values['value']))
+        bid_variables['value'] = bid_variables['variable_id'].map(values)
+
+        # Deficit variables only take up differences between tie break constraints and the pro rata dispatch.
+        if 'tie_break_deficit' in self._decision_variables:
+            tie_break = self._constraints_rhs_and_type['tie_break']
+            tie_break_deficit = self._decision_variables['tie_break_deficit']
+            variables = bid_variables.loc[:, ['variable_id', 'value']]
+            violation = solver_interface.calc_slack_from_variable_values(self._lhs_coefficients['tie_break'],
+                                                                         tie_break, variables)
+            violation = dict(zip(tie_break['constraint_id'], violation))
+            deficit_lhs = self._lhs_coefficients['tie_break_deficit']
+            deficit_value = deficit_lhs['constraint_id'].map(violation) * deficit_lhs['coefficient']
+            deficit_value = dict(zip(deficit_lhs['variable_id'], np.maximum(deficit_value, 0.0)))
+            tie_break_deficit['value'] = tie_break_deficit['variable_id'].map(deficit_value)
+
+        for variables in self._decision_variables.values():
+            variables['value_lin'] = variables['value']
+
+        variables = pd.concat(self._decision_variables).loc[:, ['variable_id', 'value']]
+        constraints_lhs = self._create_constraints_lhs()
+        for constraint_groups in [self._constraints_rhs_and_type, self._market_constraints_rhs_and_type]:
+            for constraint_group in constraint_groups.values():
+                constraint_group['slack'] = solver_interface.calc_slack_from_variable_values(
+                    constraints_lhs, constraint_group, variables)
+
+        demand = self._market_constraints_rhs_and_type['demand']
+        demand['price'] = demand['region'].map(dict(zip(prices['region'], prices['price'])))
+
+        objective_function = self._create_objective_function_definition()
+        self.objective_value = (objective_function['variable_id'].map(variables.set_index('variable_id')['value']) *
+                                objective_function['cost']).sum()
+
+    def _create_constraints_lhs(self):
+        """Combine all the components of the constraint matrix lhs into a single pd.DataFrame."""
+        # Collect all the components of the constraint matrix lhs, these are combined into a single pd.DataFrame once
+        # all components have been created.
+        lhs_components = list(self._lhs_coefficients.values())
+
+        # Get a pd.DataFrame mapping the generic constraint sets to their constraint ids.
+        generic_constraint_ids = solver_interface.create_mapping_of_generic_constraint_sets_to_constraint_ids(
+            self._constraints_rhs_and_type, self._market_constraints_rhs_and_type)
+
+        # If there are any generic constraints create their lhs definitions.
+        if generic_constraint_ids is not None:
+            # If units have been added to the generic lhs then find the relevant variable ids and map them to the
+            # constraint.
+            if 'unit' in self._generic_constraint_lhs and 'bids' in self._variable_to_constraint_map['unit_level']:
+                generic_constraint_units = self._generic_constraint_lhs['unit']
+                unit_bids_to_constraint_map = self._variable_to_constraint_map['unit_level']['bids']
+                unit_lhs = solver_interface.create_unit_level_generic_constraint_lhs(generic_constraint_units,
+                                                                                     generic_constraint_ids,
+                                                                                     unit_bids_to_constraint_map)
+                lhs_components.append(unit_lhs)
+            # If regions have been added to the generic lhs then find the relevant variable ids and map them to the
+            # constraint.
+            if 'region' in self._generic_constraint_lhs and 'bids' in self._variable_to_constraint_map['regional']:
+                generic_constraint_region = self._generic_constraint_lhs['region']
+                unit_bids_to_constraint_map = self._variable_to_constraint_map['regional']['bids']
+                regional_lhs = solver_interface.create_region_level_generic_constraint_lhs(generic_constraint_region,
+                                                                                           generic_constraint_ids,
+                                                                                           unit_bids_to_constraint_map)
+                lhs_components.append(regional_lhs)
+            # If interconnectors have been added to the generic lhs then find the relevant variable ids and map them
+            # to the constraint.
+            if 'interconnectors' in self._generic_constraint_lhs and 'interconnectors' in self._decision_variables:
+                generic_constraint_interconnectors = self._generic_constraint_lhs['interconnectors']
+                interconnector_bids_to_constraint_map = self._decision_variables['interconnectors']
+                interconnector_lhs = solver_interface.create_interconnector_generic_constraint_lhs(
+                    generic_constraint_interconnectors, generic_constraint_ids, interconnector_bids_to_constraint_map)
+                lhs_components.append(interconnector_lhs)
+
+        # If there are constraints that have been defined on a regional basis then create the constraints lhs
+        # definition by mapping to all the variables that have been defined for the corresponding region and service.
+        if len(self._constraint_to_variable_map['regional']) > 0:
+            constraints = pd.concat(list(self._constraint_to_variable_map['regional'].values()))
+            decision_variables = pd.concat(list(self._variable_to_constraint_map['regional'].values()))
+            lhs_components.append(solver_interface.create_lhs(constraints, decision_variables, ['region', 'service']))
+
+        # If there are constraints that have been defined on a unit basis then create the constraints lhs
+        # definition by mapping to all the variables that have been defined for the corresponding unit and service.
+        if len(self._constraint_to_variable_map['unit_level']) > 0:
+            constraints = pd.concat(list(self._constraint_to_variable_map['unit_level'].values()))
+            decision_variables = pd.concat(list(self._variable_to_constraint_map['unit_level'].values()))
+            lhs_components.append(solver_interface.create_lhs(constraints, decision_variables, ['unit', 'service']))
+
+        # Constraints with a variable on the rhs are moved to the lhs, with a coefficient of -1, and a rhs of zero.
+        if self._constraints_dynamic_rhs_and_type:
+            constraints_dynamic_rhs_and_type = pd.concat(self._constraints_dynamic_rhs_and_type)
+            lhs_components.append(solver_interface.create_dynamic_rhs_lhs(constraints_dynamic_rhs_and_type))
+
+        # Combine all lhs components with a single concatenation, all components only have the columns constraint_id,
+        # variable_id and coefficient. If there are none then just create a place holder empty pd.DataFrame.
+        if len(lhs_components) > 0:
+            constraints_lhs = pd.concat(lhs_components, ignore_index=True)
+        else:
+            constraints_lhs = pd.DataFrame(columns=['constraint_id', 'variable_id', 'coefficient'])
+
+        return constraints_lhs
+
+    def _create_variable_definitions(self):
+        if self._decision_variables:
+            # Combine dictionary of pd.DataFrames into a single pd.DataFrame for processing by the interface.
+            return pd.concat(self._decision_variables)
+        else:
+            raise check.ModelBuildError('The market could not be dispatch because no variables have been created')
+
+    def _create_objective_function_definition(self):
+        if self._objective_function_components:
+            # Combine components of objective function into a single pd.DataFrame
+            return pd.concat(self._objective_function_components)
+        return None
+
+    def _create_constraints_rhs_and_type(self):
+        """Collect all constraint rhs and type definitions into a single pd.DataFrame."""
+        constraints_rhs_and_type = []
+        if self._constraints_rhs_and_type:
+            constraints_rhs_and_type.append(pd.concat(self._constraints_rhs_and_type))
+        if self._market_constraints_rhs_and_type:
+            constraints_rhs_and_type.append(pd.concat(self._market_constraints_rhs_and_type))
+        if self._constraints_dynamic_rhs_and_type:
+            constraints_dynamic_rhs_and_type = pd.concat(self._constraints_dynamic_rhs_and_type)
+            # The rhs variables of the dynamic constraints have been moved to the lhs.
+            constraints_dynamic_rhs_and_type['rhs'] = 0.0
+            constraints_rhs_and_type.append(constraints_dynamic_rhs_and_type)
+        if len(constraints_rhs_and_type) > 0:
+            return pd.concat(constraints_rhs_and_type)
+        return None
+
+    def _add_special_ordered_sets(self, si, variable_offset=0):
+        if 'interpolation_weights' in self._decision_variables:
+            special_ordered_sets = self._decision_variables['interpolation_weights'].copy()
+            special_ordered_sets['variable_id'] += variable_offset
+            si.add_sos_type_2(special_ordered_sets, sos_id_columns=['interconnector', 'link'],
+                              position_column='loss_segment')
+
+        if 'interconnectors' in self._decision_variables:
+            special_ordered_sets = self._decision_variables['interconnectors']
+            special_ordered_sets = special_ordered_sets[
+                special_ordered_sets['interconnector'] != special_ordered_sets['link']]
+            if not special_ordered_sets.empty:
+                special_ordered_sets = special_ordered_sets.rename(columns={'interconnector': 'sos_id'})
+                special_ordered_sets['variable_id'] += variable_offset
+                si.add_sos_type_1(special_ordered_sets)
+
+    def _save_slack_in_constraints(self, si, constraint_offset=0):
+        for constraint_groups in [self._constraints_rhs_and_type, self._market_constraints_rhs_and_type,
+                                  self._constraints_dynamic_rhs_and_type]:
+            for constraint_group in constraint_groups:
+                constraint_ids = constraint_groups[constraint_group].loc[:, ['constraint_id']] + constraint_offset
+                constraint_groups[constraint_group]['slack'] = si.get_slack_in_constraints(constraint_ids)
+
+    def _save_optimal_values_of_decision_variables(self, si, variable_offset=0, linear=False,
+                                                   variables_not_in_model=None):
+        """Save the optimal value of each decision variable, variables_not_in_model are given a value of zero."""
+        self._results = {}
+        column = 'value_lin' if linear else 'value'
+        for var_group in self._decision_variables:
+            variables = self._decision_variables[var_group]
+            values = np.zeros(len(variables))
+            in_model = np.ones(len(variables), dtype=bool)
+            if variables_not_in_model is not None:
+                in_model = ~variables['variable_id'].isin(variables_not_in_model).to_numpy()
+            variable_ids = variables.loc[in_model, ['variable_id']] + variable_offset
+            if linear:
+                values[in_model] = si.get_optimal_values_of_decision_variables_lin(variable_ids).to_numpy()
+            else:
+                values[in_model] = si.get_optimal_values_of_decision_variables(variable_ids).to_numpy()
+            variables[column] = values
+
+    def _save_market_constraint_prices(self, si, constraint_offset=0):
+        self._results = {}
+        for constraint_group in self._market_constraints_rhs_and_type:
+            constraint_ids = self._market_constraints_rhs_and_type[constraint_group]['constraint_id'] + constraint_offset
+            prices = si.price_constraints(list(constraint_ids))
+            self._market_constraints_rhs_and_type[constraint_group]['price'] = constraint_ids.map(prices)
+
+    def _add_violated_lazy_constraints(self, si, lazy_lhs, lazy_rhs_and_type, linear=False):
+        """Add lazy constraints violated by the current solution to the model and re-solve until none are violated.
+
+        Returns the lhs and rhs and type of the lazy constraints that still have not been added to the model.
+        """
+        # Only the variables in the lazy constraints are needed to check for violations.
+        variables = pd.DataFrame({'variable_id': lazy_lhs['variable_id'].unique()})
+        while not lazy_rhs_and_type.empty:
+            if linear:
+                variables['value'] = si.get_optimal_values_of_decision_variables_lin(variables)
+            else:
+                variables['value'] = si.get_optimal_values_of_decision_variables(variables)
+            violated = solver_interface.find_violated_constraints(lazy_lhs, lazy_rhs_and_type, variables)
+            if len(violated) == 0:
+                break
+            is_violated_lhs = lazy_lhs['constraint_id'].isin(violated)
+            is_violated_rhs = lazy_rhs_and_type['constraint_id'].isin(violated)
+            si.add_constraints(lazy_lhs[is_violated_lhs], lazy_rhs_and_type[is_violated_rhs])
+            lazy_lhs = lazy_lhs[~is_violated_lhs]
+            lazy_rhs_and_type = lazy_rhs_and_type[~is_violated_rhs]
+            if linear:
+                si.optimize_linear()
+            else:
+                si.optimize()
+        return lazy_lhs, lazy_rhs_and_type
+
+    def _set_slack_of_generic_constraints_not_in_model(self, constraints_lhs, constraints_rhs_and_type):
+        variables = pd.concat(self._decision_variables).loc[:, ['variable_id', 'value']]
+        slack = solver_interface.calc_slack_from_variable_values(constraints_lhs, constraints_rhs_and_type, variables)
+        slack = dict(zip(constraints_rhs_and_type['constraint_id'], slack))
+        generic_constraints = self._constraints_rhs_and_type['generic']
+        calculated_slack = generic_constraints['constraint_id'].map(slack)
+        generic_constraints['slack'] = np.where(calculated_slack.isna(), generic_constraints['slack'],
+                                                calculated_slack)
+
+    def _get_variables_to_disable_in_linear_model(self):
+        return pd.concat([self._get_unused_interpolation_weights(), self._get_unused_link_pairs()])
+
+    def _get_unused_link_pairs(self):
+        inter_vars = self._decision_variables['interconnectors']
+        inter_vars = inter_vars[inter_vars['interconnector'] != inter_vars['link']]
+        inter_vars_unused = inter_vars[inter_vars['value'] == 0.0]
+        return inter_vars_unused.loc[:, ['variable_id']]
+
+    def _get_unused_interpolation_weights(self):
+        vars = pd.merge(self._decision_variables['interconnectors'].loc[:, ['interconnector', 'link', 'value']],
+                        self._decision_variables['interpolation_weights'].loc[:, ['interconnector', 'link',
+                                                                                  'break_point', 'variable_id']],
+                        on=['interconnector', 'link'])
+        vars['distance'] = (vars['value'] - vars['break_point']).abs()
+
+        def not_closest_three(df):
+            df = df.sort_values('distance')
+            df = df.iloc[3:, :]
+            return df
+
+        vars_to_remove = vars.groupby(['interconnector', 'link'], as_index=False).apply(not_closest_three)
+        return vars_to_remove.loc[:, ['variable_id']]
+
+    def get_constraint_set_names(self):
+        if self._model_released:
+            return self._results['constraint_set_names'].tolist()
+        return list(self._market_constraints_rhs_and_type.keys()) + list(self._constraints_rhs_and_type.keys())
+
+    def get_unit_dispatch(self):
+        """Retrieves the energy dispatch for each unit.
+
+        Examples
+        --------
+        Define the unit information data set needed to initialise the market.
+
+        >>> unit_info = pd.DataFrame({
+        ...     'unit': ['A', 'B'],
+        ...     'region': ['NSW', 'NSW']})
+
+        Initialise the market instance.
+
+        >>> market = SpotMarket(market_regions=['NSW'],
+        ...                     unit_info=unit_info)
+
+        Define a set of bids, in this example we have two units called A and B, with three bid bands.
+
+        >>> volume_bids = pd.DataFrame({
+        ...     'unit': ['A', 'B'],
+        ...     '1': [20.0, 50.0],
+        ...     '2': [20.0, 30.0],
+        ...     '3': [5.0, 10.0]})
+
+        Create energy unit bid decision variables.
+
+        >>> market.set_unit_volume_bids(volume_bids)
+
+        Define a set of prices for the bids.
+
+        >>> price_bids = pd.DataFrame({
+        ...     'unit': ['A', 'B'],
+        ...     '1': [50.0, 100.0],
+        ...     '2': [100.0, 130.0],
+        ...     '3': [100.0, 150.0]})
+
+        Create the objective function components corresponding to the the energy bids.
+
+        >>> market.set_unit_price_bids(price_bids)
+
+        Define a demand level in each region.
+
+        >>> demand = pd.DataFrame({
+        ...     'region': ['NSW'],
+        ...     'demand': [100.0]})
+
+        Create unit capacity based constraints.
+
+        >>> market.set_demand_constraints(demand)
+
+        Call the dispatch method.
+
+        >>> market.dispatch()
+
+        Now the market dispatch can be retrieved.
+
+        >>> print(market.get_unit_dispatch())
+          unit service  dispatch
+        0    A  energy      45.0
+        1    B  energy      55.0
+
+        Returns
+        -------
+        pd.DataFrame
+
+        Raises
+        ------
+            ModelBuildError
+                If a model build process is incomplete, i.e. there are energy bids but not energy demand set.
+        """
+        return self._get_cached_result('unit_dispatch', self._calc_unit_dispatch)
+
+    def _get_cached_result(self, name, calculate):
+        """Calculate a result once per dispatch, a copy is returned so callers can't modify the cached result."""
+        if name not in self._results:
+            self._check_model_not_released()
+            self._results[name] = calculate()
+        result = self._results[name].copy()
+        if name in self._categorical_result_columns:
+            # Results stored as categoricals by compact are returned with their original types.
+            result = result.astype({column: object for column in self._categorical_result_columns[name]})
+        return result
+
+    def _calc_unit_dispatch(self):
+        dispatch = self._decision_variables['bids'].loc[:, ['unit', 'service', 'value']]
+        dispatch.columns = ['unit', 'service', 'dispatch']
+        return dispatch.groupby(['unit', 'service'], as_index=False).sum()
+
+    def get_energy_prices(self):
+        """Retrieves the energy price in each market region.
+
+        Energy prices are the shadow prices of the demand constraint in each market region.
+
+        Examples
+        --------
+        Define the unit information data set needed to initialise the market.
+
+        >>> unit_info = pd.DataFrame({
+        ...     'unit': ['A', 'B'],
+        ...     'region': ['NSW', 'NSW']})
+
+        Initialise the market instance.
+
+        >>> market = SpotMarket(market_regions=['NSW'],
+        ...                     unit_info=unit_info)
+
+        Define a set of bids, in this example we have two units called A and B, with three bid bands.
+
+        >>> volume_bids = pd.DataFrame({
+        ...     'unit': ['A', 'B'],
+        ...     '1': [20.0, 50.0],
+        ...     '2': [20.0, 30.0],
+        ...     '3': [5.0, 10.0]})
+
+        Create energy unit bid decision variables.
+
+        >>> market.set_unit_volume_bids(volume_bids)
+
+        Define a set of prices for the bids.
+
+        >>> price_bids = pd.DataFrame({
+        ...     'unit': ['A', 'B'],
+        ...     '1': [50.0, 100.0],
+        ...     '2': [100.0, 130.0],
+        ...     '3': [100.0, 150.0]})
+
+        Create the objective function components corresponding to the the energy bids.
+
+        >>> market.set_unit_price_bids(price_bids)
+
+        Define a demand level in each region.
+
+        >>> demand = pd.DataFrame({
+        ...     'region': ['NSW'],
+        ...     'demand': [100.0]})
+
+        Create unit capacity based constraints.
+
+        >>> market.set_demand_constraints(demand)
+
+        Call the dispatch method.
+
+        >>> market.dispatch()
+
+        Now the market prices can be retrieved.
+
+        >>> print(market.get_energy_prices())
+          region  price
+        0    NSW  130.0
+
+        Returns
+        -------
+        pd.DateFrame
+
+        Raises
+        ------
+            ModelBuildError
+                If a model build process is incomplete, i.e. there are energy bids but not energy demand set.
+        """
+        return self._get_cached_result('energy_prices', self._calc_energy_prices)
+
+    def _calc_energy_prices(self):
+        return self._market_constraints_rhs_and_type['demand'].loc[:, ['region', 'price']]
+
+    def get_fcas_prices(self):
+        """Retrives the price associated with each set of FCAS requirement constraints.
+
+        Returns
+        -------
+        pd.DateFrame
+        """
+        return self._get_cached_result('fcas_prices', self._calc_fcas_prices)
+
+    def _calc_fcas_prices(self):
+        prices = pd.merge(
+            self._constraint_to_variable_map['regional']['fcas'].loc[:, ['service', 'region', 'constraint_id']],
+            self._market_constraints_rhs_and_type['fcas'].loc[:, ['set', 'price', 'constraint_id']], on='constraint_id')
+        prices = prices.groupby(['region', 'service'], as_index=False).aggregate({'price': 'sum'})
+        return prices
+
+    def get_interconnector_flows(self):
+        """Retrieves the  flows for each interconnector.
+
+        Examples
+        --------
+        Define the unit information data set needed to initialise the market.
+
+        >>> unit_info = pd.DataFrame({
+        ...     'unit': ['A', 'B'],
+        ...     'region': ['NSW', 'NSW']})
+
+        Initialise the market instance.
+
+        >>> market = SpotMarket(market_regions=['NSW', 'VIC'],
+        ...                     unit_info=unit_info)
+
+        Define a set of bids, in this example we have just one unit that can provide 100 MW in NSW.
+
+        >>> volume_bids = pd.DataFrame({
+        ...     'unit': ['A'],
+        ...     '1': [100.0]})
+
+        Create energy unit bid decision variables.
+
+        >>> market.set_unit_volume_bids(volume_bids)
+
+        Define a set of prices for the bids.
+
+        >>> price_bids = pd.DataFrame({
+        ...     'unit': ['A'],
+        ...     '1': [80.0]})
+
+        Create the objective function components corresponding to the the energy bids.
+
+        >>> market.set_unit_price_bids(price_bids)
+
+        Define a demand level in each region, no power is required in NSW and 90.0 MW is required in VIC.
+
+        >>> demand = pd.DataFrame({
+        ...     'region': ['NSW', 'VIC'],
+        ...     'demand': [0.0, 90.0]})
+
+        Create unit capacity based constraints.
+
+        >>> market.set_demand_constraints(demand)
+
+        Define a an interconnector between NSW and VIC so generator can A can be used to meet demand in VIC.
+
+        >>> interconnector = pd.DataFrame({
+        ...     'interconnector': ['inter_one'],
+        ...     'to_region': ['VIC'],
+        ...     'from_region': ['NSW'],
+        ...     'max': [100.0],
+        ...     'min': [-100.0]})
+
+        Create the interconnector.
+
+        >>> market.set_interconnectors(interconnector)
+
+        Call the dispatch method.
 
         >>> market.dispatch()
 
@@ -3149,6 +4289,9 @@ class SpotMarket:
         pd.DataFrame
 
         """
+        return self._get_cached_result('interconnector_flows', self._calc_interconnector_flows)
+
+    def _calc_interconnector_flows(self):
         flow = self._decision_variables['interconnectors'].loc[:, ['interconnector', 'link', 'value']]
         flow.columns = ['interconnector', 'link', 'flow']
 
@@ -3159,6 +4302,78 @@ class SpotMarket:
 
         return flow.reset_index(drop=True)
 
+    def get_constraint_slack(self):
+        """Retrieves the slack of each constraint, and the price of each market constraint, e.g. demand and FCAS.
+
+        Slack follows the nempy convention, for '<=' and '=' constraints it is the rhs minus the lhs, and for '>='
+        constraints the lhs minus the rhs, so negative slack means a constraint was violated.
+
+        Examples
+        --------
+        Build and dispatch a market as in the :meth:`dispatch` example.
+
+        >>> market = SpotMarket(market_regions=['NSW'],
+        ...                     unit_info=pd.DataFrame({'unit': ['A', 'B'], 'region': ['NSW', 'NSW']}))
+
+        >>> market.set_unit_volume_bids(pd.DataFrame({'unit': ['A', 'B'], '1': [20.0, 50.0], '2': [20.0, 30.0]}))
+
+        >>> market.set_unit_price_bids(pd.DataFrame({'unit': ['A', 'B'], '1': [50.0, 100.0], '2': [100.0, 130.0]}))
+
+        >>> market.set_unit_bid_capacity_constraints(pd.DataFrame({'unit': ['A', 'B'], 'capacity': [30.0, 100.0]}))
+
+        >>> market.set_demand_constraints(pd.DataFrame({'region': ['NSW'], 'demand': [100.0]}))
+
+        >>> market.dispatch()
+
+        >>> print(market.get_constraint_slack())
+                       group   set  constraint_id    rhs  slack  price
+        0  unit_bid_capacity  None              0   30.0    0.0    NaN
+        1  unit_bid_capacity  None              1  100.0   30.0    NaN
+        2             demand  None              2  100.0    0.0  130.0
+
+        Returns
+        -------
+        pd.DataFrame
+
+            =============  ================================================================
+            Columns:       Description:
+            group          the name of the constraint group, e.g. 'demand' or 'generic'
+                           (as `str`)
+            set            the constraint set, for groups with sets, i.e. generic and FCAS
+                           requirement constraints, otherwise None (as `str`)
+            constraint_id  the id of the constraint (as `np.int64`)
+            rhs            the rhs of the constraint (as `np.float64`)
+            slack          the slack of the constraint (as `np.float64`)
+            price          the shadow price of market constraints, NaN for other
+                           constraints (as `np.float64`)
+            =============  ================================================================
+        """
+        return self._get_cached_result('constraint_slack', self._calc_constraint_slack)
+
+    def _calc_constraint_slack(self):
+        def column(constraints, name, dtype, missing):
+            if name in constraints:
+                return constraints[name].to_numpy(dtype=dtype)
+            return np.full(len(constraints), missing, dtype=dtype)
+
+        tables = []
+        for constraint_groups in [self._constraints_rhs_and_type, self._market_constraints_rhs_and_type,
+                                  self._constraints_dynamic_rhs_and_type]:
+            for group, constraints in constraint_groups.items():
+                # Constraints with a dynamic rhs have no fixed rhs value.
+                tables.append(pd.DataFrame({
+                    'group': np.full(len(constraints), group, dtype=object),
+                    'set': column(constraints, 'set', object, None),
+                    'constraint_id': constraints['constraint_id'].to_numpy(dtype=np.int64),
+                    'rhs': column(constraints, 'rhs', float, np.nan),
+                    'slack': column(constraints, 'slack', float, np.nan),
+                    'price': column(constraints, 'price', float, np.nan)}))
+        if not tables:
+            return pd.DataFrame({'group': pd.Series(dtype=object), 'set': pd.Series(dtype=object),
+                                 'constraint_id': pd.Series(dtype=np.int64), 'rhs': pd.Series(dtype=float),
+                                 'slack': pd.Series(dtype=float), 'price': pd.Series(dtype=float)})
+        return pd.concat(tables, ignore_index=True)
+
     def get_region_dispatch_summary(self):
         """Calculates a dispatch summary at the regional level.
 
@@ -3271,6 +4486,9 @@ class SpotMarket:
                                      to region, in MW, (as `np.float64`)
             =====================    =================================
         """
+        return self._get_cached_result('region_dispatch_summary', self._calc_region_dispatch_summary)
+
+    def _calc_region_dispatch_summary(self):
         dispatch_summary = self._get_net_unit_dispatch_by_region()
         if self._interconnectors_in_market():
             interconnector_inflow = self._get_interconnector_inflow_by_region()
@@ -3284,22 +4502,22 @@ class SpotMarket:
         return dispatch_summary
 
     def _get_net_unit_dispatch_by_region(self):
+        bids = self._decision_variables['bids']
+        bids = bids[bids['service'] == 'energy']
+        unit_info = self._unit_info.set_index('unit')
+        region = bids['unit'].map(unit_info['region'])
+        has_info = region.notna().to_numpy()
+        is_load = (bids['unit'].map(unit_info['dispatch_type']) == 'load').to_numpy()[has_info]
+        dispatch = bids['value'].to_numpy(dtype=float)[has_info]
+        dispatch = np.where(is_load, -dispatch, dispatch)
+        return self._sum_by_region(region[has_info].to_numpy(), dispatch, 'dispatch')
 
-        unit_dispatch = self.get_unit_dispatch()
-        unit_dispatch = unit_dispatch[unit_dispatch['service'] == 'energy']
-        unit_dispatch_types = self._unit_info.loc[:, ['unit', 'region', 'dispatch_type']]
-        unit_dispatch = pd.merge(unit_dispatch, unit_dispatch_types, on='unit')
-
-        def make_load_dispatch_negative(dispatch_type, dispatch):
-            if dispatch_type == 'load':
-                dispatch = -1 * dispatch
-            return dispatch
-
-        unit_dispatch['dispatch'] = \
-            unit_dispatch.apply(lambda x: make_load_dispatch_negative(x['dispatch_type'], x['dispatch']), axis=1)
-
-        unit_dispatch = unit_dispatch.groupby('region', as_index=False).aggregate({'dispatch': 'sum'})
-        return unit_dispatch
+    @staticmethod
+    def _sum_by_region(regions, values, name):
+        """Sum values by region, regions are returned in sorted order."""
+        region_codes, unique_regions = pd.factorize(regions, sort=True)
+        totals = np.bincount(region_codes, weights=values, minlength=len(unique_regions))
+        return pd.DataFrame({'region': unique_regions, name: totals.astype(float)})
 
     def _interconnectors_in_market(self):
         return self._interconnector_directions is not None
@@ -3376,28 +4594,22 @@ class SpotMarket:
         return from_region_loss_share
 
     def _get_transmission_losses(self):
-        interconnector_directions = self._interconnector_directions
-        loss_factors = hf.stack_columns(interconnector_directions, ['interconnector', 'link'],
-                                        ['from_region_loss_factor', 'to_region_loss_factor'], 'direction',
-                                        'loss_factor')
-        interconnector_directions = hf.stack_columns(interconnector_directions, ['interconnector', 'link'],
-                                                     ['to_region', 'from_region'], 'direction', 'region')
-        loss_factors['direction'] = loss_factors['direction'].apply(lambda x: x.replace('_loss_factor', ''))
-        loss_factors = pd.merge(loss_factors, interconnector_directions, on=['interconnector', 'link', 'direction'])
-        flows_and_losses = self.get_interconnector_flows()
-        flows_and_losses = pd.merge(flows_and_losses, loss_factors, on=['interconnector', 'link'])
-
-        def calc_losses(direction, flow, loss_factor):
-            if (direction == 'to_region' and flow >= 0.0) or (direction == 'from_region' and flow <= 0.0):
-                losses = flow * (1 - loss_factor)
-            elif (direction == 'to_region' and flow < 0.0) or (direction == 'from_region' and flow > 0.0):
-                losses = abs(flow) - (abs(flow) / loss_factor)
-            return losses
-
-        flows_and_losses['transmission_losses'] = \
-            flows_and_losses.apply(lambda x: calc_losses(x['direction'], x['flow'], x['loss_factor']), axis=1)
-        flows_and_losses = flows_and_losses.groupby('region', as_index=False).aggregate({'transmission_losses': 'sum'})
-        return flows_and_losses
+        flows = self.get_interconnector_flows().loc[:, ['interconnector', 'link', 'flow']]
+        flows_and_directions = pd.merge(flows, self._interconnector_directions, on=['interconnector', 'link'])
+        flow = flows_and_directions['flow'].to_numpy(dtype=float)
+
+        def calc_losses(loss_factor, flow_towards_region):
+            # Flow towards the region is scaled by the loss factor, flow away from the region is divided by it.
+            return np.where(flow_towards_region, flow * (1 - loss_factor), np.abs(flow) - (np.abs(flow) / loss_factor))
+
+        to_region_losses = calc_losses(flows_and_directions['to_region_loss_factor'].to_numpy(dtype=float),
+                                       flow >= 0.0)
+        from_region_losses = calc_losses(flows_and_directions['from_region_loss_factor'].to_numpy(dtype=float),
+                                         flow <= 0.0)
+        regions = np.concatenate([flows_and_directions['to_region'].to_numpy(),
+                                  flows_and_directions['from_region'].to_numpy()])
+        losses = np.concatenate([to_region_losses, from_region_losses])
+        return self._sum_by_region(regions, losses, 'transmission_losses')
 
     def get_fcas_availability(self):
         """Get the availability of fcas service on a unit level, after constraints.
@@ -3510,9 +4722,15 @@ class SpotMarket:
         -------
 
         """
+        return self._get_cached_result('fcas_availability', self._calc_fcas_availability)
+
+    # The unit level constraints that limit the availability of FCAS.
+    _fcas_availability_types = ['fcas_max_availability', 'joint_ramping_raise_reg', 'joint_ramping_lower_reg',
+                                'joint_capacity', 'energy_and_regulation_capacity']
+
+    def _calc_fcas_availability(self):
         fcas_variable_slack = []
-        for constraint_type in ['fcas_max_availability', 'joint_ramping_raise_reg', 'joint_ramping_lower_reg',
-                                'joint_capacity', 'energy_and_regulation_capacity']:
+        for constraint_type in self._fcas_availability_types:
             if constraint_type in self._constraints_rhs_and_type.keys():
                 service_coefficients = self._constraint_to_variable_map['unit_level'][constraint_type]
                 service_coefficients = service_coefficients.loc[:, ['constraint_id', 'unit', 'service', 'coefficient']]
@@ -3539,9 +4757,664 @@ class SpotMarket:
         return fcas_availability.loc[:, ['unit', 'service', 'availability']]
 
 
+class HorizonMarket:
+    """Class for co-optimising the dispatch of a sequence of intervals as a single linear program.
+
+    Each interval is defined by a SpotMarket, built in the usual way but not dispatched. On dispatch the variables
+    and constraints of each interval are given their own block of ids and combined into one model, with additional
+    ramp constraints coupling the energy dispatch of each unit across consecutive intervals. The results of the
+    combined solve are written back to each interval's SpotMarket, so their get methods can also be used directly.
+
+    Examples
+    --------
+    Build two intervals with the same bids but different demand levels.
+
+    >>> unit_info = pd.DataFrame({
+    ...     'unit': ['A', 'B'],
+    ...     'region': ['NSW', 'NSW']})
+
+    >>> volume_bids = pd.DataFrame({
+    ...     'unit': ['A', 'B'],
+    ...     '1': [100.0, 100.0]})
+
+    >>> price_bids = pd.DataFrame({
+    ...     'unit': ['A', 'B'],
+    ...     '1': [50.0, 100.0]})
+
+    >>> interval_markets = []
+
+    >>> for demand_level in [20.0, 80.0]:
+    ...     market = SpotMarket(market_regions=['NSW'], unit_info=unit_info)
+    ...     market.set_unit_volume_bids(volume_bids)
+    ...     market.set_unit_price_bids(price_bids)
+    ...     market.set_demand_constraints(pd.DataFrame({'region': ['NSW'], 'demand': [demand_level]}))
+    ...     interval_markets.append(market)
+
+    Unit A can only increase its output by 30 MW between the 5 min intervals.
+
+    >>> horizon = HorizonMarket(interval_markets)
+
+    >>> horizon.set_inter_interval_ramp_constraints(pd.DataFrame({
+    ...     'unit': ['A', 'B'],
+    ...     'ramp_up_rate': [360.0, 1200.0],
+    ...     'ramp_down_rate': [360.0, 1200.0]}))
+
+    >>> horizon.dispatch()
+
+    >>> print(horizon.get_unit_dispatch())
+       interval unit service  dispatch
+    0         0    A  energy      20.0
+    1         0    B  energy       0.0
+    2         1    A  energy      50.0
+    3         1    B  energy      30.0
+
+    Prices reflect the coupling between intervals, extra demand in the first interval allows unit A to ramp higher in
+    the second interval, displacing unit B, so the marginal cost of demand in the first interval is zero.
+
+    >>> print(horizon.get_energy_prices())
+       interval region  price
+    0         0    NSW    0.0
+    1         1    NSW  100.0
+
+    Parameters
+    ----------
+    interval_markets : list[SpotMarket]
+        The interval markets, in the order they are dispatched. Ramp constraints relative to the output of units
+        before the first interval can be set on the first SpotMarket with set_unit_ramp_up_constraints and
+        set_unit_ramp_down_constraints. Later interval markets must not have ramp constraints on units with inter
+        interval ramp constraints, these are applied by the HorizonMarket.
+
+    Attributes
+    ----------
+    solver_name : str
+        The solver to use, see SpotMarket.
+
+    solver_process_pool : solver_backends.SolverProcessPool
+        The pool to solve in, see SpotMarket.
+
+    diagnose_infeasibility : bool
+        Whether to diagnose infeasibility, see SpotMarket.
+
+    objective_value : float
+        The objective value of the combined model, after dispatch.
+    """
+
+    def __init__(self, interval_markets):
+        self.interval_markets = list(interval_markets)
+        self._ramp_rates = None
+        self._ramp_violation_cost = None
+        self._ramp_constraints_rhs_and_type = None
+        self.solver_name = 'CBC'
+        self.solver_process_pool = None
+        self.diagnose_infeasibility = False
+        self.objective_value = None
+
+    def set_inter_interval_ramp_constraints(self, ramp_rates, violation_cost=None):
+        """Constrain the change in unit energy dispatch between consecutive intervals.
+
+        For each interval after the first the energy dispatch of a unit must satisfy
+
+            dispatch(t) - dispatch(t-1) <= ramp_up_rate * (dispatch_interval / 60)
+
+            dispatch(t - 1) - dispatch(t) <= ramp_down_rate * (dispatch_interval / 60)
+
+        where dispatch_interval is that of the interval t market.
+
+        Parameters
+        ----------
+        ramp_rates : pd.DataFrame
+
+            ==============  ==========================================
+            Columns:        Description:
+            unit            unique identifier of a dispatch unit, \n
+                            (as `str`)
+            ramp_up_rate    the maximum rate at which the unit can \n
+                            increase output, in MW/h, (as `np.float64`)
+            ramp_down_rate  the maximum rate at which the unit can \n
+                            decrease output, in MW/h, (as `np.float64`)
+            ==============  ==========================================
+
+        violation_cost : float, optional
+            If provided the ramp constraints are made elastic, and can be violated at this cost per MW.
+
+        Returns
+        -------
+        None
+
+        Raises
+        ------
+            RepeatedRowError
+                If there is more than one row for any unit.
+            ColumnDataTypeError
+                If columns are not of the require type.
+            MissingColumnError
+                If the column 'unit', 'ramp_up_rate' or 'ramp_down_rate' is missing.
+            UnexpectedColumn
+                There is a column that is not 'unit', 'ramp_up_rate' or 'ramp_down_rate'.
+            ColumnValues
+                If there are inf or null values in the rate columns.
+        """
+        schema = dv.DataFrameSchema(name='ramp_rates', primary_keys=['unit'])
+        schema.add_column(dv.SeriesSchema(name='unit', data_type=str))
+        schema.add_column(dv.SeriesSchema(name='ramp_up_rate', data_type=np.float64, must_be_real_number=True))
+        schema.add_column(dv.SeriesSchema(name='ramp_down_rate', data_type=np.float64, must_be_real_number=True))
+        schema.validate(ramp_rates)
+        self._ramp_rates = ramp_rates
+        self._ramp_violation_cost = violation_cost
+
+    def dispatch(self):
+        """Combine the interval markets into a single model, solve, and save the results to each interval market.
+
+        Returns
+        -------
+        None
+
+        Raises
+        ------
+            ModelBuildError
+                If there are no interval markets, an interval market has no variables, inter interval ramp
+                constraints are set but no interval market has energy bids, or an interval market after the first
+                has its own ramp constraints on a unit with inter interval ramp constraints.
+        """
+        if len(self.interval_markets) == 0:
+            raise check.ModelBuildError('The horizon could not be dispatched because there are no interval markets.')
+        if self._ramp_rates is not None:
+            self._check_for_interval_ramp_constraints()
+
+        variable_offsets, constraint_offsets = [], []
+        variable_definitions, objective_function_definition, constraints_lhs, constraints_rhs_and_type = \
+            [], [], [], []
+        next_variable_id, next_constraint_id = 0, 0
+        for market in self.interval_markets:
+            variable_offsets.append(next_variable_id)
+            constraint_offsets.append(next_constraint_id)
+            variables = market._create_variable_definitions()
+            variable_definitions.append(variables.assign(variable_id=variables['variable_id'] + next_variable_id))
+            objective = market._create_objective_function_definition()
+            if objective is not None:
+                objective_function_definition.append(
+                    objective.assign(variable_id=objective['variable_id'] + next_variable_id))
+            lhs = market._create_constraints_lhs()
+            constraints_lhs.append(lhs.assign(variable_id=lhs['variable_id'] + next_variable_id,
+                                              constraint_id=lhs['constraint_id'] + next_constraint_id))
+            rhs_and_type = market._create_constraints_rhs_and_type()
+            if rhs_and_type is not None:
+                constraints_rhs_and_type.append(
+                    rhs_and_type.assign(constraint_id=rhs_and_type['constraint_id'] + next_constraint_id))
+            next_variable_id += market._next_variable_id
+            next_constraint_id += market._next_constraint_id
+
+        if self._ramp_rates is not None and len(self.interval_markets) > 1:
+            ramp_variables, ramp_objective, ramp_lhs, ramp_rhs_and_type = \
+                self._create_inter_interval_ramp_constraints(variable_offsets, next_variable_id, next_constraint_id)
+            if not ramp_variables.empty:
+                variable_definitions.append(ramp_variables)
+                objective_function_definition.append(ramp_objective)
+            constraints_lhs.append(ramp_lhs)
+            constraints_rhs_and_type.append(ramp_rhs_and_type)
+
+        si = solver_interface.InterfaceToSolver(self.solver_name, self.solver_process_pool,
+                                                self.diagnose_infeasibility)
+        si.add_variables(pd.concat(variable_definitions))
+        if len(objective_function_definition) > 0:
+            si.add_objective_function(pd.concat(objective_function_definition))
+        if len(constraints_rhs_and_type) > 0:
+            si.add_constraints(pd.concat(constraints_lhs), pd.concat(constraints_rhs_and_type))
+        for market, variable_offset in zip(self.interval_markets, variable_offsets):
+            market._add_special_ordered_sets(si, variable_offset)
+
+        si.optimize()
+
+        for market, variable_offset, constraint_offset in zip(self.interval_markets, variable_offsets,
+                                                              constraint_offsets):
+            market._save_slack_in_constraints(si, constraint_offset)
+            market._save_optimal_values_of_decision_variables(si, variable_offset)
+            if 'interconnector_losses' in market._decision_variables:
+                variables_to_disable = market._get_variables_to_disable_in_linear_model()
+                si.disable_variables(variables_to_disable + variable_offset)
+
+        si.optimize_linear()
+
+        for market, variable_offset, constraint_offset in zip(self.interval_markets, variable_offsets,
+                                                              constraint_offsets):
+            market._save_optimal_values_of_decision_variables(si, variable_offset, linear=True)
+            market._save_market_constraint_prices(si, constraint_offset)
+            market.objective_value = None
+
+        if self._ramp_constraints_rhs_and_type is not None:
+            ramp_constraints = self._ramp_constraints_rhs_and_type
+            ramp_constraints['slack'] = si.get_slack_in_constraints(ramp_constraints.loc[:, ['constraint_id']])
+            ramp_constraints['violation'] = 0.0
+            is_elastic = ramp_constraints['deficit_variable_id'].notna()
+            if is_elastic.any():
+                deficit_variables = pd.DataFrame({
+                    'variable_id': ramp_constraints.loc[is_elastic, 'deficit_variable_id'].astype(np.int64)})
+                ramp_constraints.loc[is_elastic, 'violation'] = \
+                    si.get_optimal_values_of_decision_variables(deficit_variables).to_numpy()
+
+        self.objective_value = si.objective_value
+
+    def _create_inter_interval_ramp_constraints(self, variable_offsets, next_variable_id, next_constraint_id):
+        energy_bids = []
+        for interval, (market, variable_offset) in enumerate(zip(self.interval_markets, variable_offsets)):
+            if 'bids' in market._decision_variables:
+                bids = market._decision_variables['bids']
+                bids = bids[bids['service'] == 'energy'].loc[:, ['unit', 'variable_id']]
+                bids = bids.assign(variable_id=bids['variable_id'] + variable_offset, interval=interval,
+                                   dispatch_interval=market.dispatch_interval)
+                energy_bids.append(bids)
+        if len(energy_bids) == 0:
+            raise check.ModelBuildError('Inter interval ramp constraints could not be created because no interval '
+                                        'market has energy bids.')
+        energy_bids = pd.concat(energy_bids)
+        energy_bids = energy_bids[energy_bids['unit'].isin(self._ramp_rates['unit'])]
+
+        # A pair of constraints for each unit and interval with a preceding interval.
+        units_by_interval = energy_bids.loc[:, ['interval', 'unit', 'dispatch_interval']].drop_duplicates()
+        units_by_interval['previous_interval'] = units_by_interval['interval'] - 1
+        units_by_interval = pd.merge(units_by_interval, units_by_interval.loc[:, ['interval', 'unit']].rename(
+            columns={'interval': 'previous_interval'}), on=['previous_interval', 'unit'])
+        units_by_interval = pd.merge(units_by_interval, self._ramp_rates, on='unit')
+        ramp_up = units_by_interval.assign(
+            type='<=', rhs=units_by_interval['ramp_up_rate'] * (units_by_interval['dispatch_interval'] / 60))
+        ramp_down = units_by_interval.assign(
+            type='>=', rhs=-1 * units_by_interval['ramp_down_rate'] * (units_by_interval['dispatch_interval'] / 60))
+        rhs_and_type = pd.concat([ramp_up, ramp_down], ignore_index=True)
+        rhs_and_type = hf.save_index(rhs_and_type, 'constraint_id', next_constraint_id)
+
+        current = pd.merge(rhs_and_type.loc[:, ['constraint_id', 'interval', 'unit']], energy_bids,
+                           on=['interval', 'unit'])
+        current['coefficient'] = 1.0
+        previous = pd.merge(rhs_and_type.loc[:, ['constraint_id', 'previous_interval', 'unit']],
+                            energy_bids.rename(columns={'interval': 'previous_interval'}),
+                            on=['previous_interval', 'unit'])
+        previous['coefficient'] = -1.0
+        lhs = pd.concat([current, previous]).loc[:, ['constraint_id', 'variable_id', 'coefficient']]
+
+        variables = pd.DataFrame(columns=['variable_id', 'lower_bound', 'upper_bound', 'type'])
+        objective = pd.DataFrame(columns=['variable_id', 'cost'])
+        rhs_and_type['deficit_variable_id'] = np.nan
+        if self._ramp_violation_cost is not None and not rhs_and_type.empty:
+            deficit_variables, deficit_lhs = elastic_constraints.create_deficit_variables(
+                rhs_and_type.assign(cost=self._ramp_violation_cost), next_variable_id)
+            variables = deficit_variables.loc[:, ['variable_id', 'lower_bound', 'upper_bound', 'type']]
+            objective = deficit_variables.loc[:, ['variable_id', 'cost']]
+            lhs = pd.concat([lhs, deficit_lhs.loc[:, ['constraint_id', 'variable_id', 'coefficient']]])
+            rhs_and_type['deficit_variable_id'] = rhs_and_type['constraint_id'].map(
+                deficit_lhs.set_index('constraint_id')['variable_id'])
+
+        rhs_and_type['direction'] = np.where(rhs_and_type['type'] == '<=', 'up', 'down')
+        self._ramp_constraints_rhs_and_type = rhs_and_type.loc[:, ['interval', 'unit', 'direction', 'constraint_id',
+                                                                   'type', 'rhs', 'deficit_variable_id']]
+        return variables, objective, lhs, rhs_and_type.loc[:, ['constraint_id', 'type', 'rhs']]
+
+    def _check_for_interval_ramp_constraints(self):
+        # Ramp constraints on later intervals would be applied on top of the inter interval ramp constraints.
+        for interval, market in enumerate(self.interval_markets[1:], start=1):
+            for constraint_type in ['ramp_up', 'ramp_down']:
+                if constraint_type in market._constraints_rhs_and_type:
+                    units = market._constraints_rhs_and_type[constraint_type]['unit']
+                    if units.isin(self._ramp_rates['unit']).any():
+                        raise check.ModelBuildError(
+                            'Interval {} has {} constraints on units with inter interval ramp constraints, only the '
+                            'first interval market should have unit ramp constraints.'.format(interval,
+                                                                                              constraint_type))
+
+    def get_inter_interval_ramp_constraints(self):
+        """Retrieves the slack and violation of the inter interval ramp constraints.
+
+        Examples
+        --------
+        Build two intervals where unit A can't ramp fast enough to follow the change in demand.
+
+        >>> unit_info = pd.DataFrame({
+        ...     'unit': ['A', 'B'],
+        ...     'region': ['NSW', 'NSW']})
+
+        >>> interval_markets = []
+
+        >>> for demand_level in [20.0, 80.0]:
+        ...     market = SpotMarket(market_regions=['NSW'], unit_info=unit_info)
+        ...     market.set_unit_volume_bids(pd.DataFrame({'unit': ['A', 'B'], '1': [100.0, 100.0]}))
+        ...     market.set_unit_price_bids(pd.DataFrame({'unit': ['A', 'B'], '1': [50.0, 100.0]}))
+        ...     market.set_demand_constraints(pd.DataFrame({'region': ['NSW'], 'demand': [demand_level]}))
+        ...     interval_markets.append(market)
+
+        >>> horizon = HorizonMarket(interval_markets)
+
+        With elastic ramp constraints that are cheaper to violate than dispatching unit B.
+
+        >>> horizon.set_inter_interval_ramp_constraints(pd.DataFrame({
+        ...     'unit': ['A'],
+        ...     'ramp_up_rate': [360.0],
+        ...     'ramp_down_rate': [360.0]}), violation_cost=10.0)
+
+        >>> horizon.dispatch()
+
+        >>> print(horizon.get_inter_interval_ramp_constraints())
+           interval unit direction   rhs  slack  violation
+        0         1    A        up  30.0    0.0       30.0
+        1         1    A      down -30.0   90.0        0.0
+
+        Returns
+        -------
+        pd.DataFrame
+
+            ================  ========================================
+            Columns:          Description:
+            interval          the interval the ramp is into, (as `int`)
+            unit              unique identifier of a dispatch unit, \n
+                              (as `str`)
+            direction         'up' or 'down', (as `str`)
+            rhs               the allowed change in dispatch, in MW, \n
+                              negative for down, (as `np.float64`)
+            slack             the unused part of the allowed change, \n
+                              in MW, (as `np.float64`)
+            violation         the amount the constraint is violated, \n
+                              in MW, only non zero if the constraints \n
+                              are elastic (as `np.float64`)
+            ================  ========================================
+
+        Raises
+        ------
+            ModelBuildError
+                If there are no inter interval ramp constraints or the horizon has not been dispatched.
+        """
+        if self._ramp_constraints_rhs_and_type is None or 'slack' not in self._ramp_constraints_rhs_and_type:
+            raise check.ModelBuildError('No inter interval ramp constraints have been dispatched.')
+        return self._ramp_constraints_rhs_and_type.loc[:, ['interval', 'unit', 'direction', 'rhs', 'slack',
+                                                           'violation']]
+
+    def _get_interval_results(self, get_method):
+        results = []
+        for interval, market in enumerate(self.interval_markets):
+            interval_results = getattr(market, get_method)()
+            interval_results.insert(0, 'interval', interval)
+            results.append(interval_results)
+        return pd.concat(results, ignore_index=True)
+
+    def get_unit_dispatch(self):
+        """Retrieves the energy dispatch for each unit in each interval, see SpotMarket.get_unit_dispatch.
+
+        Returns
+        -------
+        pd.DataFrame
+        """
+        return self._get_interval_results('get_unit_dispatch')
+
+    def get_energy_prices(self):
+        """Retrieves the energy price in each market region in each interval, see SpotMarket.get_energy_prices.
+
+        Returns
+        -------
+        pd.DataFrame
+        """
+        return self._get_interval_results('get_energy_prices')
+
+    def get_fcas_prices(self):
+        """Retrieves the FCAS prices in each market region in each interval, see SpotMarket.get_fcas_prices.
+
+        Returns
+        -------
+        pd.DataFrame
+        """
+        return self._get_interval_results('get_fcas_prices')
+
+    def get_interconnector_flows(self):
+        """Retrieves the interconnector flows in each interval, see SpotMarket.get_interconnector_flows.
+
+        Returns
+        -------
+        pd.DataFrame
+        """
+        return self._get_interval_results('get_interconnector_flows')
+
+
+class ModelCache:
+    """On disk cache of assembled SpotMarket models, keyed by dispatch interval and the options used to build them.
+
+    Rerunning the same intervals, e.g. while tuning solver settings or violation costs, repeats loading the inputs
+    and calling each set method before dispatch. Using a cache, the market built for an interval is saved with
+    SpotMarket.save_model the first time it is requested, and loaded from file on later requests. The options can be
+    any json serialisable description of how the market is built, a hash of them is part of each file name so markets
+    built with different options are cached separately.
+
+    Examples
+    --------
+    Define a function that builds the market for an interval, here with a fixed set of bids and demand.
+
+    >>> def build_market():
+    ...     print('Building market.')
+    ...     market = SpotMarket(market_regions=['NSW'],
+    ...                         unit_info=pd.DataFrame({'unit': ['A', 'B'], 'region': ['NSW', 'NSW']}))
+    ...     market.set_unit_volume_bids(pd.DataFrame({'unit': ['A', 'B'], '1': [50.0, 100.0]}))
+    ...     market.set_unit_price_bids(pd.DataFrame({'unit': ['A', 'B'], '1': [50.0, 100.0]}))
+    ...     market.set_demand_constraints(pd.DataFrame({'region': ['NSW'], 'demand': [80.0]}))
+    ...     return market
+
+    The first request for an interval builds and saves the market.
+
+    >>> cache = ModelCache('model_cache')
+
+    >>> market = cache.get_market('2020/01/01 12:00:00', {'fast_start': True}, build_market)
+    Building market.
+
+    Later requests with the same options load the saved market.
+
+    >>> market = cache.get_market('2020/01/01 12:00:00', {'fast_start': True}, build_market)
+
+    >>> market.dispatch()
+
+    >>> print(market.get_energy_prices())
+      region  price
+    0    NSW  100.0
+
+    >>> import shutil
+    >>> shutil.rmtree('model_cache')
+
+    Parameters
+    ----------
+    directory : str or pathlib.Path
+        The directory to save models in, created if it doesn't exist.
+    """
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def get_market(self, interval, options, build_market):
+        """Load the market for an interval and options from the cache, or build and save it if it isn't cached.
+
+        Parameters
+        ----------
+        interval : str
+        options : dict
+            Json serialisable options used to build the market.
+        build_market : callable
+            Called without arguments to build the market if it isn't cached.
+
+        Returns
+        -------
+        SpotMarket
+        """
+        market = self.load(interval, options)
+        if market is None:
+            market = build_market()
+            self.save(market, interval, options)
+        return market
+
+    def load(self, interval, options):
+        """Load the market for an interval and options, returns None if it isn't cached.
+
+        Files saved with an incompatible version of the model file format are treated as not cached.
+
+        Returns
+        -------
+        SpotMarket or None
+        """
+        path = self._get_path(interval, options)
+        if not path.exists():
+            return None
+        try:
+            return SpotMarket.load_model(path)
+        except ValueError:
+            return None
+
+    def save(self, market, interval, options):
+        """Save the market for an interval and options, replacing any market already cached for them."""
+        market.save_model(self._get_path(interval, options))
+
+    def _get_path(self, interval, options):
+        options_hash = hashlib.sha256(json.dumps(options, sort_keys=True).encode()).hexdigest()[:16]
+        interval_name = ''.join(character if character.isalnum() else '_' for character in str(interval))
+        return self.directory / '{}_{}.npz'.format(interval_name, options_hash)
+
+
+class AsyncDispatcher:
+    """Dispatches markets from asyncio code on an executor, with a limit on the number of dispatches in flight.
+
+    A server can accept many more requests than it has cores to dispatch them on. Requests beyond max_in_flight wait
+    for a dispatch to finish before starting, and once max_waiting requests are waiting new requests raise
+    DispatchQueueFull straight away, so the server can turn work away rather than queue it without limit. A request
+    cancelled while waiting never starts. A request cancelled after its dispatch started returns straight away, but
+    the dispatch keeps its place in flight until it finishes in the background, so the executor is never given more
+    than max_in_flight dispatches at once.
+
+    Any function can be run with the same limits using :meth:`run`, e.g. one that loads an interval's inputs, builds
+    the market and dispatches it.
+
+    Examples
+    --------
+    Define a function that builds a market with a given demand.
+
+    >>> def build_market(demand):
+    ...     market = SpotMarket(market_regions=['NSW'],
+    ...                         unit_info=pd.DataFrame({'unit': ['A', 'B'], 'region': ['NSW', 'NSW']}))
+    ...     market.set_unit_volume_bids(pd.DataFrame({'unit': ['A', 'B'], '1': [50.0, 100.0]}))
+    ...     market.set_unit_price_bids(pd.DataFrame({'unit': ['A', 'B'], '1': [50.0, 100.0]}))
+    ...     market.set_demand_constraints(pd.DataFrame({'region': ['NSW'], 'demand': [demand]}))
+    ...     return market
+
+    Dispatch several markets concurrently, with at most two in flight at once.
+
+    >>> import asyncio
+
+    >>> async def dispatch_all(markets):
+    ...     with AsyncDispatcher(max_in_flight=2) as dispatcher:
+    ...         await asyncio.gather(*[dispatcher.dispatch(market) for market in markets])
+
+    >>> markets = [build_market(demand) for demand in [40.0, 80.0, 120.0]]
+
+    >>> asyncio.run(dispatch_all(markets))
+
+    >>> print([market.get_energy_prices()['price'].iloc[0] for market in markets])
+    [50.0, 100.0, 100.0]
+
+    Parameters
+    ----------
+    executor : concurrent.futures.Executor
+        The executor to run dispatches on, default None, a thread pool with max_in_flight threads owned by the
+        dispatcher. See :meth:`SpotMarket.dispatch_async` for the differences between thread and process executors.
+    max_in_flight : int
+        The maximum number of dispatches running at once, default None, the number of CPUs.
+    max_waiting : int
+        The maximum number of requests waiting to start, default None, no limit.
+
+    Attributes
+    ----------
+    in_flight : int
+        The number of dispatches submitted to the executor and not yet finished.
+    waiting : int
+        The number of requests waiting to start.
+    """
+
+    def __init__(self, executor=None, max_in_flight=None, max_waiting=None):
+        # asyncio is imported on use, so it isn't loaded by programs that don't dispatch asynchronously.
+        import asyncio
+        self.max_in_flight = max_in_flight if max_in_flight is not None else (os.cpu_count() or 1)
+        self.max_waiting = max_waiting
+        self._owns_executor = executor is None
+        self.executor = executor if executor is not None else ThreadPoolExecutor(max_workers=self.max_in_flight)
+        self.in_flight = 0
+        self.waiting = 0
+        self._slots = asyncio.Semaphore(self.max_in_flight)
+
+    async def run(self, function, *args):
+        """Run function(*args) on the executor once a slot is free, and return its result.
+
+        Returns
+        -------
+        The value returned by function.
+
+        Raises
+        ------
+            DispatchQueueFull
+                If max_waiting requests are already waiting to start.
+        """
+        if self._slots.locked() and self.max_waiting is not None and self.waiting >= self.max_waiting:
+            raise DispatchQueueFull('{} requests are already waiting to be dispatched.'.format(self.waiting))
+        self.waiting += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self.waiting -= 1
+        self.in_flight += 1
+        import asyncio
+        loop = asyncio.get_running_loop()
+        try:
+            future = self.executor.submit(function, *args)
+        except BaseException:
+            self._release_slot()
+            raise
+        # The slot is released when the work finishes, not when the awaiting task does, which can be cancelled first.
+        future.add_done_callback(lambda _: loop.call_soon_threadsafe(self._release_slot))
+        return await asyncio.wrap_future(future)
+
+    async def dispatch(self, market, **kwargs):
+        """Dispatch a market once a slot is free, see :meth:`SpotMarket.dispatch_async`.
+
+        Parameters
+        ----------
+        market : SpotMarket
+        **kwargs
+            Keyword arguments passed to :meth:`SpotMarket.dispatch`.
+
+        Returns
+        -------
+        None
+
+        Raises
+        ------
+            DispatchQueueFull
+                If max_waiting requests are already waiting to start.
+        """
+        dispatched = await self.run(_dispatch_market, market, kwargs)
+        if dispatched is not market:
+            market.__dict__.update(dispatched.__dict__)
+
+    def close(self):
+        """Shut down the dispatcher's thread pool, waiting for running dispatches, if it created one."""
+        if self._owns_executor:
+            self.executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _release_slot(self):
+        self.in_flight -= 1
+        self._slots.release()
+
+
 class ModelBuildError(Exception):
     """Raise for building model components in wrong order."""
 
 
 class MissingTable(Exception):
     """Raise for trying to access missing table."""
+
+
+class DispatchQueueFull(Exception):
+    """Raise for dispatch requests made when an AsyncDispatcher already has its maximum number of requests waiting."""
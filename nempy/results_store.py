@@ -0,0 +1,318 @@
+import functools
+import json
+import os
+import shutil
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Increase when the layout of results stores changes, so stores written by older versions are not misread.
+FORMAT_VERSION = 1
+
+# The columns of each table in a results store, and their types. Every table starts with the interval column.
+SCHEMAS = {
+    'unit_dispatch': [('interval', 'datetime'), ('unit', 'str'), ('service', 'str'), ('dispatch', 'float')],
+    'energy_prices': [('interval', 'datetime'), ('region', 'str'), ('price', 'float')],
+    'fcas_prices': [('interval', 'datetime'), ('region', 'str'), ('service', 'str'), ('price', 'float')],
+    'interconnector_flows': [('interval', 'datetime'), ('interconnector', 'str'), ('link', 'str'), ('flow', 'float'),
+                             ('losses', 'float')],
+    'constraint_slack': [('interval', 'datetime'), ('group', 'str'), ('set', 'str'), ('constraint_id', 'int'),
+                         ('rhs', 'float'), ('slack', 'float'), ('price', 'float')],
+    'violation_degrees': [('interval', 'datetime'), ('group', 'str'), ('violation', 'float')]}
+
+_DTYPES = {'datetime': np.dtype('datetime64[s]'), 'str': np.dtype(object), 'float': np.dtype(np.float64),
+           'int': np.dtype(np.int64)}
+
+
+class ResultsWriter:
+    """Writes the dispatch results of a sequence of intervals to a directory, in batches of columns.
+
+    Rather than holding the results of every interval in memory until a replay finishes, results are buffered for
+    batch_intervals intervals and then written to disk, so memory use is bounded and results already written survive
+    the replay stopping. Results are partitioned by calendar day, the buffer is written whenever the day changes,
+    and each table of each batch is saved as one .npy file per column in the directory
+    <directory>/<YYYY-MM-DD>/<table>/<batch number>/. Batches are written to a temporary directory and then moved into
+    place, so a batch is either complete or absent. Each table has a fixed schema, see SCHEMAS, which is saved with
+    the store, and results are converted to the schema types, missing optional columns are filled with NaN or None.
+    Use a :class:`ResultsReader` to read the results.
+
+    Writing to an existing store appends new batches to it.
+
+    Examples
+    --------
+    Define a function that builds a market with a given demand.
+
+    >>> from nempy import markets
+
+    >>> def build_market(demand):
+    ...     market = markets.SpotMarket(market_regions=['NSW'],
+    ...                                 unit_info=pd.DataFrame({'unit': ['A', 'B'], 'region': ['NSW', 'NSW']}))
+    ...     market.set_unit_volume_bids(pd.DataFrame({'unit': ['A', 'B'], '1': [50.0, 100.0]}))
+    ...     market.set_unit_price_bids(pd.DataFrame({'unit': ['A', 'B'], '1': [50.0, 100.0]}))
+    ...     market.set_demand_constraints(pd.DataFrame({'region': ['NSW'], 'demand': [demand]}))
+    ...     return market
+
+    Attach the writer to the market for each interval, so the results are written after the market is dispatched.
+
+    >>> intervals = ['2019/01/01 23:55:00', '2019/01/02 00:00:00', '2019/01/02 00:05:00']
+
+    >>> with ResultsWriter('replay_results') as writer:
+    ...     for interval, demand in zip(intervals, [40.0, 80.0, 120.0]):
+    ...         market = build_market(demand)
+    ...         writer.attach(market, interval)
+    ...         market.dispatch()
+
+    Then read back the results.
+
+    >>> reader = ResultsReader('replay_results')
+
+    >>> reader.days()
+    ['2019-01-01', '2019-01-02']
+
+    >>> print(reader.read('energy_prices'))
+                 interval region  price
+    0 2019-01-01 23:55:00    NSW   50.0
+    1 2019-01-02 00:00:00    NSW  100.0
+    2 2019-01-02 00:05:00    NSW  100.0
+
+    >>> import shutil
+    >>> shutil.rmtree('replay_results')
+
+    Parameters
+    ----------
+    directory : str or pathlib.Path
+        The directory of the results store, created if it doesn't exist.
+    batch_intervals : int
+        The number of intervals buffered before a batch is written, default 288, i.e. one day of 5 min intervals.
+
+    Raises
+    ------
+    ValueError
+        If the store at directory was written with a different schema or format version.
+    """
+
+    def __init__(self, directory, batch_intervals=288):
+        if batch_intervals < 1:
+            raise ValueError('batch_intervals must be at least 1.')
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.batch_intervals = batch_intervals
+        manifest = {'format_version': FORMAT_VERSION, 'tables': {table: [list(column) for column in schema]
+                                                                 for table, schema in SCHEMAS.items()}}
+        manifest_path = self.directory / 'schema.json'
+        if manifest_path.exists():
+            with open(manifest_path) as file:
+                if json.load(file) != manifest:
+                    raise ValueError('The results store {} was written with a different schema.'.format(directory))
+        else:
+            with open(manifest_path, 'w') as file:
+                json.dump(manifest, file, indent=1)
+        self._day = None
+        self._buffered_intervals = 0
+        self._buffers = {table: [] for table in SCHEMAS}
+
+    def attach(self, market, interval):
+        """Write the results of a market after it is dispatched, by setting the market's after_dispatch hook.
+
+        Parameters
+        ----------
+        market : nempy.markets.SpotMarket
+        interval : str
+            The interval the market is for, in the format '%Y/%m/%d %H:%M:%S'
+
+        Returns
+        -------
+        None
+        """
+        market.after_dispatch = functools.partial(self.write, interval)
+
+    def write(self, interval, market):
+        """Add the results of a dispatched market to the buffer, writing the buffer if it is full or the day changed.
+
+        Parameters
+        ----------
+        interval : str
+            The interval the market is for, in the format '%Y/%m/%d %H:%M:%S'
+        market : nempy.markets.SpotMarket
+
+        Returns
+        -------
+        None
+        """
+        interval = pd.Timestamp(interval)
+        day = interval.strftime('%Y-%m-%d')
+        if day != self._day:
+            self.flush()
+            self._day = day
+        for table, frame in _get_market_tables(market).items():
+            self._buffers[table].append(_conform_to_schema(frame, SCHEMAS[table], interval))
+        self._buffered_intervals += 1
+        if self._buffered_intervals >= self.batch_intervals:
+            self.flush()
+
+    def flush(self):
+        """Write the buffered results to disk."""
+        for table, batches in self._buffers.items():
+            if batches:
+                columns = {name: np.concatenate([batch[name] for batch in batches]) for name, _ in SCHEMAS[table]}
+                _write_batch(self.directory / self._day / table, columns)
+        self._buffers = {table: [] for table in SCHEMAS}
+        self._buffered_intervals = 0
+
+    def close(self):
+        """Write any buffered results."""
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class ResultsReader:
+    """Reads the results written by a :class:`ResultsWriter`.
+
+    Columns are memory mapped, only the days in the requested range and the requested columns are read, and only the
+    rows of the requested intervals are copied into memory. Results can be read a batch at a time with
+    :meth:`iter_batches` to keep memory use low when analysing long replays.
+
+    For an example see :class:`ResultsWriter`.
+
+    Parameters
+    ----------
+    directory : str or pathlib.Path
+        The directory of the results store.
+
+    Raises
+    ------
+    ValueError
+        If the store was written with a different format version.
+    """
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        with open(self.directory / 'schema.json') as file:
+            manifest = json.load(file)
+        if manifest['format_version'] != FORMAT_VERSION:
+            raise ValueError('The results store {} has format version {}, but version {} is required.'.format(
+                directory, manifest['format_version'], FORMAT_VERSION))
+        self.schemas = {table: [tuple(column) for column in schema] for table, schema in manifest['tables'].items()}
+
+    def days(self):
+        """The days with results in the store, in the format '%Y-%m-%d'."""
+        return sorted(path.name for path in self.directory.iterdir() if path.is_dir())
+
+    def iter_batches(self, table, start=None, end=None, columns=None):
+        """Yield the results of a table one batch at a time, for intervals from start to end inclusive.
+
+        Parameters
+        ----------
+        table : str
+            One of the tables in SCHEMAS, e.g. 'unit_dispatch'.
+        start : str or pd.Timestamp
+            The first interval to read, default None, from the first interval in the store.
+        end : str or pd.Timestamp
+            The last interval to read, default None, to the last interval in the store.
+        columns : list[str]
+            The columns to read, default None, all columns. The interval column is always read.
+
+        Yields
+        ------
+        pd.DataFrame
+        """
+        if table not in self.schemas:
+            raise ValueError("Table '{}' not recognised, should be one of {}.".format(table, list(self.schemas)))
+        start = None if start is None else np.datetime64(pd.Timestamp(start), 's')
+        end = None if end is None else np.datetime64(pd.Timestamp(end), 's')
+        schema = [(name, kind) for name, kind in self.schemas[table] if columns is None or name == 'interval' or
+                  name in columns]
+        for day in self.days():
+            if (start is not None and day < str(start)[:10]) or (end is not None and day > str(end)[:10]):
+                continue
+            table_directory = self.directory / day / table
+            if not table_directory.exists():
+                continue
+            for batch in sorted(path for path in table_directory.iterdir() if path.suffix != '.tmp'):
+                intervals = np.load(batch / 'interval.npy', mmap_mode='r')
+                rows = np.ones(len(intervals), dtype=bool)
+                if start is not None:
+                    rows &= intervals >= start
+                if end is not None:
+                    rows &= intervals <= end
+                if rows.any():
+                    yield pd.DataFrame({name: _read_column(batch, name, kind, rows) for name, kind in schema})
+
+    def read(self, table, start=None, end=None, columns=None):
+        """Read the results of a table, for intervals from start to end inclusive.
+
+        Parameters are the same as for :meth:`iter_batches`.
+
+        Returns
+        -------
+        pd.DataFrame
+        """
+        batches = list(self.iter_batches(table, start, end, columns))
+        if not batches:
+            schema = [(name, kind) for name, kind in self.schemas[table] if columns is None or name == 'interval' or
+                      name in columns]
+            return pd.DataFrame({name: pd.Series(dtype='datetime64[ns]' if kind == 'datetime' else _DTYPES[kind])
+                                 for name, kind in schema})
+        return pd.concat(batches, ignore_index=True)
+
+
+def _get_market_tables(market):
+    """The results of a dispatched market, as the tables of a results store."""
+    results = market.get_dispatch_results()
+    tables = {table: results[table] for table in SCHEMAS if table in results}
+    groups = market.get_constraint_set_names()
+    tables['violation_degrees'] = pd.DataFrame({
+        'group': groups, 'violation': [market.get_elastic_constraints_violation_degree(group) for group in groups]})
+    return tables
+
+
+def _conform_to_schema(frame, schema, interval):
+    """Convert a table's results to arrays of the schema types, adding the interval column."""
+    columns = {}
+    for name, kind in schema:
+        if name == 'interval':
+            columns[name] = np.full(len(frame), np.datetime64(interval, 's'))
+        elif name in frame.columns:
+            columns[name] = frame[name].to_numpy(dtype=_DTYPES[kind])
+        elif kind in ('str', 'float'):
+            columns[name] = np.full(len(frame), None if kind == 'str' else np.nan, dtype=_DTYPES[kind])
+        else:
+            raise ValueError("The results are missing the column '{}'.".format(name))
+    return columns
+
+
+def _write_batch(table_directory, columns):
+    """Save each column as a .npy file in a new batch directory, text columns are saved with a mask of nulls."""
+    table_directory.mkdir(parents=True, exist_ok=True)
+    batch_number = len([path for path in table_directory.iterdir() if path.suffix != '.tmp'])
+    batch_directory = table_directory / '{:06d}'.format(batch_number)
+    temporary_directory = batch_directory.with_suffix('.tmp')
+    # Left over if an earlier write was interrupted.
+    shutil.rmtree(temporary_directory, ignore_errors=True)
+    temporary_directory.mkdir()
+    for name, values in columns.items():
+        if values.dtype == object:
+            is_null = pd.isna(values)
+            values = np.array(np.where(is_null, '', values).astype(str), dtype=str)
+            if is_null.any():
+                np.save(temporary_directory / '{}.null.npy'.format(name), is_null)
+        np.save(temporary_directory / '{}.npy'.format(name), values)
+    os.replace(temporary_directory, batch_directory)
+
+
+def _read_column(batch, name, kind, rows):
+    values = np.asarray(np.load(batch / '{}.npy'.format(name), mmap_mode='r')[rows])
+    if kind == 'datetime':
+        return values.astype('datetime64[ns]')
+    if kind == 'str':
+        values = values.astype(object)
+        null_path = batch / '{}.null.npy'.format(name)
+        if null_path.exists():
+            values[np.load(null_path, mmap_mode='r')[rows]] = None
+    return values
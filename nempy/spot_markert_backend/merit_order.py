@@ -0,0 +1,160 @@
+import pandas as pd
+import numpy as np
+
+
+def clear_energy_market(bids, demand, unit_capacity=None, tolerance=1e-9):
+    """Dispatch energy bids in merit order to meet regional demand, without building a linear program.
+
+    For a market with only energy bids, regional demand constraints and optionally unit capacity constraints, the
+    least cost dispatch can be found by filling demand in each region from the cheapest bid band up. Bid bands with the
+    same price in a region are dispatched pro rata to their volume, matching the tie break constraints. The price in
+    each region is the price of the marginal, i.e. last dispatched, bid band.
+
+    Examples
+    --------
+
+    >>> bids = pd.DataFrame({
+    ...   'variable_id': [0, 1, 2, 3],
+    ...   'unit': ['A', 'A', 'B', 'B'],
+    ...   'region': ['NSW', 'NSW', 'NSW', 'NSW'],
+    ...   'coefficient': [1.0, 1.0, 1.0, 1.0],
+    ...   'cost': [50.0, 60.0, 55.0, 60.0],
+    ...   'lower_bound': [0.0, 0.0, 0.0, 0.0],
+    ...   'upper_bound': [20.0, 20.0, 50.0, 30.0]})
+
+    >>> demand = pd.DataFrame({
+    ...   'region': ['NSW'],
+    ...   'rhs': [95.0]})
+
+    >>> values, prices = clear_energy_market(bids, demand)
+
+    >>> print(values)
+       variable_id  value
+    0            0   20.0
+    1            1   10.0
+    2            2   50.0
+    3            3   15.0
+
+    >>> print(prices)
+      region  price
+    0    NSW   60.0
+
+    Parameters
+    ----------
+    bids : pd.DataFrame
+        ===========  ====================================================================================
+        Columns:     Description:
+        variable_id  the id of the bid band decision variable (as `int`)
+        unit         the unit the bid band belongs to (as `str`)
+        region       the region the bid band is dispatched in (as `str`)
+        coefficient  the coefficient of the variable in the regional demand constraint, 1.0 for \n
+                     generators and -1.0 for loads (as `np.float64`)
+        cost         the objective function cost of the variable (as `np.float64`)
+        lower_bound  the minimum value of the variable (as `np.float64`)
+        upper_bound  the maximum value of the variable (as `np.float64`)
+        ===========  ====================================================================================
+
+    demand : pd.DataFrame
+        ========  ====================================================================================
+        Columns:  Description:
+        region    unique identifier of a market region (as `str`)
+        rhs       the demand to be met in the region, in MW (as `np.float64`)
+        ========  ====================================================================================
+
+    unit_capacity : pd.DataFrame
+        ========  ====================================================================================
+        Columns:  Description:
+        unit      unique identifier of a dispatch unit (as `str`)
+        rhs       the maximum total dispatch across the unit's bid bands, in MW (as `np.float64`)
+        ========  ====================================================================================
+
+    tolerance : float
+        The tolerance used when checking if demand can be met.
+
+    Returns
+    -------
+    values : pd.DataFrame
+        ===========  ====================================================================================
+        Columns:     Description:
+        variable_id  the id of the bid band decision variable (as `int`)
+        value        the dispatch of the bid band (as `np.float64`)
+        ===========  ====================================================================================
+
+    prices : pd.DataFrame
+        ========  ====================================================================================
+        Columns:  Description:
+        region    unique identifier of a market region (as `str`)
+        price     the marginal cost of meeting demand in the region (as `np.float64`)
+        ========  ====================================================================================
+
+    Raises
+    ------
+        ValueError
+            If demand cannot be met in a region.
+    """
+    bands = bids.reset_index(drop=True)
+    lower_bound = bands['lower_bound'].to_numpy(dtype=float)
+    upper_bound = bands['upper_bound'].to_numpy(dtype=float)
+    coefficient = bands['coefficient'].to_numpy(dtype=float)
+    cost = bands['cost'].to_numpy(dtype=float)
+    volume = upper_bound - lower_bound
+
+    # Unit capacity removes the least valuable volume of each unit, i.e. the bands with the highest cost per MW.
+    if unit_capacity is not None and not unit_capacity.empty:
+        capacity = bands['unit'].map(dict(zip(unit_capacity['unit'], unit_capacity['rhs'])))
+        capacity = capacity.fillna(np.inf).to_numpy(dtype=float)
+        order = np.lexsort((cost, bands['unit'].to_numpy()))
+        unit_of_sorted = bands['unit'].to_numpy()[order]
+        sorted_volume = volume[order]
+        cumulative_volume = pd.Series(sorted_volume).groupby(unit_of_sorted).cumsum().to_numpy()
+        minimum_dispatch = bands.groupby('unit')['lower_bound'].transform('sum').to_numpy(dtype=float)[order]
+        available = capacity[order] - minimum_dispatch
+        if (available < -tolerance).any():
+            raise ValueError('Linear program infeasible')
+        clipped = np.clip(available - (cumulative_volume - sorted_volume), 0.0, sorted_volume)
+        volume = np.empty_like(volume)
+        volume[order] = clipped
+
+    # Substituting y = coefficient * value makes each region a continuous knapsack, sorted by cost per unit of y.
+    is_positive = coefficient > 0.0
+    minimum_contribution = np.where(is_positive, coefficient * lower_bound, coefficient * (lower_bound + volume))
+    width = np.abs(coefficient) * volume
+    ratio = cost / coefficient
+
+    bands['ratio'] = ratio
+    bands['width'] = width
+    bands['minimum_contribution'] = minimum_contribution
+
+    # Bands with the same price in a region are grouped so they can be dispatched pro rata.
+    tie_groups = bands.groupby(['region', 'ratio'], sort=True).agg(width=('width', 'sum')).reset_index()
+    tie_groups['width_before'] = tie_groups.groupby('region')['width'].cumsum() - tie_groups['width']
+
+    region_demand = pd.Series(demand['rhs'].to_numpy(dtype=float), index=demand['region'])
+    minimum_supply = bands.groupby('region')['minimum_contribution'].sum()
+    total_width = tie_groups.groupby('region')['width'].sum()
+    required = region_demand - minimum_supply.reindex(region_demand.index, fill_value=0.0)
+    available_width = total_width.reindex(region_demand.index, fill_value=0.0)
+    if ((required < -tolerance) | (required > available_width + tolerance)).any():
+        raise ValueError('Linear program infeasible')
+
+    tie_groups['required'] = tie_groups['region'].map(required)
+    tie_groups['fill'] = np.clip(tie_groups['required'] - tie_groups['width_before'], 0.0, tie_groups['width'])
+    tie_groups['fraction'] = np.where(tie_groups['width'] > 0.0,
+                                      tie_groups['fill'] / tie_groups['width'].where(tie_groups['width'] > 0.0, 1.0),
+                                      0.0)
+
+    fraction = pd.merge(bands.loc[:, ['region', 'ratio']], tie_groups.loc[:, ['region', 'ratio', 'fraction']],
+                        on=['region', 'ratio'], how='left')['fraction'].to_numpy()
+    contribution = minimum_contribution + fraction * width
+    values = pd.DataFrame({'variable_id': bands['variable_id'].to_numpy(), 'value': contribution / coefficient})
+
+    # The marginal band is the last band with volume that is used, or the first with volume if none are needed.
+    has_width = tie_groups[tie_groups['width'] > tolerance]
+    used = has_width[has_width['fill'] > tolerance]
+    marginal = used.groupby('region').tail(1)
+    unused_regions = ~has_width['region'].isin(marginal['region'])
+    first_available = has_width[unused_regions].groupby('region').head(1)
+    marginal = pd.concat([marginal, first_available])
+    prices = pd.DataFrame({'region': demand['region'].to_numpy()})
+    prices['price'] = prices['region'].map(dict(zip(marginal['region'], marginal['ratio'])))
+    return values, prices
@@ -0,0 +1,116 @@
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Increase when the layout of model files changes, so files written by older versions are not misread.
+FORMAT_VERSION = 1
+
+
+def write_frames(path, frames, attributes):
+    """Write a set of pd.DataFrames and json serialisable attributes to a single compressed numpy archive.
+
+    Each column, and the index, of each pd.DataFrame is saved as a numpy array. Text columns are saved as fixed width
+    unicode arrays, with a separate mask of null values, so the archive can be read without unpickling objects. The
+    file is written to a temporary path first and then moved into place, so an interrupted write never leaves a
+    partial file at path.
+
+    Examples
+    --------
+    >>> frames = {('bids', 'energy'): pd.DataFrame({'unit': ['A', None], 'variable_id': [0, 1]})}
+
+    >>> write_frames('model.npz', frames, attributes={'next_variable_id': 2})
+
+    >>> frames, attributes = read_frames('model.npz')
+
+    >>> print(frames[('bids', 'energy')])
+       unit  variable_id
+    0     A            0
+    1  None            1
+
+    >>> attributes
+    {'next_variable_id': 2}
+
+    >>> os.remove('model.npz')
+
+    Parameters
+    ----------
+    path : str or pathlib.Path
+    frames : dict[tuple[str], pd.DataFrame]
+        The pd.DataFrames to save, keyed by a tuple of str.
+    attributes : dict
+        Json serialisable values to save alongside the pd.DataFrames.
+
+    Returns
+    -------
+    None
+    """
+    path = Path(path)
+    arrays = {}
+    manifest = {'format_version': FORMAT_VERSION, 'attributes': attributes, 'frames': []}
+    for frame_number, (key, frame) in enumerate(frames.items()):
+        columns = []
+        for column_number, (name, column) in enumerate([('index', frame.index.to_series())] + list(frame.items())):
+            array_name = '{}.{}'.format(frame_number, column_number)
+            arrays[array_name], is_null = _column_to_array(column)
+            null_array_name = None
+            if is_null is not None:
+                null_array_name = array_name + '.null'
+                arrays[null_array_name] = is_null
+            columns.append({'name': name, 'array': array_name, 'null_array': null_array_name})
+        manifest['frames'].append({'key': list(key), 'index': columns[0], 'columns': columns[1:]})
+    arrays['manifest'] = np.array(json.dumps(manifest))
+    temporary_path = path.with_name(path.name + '.tmp')
+    with open(temporary_path, 'wb') as file:
+        np.savez_compressed(file, **arrays)
+    os.replace(temporary_path, path)
+
+
+def read_frames(path):
+    """Read the pd.DataFrames and attributes saved by :func:`write_frames`.
+
+    Parameters
+    ----------
+    path : str or pathlib.Path
+
+    Returns
+    -------
+    frames : dict[tuple[str], pd.DataFrame]
+    attributes : dict
+
+    Raises
+    ------
+    ValueError
+        If the file was written with a different version of the file format.
+    """
+    with np.load(path, allow_pickle=False) as archive:
+        manifest = json.loads(str(archive['manifest']))
+        if manifest['format_version'] != FORMAT_VERSION:
+            raise ValueError('The model file {} has format version {}, but version {} is required.'.format(
+                path, manifest['format_version'], FORMAT_VERSION))
+        frames = {}
+        for frame in manifest['frames']:
+            data = {column['name']: _array_to_column(archive, column) for column in frame['columns']}
+            index = pd.Index(_array_to_column(archive, frame['index']))
+            frames[tuple(frame['key'])] = pd.DataFrame(data, index=index, columns=[c['name'] for c in frame['columns']])
+    return frames, manifest['attributes']
+
+
+def _column_to_array(column):
+    """Convert a column to a numpy array that can be loaded without pickling, and a mask of null text values."""
+    if column.dtype == object:
+        is_null = column.isna().to_numpy()
+        values = np.array(column.where(~is_null, '').astype(str).tolist(), dtype=str)
+        return values, is_null if is_null.any() else None
+    return column.to_numpy(), None
+
+
+def _array_to_column(archive, column):
+    values = archive[column['array']]
+    if values.dtype.kind == 'U':
+        values = values.astype(object)
+        if column['null_array'] is not None:
+            values[archive[column['null_array']]] = None
+    return values
@@ -0,0 +1,670 @@
+import copy
+import multiprocessing
+import queue
+import time
+
+import numpy as np
+
+# LP methods that solves can be retried with, see SolverProcessPool, mapped to the name of the mip.LP_Method.
+LP_METHODS = {'auto': 'AUTO', 'dual': 'DUAL', 'primal': 'PRIMAL', 'barrier': 'BARRIER'}
+
+# Solver statuses which show the model has no optimal solution, rather than that the solve failed.
+INFEASIBLE_STATUSES = ['infeasible', 'int_infeasible', 'unbounded']
+
+
+class SolverBackend:
+    """The interface between nempy and a solver, models are passed to the solver as arrays.
+
+    Columns (variables) and rows (constraints) are identified by their position, in the order they were added. Rows
+    are added in bulk as a compressed sparse row (CSR) matrix, and results are returned as arrays in column or row
+    order. Slack follows the nempy convention, for '<=' and '=' rows it is the rhs minus the row activity, and for '>='
+    rows the row activity minus the rhs. Duals are the change in the objective value per unit increase in a row's rhs.
+
+    Subclasses implement each method, backends that can't model special ordered sets raise NotImplementedError from
+    add_special_ordered_sets. After each solve the status attribute is 'optimal', or a lower case description of why
+    an optimal solution wasn't found, e.g. 'infeasible'.
+
+    Examples
+    --------
+    Load a model with two variables and one constraint, then solve.
+
+    >>> backend = create_backend('CBC')
+
+    >>> backend.add_columns(lower_bounds=np.array([0.0, 0.0]), upper_bounds=np.array([5.0, 10.0]),
+    ...                     is_integer=np.array([False, False]))
+
+    >>> backend.set_objective(columns=np.array([0, 1]), costs=np.array([1.0, 2.0]))
+
+    >>> backend.add_rows(indptr=np.array([0, 2]), indices=np.array([0, 1]), data=np.array([1.0, 1.0]),
+    ...                  senses=np.array(['=']), rhs=np.array([8.0]))
+
+    >>> backend.solve()
+    True
+
+    >>> backend.get_primal()
+    array([5., 3.])
+
+    >>> backend.get_dual()
+    array([2.])
+    """
+
+    status = None
+
+    def add_columns(self, lower_bounds, upper_bounds, is_integer, names=None):
+        """Add variables, with their bounds and whether they are integer."""
+        raise NotImplementedError
+
+    def add_rows(self, indptr, indices, data, senses, rhs, names=None):
+        """Add constraints given as a CSR matrix, with senses '<=', '>=' or '=' and rhs values."""
+        raise NotImplementedError
+
+    def set_objective(self, columns, costs):
+        """Set the cost of columns in the objective function, which is minimised."""
+        raise NotImplementedError
+
+    def add_special_ordered_sets(self, sos_type, sets):
+        """Add special ordered sets, given as a list of (columns, weights) pairs."""
+        raise NotImplementedError
+
+    def set_bounds(self, columns, lower_bounds, upper_bounds):
+        raise NotImplementedError
+
+    def get_rhs(self, rows):
+        raise NotImplementedError
+
+    def set_rhs(self, rows, rhs):
+        raise NotImplementedError
+
+    def solve(self):
+        """Solve the model, returns True if an optimal solution was found."""
+        raise NotImplementedError
+
+    def get_primal(self):
+        raise NotImplementedError
+
+    def get_dual(self):
+        raise NotImplementedError
+
+    def get_slack(self):
+        raise NotImplementedError
+
+    @property
+    def objective_value(self):
+        raise NotImplementedError
+
+    def export_model(self):
+        """Return a copy of the model stored as arrays, which can be loaded into other backends."""
+        raise NotImplementedError
+
+
+class MipBackend(SolverBackend):
+    """Backend using python-mip, with either the CBC or GUROBI solvers.
+
+    mip, which loads the solver library, is imported when the first backend is created rather than with nempy.
+    """
+
+    def __init__(self, solver_name='CBC'):
+        import mip
+        self._mip = mip
+        if solver_name == 'CBC':
+            self.model = mip.Model("market", solver_name=mip.CBC)
+        elif solver_name == 'GUROBI':
+            self.model = mip.Model("market", solver_name=mip.GUROBI)
+        else:
+            raise ValueError("Solver '{}' not recognised.".format(solver_name))
+        self.model.verbose = 0
+        self.model.solver.set_mip_gap_abs(1e-10)
+        self.model.solver.set_mip_gap(1e-20)
+        self.model.lp_method = mip.LP_Method.DUAL
+        self.variables = []
+        self.constraints = []
+        self._special_ordered_sets = []
+
+    def add_columns(self, lower_bounds, upper_bounds, is_integer, names=None):
+        binary, continuous = self._mip.BINARY, self._mip.CONTINUOUS
+        if names is None:
+            names = [str(column) for column in range(len(self.variables), len(self.variables) + len(lower_bounds))]
+        for lower_bound, upper_bound, integer, name in zip(np.asarray(lower_bounds).tolist(),
+                                                           np.asarray(upper_bounds).tolist(),
+                                                           np.asarray(is_integer).tolist(), names):
+            self.variables.append(self.model.add_var(lb=lower_bound, ub=upper_bound,
+                                                     var_type=binary if integer else continuous, name=name))
+
+    def add_rows(self, indptr, indices, data, senses, rhs, names=None):
+        if names is None:
+            names = [str(row) for row in range(len(self.constraints), len(self.constraints) + len(rhs))]
+        # Map the nempy constraint types to the mip representation.
+        mip_senses = {'<=': '<', '>=': '>', '=': '='}
+        lhs_variables = [self.variables[column] for column in np.asarray(indices).tolist()]
+        coefficients = np.asarray(data, dtype=float).tolist()
+        indptr = np.asarray(indptr).tolist()
+        for row, (sense, row_rhs, name) in enumerate(zip(senses, np.asarray(rhs, dtype=float).tolist(), names)):
+            if sense not in mip_senses:
+                raise ValueError("Constraint type not recognised should be one of '<=', '>=' or '='.")
+            start, end = indptr[row], indptr[row + 1]
+            # Create the constraint directly from the variables and coefficients in the row.
+            new_constraint = self._mip.LinExpr(lhs_variables[start:end], coefficients[start:end], -row_rhs,
+                                               mip_senses[sense])
+            self.constraints.append(self.model.add_constr(new_constraint, name=name))
+
+    def set_objective(self, columns, costs):
+        for column, cost in zip(np.asarray(columns).tolist(), np.asarray(costs, dtype=float).tolist()):
+            self.variables[column].obj = cost
+
+    def add_special_ordered_sets(self, sos_type, sets):
+        for columns, weights in sets:
+            self.model.add_sos(list(zip([self.variables[column] for column in columns], weights)), sos_type)
+        # This is a hack to make sure mip knows there are binary constraints.
+        self.model.add_var(var_type=self._mip.BINARY, obj=0.0)
+        self._special_ordered_sets.append((sos_type, sets))
+
+    def set_bounds(self, columns, lower_bounds, upper_bounds):
+        for column, lower_bound, upper_bound in zip(np.asarray(columns).tolist(), np.asarray(lower_bounds).tolist(),
+                                                    np.asarray(upper_bounds).tolist()):
+            self.variables[column].lb = lower_bound
+            self.variables[column].ub = upper_bound
+
+    def get_rhs(self, rows):
+        return np.array([self.constraints[row].rhs for row in np.asarray(rows).tolist()], dtype=float)
+
+    def set_rhs(self, rows, rhs):
+        for row, row_rhs in zip(np.asarray(rows).tolist(), np.asarray(rhs, dtype=float).tolist()):
+            self.constraints[row].rhs = row_rhs
+
+    def solve(self):
+        status = self.model.optimize()
+        self.status = status.name.lower()
+        return status == self._mip.OptimizationStatus.OPTIMAL
+
+    def set_lp_method(self, lp_method):
+        """Set the method used to solve linear programs, one of the keys of LP_METHODS."""
+        self.model.lp_method = getattr(self._mip.LP_Method, LP_METHODS[lp_method])
+
+    def get_primal(self):
+        return np.array([variable.x for variable in self.variables], dtype=float)
+
+    def get_dual(self):
+        return np.array([constraint.pi for constraint in self.constraints], dtype=float)
+
+    def get_slack(self):
+        return np.array([constraint.slack for constraint in self.constraints], dtype=float)
+
+    @property
+    def objective_value(self):
+        return self.model.objective_value
+
+    def export_model(self):
+        model = _ArrayModel()
+        model.add_columns([variable.lb for variable in self.variables], [variable.ub for variable in self.variables],
+                          [variable.var_type == self._mip.BINARY for variable in self.variables])
+        model.set_objective(np.arange(len(self.variables)), [variable.obj for variable in self.variables])
+        positions = {variable.idx: position for position, variable in enumerate(self.variables)}
+        indptr, indices, data, senses, rhs = [0], [], [], [], []
+        nempy_senses = {'<': '<=', '>': '>=', '=': '='}
+        for constraint in self.constraints:
+            expression = constraint.expr
+            indices += [positions[variable.idx] for variable in expression.expr]
+            data += list(expression.expr.values())
+            indptr.append(len(indices))
+            senses.append(nempy_senses[expression.sense])
+            rhs.append(constraint.rhs)
+        model.add_rows(np.array(indptr), np.array(indices, dtype=np.int64), np.array(data, dtype=float),
+                       np.array(senses, dtype=object), np.array(rhs, dtype=float))
+        model._special_ordered_sets = list(self._special_ordered_sets)
+        return model
+
+
+class _ArrayModel(SolverBackend):
+    """Stores a model as arrays, the base of backends that pass the whole model to a solver engine on each solve."""
+
+    def __init__(self):
+        self._lower_bounds = np.zeros(0)
+        self._upper_bounds = np.zeros(0)
+        self._is_integer = np.zeros(0, dtype=bool)
+        self._costs = np.zeros(0)
+        self._indptr = np.zeros(1, dtype=np.int64)
+        self._indices = np.zeros(0, dtype=np.int64)
+        self._data = np.zeros(0)
+        self._senses = np.zeros(0, dtype=object)
+        self._rhs = np.zeros(0)
+        self._special_ordered_sets = []
+
+    def add_columns(self, lower_bounds, upper_bounds, is_integer, names=None):
+        self._lower_bounds = np.append(self._lower_bounds, np.asarray(lower_bounds, dtype=float))
+        self._upper_bounds = np.append(self._upper_bounds, np.asarray(upper_bounds, dtype=float))
+        self._is_integer = np.append(self._is_integer, np.asarray(is_integer, dtype=bool))
+        self._costs = np.append(self._costs, np.zeros(len(lower_bounds)))
+
+    def add_rows(self, indptr, indices, data, senses, rhs, names=None):
+        senses = np.asarray(senses, dtype=object)
+        if not np.isin(senses, ['<=', '>=', '=']).all():
+            raise ValueError("Constraint type not recognised should be one of '<=', '>=' or '='.")
+        self._indptr = np.append(self._indptr, np.asarray(indptr[1:], dtype=np.int64) + self._indptr[-1])
+        self._indices = np.append(self._indices, np.asarray(indices, dtype=np.int64))
+        self._data = np.append(self._data, np.asarray(data, dtype=float))
+        self._senses = np.append(self._senses, senses)
+        self._rhs = np.append(self._rhs, np.asarray(rhs, dtype=float))
+
+    def set_objective(self, columns, costs):
+        self._costs[np.asarray(columns, dtype=np.int64)] = costs
+
+    def add_special_ordered_sets(self, sos_type, sets):
+        self._special_ordered_sets.append((sos_type, sets))
+
+    def set_bounds(self, columns, lower_bounds, upper_bounds):
+        columns = np.asarray(columns, dtype=np.int64)
+        self._lower_bounds[columns] = lower_bounds
+        self._upper_bounds[columns] = upper_bounds
+
+    def get_rhs(self, rows):
+        return self._rhs[np.asarray(rows, dtype=np.int64)]
+
+    def set_rhs(self, rows, rhs):
+        self._rhs[np.asarray(rows, dtype=np.int64)] = rhs
+
+    @property
+    def number_of_columns(self):
+        return len(self._costs)
+
+    @property
+    def number_of_rows(self):
+        return len(self._rhs)
+
+    @property
+    def senses(self):
+        return self._senses
+
+    def load_into(self, backend, rows=None, elastic_rows=None):
+        """Load the model, or only some of its rows, into another backend.
+
+        Rows in elastic_rows get non-negative variables that allow them to be violated, and the objective becomes
+        minimising the total violation, which is used to search for the constraints causing infeasibility.
+        """
+        rows = np.arange(len(self._rhs)) if rows is None else np.asarray(rows, dtype=np.int64)
+        is_elastic = np.zeros(len(self._rhs), dtype=bool)
+        if elastic_rows is not None:
+            is_elastic[np.asarray(elastic_rows, dtype=np.int64)] = True
+        is_elastic = is_elastic[rows]
+        senses = self._senses[rows]
+        # Violations of '>=' rows are covered by a variable with a coefficient of 1, and of '<=' rows by one with a
+        # coefficient of -1, '=' rows need both.
+        plus_rows = np.flatnonzero(is_elastic & (senses != '<='))
+        minus_rows = np.flatnonzero(is_elastic & (senses != '>='))
+        n_columns, n_elastic = len(self._costs), len(plus_rows) + len(minus_rows)
+
+        backend.add_columns(self._lower_bounds, self._upper_bounds, self._is_integer)
+        backend.add_columns(np.zeros(n_elastic), np.full(n_elastic, np.inf), np.zeros(n_elastic, dtype=bool))
+        costs = np.append(np.zeros(n_columns) if elastic_rows is not None else self._costs, np.ones(n_elastic))
+        backend.set_objective(np.arange(n_columns + n_elastic), costs)
+
+        starts, lengths = self._indptr[rows], np.diff(self._indptr)[rows]
+        terms = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+        term_rows = np.concatenate([np.repeat(np.arange(len(rows)), lengths), plus_rows, minus_rows])
+        term_columns = np.concatenate([self._indices[terms], n_columns + np.arange(n_elastic)])
+        term_data = np.concatenate([self._data[terms], np.ones(len(plus_rows)), -np.ones(len(minus_rows))])
+        order = np.argsort(term_rows, kind='stable')
+        indptr = np.append(0, np.cumsum(np.bincount(term_rows, minlength=len(rows))))
+        backend.add_rows(indptr, term_columns[order], term_data[order], senses, self._rhs[rows])
+        for sos_type, sets in self._special_ordered_sets:
+            backend.add_special_ordered_sets(sos_type, sets)
+
+    def export_model(self):
+        model = _ArrayModel()
+        for name in vars(model):
+            setattr(model, name, copy.copy(getattr(self, name)))
+        return model
+
+
+class MatrixBackend(_ArrayModel):
+    """Backend for matrix oriented LP engines, using highspy if installed, otherwise scipy's HiGHS interface.
+
+    The model is stored as arrays and passed to the engine in one call on each solve. Special ordered sets are not
+    supported, so markets with interconnector losses need the mip backend. Models with integer variables can be
+    solved with highspy, but duals are not available for them.
+    """
+
+    def __init__(self):
+        super().__init__()
+        try:
+            import highspy
+            self._highspy = highspy
+            self._scipy_optimize = None
+        except ImportError:
+            self._highspy = None
+            try:
+                from scipy import optimize
+                self._scipy_optimize = optimize
+            except ImportError:
+                raise ImportError("The 'HIGHS' solver requires highspy or scipy to be installed.")
+        self._primal = None
+        self._dual = None
+        self._activity = None
+        self._objective_value = None
+
+    def add_special_ordered_sets(self, sos_type, sets):
+        raise NotImplementedError("The 'HIGHS' solver does not support special ordered sets, use 'CBC' or 'GUROBI' "
+                                  "for markets with interconnector losses.")
+
+    def _row_bounds(self):
+        row_lower = np.where(self._senses == '<=', -np.inf, self._rhs)
+        row_upper = np.where(self._senses == '>=', np.inf, self._rhs)
+        return row_lower, row_upper
+
+    def solve(self):
+        if self._highspy is not None:
+            return self._solve_with_highspy()
+        return self._solve_with_scipy()
+
+    def _solve_with_highspy(self):
+        highs = self._highspy.Highs()
+        highs.setOptionValue('output_flag', False)
+        lp = self._highspy.HighsLp()
+        lp.num_col_ = len(self._costs)
+        lp.num_row_ = len(self._rhs)
+        lp.col_cost_ = self._costs
+        lp.col_lower_ = self._lower_bounds
+        lp.col_upper_ = self._upper_bounds
+        lp.row_lower_, lp.row_upper_ = self._row_bounds()
+        lp.a_matrix_.format_ = self._highspy.MatrixFormat.kRowwise
+        lp.a_matrix_.start_ = self._indptr
+        lp.a_matrix_.index_ = self._indices
+        lp.a_matrix_.value_ = self._data
+        if self._is_integer.any():
+            lp.integrality_ = [self._highspy.HighsVarType.kInteger if integer else
+                               self._highspy.HighsVarType.kContinuous for integer in self._is_integer]
+        highs.passModel(lp)
+        highs.run()
+        status = highs.getModelStatus()
+        self.status = highs.modelStatusToString(status).lower().replace(' ', '_')
+        if status != self._highspy.HighsModelStatus.kOptimal:
+            return False
+        solution = highs.getSolution()
+        self._primal = np.array(solution.col_value, dtype=float)
+        self._activity = np.array(solution.row_value, dtype=float)
+        if self._is_integer.any():
+            self._dual = np.full(len(self._rhs), np.nan)
+        else:
+            self._dual = np.array(solution.row_dual, dtype=float)
+        self._objective_value = highs.getInfo().objective_function_value
+        return True
+
+    def _solve_with_scipy(self):
+        if self._is_integer.any():
+            raise NotImplementedError("Solving models with integer variables using the 'HIGHS' solver requires "
+                                      "highspy to be installed.")
+        n_rows, n_columns = len(self._rhs), len(self._costs)
+        rows = np.repeat(np.arange(n_rows), np.diff(self._indptr))
+        is_equality = self._senses == '='
+        # Rows are passed as A_ub x <= b_ub, so '>=' rows are multiplied by -1.
+        sign = np.where(self._senses == '>=', -1.0, 1.0)
+        matrices = {}
+        for name, in_group in [('ub', ~is_equality), ('eq', is_equality)]:
+            group_rows = np.flatnonzero(in_group)
+            positions = np.full(n_rows, -1)
+            positions[group_rows] = np.arange(len(group_rows))
+            matrix = np.zeros((len(group_rows), n_columns))
+            in_group_terms = in_group[rows]
+            np.add.at(matrix, (positions[rows[in_group_terms]], self._indices[in_group_terms]),
+                      self._data[in_group_terms] * sign[rows[in_group_terms]])
+            matrices[name] = (group_rows, matrix, self._rhs[group_rows] * sign[group_rows])
+        ub_rows, a_ub, b_ub = matrices['ub']
+        eq_rows, a_eq, b_eq = matrices['eq']
+        result = self._scipy_optimize.linprog(
+            self._costs, A_ub=a_ub if len(ub_rows) > 0 else None, b_ub=b_ub if len(ub_rows) > 0 else None,
+            A_eq=a_eq if len(eq_rows) > 0 else None, b_eq=b_eq if len(eq_rows) > 0 else None,
+            bounds=np.column_stack([self._lower_bounds, self._upper_bounds]), method='highs')
+        self.status = {0: 'optimal', 1: 'iteration_limit', 2: 'infeasible', 3: 'unbounded'}.get(result.status,
+                                                                                               'numerical_difficulties')
+        if result.status != 0:
+            return False
+        self._primal = np.asarray(result.x, dtype=float)
+        self._dual = np.zeros(n_rows)
+        if len(ub_rows) > 0:
+            self._dual[ub_rows] = np.asarray(result.ineqlin.marginals) * sign[ub_rows]
+        if len(eq_rows) > 0:
+            self._dual[eq_rows] = np.asarray(result.eqlin.marginals)
+        self._activity = np.bincount(rows, weights=self._data * self._primal[self._indices], minlength=n_rows)
+        self._objective_value = result.fun
+        return True
+
+    def get_primal(self):
+        return self._primal
+
+    def get_dual(self):
+        return self._dual
+
+    def get_slack(self):
+        return np.where(self._senses == '>=', self._activity - self._rhs, self._rhs - self._activity)
+
+    @property
+    def objective_value(self):
+        return self._objective_value
+
+
+class SolverProcessPool:
+    """Worker processes that run solves under supervision, so a solve that hangs or crashes can't take down the caller.
+
+    Each solve is sent to an idle worker process and given time_limit seconds of wall clock time. If no result
+    arrives in time the worker is killed, and replaced when next needed, and the solve fails with the status
+    'timeout'. If the worker process dies during a solve, e.g. due to a segfault in the solver library, the solve fails
+    with the status 'crashed'. Solves that fail for reasons other than the model being infeasible or unbounded are
+    retried once with each of the LP methods in retry_lp_methods. Workers are started when first needed and reused
+    for later solves. A pool can be shared by many markets, and used from several threads at once, each thread
+    waits for an idle worker.
+
+    Examples
+    --------
+    Solve a model in a worker process, giving up on the solve after 60 s and retrying once with the primal simplex.
+
+    >>> pool = SolverProcessPool(workers=1, time_limit=60.0, retry_lp_methods=['primal'])
+
+    >>> backend = create_backend('CBC', process_pool=pool)
+
+    >>> backend.add_columns(lower_bounds=np.array([0.0, 0.0]), upper_bounds=np.array([5.0, 10.0]),
+    ...                     is_integer=np.array([False, False]))
+
+    >>> backend.set_objective(columns=np.array([0, 1]), costs=np.array([1.0, 2.0]))
+
+    >>> backend.add_rows(indptr=np.array([0, 2]), indices=np.array([0, 1]), data=np.array([1.0, 1.0]),
+    ...                  senses=np.array(['=']), rhs=np.array([8.0]))
+
+    >>> backend.solve()
+    True
+
+    >>> backend.get_primal()
+    array([5., 3.])
+
+    Each attempt at the solve is recorded.
+
+    >>> [(attempt['lp_method'], attempt['status']) for attempt in backend.attempts]
+    [(None, 'optimal')]
+
+    >>> pool.close()
+
+    Parameters
+    ----------
+    workers : int
+        The number of worker processes, default 1.
+    time_limit : float
+        The wall clock time limit on each attempt at a solve, in seconds, default None, for no limit.
+    retry_lp_methods : list[str]
+        The LP methods to retry failed solves with, in order, from 'dual', 'primal', 'barrier' and 'auto'. The
+        method is only changed for the 'CBC' and 'GUROBI' solvers, 'HIGHS' solves are retried unchanged. Default no
+        retries.
+    start_method : str
+        The multiprocessing start method used for the workers, default None, for the platform default.
+    """
+
+    def __init__(self, workers=1, time_limit=None, retry_lp_methods=(), start_method=None):
+        unknown_methods = set(retry_lp_methods) - set(LP_METHODS)
+        if unknown_methods:
+            raise ValueError('LP methods {} not recognised, use one of {}.'.format(sorted(unknown_methods),
+                                                                              list(LP_METHODS)))
+        self.time_limit = time_limit
+        self.retry_lp_methods = list(retry_lp_methods)
+        self._context = multiprocessing.get_context(start_method)
+        self._idle_workers = queue.Queue()
+        # Workers are started when first used, until then the queue holds a placeholder for each worker.
+        for _ in range(workers):
+            self._idle_workers.put(None)
+        self._workers = workers
+
+    def run(self, function, args):
+        """Run function(*args) in a worker, returns the status 'ok', 'timeout', 'crashed' or 'error', and the result.
+
+        For statuses other than 'ok' the result is a message describing the failure. The function and its args must
+        be picklable.
+        """
+        worker = self._idle_workers.get()
+        try:
+            if worker is None or not worker[1].is_alive():
+                worker = self._start_worker()
+            connection, process = worker
+            connection.send((function, args))
+            if not connection.poll(self.time_limit):
+                self._stop_worker(worker)
+                worker = None
+                return 'timeout', 'No result after {} s.'.format(self.time_limit)
+            try:
+                return connection.recv()
+            except EOFError:
+                self._stop_worker(worker)
+                worker = None
+                return 'crashed', 'The solver process exited with code {}.'.format(process.exitcode)
+        finally:
+            self._idle_workers.put(worker)
+
+    def _start_worker(self):
+        connection, worker_connection = self._context.Pipe()
+        process = self._context.Process(target=_run_worker, args=(worker_connection,), daemon=True)
+        process.start()
+        worker_connection.close()
+        return connection, process
+
+    @staticmethod
+    def _stop_worker(worker):
+        connection, process = worker
+        process.kill()
+        process.join()
+        connection.close()
+
+    def close(self):
+        """Stop the worker processes, waiting for running solves to finish."""
+        for _ in range(self._workers):
+            worker = self._idle_workers.get()
+            if worker is not None:
+                self._stop_worker(worker)
+        for _ in range(self._workers):
+            self._idle_workers.put(None)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def _run_worker(connection):
+    """Run the functions sent by a SolverProcessPool until the pool closes the connection."""
+    while True:
+        try:
+            function, args = connection.recv()
+        except EOFError:
+            return
+        try:
+            result = ('ok', function(*args))
+        except Exception as error:
+            result = ('error', '{}: {}'.format(type(error).__name__, error))
+        connection.send(result)
+
+
+def _solve_in_worker(solver_name, lp_method, model):
+    """Load a model into a new backend and solve it, returns the status and, if optimal, the solution."""
+    backend = create_backend(solver_name)
+    if lp_method is not None and isinstance(backend, MipBackend):
+        backend.set_lp_method(lp_method)
+    model.load_into(backend)
+    if not backend.solve():
+        return {'status': backend.status}
+    return {'status': backend.status, 'primal': backend.get_primal(), 'dual': backend.get_dual(),
+            'slack': backend.get_slack(), 'objective_value': backend.objective_value}
+
+
+class SubprocessBackend(_ArrayModel):
+    """Backend that stores the model as arrays and solves it in a SolverProcessPool worker.
+
+    The model is loaded into a 'CBC', 'GUROBI' or 'HIGHS' backend in the worker for each solve. After a solve the
+    attempts attribute lists a dict for each attempt, with the keys lp_method (None for the solver's default), status,
+    seconds and message, which describes failures of the worker process.
+    """
+
+    def __init__(self, solver_name, process_pool):
+        super().__init__()
+        self.solver_name = solver_name
+        self.process_pool = process_pool
+        self.attempts = []
+        self._solution = None
+
+    def solve(self):
+        model = self.export_model()
+        self.attempts = []
+        self._solution = None
+        for lp_method in [None] + self.process_pool.retry_lp_methods:
+            start_time = time.perf_counter()
+            status, result = self.process_pool.run(_solve_in_worker, (self.solver_name, lp_method, model))
+            message = result if status != 'ok' else None
+            if status == 'ok':
+                status = result['status']
+            self.attempts.append({'lp_method': lp_method, 'status': status,
+                                  'seconds': time.perf_counter() - start_time, 'message': message})
+            self.status = status
+            if status == 'optimal':
+                self._solution = result
+                return True
+            if status in INFEASIBLE_STATUSES:
+                return False
+        return False
+
+    def get_primal(self):
+        return self._solution['primal']
+
+    def get_dual(self):
+        return self._solution['dual']
+
+    def get_slack(self):
+        return self._solution['slack']
+
+    @property
+    def objective_value(self):
+        return self._solution['objective_value']
+
+
+def create_backend(solver_name, process_pool=None):
+    """Create the backend for a solver name, 'CBC' or 'GUROBI' use python-mip, and 'HIGHS' uses highspy or scipy.
+
+    If a SolverProcessPool is given the model is solved in the pool's worker processes, see SubprocessBackend.
+
+    Examples
+    --------
+
+    >>> backend = create_backend('CBC')
+
+    >>> type(backend).__name__
+    'MipBackend'
+
+    Raises
+    ------
+        ValueError
+            If the solver name is not recognised.
+        ImportError
+            If the packages needed for the solver are not installed.
+    """
+    if process_pool is not None:
+        if solver_name not in ('CBC', 'GUROBI', 'HIGHS'):
+            raise ValueError("Solver '{}' not recognised.".format(solver_name))
+        return SubprocessBackend(solver_name, process_pool)
+    if solver_name in ('CBC', 'GUROBI'):
+        return MipBackend(solver_name)
+    elif solver_name == 'HIGHS':
+        return MatrixBackend()
+    raise ValueError("Solver '{}' not recognised.".format(solver_name))
@@ -1,34 +1,88 @@
+from concurrent.futures import ThreadPoolExecutor
+
 import numpy as np
 import pandas as pd
-from mip import Model, xsum, minimize, CONTINUOUS, OptimizationStatus, BINARY, CBC, GUROBI, LP_Method
+
+from nempy.spot_markert_backend import solver_backends
+
+
+class SolveError(ValueError):
+    """Raised when the solver doesn't find an optimal solution.
+
+    Attributes
+    ----------
+    status : str
+        Why an optimal solution wasn't found, e.g. 'infeasible', or for solves in a SolverProcessPool 'timeout' or
+        'crashed'.
+    attempts : list[dict]
+        The attempts at the solve, see SubprocessBackend, empty for solves in the calling process.
+    infeasible_constraint_ids : list[int]
+        If infeasibility was diagnosed, the ids of a set of constraints that can't be satisfied together, else None.
+    diagnosis_complete : bool
+        False if the diagnosis stopped at its limit on solves, in which case infeasible_constraint_ids is a set that
+        can't be satisfied together but may not be irreducible.
+    """
+
+    def __init__(self, status, attempts=None, infeasible_constraint_ids=None, diagnosis_complete=False):
+        self.status = status
+        self.attempts = attempts if attempts is not None else []
+        self.infeasible_constraint_ids = infeasible_constraint_ids
+        self.diagnosis_complete = diagnosis_complete
+        if status in solver_backends.INFEASIBLE_STATUSES:
+            message = 'Linear program infeasible'
+        else:
+            message = 'Linear program could not be solved, solver status {}'.format(status)
+        if len(self.attempts) > 1:
+            message += ' after {} attempts'.format(len(self.attempts))
+        if infeasible_constraint_ids is not None:
+            message += ', constraints {} can not be satisfied together'.format(infeasible_constraint_ids)
+        super().__init__(message)
 
 
 class InterfaceToSolver:
-    """A wrapper for the mip model class, allows interaction with mip using pd.DataFrames."""
+    """A wrapper for the solver backends, allows interaction with solvers using pd.DataFrames.
+
+    Two copies of the model are kept, one including any special ordered sets and binary variables, and a linear
+    version used for pricing constraints. Variable and constraint ids are mapped to the positional columns and rows of
+    the backends.
 
-    def __init__(self, solver_name='CBC'):
-        self.variables = {}
-        self.linear_mip_variables = {}
+    Parameters
+    ----------
+    solver_name : str
+        'CBC', 'GUROBI' or 'HIGHS', default 'CBC'.
+    process_pool : solver_backends.SolverProcessPool
+        If given, solves are run in the pool's worker processes, with its time limit and retries, default None.
+    diagnose_infeasibility : bool
+        If True, when the model is infeasible search for the constraints causing it before raising SolveError, see
+        find_infeasible_rows, default False.
+    max_diagnostic_solves : int
+        The limit on the number of solves used to diagnose infeasibility, default 50.
+    """
 
+    def __init__(self, solver_name='CBC', process_pool=None, diagnose_infeasibility=False, max_diagnostic_solves=50):
         self.solver_name = solver_name
-        if solver_name == 'CBC':
-            self.mip_model = Model("market", solver_name=CBC)
-            self.linear_mip_model = Model("market", solver_name=CBC)
-        elif solver_name == 'GUROBI':
-            self.mip_model = Model("market", solver_name=GUROBI)
-            self.linear_mip_model = Model("market", solver_name=GUROBI)
-        else:
-            raise ValueError("Solver '{}' not recognised.")
+        self.process_pool = process_pool
+        self.diagnose_infeasibility = diagnose_infeasibility
+        self.max_diagnostic_solves = max_diagnostic_solves
+        self.backend = solver_backends.create_backend(solver_name, process_pool)
+        self.linear_backend = solver_backends.create_backend(solver_name, process_pool)
+        self._columns = pd.Index([], dtype=np.int64)
+        self._rows = pd.Index([], dtype=np.int64)
+
+    @property
+    def mip_model(self):
+        """The underlying mip.Model, only available when using the 'CBC' or 'GUROBI' solvers."""
+        return self.backend.model
+
+    @property
+    def linear_mip_model(self):
+        return self.linear_backend.model
 
-        self.mip_model.verbose = 0
-        self.mip_model.solver.set_mip_gap_abs(1e-10)
-        self.mip_model.solver.set_mip_gap(1e-20)
-        self.mip_model.lp_method = LP_Method.DUAL
+    def _column_positions(self, variable_ids):
+        return self._columns.get_indexer(pd.Index(variable_ids))
 
-        self.linear_mip_model.verbose = 0
-        self.linear_mip_model.solver.set_mip_gap_abs(1e-10)
-        self.linear_mip_model.solver.set_mip_gap(1e-20)
-        self.linear_mip_model.lp_method = LP_Method.DUAL
+    def _row_positions(self, constraint_ids):
+        return self._rows.get_indexer(pd.Index(constraint_ids))
 
     def add_variables(self, decision_variables):
         """Add decision variables to the model.
@@ -73,20 +127,13 @@ class InterfaceToSolver:
         1.0
 
         """
-        # Create a mapping between the nempy level names for variable types and the mip representation.
-        variable_types = {'continuous': CONTINUOUS, 'binary': BINARY}
-        # Add each variable to the mip model.
-        for variable_id, lower_bound, upper_bound, variable_type in zip(
-                list(decision_variables['variable_id']), list(decision_variables['lower_bound']),
-                list(decision_variables['upper_bound']), list(decision_variables['type'])):
-            self.variables[variable_id] = self.mip_model.add_var(lb=lower_bound, ub=upper_bound,
-                                                                 var_type=variable_types[variable_type],
-                                                                 name=str(variable_id))
-
-            self.linear_mip_variables[variable_id] = self.linear_mip_model.add_var(lb=lower_bound, ub=upper_bound,
-                                                                                   var_type=variable_types[
-                                                                                       variable_type],
-                                                                                   name=str(variable_id))
+        variable_ids = decision_variables['variable_id'].to_numpy(dtype=np.int64)
+        is_integer = (decision_variables['type'] == 'binary').to_numpy()
+        for backend in [self.backend, self.linear_backend]:
+            backend.add_columns(decision_variables['lower_bound'].to_numpy(dtype=float),
+                                decision_variables['upper_bound'].to_numpy(dtype=float), is_integer,
+                                names=[str(variable_id) for variable_id in variable_ids.tolist()])
+        self._columns = self._columns.append(pd.Index(variable_ids))
 
     def add_sos_type_2(self, sos_variables, sos_id_columns, position_column):
         """Add groups of special ordered sets of type 2 two the mip model.
@@ -114,28 +161,15 @@ class InterfaceToSolver:
 
         """
 
-        # Function that adds sets to mip model.
-        def add_sos_vars(sos_group):
-            self.mip_model.add_sos(list(zip(sos_group['vars'], sos_group[position_column])), 2)
-
-        # For each variable_id get the variable object from the mip model
-        sos_variables['vars'] = sos_variables['variable_id'].apply(lambda x: self.variables[x])
         # Break up the sets based on their id and add them to the model separately.
-        sos_variables.groupby(sos_id_columns).apply(add_sos_vars)
-        # This is a hack to make sure mip knows there are binary constraints.
-        self.mip_model.add_var(var_type=BINARY, obj=0.0)
+        sets = [(self._column_positions(sos_group['variable_id']).tolist(), sos_group[position_column].tolist())
+                for _, sos_group in sos_variables.groupby(sos_id_columns)]
+        self.backend.add_special_ordered_sets(2, sets)
 
     def add_sos_type_1(self, sos_variables):
-        # Function that adds sets to mip model.
-        def add_sos_vars(sos_group):
-            self.mip_model.add_sos(list(zip(sos_group['vars'], [1.0 for i in range(len(sos_variables['vars']))])), 1)
-
-        # For each variable_id get the variable object from the mip model
-        sos_variables['vars'] = sos_variables['variable_id'].apply(lambda x: self.variables[x])
-        # Break up the sets based on their id and add them to the model separately.
-        sos_variables.groupby('sos_id').apply(add_sos_vars)
-        # This is a hack to make mip knows there are binary constraints.
-        self.mip_model.add_var(var_type=BINARY, obj=0.0)
+        sets = [(self._column_positions(sos_group['variable_id']).tolist(), [1.0] * len(sos_variables))
+                for _, sos_group in sos_variables.groupby('sos_id')]
+        self.backend.add_special_ordered_sets(1, sets)
 
     def add_objective_function(self, objective_function):
         """Add the objective function to the mip model.
@@ -167,12 +201,9 @@ class InterfaceToSolver:
         0.0
 
         """
-        objective_function = objective_function.sort_values('variable_id')
-        objective_function = objective_function.set_index('variable_id')
-        obj = minimize(xsum(objective_function['cost'][i] * self.variables[i] for i in
-                            list(objective_function.index)))
-        self.mip_model.objective = obj
-        self.linear_mip_model.objective = obj
+        columns = self._column_positions(objective_function['variable_id'])
+        for backend in [self.backend, self.linear_backend]:
+            backend.set_objective(columns, objective_function['cost'].to_numpy(dtype=float))
 
     def add_constraints(self, constraints_lhs, constraints_type_and_rhs):
         """Add constraints to the mip model.
@@ -210,44 +241,41 @@ class InterfaceToSolver:
 
         """
 
-        constraints_lhs = constraints_lhs.groupby(['constraint_id', 'variable_id'], as_index=False).agg(
-            {'coefficient': 'sum'})
-        rows = constraints_lhs.groupby(['constraint_id'], as_index=False)
-
-        # Make a dictionary so constraint rhs values can be accessed using the constraint id.
-        rhs = dict(zip(constraints_type_and_rhs['constraint_id'], constraints_type_and_rhs['rhs']))
-        # Make a dictionary so constraint type can be accessed using the constraint id.
-        enq_type = dict(zip(constraints_type_and_rhs['constraint_id'], constraints_type_and_rhs['type']))
-        var_ids = constraints_lhs['variable_id'].to_numpy()
-        vars = np.asarray(
-            [self.variables[k] if k in self.variables.keys() else None for k in range(0, max(var_ids) + 1)])
-        coefficients = constraints_lhs['coefficient'].to_numpy()
-        for row_id, row in rows.indices.items():
-            # Use the variable_ids to get mip variable objects present in the constraints
-            lhs_variables = vars[var_ids[row]]
-            # Use the positions of the non nan values to the lhs coefficients.
-            lhs = coefficients[row]
-            # Multiply and the variables by their coefficients and sum to create the lhs of the constraint.
-            exp = lhs_variables * lhs
-            exp = exp.tolist()
-            exp = xsum(exp)
-            # Add based on inequality type.
-            if enq_type[row_id] == '<=':
-                new_constraint = exp <= rhs[row_id]
-            elif enq_type[row_id] == '>=':
-                new_constraint = exp >= rhs[row_id]
-            elif enq_type[row_id] == '=':
-                new_constraint = exp == rhs[row_id]
-            else:
-                raise ValueError("Constraint type not recognised should be one of '<=', '>=' or '='.")
-            self.mip_model.add_constr(new_constraint, name=str(row_id))
-            self.linear_mip_model.add_constr(new_constraint, name=str(row_id))
+        constraint_ids = constraints_lhs['constraint_id'].to_numpy(dtype=np.int64)
+        var_ids = constraints_lhs['variable_id'].to_numpy(dtype=np.int64)
+        coefficients = constraints_lhs['coefficient'].to_numpy(dtype=np.float64)
+
+        # Sort terms by constraint and then variable, so each row is contiguous and repeated terms are adjacent.
+        order = np.lexsort((var_ids, constraint_ids))
+        constraint_ids, var_ids, coefficients = constraint_ids[order], var_ids[order], coefficients[order]
+
+        # Sum the coefficients of repeated terms.
+        if len(constraint_ids) > 0:
+            new_term = np.ones(len(constraint_ids), dtype=bool)
+            new_term[1:] = (constraint_ids[1:] != constraint_ids[:-1]) | (var_ids[1:] != var_ids[:-1])
+            term_starts = np.flatnonzero(new_term)
+            coefficients = np.add.reduceat(coefficients, term_starts)
+            constraint_ids, var_ids = constraint_ids[term_starts], var_ids[term_starts]
+
+        # Only constraints with terms on the lhs are added, in the CSR format used by the backends.
+        row_starts = np.flatnonzero(np.diff(constraint_ids, prepend=-1) != 0)
+        row_ids = constraint_ids[row_starts]
+        indptr = np.append(row_starts, len(constraint_ids))
+
+        type_and_rhs = constraints_type_and_rhs.set_index('constraint_id').loc[row_ids]
+        senses = type_and_rhs['type'].to_numpy()
+        rhs = type_and_rhs['rhs'].to_numpy(dtype=float)
+        indices = self._column_positions(var_ids)
+        names = [str(row_id) for row_id in row_ids.tolist()]
+        for backend in [self.backend, self.linear_backend]:
+            backend.add_rows(indptr, indices, coefficients, senses, rhs, names=names)
+        self._rows = self._rows.append(pd.Index(row_ids))
 
     def optimize(self):
         """Optimize the mip model.
 
-        If an optimal solution cannot be found and the investigate_infeasibility flag is set to True then remove
-        constraints until a feasible solution is found.
+        If an optimal solution cannot be found a SolveError is raised. If diagnose_infeasibility is True, and the model
+        is infeasible, the error lists a set of constraints that can't be satisfied together.
 
         Examples
         --------
@@ -287,13 +315,17 @@ class InterfaceToSolver:
         4            4          0.0          5.0  continuous    5.0
         5            5          0.0          5.0  continuous    0.0
         """
-        status = self.mip_model.optimize()
-        if status != OptimizationStatus.OPTIMAL:
-            # Attempt find constraint causing infeasibility.
-            print('Model infeasible attempting to find problem constraint.')
-            con_index = find_problem_constraint(self.mip_model)
-            print('Couldn\'t find an optimal solution, but removing con {} fixed INFEASIBLITY'.format(con_index))
-            raise ValueError('Linear program infeasible')
+        if not self.backend.solve():
+            self._raise_solve_error(self.backend, diagnose=self.diagnose_infeasibility)
+
+    def _raise_solve_error(self, backend, diagnose=False):
+        attempts = getattr(backend, 'attempts', [])
+        if diagnose and backend.status not in ['timeout', 'crashed', 'error']:
+            rows, complete = find_infeasible_rows(
+                backend.export_model(), lambda: solver_backends.create_backend(self.solver_name, self.process_pool),
+                self.max_diagnostic_solves)
+            raise SolveError(backend.status, attempts, self._rows[rows].tolist(), complete)
+        raise SolveError(backend.status, attempts)
 
     def get_optimal_values_of_decision_variables(self, variable_definitions):
         """Get the optimal values for each decision variable.
@@ -338,12 +370,12 @@ class InterfaceToSolver:
         5            5          0.0          5.0  continuous    0.0
 
         """
-        values = variable_definitions['variable_id'].apply(lambda x: self.mip_model.var_by_name(str(x)).x)
-        return values
+        values = self.backend.get_primal()[self._column_positions(variable_definitions['variable_id'])]
+        return pd.Series(values, index=variable_definitions.index, dtype=float)
 
     def get_optimal_values_of_decision_variables_lin(self, variable_definitions):
-        values = variable_definitions['variable_id'].apply(lambda x: self.linear_mip_model.var_by_name(str(x)).x)
-        return values
+        values = self.linear_backend.get_primal()[self._column_positions(variable_definitions['variable_id'])]
+        return pd.Series(values, index=variable_definitions.index, dtype=float)
 
     def get_slack_in_constraints(self, constraints_type_and_rhs):
         """Get the slack values in each constraint.
@@ -384,9 +416,10 @@ class InterfaceToSolver:
         1              2    =  20.0    0.0
 
         """
-        slack = constraints_type_and_rhs['constraint_id'].apply(
-            lambda x: getattr(self.mip_model.constr_by_name(str(x)), "slack", 0.0))
-        return slack
+        # Constraints without lhs terms are not in the model, and have zero slack.
+        rows = self._row_positions(constraints_type_and_rhs['constraint_id'])
+        slack = np.where(rows >= 0, self.backend.get_slack()[rows], 0.0)
+        return pd.Series(slack, index=constraints_type_and_rhs.index, name='constraint_id')
 
     def price_constraints(self, constraint_ids_to_price):
         """For each constraint_id find the marginal value of the constraint.
@@ -448,37 +481,724 @@ class InterfaceToSolver:
         5            5          0.0          5.0  continuous    0.0
 
         """
+        constraint_ids_to_price = list(constraint_ids_to_price)
+        prices = self.linear_backend.get_dual()[self._row_positions(constraint_ids_to_price)]
+        return dict(zip(constraint_ids_to_price, prices.tolist()))
+
+    def optimize_linear(self):
+        """Optimize the linear version of the model, used for pricing constraints.
+
+        Failures of solves in a SolverProcessPool raise a SolveError, as there is then no solution to price from.
+        """
+        if not self.linear_backend.solve() and isinstance(self.linear_backend, solver_backends.SubprocessBackend):
+            self._raise_solve_error(self.linear_backend)
+
+    @property
+    def objective_value(self):
+        return self.backend.objective_value
+
+    def update_rhs(self, constraint_id, violation_degree):
+        rows = self._row_positions([constraint_id])
+        self.linear_backend.set_rhs(rows, self.linear_backend.get_rhs(rows) + violation_degree)
+
+    def update_variable_bounds(self, new_bounds):
+        self.backend.set_bounds(self._column_positions(new_bounds['variable_id']),
+                                new_bounds['lower_bound'].to_numpy(dtype=float),
+                                new_bounds['upper_bound'].to_numpy(dtype=float))
+
+    def disable_variables(self, variables):
+        columns = self._column_positions(variables['variable_id'])
+        self.linear_backend.set_bounds(columns, np.zeros(len(columns)), np.zeros(len(columns)))
+
+    def set_variable_bounds(self, new_bounds):
+        """Set the bounds of variables in both the mip and linear models, used to modify a model between solves."""
+        columns = self._column_positions(new_bounds['variable_id'])
+        for backend in [self.backend, self.linear_backend]:
+            backend.set_bounds(columns, new_bounds['lower_bound'].to_numpy(dtype=float),
+                               new_bounds['upper_bound'].to_numpy(dtype=float))
+
+    def set_rhs(self, constraints_rhs):
+        """Set the rhs of constraints in both the mip and linear models, used to modify a model between solves."""
+        rows = self._row_positions(constraints_rhs['constraint_id'])
+        for backend in [self.backend, self.linear_backend]:
+            backend.set_rhs(rows, constraints_rhs['rhs'].to_numpy(dtype=float))
+
+    def set_objective_coefficients(self, objective_function):
+        """Set the cost of variables in both the mip and linear models, used to modify a model between solves."""
+        columns = self._column_positions(objective_function['variable_id'])
+        for backend in [self.backend, self.linear_backend]:
+            backend.set_objective(columns, objective_function['cost'].to_numpy(dtype=float))
+
+
+class DecomposedInterfaceToSolver:
+    """Solves each independent component of a model as a separate, smaller, model.
+
+    Accepts the same calls as InterfaceToSolver. Model components are stored until optimize is called, the model is
+    then split into the connected components of its variable-constraint graph (see find_independent_components) and
+    an InterfaceToSolver is created for each component. Variables with equal lower and upper bounds, e.g.
+    interconnectors limited to zero flow, are fixed at their bound and moved to the constraint rhs, so they do not
+    link components. Calls for results are routed to the component containing the relevant variable or constraint.
+
+    Examples
+    --------
+    Two pairs of variables, each pair only linked by its own constraint.
+
+    >>> decision_variables = pd.DataFrame({
+    ...   'variable_id': [0, 1, 2, 3],
+    ...   'lower_bound': [0.0, 0.0, 0.0, 0.0],
+    ...   'upper_bound': [5.0, 5.0, 5.0, 5.0],
+    ...   'type': ['continuous', 'continuous', 'continuous', 'continuous']})
+
+    >>> objective_function = pd.DataFrame({
+    ...   'variable_id': [0, 1, 2, 3],
+    ...   'cost': [1.0, 2.0, 2.0, 1.0]})
+
+    >>> constraints_lhs = pd.DataFrame({
+    ...   'constraint_id': [0, 0, 1, 1],
+    ...   'variable_id': [0, 1, 2, 3],
+    ...   'coefficient': [1.0, 1.0, 1.0, 1.0]})
+
+    >>> constraints_type_and_rhs = pd.DataFrame({
+    ...   'constraint_id': [0, 1],
+    ...   'type': ['=', '='],
+    ...   'rhs': [7.0, 3.0]})
+
+    >>> si = DecomposedInterfaceToSolver()
+
+    >>> si.add_variables(decision_variables)
+
+    >>> si.add_objective_function(objective_function)
+
+    >>> si.add_constraints(constraints_lhs, constraints_type_and_rhs)
+
+    >>> si.optimize()
+
+    >>> len(si.components)
+    2
+
+    >>> decision_variables['value'] = si.get_optimal_values_of_decision_variables(decision_variables)
+
+    >>> print(decision_variables)
+       variable_id  lower_bound  upper_bound        type  value
+    0            0          0.0          5.0  continuous    5.0
+    1            1          0.0          5.0  continuous    2.0
+    2            2          0.0          5.0  continuous    0.0
+    3            3          0.0          5.0  continuous    3.0
+
+    >>> si.objective_value
+    12.0
+
+    Parameters
+    ----------
+    solver_name : str
+        The solver to use for each component, see InterfaceToSolver.
+
+    workers : int
+        The number of threads used to optimize components in parallel, default 1.
+
+    process_pool : solver_backends.SolverProcessPool
+        The pool to solve components in, see InterfaceToSolver, default None.
+
+    diagnose_infeasibility : bool
+        Diagnose infeasible components, see InterfaceToSolver, default False.
+    """
+
+    def __init__(self, solver_name='CBC', workers=1, process_pool=None, diagnose_infeasibility=False):
+        self.solver_name = solver_name
+        self.workers = workers
+        self.process_pool = process_pool
+        self.diagnose_infeasibility = diagnose_infeasibility
+        self.components = []
+        self._decision_variables = None
+        self._objective_function = None
+        self._constraints_lhs = []
+        self._constraints_type_and_rhs = []
+        self._linking_lhs = []
+        self._special_ordered_sets = []
+        self._variable_components = None
+        self._constraint_components = None
+        self._fixed_values = None
+        self._fixed_objective_value = 0.0
+        self._constant_slack = None
+
+    def add_variables(self, decision_variables):
+        self._decision_variables = decision_variables
+
+    def add_objective_function(self, objective_function):
+        self._objective_function = objective_function
+
+    def link_variables(self, constraints_lhs):
+        """Keep variables in the same component if they share a constraint that may be added after optimization.
+
+        Constraints added after the model has been decomposed must have all of their variables in one component, so
+        row generation should register the lhs of the constraints it may add before optimize is called.
+        """
+        if self.components:
+            raise ValueError('Variables can not be linked after the model has been decomposed.')
+        self._linking_lhs.append(constraints_lhs.loc[:, ['constraint_id', 'variable_id']])
+
+    def add_constraints(self, constraints_lhs, constraints_type_and_rhs):
+        constraints_lhs = constraints_lhs.loc[:, ['constraint_id', 'variable_id', 'coefficient']]
+        if not self.components:
+            self._constraints_lhs.append(constraints_lhs)
+            self._constraints_type_and_rhs.append(constraints_type_and_rhs)
+            return
+
+        # Once decomposed, route each new constraint to the component containing its variables.
+        constraints_lhs, constraints_type_and_rhs = self._move_fixed_variables_to_rhs(constraints_lhs,
+                                                                                      constraints_type_and_rhs)
+        components = self._map_to_components(constraints_lhs['variable_id'], self._variable_components)
+        constraint_components = pd.Series(components).groupby(constraints_lhs['constraint_id'].to_numpy())
+        if (constraint_components.nunique() > 1).any():
+            raise ValueError('Constraints added after decomposition can not link model components.')
+        constraint_components = constraint_components.first()
+        self._constraint_components = pd.concat([self._constraint_components, constraint_components])
+        rhs_components = self._map_to_components(constraints_type_and_rhs['constraint_id'], constraint_components)
+        for component, si in enumerate(self.components):
+            if (components == component).any():
+                si.add_constraints(constraints_lhs[components == component],
+                                   constraints_type_and_rhs[rhs_components == component])
+
+    def add_sos_type_2(self, sos_variables, sos_id_columns, position_column):
+        self._special_ordered_sets.append((2, sos_variables.copy(), sos_id_columns, position_column))
+
+    def add_sos_type_1(self, sos_variables):
+        self._special_ordered_sets.append((1, sos_variables.copy(), 'sos_id', None))
+
+    def _move_fixed_variables_to_rhs(self, constraints_lhs, constraints_type_and_rhs):
+        is_fixed = constraints_lhs['variable_id'].isin(self._fixed_values.index)
+        fixed_lhs = constraints_lhs[is_fixed]
+        activity = (fixed_lhs['coefficient'] * fixed_lhs['variable_id'].map(self._fixed_values)).groupby(
+            fixed_lhs['constraint_id']).sum()
+        constraints_type_and_rhs = constraints_type_and_rhs.assign(
+            rhs=constraints_type_and_rhs['rhs'] - constraints_type_and_rhs['constraint_id'].map(activity).fillna(0.0))
+        # Constraints left without variables are in no component, their slack is set by the moved lhs activity.
+        constant_slack = pd.Series(np.where(constraints_type_and_rhs['type'] == '>=', -constraints_type_and_rhs['rhs'],
+                                            constraints_type_and_rhs['rhs']).astype(float),
+                                   index=constraints_type_and_rhs['constraint_id'].to_numpy())
+        self._constant_slack = pd.concat([self._constant_slack, constant_slack])
+        return constraints_lhs[~is_fixed], constraints_type_and_rhs
+
+    def _decompose(self):
+        decision_variables = self._decision_variables
+        is_fixed = ((decision_variables['lower_bound'] == decision_variables['upper_bound']) &
+                    (decision_variables['type'] == 'continuous'))
+        self._fixed_values = pd.Series(decision_variables['lower_bound'][is_fixed].to_numpy(),
+                                       index=decision_variables['variable_id'][is_fixed].to_numpy())
+        decision_variables = decision_variables[~is_fixed]
+        variable_ids = decision_variables['variable_id'].to_numpy()
+
+        constraints_lhs = pd.DataFrame(columns=['constraint_id', 'variable_id', 'coefficient'])
+        constraints_type_and_rhs = pd.DataFrame(columns=['constraint_id', 'type', 'rhs'])
+        if self._constraints_lhs:
+            constraints_lhs = pd.concat(self._constraints_lhs)
+            constraints_type_and_rhs = pd.concat(self._constraints_type_and_rhs)
+        self._constant_slack = pd.Series(dtype=float)
+        constraints_lhs, constraints_type_and_rhs = self._move_fixed_variables_to_rhs(constraints_lhs,
+                                                                                      constraints_type_and_rhs)
+        if self._objective_function is not None:
+            fixed_costs = self._objective_function[self._objective_function['variable_id'].isin(
+                self._fixed_values.index)]
+            self._fixed_objective_value = (fixed_costs['cost'] *
+                                           fixed_costs['variable_id'].map(self._fixed_values)).sum()
+
+        # Variables in the same special ordered set must be in the same component, so each set is treated like a
+        # constraint, given a negative id so it can't clash with the real constraints.
+        links = [constraints_lhs.loc[:, ['constraint_id', 'variable_id']]] + self._linking_lhs
+        next_set_id = -1
+        for sos_type, sos_variables, sos_id_columns, position_column in self._special_ordered_sets:
+            set_ids = sos_variables.groupby(sos_id_columns).ngroup()
+            links.append(pd.DataFrame({'constraint_id': next_set_id - set_ids,
+                                       'variable_id': sos_variables['variable_id']}))
+            next_set_id = next_set_id - set_ids.max() - 1
+        links = pd.concat(links)
+        links = links[links['variable_id'].isin(variable_ids)]
+
+        components = find_independent_components(variable_ids, links)
+        self._variable_components = pd.Series(components, index=variable_ids)
+        self._constraint_components = constraints_lhs.groupby('constraint_id')['variable_id'].first().map(
+            self._variable_components)
+
+        lhs_components = self._map_to_components(constraints_lhs['variable_id'], self._variable_components)
+        rhs_components = self._map_to_components(constraints_type_and_rhs['constraint_id'],
+                                                 self._constraint_components)
+        variable_components = self._map_to_components(decision_variables['variable_id'], self._variable_components)
+        if self._objective_function is not None:
+            objective_components = self._map_to_components(self._objective_function['variable_id'],
+                                                           self._variable_components)
+        for component in range(components.max() + 1 if len(components) > 0 else 0):
+            si = InterfaceToSolver(self.solver_name, self.process_pool, self.diagnose_infeasibility)
+            si.add_variables(decision_variables[variable_components == component])
+            if self._objective_function is not None and (objective_components == component).any():
+                si.add_objective_function(self._objective_function[objective_components == component])
+            if (lhs_components == component).any():
+                si.add_constraints(constraints_lhs[lhs_components == component],
+                                   constraints_type_and_rhs[rhs_components == component])
+            for sos_type, sos_variables, sos_id_columns, position_column in self._special_ordered_sets:
+                sos_variables = sos_variables[sos_variables['variable_id'].map(
+                    self._variable_components) == component].copy()
+                if sos_variables.empty:
+                    continue
+                if sos_type == 2:
+                    si.add_sos_type_2(sos_variables, sos_id_columns, position_column)
+                else:
+                    si.add_sos_type_1(sos_variables)
+            self.components.append(si)
+
+    @staticmethod
+    def _map_to_components(ids, id_to_component):
+        return ids.map(id_to_component).fillna(-1).astype(int).to_numpy()
+
+    def _run_on_components(self, method_name):
+        if self.workers > 1 and len(self.components) > 1:
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                list(executor.map(lambda si: getattr(si, method_name)(), self.components))
+        else:
+            for si in self.components:
+                getattr(si, method_name)()
+
+    def optimize(self):
+        if not self.components:
+            self._decompose()
+        self._run_on_components('optimize')
+
+    def optimize_linear(self):
+        self._run_on_components('optimize_linear')
+
+    @property
+    def objective_value(self):
+        return sum(si.objective_value for si in self.components) + self._fixed_objective_value
+
+    def _get_from_components(self, method_name, definitions, id_column, id_to_component, default_values):
+        components = self._map_to_components(definitions[id_column], id_to_component)
+        values = default_values
+        for component, si in enumerate(self.components):
+            in_component = components == component
+            if in_component.any():
+                values[in_component] = getattr(si, method_name)(definitions[in_component]).to_numpy()
+        return pd.Series(values, index=definitions.index)
+
+    def _get_variable_values(self, method_name, variable_definitions):
+        # Variables in no component were fixed at their bounds, any other unknown id is an error.
+        fixed_values = variable_definitions['variable_id'].map(self._fixed_values)
+        unknown = fixed_values.isna() & ~variable_definitions['variable_id'].isin(self._variable_components.index)
+        if unknown.any():
+            raise ValueError('Variable ids {} are not in the model.'.format(
+                list(variable_definitions['variable_id'][unknown])))
+        return self._get_from_components(method_name, variable_definitions, 'variable_id', self._variable_components,
+                                         fixed_values.fillna(0.0).to_numpy(dtype=float))
+
+    def get_optimal_values_of_decision_variables(self, variable_definitions):
+        return self._get_variable_values('get_optimal_values_of_decision_variables', variable_definitions)
+
+    def get_optimal_values_of_decision_variables_lin(self, variable_definitions):
+        return self._get_variable_values('get_optimal_values_of_decision_variables_lin', variable_definitions)
+
+    def get_slack_in_constraints(self, constraints_type_and_rhs):
+        constant_slack = constraints_type_and_rhs['constraint_id'].map(self._constant_slack).fillna(0.0)
+        return self._get_from_components('get_slack_in_constraints', constraints_type_and_rhs, 'constraint_id',
+                                         self._constraint_components, constant_slack.to_numpy(dtype=float))
+
+    def price_constraints(self, constraint_ids_to_price):
         costs = {}
         for id in constraint_ids_to_price:
-            costs[id] = self.linear_mip_model.constr_by_name(str(id)).pi
+            if id in self._constraint_components.index:
+                costs[id] = self.components[self._constraint_components[id]].price_constraints([id])[id]
+            else:
+                costs[id] = 0.0
         return costs
 
     def update_rhs(self, constraint_id, violation_degree):
-        constraint = self.linear_mip_model.constr_by_name(str(constraint_id))
-        constraint.rhs += violation_degree
+        self.components[self._constraint_components[constraint_id]].update_rhs(constraint_id, violation_degree)
 
     def update_variable_bounds(self, new_bounds):
-        for variable_id, lb, ub in zip(new_bounds['variable_id'], new_bounds['lower_bound'], new_bounds['upper_bound']):
-            self.mip_model.var_by_name(str(variable_id)).lb = lb
-            self.mip_model.var_by_name(str(variable_id)).ub = ub
+        components = self._map_to_components(new_bounds['variable_id'], self._variable_components)
+        if (components == -1).any():
+            raise ValueError('The bounds of fixed variables can not be updated after decomposition.')
+        for component, si in enumerate(self.components):
+            if (components == component).any():
+                si.update_variable_bounds(new_bounds[components == component])
 
     def disable_variables(self, variables):
-        for var_id in variables['variable_id']:
-            var = self.linear_mip_model.var_by_name(str(var_id))
-            var.lb = 0.0
-            var.ub = 0.0
+        components = self._map_to_components(variables['variable_id'], self._variable_components)
+        for component, si in enumerate(self.components):
+            if (components == component).any():
+                si.disable_variables(variables[components == component])
+
+
+def find_independent_components(variable_ids, constraints_lhs):
+    """Label the connected components of the graph formed by variables and the constraints linking them.
+
+    Variables in different components share no constraints, so each component can be optimised separately.
+
+    Examples
+    --------
+    >>> constraints_lhs = pd.DataFrame({
+    ...   'constraint_id': [0, 0, 1, 1, 2],
+    ...   'variable_id': [0, 3, 3, 4, 2]})
+
+    >>> find_independent_components([0, 1, 2, 3, 4], constraints_lhs)
+    array([0, 1, 2, 0, 0])
+
+    Parameters
+    ----------
+    variable_ids : list-like[int]
+        The ids of all the variables in the model.
 
+    constraints_lhs : pd.DataFrame
 
-def find_problem_constraint(base_prob):
-    cons = []
-    test_prob = base_prob.copy()
-    for con in [con.name for con in base_prob.constrs]:
-        [test_prob.remove(c) for c in test_prob.constrs if c.name == con]
-        status = test_prob.optimize()
-        cons.append(con)
-        if status == OptimizationStatus.OPTIMAL:
-            return cons
-    return []
+        =============  ====================================================================
+        Columns:       Description:
+        constraint_id  the id of the constraint (as `int`)
+        variable_id    the id of the variable (as `int`)
+        =============  ====================================================================
+
+    Returns
+    -------
+    np.ndarray
+        The component of each variable, numbered in order of first appearance in variable_ids.
+    """
+    variable_ids = pd.Index(variable_ids)
+    variable_positions = variable_ids.get_indexer(constraints_lhs['variable_id'])
+    constraint_codes = pd.factorize(constraints_lhs['constraint_id'])[0]
+    n_constraints = constraint_codes.max() + 1 if len(constraint_codes) > 0 else 0
+
+    # Each variable starts in its own component, labeled by its position, the smallest label is then spread across
+    # constraints until no labels change.
+    labels = np.arange(len(variable_ids))
+    while True:
+        constraint_labels = np.full(n_constraints, len(variable_ids))
+        np.minimum.at(constraint_labels, constraint_codes, labels[variable_positions])
+        new_labels = labels.copy()
+        np.minimum.at(new_labels, variable_positions, constraint_labels[constraint_codes])
+        # Labels are positions of variables in the same component, so labels can jump directly to their label's label.
+        new_labels = new_labels[new_labels]
+        if np.array_equal(new_labels, labels):
+            break
+        labels = new_labels
+    return pd.factorize(labels)[0]
+
+
+def find_infeasible_rows(model, create_backend, max_solves=50):
+    """Search for a set of rows (constraints) of an infeasible model that can't be satisfied together.
+
+    First an elastic filter finds a small infeasible set of rows. Each row is given variables that allow it to be
+    violated, and the total violation is minimised. Rows that are violated in the solution are made strict, and this
+    repeats until the model with those rows strict is infeasible. Then a deletion filter removes rows from the set one
+    at a time, keeping them out if the rest of the set is still infeasible, which leaves an irreducible infeasible
+    set. Variable bounds and special ordered sets are kept in each model solved, so infeasibility caused by bounds
+    alone gives an empty set of rows, as does a model that is found to be feasible. At most max_solves models are
+    solved. If the limit is reached the set found so far is returned, which can't be satisfied but may not be
+    irreducible, or, if the elastic filter didn't finish, may be satisfiable.
+
+    Examples
+    --------
+    Rows 0 and 2 conflict, x0 + x1 <= 4 and x0 >= 6, while row 1, x1 <= 10, is not part of the problem.
+
+    >>> model = solver_backends._ArrayModel()
+
+    >>> model.add_columns(lower_bounds=np.zeros(2), upper_bounds=np.full(2, 20.0), is_integer=np.zeros(2, dtype=bool))
+
+    >>> model.add_rows(indptr=np.array([0, 2, 3, 4]), indices=np.array([0, 1, 1, 0]), data=np.ones(4),
+    ...                senses=np.array(['<=', '<=', '>=']), rhs=np.array([4.0, 10.0, 6.0]))
+
+    >>> rows, complete = find_infeasible_rows(model, lambda: solver_backends.create_backend('CBC'))
+
+    >>> rows
+    array([0, 2])
+
+    >>> complete
+    True
+
+    Parameters
+    ----------
+    model : solver_backends._ArrayModel
+    create_backend : callable
+        Returns a new, empty, backend to solve each model with.
+    max_solves : int
+
+    Returns
+    -------
+    rows : np.ndarray
+        The positions of the rows in the infeasible set.
+    complete : bool
+        False if the search stopped at the limit on solves.
+    """
+    solves = 0
+    is_strict = np.zeros(model.number_of_rows, dtype=bool)
+    all_rows = np.arange(model.number_of_rows)
+
+    def solve(rows, elastic_rows=None):
+        nonlocal solves
+        solves += 1
+        backend = create_backend()
+        model.load_into(backend, rows, elastic_rows)
+        backend.solve()
+        return backend.status, backend
+
+    # Elastic filter.
+    while True:
+        if solves >= max_solves:
+            return np.flatnonzero(is_strict), False
+        status, backend = solve(all_rows, elastic_rows=np.flatnonzero(~is_strict))
+        if status in solver_backends.INFEASIBLE_STATUSES:
+            break
+        if status != 'optimal':
+            return np.flatnonzero(is_strict), False
+        # The elastic variables follow the model's columns, first those of '>=' and '=' rows, then of '<=' and '='.
+        elastic_rows = np.flatnonzero(~is_strict)
+        senses = model.senses[elastic_rows]
+        relaxed_rows = np.concatenate([elastic_rows[senses != '<='], elastic_rows[senses != '>=']])
+        violation = np.zeros(model.number_of_rows)
+        np.add.at(violation, relaxed_rows, backend.get_primal()[model.number_of_columns:])
+        violated = violation > 1e-6
+        if not violated.any():
+            # Every row can be satisfied, so the model is feasible.
+            return np.zeros(0, dtype=np.int64), True
+        is_strict |= violated
+
+    # Deletion filter.
+    infeasible_rows = list(np.flatnonzero(is_strict))
+    for row in list(infeasible_rows):
+        remaining_rows = [other_row for other_row in infeasible_rows if other_row != row]
+        # The first elastic solve showed the bounds and special ordered sets can be satisfied without any rows.
+        if not remaining_rows:
+            continue
+        if solves >= max_solves:
+            return np.array(infeasible_rows, dtype=np.int64), False
+        status, _ = solve(np.array(remaining_rows, dtype=np.int64))
+        if status in solver_backends.INFEASIBLE_STATUSES:
+            infeasible_rows = remaining_rows
+        elif status != 'optimal':
+            return np.array(infeasible_rows, dtype=np.int64), False
+    return np.array(infeasible_rows, dtype=np.int64), True
+
+
+def calc_slack_from_variable_values(constraints_lhs, constraints_type_and_rhs, decision_variables):
+    """Calculate the slack in each constraint given a set of decision variable values.
+
+    Slack follows the sign convention of the solver, i.e. rhs - lhs for '<=' and '=' constraints and lhs - rhs for
+    '>=' constraints, so a negative slack on an inequality means the constraint is violated. Constraints with no lhs
+    terms have an lhs of zero.
+
+    Examples
+    --------
+
+    >>> decision_variables = pd.DataFrame({
+    ...   'variable_id': [0, 1, 2],
+    ...   'value': [5.0, 10.0, 2.0]})
+
+    >>> constraints_lhs = pd.DataFrame({
+    ...   'constraint_id': [1, 1, 2, 3],
+    ...   'variable_id': [0, 1, 2, 2],
+    ...   'coefficient': [1.0, 0.5, 1.0, 2.0]})
+
+    >>> constraints_type_and_rhs = pd.DataFrame({
+    ...   'constraint_id': [1, 2, 3],
+    ...   'type': ['<=', '>=', '='],
+    ...   'rhs': [8.0, 3.0, 4.0]})
+
+    >>> constraints_type_and_rhs['slack'] = calc_slack_from_variable_values(
+    ...   constraints_lhs, constraints_type_and_rhs, decision_variables)
+
+    >>> print(constraints_type_and_rhs)
+       constraint_id type  rhs  slack
+    0              1   <=  8.0   -2.0
+    1              2   >=  3.0   -1.0
+    2              3    =  4.0    0.0
+
+    Parameters
+    ----------
+    constraints_lhs : pd.DataFrame
+
+        =============  ===============================================================
+        Columns:       Description:
+        constraint_id  the unique identifier of the constraint (as `np.int64`)
+        variable_id    the unique identifier of the variable (as `np.int64`)
+        coefficient    the lhs coefficient (as `np.float64`)
+        =============  ===============================================================
+
+    constraints_type_and_rhs : pd.DataFrame
+
+        =============  ===============================================================
+        Columns:       Description:
+        constraint_id  the unique identifier of the constraint (as `np.int64`)
+        type           the type of the constraint, e.g. '<=' (as `str`)
+        rhs            the rhs of the constraint (as `np.float64`)
+        =============  ===============================================================
+
+    decision_variables : pd.DataFrame
+
+        =============  ===============================================================
+        Columns:       Description:
+        variable_id    the unique identifier of the variable (as `np.int64`)
+        value          the value of the variable (as `np.float64`)
+        =============  ===============================================================
+
+    Returns
+    -------
+    np.ndarray
+        The slack of each constraint, in the order of constraints_type_and_rhs.
+    """
+    variable_ids = decision_variables['variable_id'].to_numpy()
+    values_by_id = np.zeros(variable_ids.max() + 1)
+    values_by_id[variable_ids] = decision_variables['value'].to_numpy()
+
+    row_positions = pd.Index(constraints_type_and_rhs['constraint_id']).get_indexer(constraints_lhs['constraint_id'])
+    in_rows = row_positions >= 0
+    terms = (constraints_lhs['coefficient'].to_numpy()[in_rows] *
+             values_by_id[constraints_lhs['variable_id'].to_numpy()[in_rows]])
+    lhs = np.bincount(row_positions[in_rows], weights=terms, minlength=len(constraints_type_and_rhs))
+
+    slack = constraints_type_and_rhs['rhs'].to_numpy() - lhs
+    return np.where(constraints_type_and_rhs['type'].to_numpy() == '>=', -slack, slack)
+
+
+def find_violated_constraints(constraints_lhs, constraints_type_and_rhs, decision_variables, tolerance=1e-6):
+    """Find the constraints that are not satisfied by a set of decision variable values.
+
+    Constraints without any lhs terms are never reported as violated, consistent with
+    :meth:`InterfaceToSolver.add_constraints` which does not add such constraints to the model.
+
+    Examples
+    --------
+
+    >>> decision_variables = pd.DataFrame({
+    ...   'variable_id': [0, 1, 2],
+    ...   'value': [5.0, 10.0, 2.0]})
+
+    >>> constraints_lhs = pd.DataFrame({
+    ...   'constraint_id': [1, 1, 2, 3],
+    ...   'variable_id': [0, 1, 2, 2],
+    ...   'coefficient': [1.0, 0.5, 1.0, 2.0]})
+
+    >>> constraints_type_and_rhs = pd.DataFrame({
+    ...   'constraint_id': [1, 2, 3, 4],
+    ...   'type': ['<=', '>=', '=', '>='],
+    ...   'rhs': [8.0, 3.0, 4.0, 5.0]})
+
+    >>> find_violated_constraints(constraints_lhs, constraints_type_and_rhs, decision_variables)
+    array([1, 2])
+
+    Parameters
+    ----------
+    constraints_lhs : pd.DataFrame
+        See :func:`calc_slack_from_variable_values`.
+
+    constraints_type_and_rhs : pd.DataFrame
+        See :func:`calc_slack_from_variable_values`.
+
+    decision_variables : pd.DataFrame
+        See :func:`calc_slack_from_variable_values`.
+
+    tolerance : float
+        The amount a constraint can be violated by before it is reported.
+
+    Returns
+    -------
+    np.ndarray
+        The ids of the violated constraints.
+    """
+    slack = calc_slack_from_variable_values(constraints_lhs, constraints_type_and_rhs, decision_variables)
+    is_equality = constraints_type_and_rhs['type'].to_numpy() == '='
+    violated = np.where(is_equality, np.abs(slack) > tolerance, slack < -tolerance)
+    has_lhs = constraints_type_and_rhs['constraint_id'].isin(constraints_lhs['constraint_id']).to_numpy()
+    return constraints_type_and_rhs['constraint_id'].to_numpy()[violated & has_lhs]
+
+
+def find_redundant_constraints(constraints_lhs, constraints_type_and_rhs, decision_variables):
+    """Find the constraints that can never be violated given the bounds of the decision variables.
+
+    The minimum and maximum activity of each constraint's lhs is found using interval arithmetic on the variable
+    bounds. A '<=' constraint is redundant if its maximum activity is less than or equal to the rhs, and a '>='
+    constraint is redundant if its minimum activity is greater than or equal to the rhs. Equality constraints are never
+    redundant. Deficit variables don't prevent a constraint being found redundant as they only ever relax it.
+
+    Examples
+    --------
+
+    >>> decision_variables = pd.DataFrame({
+    ...   'variable_id': [0, 1, 2],
+    ...   'lower_bound': [0.0, 0.0, -50.0],
+    ...   'upper_bound': [100.0, 200.0, 50.0]})
+
+    >>> constraints_lhs = pd.DataFrame({
+    ...   'constraint_id': [1, 1, 2, 3, 3, 4],
+    ...   'variable_id': [0, 1, 2, 0, 2, 0],
+    ...   'coefficient': [1.0, 1.0, 1.0, 1.0, -1.0, 1.0]})
+
+    >>> constraints_type_and_rhs = pd.DataFrame({
+    ...   'constraint_id': [1, 2, 3, 4],
+    ...   'type': ['<=', '>=', '<=', '='],
+    ...   'rhs': [10000.0, -60.0, 100.0, 100.0]})
+
+    >>> find_redundant_constraints(constraints_lhs, constraints_type_and_rhs, decision_variables)
+    array([1, 2])
+
+    Parameters
+    ----------
+    constraints_lhs : pd.DataFrame
+
+        =============  ===============================================================
+        Columns:       Description:
+        constraint_id  the unique identifier of the constraint (as `np.int64`)
+        variable_id    the unique identifier of the variable (as `np.int64`)
+        coefficient    the lhs coefficient (as `np.float64`)
+        =============  ===============================================================
+
+    constraints_type_and_rhs : pd.DataFrame
+
+        =============  ===============================================================
+        Columns:       Description:
+        constraint_id  the unique identifier of the constraint (as `np.int64`)
+        type           the type of the constraint, e.g. '<=' (as `str`)
+        rhs            the rhs of the constraint (as `np.float64`)
+        =============  ===============================================================
+
+    decision_variables : pd.DataFrame
+
+        =============  ===============================================================
+        Columns:       Description:
+        variable_id    the unique identifier of the variable (as `np.int64`)
+        lower_bound    the lower bound of the variable (as `np.float64`)
+        upper_bound    the upper bound of the variable (as `np.float64`)
+        =============  ===============================================================
+
+    Returns
+    -------
+    np.ndarray
+        The ids of the redundant constraints.
+    """
+    variable_ids = decision_variables['variable_id'].to_numpy()
+    lower_bounds = np.zeros(variable_ids.max() + 1)
+    upper_bounds = np.zeros(variable_ids.max() + 1)
+    lower_bounds[variable_ids] = decision_variables['lower_bound'].to_numpy()
+    upper_bounds[variable_ids] = decision_variables['upper_bound'].to_numpy()
+
+    row_positions = pd.Index(constraints_type_and_rhs['constraint_id']).get_indexer(constraints_lhs['constraint_id'])
+    in_rows = row_positions >= 0
+    row_positions = row_positions[in_rows]
+    coefficients = constraints_lhs['coefficient'].to_numpy()[in_rows]
+    lhs_variable_ids = constraints_lhs['variable_id'].to_numpy()[in_rows]
+
+    # Multiplying zero coefficients by infinite bounds would give nan, so zero coefficients are skipped.
+    with np.errstate(invalid='ignore'):
+        min_terms = np.where(coefficients > 0.0, coefficients * lower_bounds[lhs_variable_ids],
+                             coefficients * upper_bounds[lhs_variable_ids])
+        max_terms = np.where(coefficients > 0.0, coefficients * upper_bounds[lhs_variable_ids],
+                             coefficients * lower_bounds[lhs_variable_ids])
+    min_terms = np.where(coefficients == 0.0, 0.0, min_terms)
+    max_terms = np.where(coefficients == 0.0, 0.0, max_terms)
+    n_rows = len(constraints_type_and_rhs)
+    min_activity = np.bincount(row_positions, weights=min_terms, minlength=n_rows)
+    max_activity = np.bincount(row_positions, weights=max_terms, minlength=n_rows)
+
+    constraint_type = constraints_type_and_rhs['type'].to_numpy()
+    rhs = constraints_type_and_rhs['rhs'].to_numpy()
+    with np.errstate(invalid='ignore'):
+        redundant = (((constraint_type == '<=') & (max_activity <= rhs)) |
+                     ((constraint_type == '>=') & (min_activity >= rhs)))
+    return constraints_type_and_rhs['constraint_id'].to_numpy()[redundant]
 
 
 def create_lhs(constraints, decision_variables, join_columns):
@@ -548,12 +1268,100 @@ def create_lhs(constraints, decision_variables, join_columns):
         coefficient    the constraint level contribution to the lhs coefficient (as `np.float64`)
         =============  ===============================================================
     """
-    constraints = pd.merge(constraints, decision_variables, 'inner', on=join_columns)
-    constraints['coefficient'] = constraints['coefficient_x'] * constraints['coefficient_y']
-    lhs = constraints.loc[:, ['constraint_id', 'variable_id', 'coefficient']]
+    # The join is symmetric, so accept the two pd.DataFrames in either order.
+    if 'constraint_id' not in constraints.columns:
+        constraints, decision_variables = decision_variables, constraints
+    constraint_rows, variable_rows = _inner_join_positions([constraints[col] for col in join_columns],
+                                                           [decision_variables[col] for col in join_columns])
+    lhs = pd.DataFrame({
+        'constraint_id': constraints['constraint_id'].to_numpy()[constraint_rows],
+        'variable_id': decision_variables['variable_id'].to_numpy()[variable_rows],
+        'coefficient': (constraints['coefficient'].to_numpy()[constraint_rows] *
+                        decision_variables['coefficient'].to_numpy()[variable_rows])})
     return lhs
 
 
+def _inner_join_positions(left_keys, right_keys):
+    """Find the row positions of left and right that an inner join on the key columns would pair up.
+
+    Key values are mapped to integer codes, the join is then done by sorting the right codes and looking up the run of
+    matching right rows for each left row. Pairs are in the order of the left rows.
+
+    Examples
+    --------
+    >>> left_positions, right_positions = _inner_join_positions(
+    ...   [pd.Series(['A', 'B', 'A']), pd.Series(['energy', 'energy', 'raise_reg'])],
+    ...   [pd.Series(['B', 'A', 'A', 'C']), pd.Series(['energy', 'energy', 'energy', 'energy'])])
+
+    >>> left_positions
+    array([0, 0, 1])
+
+    >>> right_positions
+    array([1, 2, 0])
+    """
+    n_left = len(left_keys[0])
+    left_codes = np.zeros(n_left, dtype=np.int64)
+    right_codes = np.zeros(len(right_keys[0]), dtype=np.int64)
+    for left_key, right_key in zip(left_keys, right_keys):
+        codes, uniques = pd.factorize(np.concatenate([np.asarray(left_key), np.asarray(right_key)]))
+        left_codes = left_codes * len(uniques) + codes[:n_left]
+        right_codes = right_codes * len(uniques) + codes[n_left:]
+    order = np.argsort(right_codes, kind='stable')
+    sorted_right_codes = right_codes[order]
+    starts = np.searchsorted(sorted_right_codes, left_codes, side='left')
+    counts = np.searchsorted(sorted_right_codes, left_codes, side='right') - starts
+    left_positions = np.repeat(np.arange(n_left), counts)
+    offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    right_positions = order[np.repeat(starts, counts) + offsets]
+    return left_positions, right_positions
+
+
+def create_dynamic_rhs_lhs(constraints_dynamic_rhs_and_type):
+    """Create the lhs terms that move the rhs variable of dynamic rhs constraints to the lhs.
+
+    A constraint of the form lhs = rhs_variable is equivalent to lhs - rhs_variable = 0, so the rhs variable is added
+    to the lhs with a coefficient of -1.0, and the rhs of the constraint becomes zero.
+
+    Examples
+    --------
+
+    >>> constraints_dynamic_rhs_and_type = pd.DataFrame({
+    ...   'constraint_id': [3, 4],
+    ...   'type': ['=', '='],
+    ...   'rhs_variable_id': [7, 8]})
+
+    >>> print(create_dynamic_rhs_lhs(constraints_dynamic_rhs_and_type))
+       constraint_id  variable_id  coefficient
+    0              3            7         -1.0
+    1              4            8         -1.0
+
+    Parameters
+    ----------
+    constraints_dynamic_rhs_and_type : pd.DataFrame
+
+        ===============  ===============================================================
+        Columns:         Description:
+        constraint_id    the unique identifier of the constraint (as `np.int64`)
+        rhs_variable_id  the id of the variable on the rhs of the constraint (as `np.int64`)
+        ===============  ===============================================================
+
+    Returns
+    -------
+    lhs : pd.DataFrame
+
+        =============  ===============================================================
+        Columns:       Description:
+        constraint_id  the unique identifier of the constraint (as `np.int64`)
+        variable_id    the unique identifier of the variable (as `np.int64`)
+        coefficient    the lhs coefficient (as `np.float64`)
+        =============  ===============================================================
+    """
+    return pd.DataFrame({
+        'constraint_id': constraints_dynamic_rhs_and_type['constraint_id'].to_numpy(),
+        'variable_id': constraints_dynamic_rhs_and_type['rhs_variable_id'].to_numpy(),
+        'coefficient': -1.0})
+
+
 def create_mapping_of_generic_constraint_sets_to_constraint_ids(constraints, market_constraints):
     """Combine generic constraints and fcas market constraints to get the full set of generic constraints.
 
@@ -702,11 +1510,8 @@ def create_unit_level_generic_constraint_lhs(generic_constraint_units, generic_c
         coefficient    the constraint level contribution to the lhs coefficient (as `np.float64`)
         =============  ===============================================================
     """
-    unit_lhs = pd.merge(generic_constraint_units,
-                        unit_bids_to_constraint_map.loc[:, ['unit', 'service', 'variable_id']],
-                        on=['unit', 'service'])
-    unit_lhs = pd.merge(unit_lhs, generic_constraint_ids.loc[:, ['constraint_id', 'set']], on='set')
-    return unit_lhs.loc[:, ['constraint_id', 'variable_id', 'coefficient']]
+    return _create_generic_constraint_lhs(generic_constraint_units, generic_constraint_ids,
+                                          unit_bids_to_constraint_map, ['unit', 'service'])
 
 
 def create_region_level_generic_constraint_lhs(generic_constraint_regions, generic_constraint_ids,
@@ -780,11 +1585,8 @@ def create_region_level_generic_constraint_lhs(generic_constraint_regions, gener
         coefficient    the constraint level contribution to the lhs coefficient (as `np.float64`)
         =============  ===============================================================
     """
-    region_lhs = pd.merge(generic_constraint_regions,
-                          regional_bids_to_constraint_map.loc[:, ['region', 'service', 'variable_id']],
-                          on=['region', 'service'])
-    region_lhs = pd.merge(region_lhs, generic_constraint_ids.loc[:, ['constraint_id', 'set']], on='set')
-    return region_lhs.loc[:, ['constraint_id', 'variable_id', 'coefficient']]
+    return _create_generic_constraint_lhs(generic_constraint_regions, generic_constraint_ids,
+                                          regional_bids_to_constraint_map, ['region', 'service'])
 
 
 def create_interconnector_generic_constraint_lhs(generic_constraint_interconnectors, generic_constraint_ids,
@@ -816,11 +1618,23 @@ def create_interconnector_generic_constraint_lhs(generic_constraint_interconnect
     0              1            0          0.9
     1              1            1          0.9
     """
-    interconnector_lhs = pd.merge(generic_constraint_interconnectors,
-                                  interconnector_variables.loc[:, ['interconnector', 'variable_id',
-                                                                   'generic_constraint_factor']],
-                                  on=['interconnector'])
-    interconnector_lhs = pd.merge(interconnector_lhs, generic_constraint_ids.loc[:, ['constraint_id', 'set']], on='set')
-    interconnector_lhs['coefficient'] = interconnector_lhs['coefficient'] * interconnector_lhs[
-        'generic_constraint_factor']
-    return interconnector_lhs.loc[:, ['constraint_id', 'variable_id', 'coefficient']]
+    return _create_generic_constraint_lhs(generic_constraint_interconnectors, generic_constraint_ids,
+                                          interconnector_variables, ['interconnector'],
+                                          variable_factor_column='generic_constraint_factor')
+
+
+def _create_generic_constraint_lhs(generic_constraint_lhs, generic_constraint_ids, variables, join_columns,
+                                   variable_factor_column=None):
+    """Map generic constraint lhs definitions to variables and constraint ids using integer coded joins."""
+    lhs_rows, variable_rows = _inner_join_positions([generic_constraint_lhs[col] for col in join_columns],
+                                                    [variables[col] for col in join_columns])
+    set_rows, id_rows = _inner_join_positions([generic_constraint_lhs['set'].to_numpy()[lhs_rows]],
+                                              [generic_constraint_ids['set']])
+    lhs_rows, variable_rows = lhs_rows[set_rows], variable_rows[set_rows]
+    coefficient = generic_constraint_lhs['coefficient'].to_numpy()[lhs_rows]
+    if variable_factor_column is not None:
+        coefficient = coefficient * variables[variable_factor_column].to_numpy()[variable_rows]
+    return pd.DataFrame({
+        'constraint_id': generic_constraint_ids['constraint_id'].to_numpy()[id_rows],
+        'variable_id': variables['variable_id'].to_numpy()[variable_rows],
+        'coefficient': coefficient})
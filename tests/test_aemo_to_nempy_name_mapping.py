@@ -0,0 +1,28 @@
+import numpy as np
+import pandas as pd
+import pytest
+from pandas._testing import assert_series_equal
+
+from nempy.historical_inputs import aemo_to_nempy_name_mapping as an
+
+
+def test_map_values_matches_dict_lookup():
+    trade_types = pd.Series(np.random.default_rng(0).choice(list(an.xml_service_name_map), 5000),
+                            index=np.arange(5000, 10000), name='service')
+    expected = trade_types.apply(lambda x: an.xml_service_name_map[x])
+    assert_series_equal(an.map_values(trade_types, an.xml_service_name_map, 'bid type'), expected)
+    assert an.map_values(pd.Series([], dtype=object), an.service_name_map).empty
+
+
+def test_map_values_reports_every_unmapped_value():
+    dispatch_types = pd.Series(['GENERATOR', 'BIDIRECTIONAL', None, 'LOAD', 'BIDIRECTIONAL'])
+    with pytest.raises(ValueError) as error:
+        an.map_values(dispatch_types, an.dispatch_type_map, 'dispatch type')
+    assert str(error.value) == ("No dispatch type mapping available for 'BIDIRECTIONAL' (2 rows), "
+                                "'None' (1 rows).")
+
+
+def test_code_tables_agree():
+    assert set(an.xml_bid_type_map.values()) == set(an.service_name_map)
+    for aemo_name, nempy_name in an.service_name_map.items():
+        assert an.name_map[aemo_name] == nempy_name
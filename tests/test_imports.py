@@ -0,0 +1,35 @@
+import subprocess
+import sys
+
+import pytest
+
+# Packages only loaded on first use, by solves, downloads, parsing XML files or asynchronous dispatch.
+DEFERRED_PACKAGES = ['mip', 'cffi', 'requests', 'xmltodict', 'asyncio', 'highspy', 'scipy']
+
+# Generous budget for the time spent importing nempy's own modules, excluding pandas and numpy.
+NEMPY_IMPORT_BUDGET_SECONDS = 0.5
+
+
+def import_times(module):
+    """Import module in a new interpreter, returns the self import time in seconds of each module imported."""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import {}'.format(module)],
+                            capture_output=True, text=True, check=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_time, _, name = line[len('import time:'):].split('|')
+        times[name.strip()] = int(self_time) / 1e6
+    return times
+
+
+@pytest.mark.parametrize('module', ['nempy.markets', 'nempy.historical_inputs.loaders',
+                                    'nempy.historical_inputs.xml_cache', 'nempy.historical_inputs.mms_db',
+                                    'nempy.historical_inputs.units'])
+def test_core_modules_import_within_budget(module):
+    times = import_times(module)
+    assert module in times
+    imported_packages = {name.split('.')[0] for name in times}
+    assert imported_packages.isdisjoint(DEFERRED_PACKAGES)
+    nempy_time = sum(time for name, time in times.items() if name.split('.')[0] == 'nempy')
+    assert nempy_time < NEMPY_IMPORT_BUDGET_SECONDS
@@ -0,0 +1,149 @@
+import asyncio
+import shutil
+import sqlite3
+import threading
+
+import pandas as pd
+import pytest
+from pandas._testing import assert_frame_equal
+
+from nempy.historical_inputs import loaders, mms_db, xml_cache
+
+
+class FakeXMLCacheManager:
+    """Stands in for the XMLCacheManager, returning a small table for each get method of the loaded interval."""
+
+    def __init__(self, missing_intervals=()):
+        self.interval = None
+        self.missing_intervals = missing_intervals
+        self.loaded = []
+        self.load_threads = []
+
+    def load_interval(self, interval):
+        if interval in self.missing_intervals:
+            raise xml_cache.MissingDataError('No data for interval {}.'.format(interval))
+        self.interval = interval
+        self.loaded.append(interval)
+        self.load_threads.append(threading.current_thread())
+
+    def get_file_name(self):
+        return 'NEMSPDOutputs_{}.loaded'.format(self.interval)
+
+    def __getattr__(self, name):
+        if not name.startswith('get_'):
+            raise AttributeError(name)
+        return lambda: pd.DataFrame({'interval': [self.interval], 'table': [name]})
+
+
+@pytest.fixture
+def database(tmp_path):
+    database_file = tmp_path / 'market_management_system.db'
+    shutil.copy('market_management_system.db', database_file)
+    con = sqlite3.connect(database_file)
+    yield mms_db.DBManager(connection=con)
+    con.close()
+
+
+def test_prefetching_loader_matches_raw_inputs_loader(database):
+    intervals = ['2019/01/10 12:00:00', '2019/01/10 12:05:00', '2019/01/10 12:10:00']
+    raw_loader = loaders.RawInputsLoader(FakeXMLCacheManager(), database)
+    xml = FakeXMLCacheManager()
+
+    with loaders.PrefetchingRawInputsLoader(xml, database, intervals, prefetch_count=2) as prefetching_loader:
+        for interval in intervals:
+            raw_loader.set_interval(interval)
+            prefetching_loader.set_interval(interval)
+            for method in loaders.PrefetchingRawInputsLoader._prefetched_methods:
+                expected = getattr(raw_loader, method)()
+                result = getattr(prefetching_loader, method)()
+                if isinstance(expected, pd.DataFrame):
+                    assert_frame_equal(result, expected)
+                else:
+                    assert result == expected
+
+        # Inputs were loaded on the background thread, using a copy of the cache manager.
+        assert xml.loaded == intervals
+        assert xml.interval is None
+        assert threading.current_thread() not in xml.load_threads
+
+        # Intervals not in the prefetch list are loaded directly.
+        prefetching_loader.set_interval('2019/01/10 12:30:00')
+        assert xml.interval == '2019/01/10 12:30:00'
+        assert xml.load_threads[-1] == threading.current_thread()
+
+
+def test_prefetching_loader_limits_intervals_loaded_ahead_and_can_be_closed(database):
+    intervals = ['2019/01/10 12:{:02d}:00'.format(minute) for minute in range(0, 60, 5)]
+    xml = FakeXMLCacheManager()
+    prefetching_loader = loaders.PrefetchingRawInputsLoader(xml, database, intervals, prefetch_count=2)
+    prefetching_loader.set_interval(intervals[0])
+    prefetching_loader._thread.join(timeout=0.5)
+
+    # The background thread is blocked with two intervals queued, and one more loaded waiting to be queued.
+    assert prefetching_loader._thread.is_alive()
+    assert prefetching_loader._queue.qsize() == 2
+    assert len(xml.loaded) == 4
+
+    prefetching_loader.close()
+    assert not prefetching_loader._thread.is_alive()
+
+    # After closing, intervals are loaded directly.
+    prefetching_loader.set_interval(intervals[1])
+    assert xml.interval == intervals[1]
+    assert xml.load_threads[-1] == threading.current_thread()
+
+
+def test_prefetching_loader_raises_errors_when_interval_is_set(database):
+    intervals = ['2019/01/10 12:00:00', '2019/01/10 12:05:00', '2019/01/10 12:10:00']
+    xml = FakeXMLCacheManager(missing_intervals=['2019/01/10 12:05:00'])
+
+    with loaders.PrefetchingRawInputsLoader(xml, database, intervals) as prefetching_loader:
+        # The first interval is skipped, and the error loading the second is raised when it is set.
+        with pytest.raises(xml_cache.MissingDataError):
+            prefetching_loader.set_interval(intervals[1])
+        prefetching_loader.set_interval(intervals[2])
+        assert prefetching_loader.get_unit_volume_bids()['interval'].iloc[0] == intervals[2]
+
+
+def test_async_loader_matches_raw_inputs_loader(database):
+    intervals = ['2019/01/10 12:00:00', '2019/01/10 12:05:00', '2019/01/10 12:10:00']
+    raw_loader = loaders.RawInputsLoader(FakeXMLCacheManager(), database)
+    xml = FakeXMLCacheManager()
+
+    async def load():
+        with loaders.AsyncRawInputsLoader(xml, database, max_concurrent=2) as async_loader:
+            return await asyncio.gather(*[async_loader.load_interval(interval) for interval in intervals])
+
+    interval_inputs = asyncio.run(load())
+
+    for interval, inputs in zip(intervals, interval_inputs):
+        raw_loader.set_interval(interval)
+        inputs.set_interval(interval)
+        for method in loaders.PrefetchingRawInputsLoader._prefetched_methods:
+            expected = getattr(raw_loader, method)()
+            result = getattr(inputs, method)()
+            if isinstance(expected, pd.DataFrame):
+                assert_frame_equal(result, expected)
+            else:
+                assert result == expected
+
+    # Inputs were loaded on worker threads, using copies of the cache manager.
+    assert sorted(xml.loaded) == intervals
+    assert xml.interval is None
+    assert threading.current_thread() not in xml.load_threads
+
+    # Loaded inputs only cover their own interval.
+    with pytest.raises(ValueError):
+        interval_inputs[0].set_interval(intervals[1])
+
+
+def test_async_loader_raises_errors_when_interval_is_awaited(database):
+    xml = FakeXMLCacheManager(missing_intervals=['2019/01/10 12:05:00'])
+
+    async def load(interval):
+        with loaders.AsyncRawInputsLoader(xml, database) as async_loader:
+            return await async_loader.load_interval(interval)
+
+    with pytest.raises(xml_cache.MissingDataError):
+        asyncio.run(load('2019/01/10 12:05:00'))
+    assert asyncio.run(load('2019/01/10 12:10:00')).get_unit_volume_bids()['interval'].iloc[0] == '2019/01/10 12:10:00'
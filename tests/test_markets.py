@@ -1,6 +1,12 @@
+import asyncio
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
 import pandas as pd
 from pandas._testing import assert_frame_equal
 from nempy import markets
+from nempy.spot_markert_backend import solver_backends, solver_interface
 
 
 def test_one_region_energy_market():
@@ -1036,4 +1042,971 @@ def test_setting_constraint_on_unit_with_no_bid_volume_doesnt_raise_error():
     })
 
     assert_frame_equal(market.get_energy_prices(), expected_prices)
-    assert_frame_equal(market.get_unit_dispatch(), expected_dispatch)
\ No newline at end of file
+    assert_frame_equal(market.get_unit_dispatch(), expected_dispatch)
+
+
+def record_constraints_added_to_solver(monkeypatch):
+    """Make the markets module use a solver interface that records the ids of the constraints and variables added."""
+    added_constraint_ids = []
+    added_variable_ids = []
+
+    class RecordingInterfaceToSolver(solver_interface.InterfaceToSolver):
+        def add_variables(self, decision_variables):
+            added_variable_ids.extend(decision_variables['variable_id'])
+            super().add_variables(decision_variables)
+
+        def add_constraints(self, constraints_lhs, constraints_type_and_rhs):
+            added_constraint_ids.extend(constraints_type_and_rhs['constraint_id'])
+            super().add_constraints(constraints_lhs, constraints_type_and_rhs)
+
+    monkeypatch.setattr(markets.solver_interface, 'InterfaceToSolver', RecordingInterfaceToSolver)
+    return added_constraint_ids, added_variable_ids
+
+
+def build_market_with_generic_constraints_x_y_z(with_losses):
+    volume_bids = pd.DataFrame({
+        'unit': ['A', 'B', 'C'],
+        '1': [100.0, 100.0, 100.0]
+    })
+
+    price_bids = pd.DataFrame({
+        'unit': ['A', 'B', 'C'],
+        '1': [50.0, 20.0, 30.0]
+    })
+
+    unit_info = pd.DataFrame({
+        'unit': ['A', 'B', 'C'],
+        'region': ['NSW', 'VIC', 'VIC']
+    })
+
+    demand = pd.DataFrame({
+        'region': ['NSW', 'VIC'],
+        'demand': [60.0, 80.0]  # MW
+    })
+
+    # Set X binds, set Y and Z can never bind.
+    generic_cons = pd.DataFrame({
+        'set': ['X', 'Y', 'Z'],
+        'type': ['>=', '<=', '>='],
+        'rhs': [65.0, 1000.0, 0.0],
+    })
+
+    unit_coefficients = pd.DataFrame({
+        'set': ['X', 'Y', 'Z'],
+        'unit': ['A', 'B', 'C'],
+        'service': ['energy', 'energy', 'energy'],
+        'coefficient': [1.0, 1.0, 1.0]
+    })
+
+    interconnectors = pd.DataFrame({
+        'interconnector': ['little_link'],
+        'to_region': ['VIC'],
+        'from_region': ['NSW'],
+        'max': [100.0],
+        'min': [-120.0]
+    })
+
+    def constant_losses(flow):
+        return abs(flow) * 0.05
+
+    loss_functions = pd.DataFrame({
+        'interconnector': ['little_link'],
+        'from_region_loss_share': [0.5],
+        'loss_function': [constant_losses]
+    })
+
+    interpolation_break_points = pd.DataFrame({
+        'interconnector': ['little_link', 'little_link', 'little_link'],
+        'loss_segment': [1, 2, 3],
+        'break_point': [-120.0, 0.0, 100]
+    })
+
+    market = markets.SpotMarket(unit_info=unit_info.copy(), market_regions=['NSW', 'VIC'])
+    market.set_interconnectors(interconnectors)
+    if with_losses:
+        market.set_interconnector_losses(loss_functions, interpolation_break_points)
+    market.set_unit_volume_bids(volume_bids)
+    market.set_unit_price_bids(price_bids)
+    market.set_demand_constraints(demand)
+    market.set_generic_constraints(generic_cons)
+    market.make_constraints_elastic('generic', violation_cost=1000.0)
+    market.link_units_to_generic_constraints(unit_coefficients)
+    return market
+
+
+def test_lazy_generic_constraints_match_full_dispatch(monkeypatch):
+    added_constraint_ids, _ = record_constraints_added_to_solver(monkeypatch)
+
+    full_market = build_market_with_generic_constraints_x_y_z(with_losses=False)
+    full_market.dispatch()
+
+    lazy_market = build_market_with_generic_constraints_x_y_z(with_losses=False)
+    added_constraint_ids.clear()
+    lazy_market.dispatch(lazy_generic_constraints=True)
+    lazy_added_constraint_ids = list(added_constraint_ids)
+
+    working_set_market = build_market_with_generic_constraints_x_y_z(with_losses=False)
+    added_constraint_ids.clear()
+    working_set_market.dispatch(lazy_generic_constraints=True, generic_constraint_working_set=['X'])
+    working_set_added_constraint_ids = list(added_constraint_ids)
+
+    expected_dispatch = pd.DataFrame({
+        'unit': ['A', 'B', 'C'],
+        'service': ['energy', 'energy', 'energy'],
+        'dispatch': [65.0, 75.0, 0.0]
+    })
+
+    for market in [full_market, lazy_market, working_set_market]:
+        assert_frame_equal(market.get_unit_dispatch(), expected_dispatch)
+        assert_frame_equal(market.get_energy_prices(), full_market.get_energy_prices())
+        assert_frame_equal(market._constraints_rhs_and_type['generic'].loc[:, ['set', 'slack']],
+                           full_market._constraints_rhs_and_type['generic'].loc[:, ['set', 'slack']])
+
+    # Only the violated set X is added to the solver, Y and Z never are.
+    generic_ids = full_market._constraints_rhs_and_type['generic'].set_index('set')['constraint_id']
+    assert generic_ids['X'] in lazy_added_constraint_ids
+    assert generic_ids['X'] in working_set_added_constraint_ids
+    for constraint_ids in [lazy_added_constraint_ids, working_set_added_constraint_ids]:
+        assert generic_ids['Y'] not in constraint_ids
+        assert generic_ids['Z'] not in constraint_ids
+
+
+def test_lazy_generic_constraints_match_full_dispatch_with_interconnector_losses(monkeypatch):
+    added_constraint_ids, _ = record_constraints_added_to_solver(monkeypatch)
+
+    full_market = build_market_with_generic_constraints_x_y_z(with_losses=True)
+    full_market.dispatch()
+
+    lazy_market = build_market_with_generic_constraints_x_y_z(with_losses=True)
+    added_constraint_ids.clear()
+    lazy_market.dispatch(lazy_generic_constraints=True)
+
+    assert_frame_equal(lazy_market.get_unit_dispatch(), full_market.get_unit_dispatch())
+    assert_frame_equal(lazy_market.get_energy_prices(), full_market.get_energy_prices())
+    assert_frame_equal(lazy_market.get_interconnector_flows(), full_market.get_interconnector_flows())
+    assert_frame_equal(lazy_market._constraints_rhs_and_type['generic'].loc[:, ['set', 'slack']],
+                       full_market._constraints_rhs_and_type['generic'].loc[:, ['set', 'slack']])
+    assert lazy_market.objective_value == full_market.objective_value
+
+    generic_ids = full_market._constraints_rhs_and_type['generic'].set_index('set')['constraint_id']
+    assert generic_ids['X'] in added_constraint_ids
+    assert generic_ids['Y'] not in added_constraint_ids
+    assert generic_ids['Z'] not in added_constraint_ids
+
+
+def test_presolve_removes_redundant_generic_constraints_without_changing_dispatch(monkeypatch):
+    volume_bids = pd.DataFrame({
+        'unit': ['A', 'B'],
+        '1': [100.0, 100.0]
+    })
+
+    price_bids = pd.DataFrame({
+        'unit': ['A', 'B'],
+        '1': [50.0, 20.0]
+    })
+
+    unit_info = pd.DataFrame({
+        'unit': ['A', 'B'],
+        'region': ['NSW', 'NSW']
+    })
+
+    demand = pd.DataFrame({
+        'region': ['NSW'],
+        'demand': [140.0]  # MW
+    })
+
+    # Set X binds, set Y can never bind because unit B only bids 100 MW.
+    generic_cons = pd.DataFrame({
+        'set': ['X', 'Y'],
+        'type': ['<=', '<='],
+        'rhs': [90.0, 10000.0],
+    })
+
+    unit_coefficients = pd.DataFrame({
+        'set': ['X', 'Y'],
+        'unit': ['B', 'B'],
+        'service': ['energy', 'energy'],
+        'coefficient': [1.0, 1.0]
+    })
+
+    def build_market():
+        market = markets.SpotMarket(unit_info=unit_info.copy(), market_regions=['NSW'])
+        market.set_unit_volume_bids(volume_bids)
+        market.set_unit_price_bids(price_bids)
+        market.set_demand_constraints(demand)
+        market.set_generic_constraints(generic_cons)
+        market.make_constraints_elastic('generic', violation_cost=1000.0)
+        market.link_units_to_generic_constraints(unit_coefficients)
+        return market
+
+    added_constraint_ids, added_variable_ids = record_constraints_added_to_solver(monkeypatch)
+
+    full_market = build_market()
+    full_market.dispatch()
+
+    presolved_market = build_market()
+    added_constraint_ids.clear()
+    added_variable_ids.clear()
+    presolved_market.dispatch(presolve_generic_constraints=True)
+
+    expected_dispatch = pd.DataFrame({
+        'unit': ['A', 'B'],
+        'service': ['energy', 'energy'],
+        'dispatch': [50.0, 90.0]
+    })
+
+    expected_slack = pd.DataFrame({
+        'set': ['X', 'Y'],
+        'slack': [0.0, 9910.0]
+    })
+
+    for market in [full_market, presolved_market]:
+        assert_frame_equal(market.get_unit_dispatch(), expected_dispatch)
+        assert_frame_equal(market.get_energy_prices(), full_market.get_energy_prices())
+        assert_frame_equal(market._constraints_rhs_and_type['generic'].loc[:, ['set', 'slack']], expected_slack)
+        assert market.get_elastic_constraints_violation_degree('generic') == 0.0
+
+    # Set Y and its deficit variable are left out of the presolved model, set X is kept.
+    generic_ids = presolved_market._constraints_rhs_and_type['generic'].set_index('set')['constraint_id']
+    deficit_lhs = presolved_market._lhs_coefficients['generic_deficit']
+    deficit_ids = deficit_lhs.set_index('constraint_id')['variable_id']
+    assert generic_ids['X'] in added_constraint_ids
+    assert deficit_ids[generic_ids['X']] in added_variable_ids
+    assert generic_ids['Y'] not in added_constraint_ids
+    assert deficit_ids[generic_ids['Y']] not in added_variable_ids
+
+
+def test_horizon_market_without_ramp_coupling_matches_independent_dispatch():
+    unit_info = pd.DataFrame({
+        'unit': ['A', 'B'],
+        'region': ['NSW', 'VIC']
+    })
+
+    volume_bids = pd.DataFrame({
+        'unit': ['A', 'B'],
+        '1': [100.0, 100.0]
+    })
+
+    price_bids = pd.DataFrame({
+        'unit': ['A', 'B'],
+        '1': [50.0, 80.0]
+    })
+
+    interconnectors = pd.DataFrame({
+        'interconnector': ['little_link'],
+        'to_region': ['VIC'],
+        'from_region': ['NSW'],
+        'max': [60.0],
+        'min': [-120.0]
+    })
+
+    def constant_losses(flow):
+        return abs(flow) * 0.05
+
+    loss_functions = pd.DataFrame({
+        'interconnector': ['little_link'],
+        'from_region_loss_share': [0.5],
+        'loss_function': [constant_losses]
+    })
+
+    interpolation_break_points = pd.DataFrame({
+        'interconnector': ['little_link', 'little_link', 'little_link'],
+        'loss_segment': [1, 2, 3],
+        'break_point': [-120.0, 0.0, 100]
+    })
+
+    def build_market(vic_demand):
+        market = markets.SpotMarket(unit_info=unit_info.copy(), market_regions=['NSW', 'VIC'])
+        market.set_unit_volume_bids(volume_bids)
+        market.set_unit_price_bids(price_bids)
+        market.set_demand_constraints(pd.DataFrame({'region': ['NSW', 'VIC'], 'demand': [10.0, vic_demand]}))
+        market.set_interconnectors(interconnectors)
+        market.set_interconnector_losses(loss_functions, interpolation_break_points)
+        return market
+
+    vic_demands = [40.0, 90.0, 20.0]
+    horizon = markets.HorizonMarket([build_market(vic_demand) for vic_demand in vic_demands])
+    horizon.dispatch()
+
+    for interval, vic_demand in enumerate(vic_demands):
+        market = build_market(vic_demand)
+        market.dispatch()
+        for get_method in ['get_unit_dispatch', 'get_energy_prices', 'get_interconnector_flows']:
+            horizon_results = getattr(horizon, get_method)()
+            horizon_results = horizon_results[horizon_results['interval'] == interval]
+            horizon_results = horizon_results.drop(columns=['interval']).reset_index(drop=True)
+            assert_frame_equal(horizon_results, getattr(market, get_method)())
+
+
+def test_horizon_market_ramp_coupling_limits_change_in_dispatch_between_intervals():
+    unit_info = pd.DataFrame({
+        'unit': ['A', 'B'],
+        'region': ['NSW', 'NSW']
+    })
+
+    volume_bids = pd.DataFrame({
+        'unit': ['A', 'B'],
+        '1': [100.0, 100.0]
+    })
+
+    price_bids = pd.DataFrame({
+        'unit': ['A', 'B'],
+        '1': [50.0, 100.0]
+    })
+
+    interval_markets = []
+    for demand in [80.0, 10.0, 80.0]:
+        market = markets.SpotMarket(unit_info=unit_info.copy(), market_regions=['NSW'])
+        market.set_unit_volume_bids(volume_bids)
+        market.set_unit_price_bids(price_bids)
+        market.set_demand_constraints(pd.DataFrame({'region': ['NSW'], 'demand': [demand]}))
+        interval_markets.append(market)
+
+    horizon = markets.HorizonMarket(interval_markets)
+
+    # Unit A can move 30 MW per 5 min interval, B is unconstrained.
+    horizon.set_inter_interval_ramp_constraints(pd.DataFrame({
+        'unit': ['A', 'B'],
+        'ramp_up_rate': [360.0, 6000.0],
+        'ramp_down_rate': [360.0, 6000.0]
+    }))
+    horizon.dispatch()
+
+    expected_dispatch = pd.DataFrame({
+        'interval': [0, 0, 1, 1, 2, 2],
+        'unit': ['A', 'B', 'A', 'B', 'A', 'B'],
+        'service': ['energy'] * 6,
+        'dispatch': [40.0, 40.0, 10.0, 0.0, 40.0, 40.0]
+    })
+
+    assert_frame_equal(horizon.get_unit_dispatch(), expected_dispatch)
+
+    # With elastic ramp constraints and a low violation cost the ramp constraints are ignored.
+    horizon.set_inter_interval_ramp_constraints(pd.DataFrame({
+        'unit': ['A', 'B'],
+        'ramp_up_rate': [360.0, 6000.0],
+        'ramp_down_rate': [360.0, 6000.0]
+    }), violation_cost=1.0)
+    horizon.dispatch()
+
+    expected_dispatch['dispatch'] = [80.0, 0.0, 10.0, 0.0, 80.0, 0.0]
+
+    assert_frame_equal(horizon.get_unit_dispatch(), expected_dispatch)
+
+
+def build_two_unit_interval_markets(demands):
+    unit_info = pd.DataFrame({
+        'unit': ['A', 'B'],
+        'region': ['NSW', 'NSW']
+    })
+
+    interval_markets = []
+    for demand in demands:
+        market = markets.SpotMarket(unit_info=unit_info.copy(), market_regions=['NSW'])
+        market.set_unit_volume_bids(pd.DataFrame({'unit': ['A', 'B'], '1': [100.0, 100.0]}))
+        market.set_unit_price_bids(pd.DataFrame({'unit': ['A', 'B'], '1': [50.0, 100.0]}))
+        market.set_demand_constraints(pd.DataFrame({'region': ['NSW'], 'demand': [demand]}))
+        interval_markets.append(market)
+    return interval_markets
+
+
+def test_horizon_market_ramp_constraint_slack_and_violation():
+    horizon = markets.HorizonMarket(build_two_unit_interval_markets([80.0, 10.0, 80.0]))
+
+    ramp_rates = pd.DataFrame({
+        'unit': ['A'],
+        'ramp_up_rate': [360.0],
+        'ramp_down_rate': [360.0]
+    })
+
+    horizon.set_inter_interval_ramp_constraints(ramp_rates)
+    horizon.dispatch()
+
+    expected_ramp_constraints = pd.DataFrame({
+        'interval': [1, 2, 1, 2],
+        'unit': ['A', 'A', 'A', 'A'],
+        'direction': ['up', 'up', 'down', 'down'],
+        'rhs': [30.0, 30.0, -30.0, -30.0],
+        'slack': [60.0, 0.0, 0.0, 60.0],
+        'violation': [0.0, 0.0, 0.0, 0.0]
+    })
+
+    assert_frame_equal(horizon.get_inter_interval_ramp_constraints(), expected_ramp_constraints)
+
+    # Violating the ramp constraints is cheaper than dispatching unit B.
+    horizon.set_inter_interval_ramp_constraints(ramp_rates, violation_cost=1.0)
+    horizon.dispatch()
+
+    expected_ramp_constraints['slack'] = [100.0, 0.0, 0.0, 100.0]
+    expected_ramp_constraints['violation'] = [0.0, 40.0, 40.0, 0.0]
+
+    assert_frame_equal(horizon.get_inter_interval_ramp_constraints(), expected_ramp_constraints)
+
+
+def test_horizon_market_rejects_ramp_constraints_on_later_intervals_and_missing_bids():
+    horizon = markets.HorizonMarket(build_two_unit_interval_markets([80.0, 10.0]))
+    horizon.interval_markets[1].set_unit_ramp_up_constraints(pd.DataFrame({
+        'unit': ['A'],
+        'initial_output': [0.0],
+        'ramp_up_rate': [360.0]
+    }))
+    horizon.set_inter_interval_ramp_constraints(pd.DataFrame({
+        'unit': ['A'],
+        'ramp_up_rate': [360.0],
+        'ramp_down_rate': [360.0]
+    }))
+    with pytest.raises(markets.check.ModelBuildError):
+        horizon.dispatch()
+
+    # Intervals with only an interconnector, and no unit bids to apply ramp constraints to.
+    interval_markets = []
+    for _ in range(2):
+        market = markets.SpotMarket(unit_info=pd.DataFrame({'unit': ['A'], 'region': ['NSW']}),
+                                    market_regions=['NSW', 'VIC'])
+        market.set_interconnectors(pd.DataFrame({
+            'interconnector': ['little_link'],
+            'to_region': ['VIC'],
+            'from_region': ['NSW'],
+            'max': [100.0],
+            'min': [-120.0]
+        }))
+        market.set_demand_constraints(pd.DataFrame({'region': ['NSW', 'VIC'], 'demand': [0.0, 0.0]}))
+        interval_markets.append(market)
+    horizon = markets.HorizonMarket(interval_markets)
+    horizon.set_inter_interval_ramp_constraints(pd.DataFrame({
+        'unit': ['A'],
+        'ramp_up_rate': [360.0],
+        'ramp_down_rate': [360.0]
+    }))
+    with pytest.raises(markets.check.ModelBuildError):
+        horizon.dispatch()
+
+
+def build_two_island_market():
+    unit_info = pd.DataFrame({
+        'unit': ['A', 'B', 'C', 'D'],
+        'region': ['NSW', 'NSW', 'VIC', 'VIC']
+    })
+
+    market = markets.SpotMarket(unit_info=unit_info, market_regions=['NSW', 'VIC'])
+    market.set_unit_volume_bids(pd.DataFrame({
+        'unit': ['A', 'B', 'C', 'D'],
+        '1': [50.0, 100.0, 60.0, 100.0]
+    }))
+    market.set_unit_price_bids(pd.DataFrame({
+        'unit': ['A', 'B', 'C', 'D'],
+        '1': [20.0, 60.0, 30.0, 90.0]
+    }))
+    market.set_demand_constraints(pd.DataFrame({
+        'region': ['NSW', 'VIC'],
+        'demand': [80.0, 90.0]
+    }))
+
+    # The only interconnector is limited to zero flow, so the regions are islanded.
+    market.set_interconnectors(pd.DataFrame({
+        'interconnector': ['little_link'],
+        'to_region': ['VIC'],
+        'from_region': ['NSW'],
+        'max': [0.0],
+        'min': [0.0]
+    }))
+
+    # Each generic constraint only covers units in one region.
+    market.set_generic_constraints(pd.DataFrame({
+        'set': ['X', 'Y'],
+        'type': ['<=', '<='],
+        'rhs': [40.0, 1000.0]
+    }))
+    market.make_constraints_elastic('generic', violation_cost=1000.0)
+    market.link_units_to_generic_constraints(pd.DataFrame({
+        'set': ['X', 'Y'],
+        'unit': ['A', 'C'],
+        'service': ['energy', 'energy'],
+        'coefficient': [1.0, 1.0]
+    }))
+    return market
+
+
+def test_decomposed_dispatch_of_islanded_regions_matches_single_model(monkeypatch):
+    full_market = build_two_island_market()
+    full_market.dispatch()
+
+    expected_dispatch = pd.DataFrame({
+        'unit': ['A', 'B', 'C', 'D'],
+        'service': ['energy', 'energy', 'energy', 'energy'],
+        'dispatch': [40.0, 40.0, 60.0, 30.0]
+    })
+
+    expected_prices = pd.DataFrame({
+        'region': ['NSW', 'VIC'],
+        'price': [60.0, 90.0]
+    })
+
+    assert_frame_equal(full_market.get_unit_dispatch(), expected_dispatch)
+    assert_frame_equal(full_market.get_energy_prices(), expected_prices)
+
+    solved_components = []
+
+    class RecordingDecomposedInterfaceToSolver(solver_interface.DecomposedInterfaceToSolver):
+        def optimize(self):
+            super().optimize()
+            solved_components.append(len(self.components))
+
+    monkeypatch.setattr(markets.solver_interface, 'DecomposedInterfaceToSolver', RecordingDecomposedInterfaceToSolver)
+
+    for dispatch_options in [{'decompose': True},
+                             {'decompose': True, 'decomposition_workers': 2},
+                             {'decompose': True, 'lazy_generic_constraints': True},
+                             {'decompose': True, 'presolve_generic_constraints': True}]:
+        solved_components.clear()
+        market = build_two_island_market()
+        market.dispatch(**dispatch_options)
+        assert solved_components[0] == 2
+        assert_frame_equal(market.get_unit_dispatch(), full_market.get_unit_dispatch())
+        assert_frame_equal(market.get_energy_prices(), full_market.get_energy_prices())
+        assert_frame_equal(market.get_interconnector_flows(), full_market.get_interconnector_flows())
+        assert_frame_equal(market.get_region_dispatch_summary(), full_market.get_region_dispatch_summary())
+        assert_frame_equal(market._constraints_rhs_and_type['generic'].loc[:, ['set', 'slack']],
+                           full_market._constraints_rhs_and_type['generic'].loc[:, ['set', 'slack']])
+        assert market.objective_value == full_market.objective_value
+
+
+def build_energy_only_market(demand, with_tie_break=False):
+    unit_info = pd.DataFrame({
+        'unit': ['A', 'B', 'C', 'D', 'E'],
+        'region': ['NSW', 'NSW', 'NSW', 'VIC', 'VIC'],
+        'loss_factor': [1.0, 1.0, 1.0, 0.95, 1.0],
+        'dispatch_type': ['generator', 'generator', 'load', 'generator', 'generator']
+    })
+
+    volume_bids = pd.DataFrame({
+        'unit': ['A', 'B', 'C', 'D', 'E'],
+        '1': [20.0, 50.0, 10.0, 40.0, 30.0],  # MW
+        '2': [20.0, 30.0, 5.0, 40.0, 30.0],  # MW
+    })
+
+    price_bids = pd.DataFrame({
+        'unit': ['A', 'B', 'C', 'D', 'E'],
+        '1': [50.0, 50.0, 300.0, 40.0, 45.0],  # $/MW
+        '2': [60.0, 80.0, 10.0, 70.0, 90.0],  # $/MW
+    })
+
+    unit_limits = pd.DataFrame({
+        'unit': ['A', 'B', 'C', 'D'],
+        'capacity': [30.0, 100.0, 12.0, 60.0],  # MW
+    })
+
+    market = markets.SpotMarket(unit_info=unit_info, market_regions=['NSW', 'VIC'])
+    market.set_unit_volume_bids(volume_bids)
+    market.set_unit_price_bids(price_bids)
+    market.set_unit_bid_capacity_constraints(unit_limits)
+    market.set_demand_constraints(pd.DataFrame({'region': ['NSW', 'VIC'], 'demand': demand}))
+    if with_tie_break:
+        market.set_tie_break_constraints(cost=0.001)
+    return market
+
+
+def test_merit_order_dispatch_matches_linear_program():
+    for demand, with_tie_break in [([65.0, 50.0], False), ([45.0, 75.0], True), ([95.0, 20.0], True),
+                                   ([0.0, 85.0], True)]:
+        lp_market = build_energy_only_market(demand, with_tie_break)
+        lp_market.dispatch()
+
+        for method in ['merit_order', 'auto']:
+            market = build_energy_only_market(demand, with_tie_break)
+            market.dispatch(method=method)
+            assert_frame_equal(market.get_unit_dispatch(), lp_market.get_unit_dispatch())
+            assert_frame_equal(market.get_energy_prices(), lp_market.get_energy_prices())
+            assert_frame_equal(market._constraints_rhs_and_type['unit_bid_capacity'],
+                               lp_market._constraints_rhs_and_type['unit_bid_capacity'])
+            assert market.objective_value == pytest.approx(lp_market.objective_value)
+
+
+def test_merit_order_dispatch_is_only_used_for_supported_markets(monkeypatch):
+    market = build_two_island_market()
+    with pytest.raises(markets.check.ModelBuildError):
+        market.dispatch(method='merit_order')
+
+    with pytest.raises(ValueError):
+        build_energy_only_market([55.0, 50.0]).dispatch(method='simplex')
+
+    # With interconnectors in the model auto falls back to the linear program.
+    market.dispatch(method='auto')
+    full_market = build_two_island_market()
+    full_market.dispatch()
+    assert_frame_equal(market.get_unit_dispatch(), full_market.get_unit_dispatch())
+
+    # Demand that cannot be met is infeasible, as it is for the linear program.
+    with pytest.raises(ValueError):
+        build_energy_only_market([500.0, 50.0]).dispatch(method='merit_order')
+
+
+def build_market_with_load_and_interconnector_loss_factors(vic_demand):
+    unit_info = pd.DataFrame({
+        'unit': ['A', 'L', 'C'],
+        'region': ['NSW', 'NSW', 'VIC'],
+        'dispatch_type': ['generator', 'load', 'generator']
+    })
+
+    market = markets.SpotMarket(unit_info=unit_info, market_regions=['NSW', 'VIC'])
+    market.set_unit_volume_bids(pd.DataFrame({'unit': ['A', 'L', 'C'], '1': [200.0, 20.0, 100.0]}))
+    market.set_unit_price_bids(pd.DataFrame({'unit': ['A', 'L', 'C'], '1': [20.0, 500.0, 90.0]}))
+    market.set_demand_constraints(pd.DataFrame({'region': ['NSW', 'VIC'], 'demand': [40.0, vic_demand]}))
+    market.set_interconnectors(pd.DataFrame({
+        'interconnector': ['inter'],
+        'to_region': ['VIC'],
+        'from_region': ['NSW'],
+        'max': [50.0],
+        'min': [-50.0],
+        'from_region_loss_factor': [0.9],
+        'to_region_loss_factor': [0.8]
+    }))
+    return market
+
+
+def test_region_dispatch_summary_with_loads_and_transmission_loss_factors():
+    market = build_market_with_load_and_interconnector_loss_factors(vic_demand=80.0)
+    market.dispatch()
+
+    # Load dispatch is negative, flow towards VIC is scaled by its loss factor and flow away from NSW is divided by
+    # its loss factor.
+    expected_summary = pd.DataFrame({
+        'region': ['NSW', 'VIC'],
+        'dispatch': [105.0 - 20.0, 40.0],
+        'inflow': [-50.0, 50.0],
+        'transmission_losses': [50.0 - 50.0 / 0.9, 50.0 * (1 - 0.8)]
+    })
+    assert_frame_equal(market.get_region_dispatch_summary(), expected_summary)
+
+
+def test_dispatch_results_are_cached_until_the_model_changes():
+    market = build_market_with_load_and_interconnector_loss_factors(vic_demand=80.0)
+    market.dispatch()
+
+    # Changing a returned result doesn't change the cached result.
+    summary = market.get_region_dispatch_summary()
+    summary['dispatch'] = 0.0
+    assert_frame_equal(market.get_region_dispatch_summary().loc[:, ['region', 'dispatch']],
+                       pd.DataFrame({'region': ['NSW', 'VIC'], 'dispatch': [85.0, 40.0]}))
+
+    # Changing the model clears the cached results, and re-dispatching gives results for the new model. Flow is
+    # scaled by the loss factor at each end, so 37.5 MW meets 30 MW of VIC demand and uses 33.75 MW in NSW.
+    market.set_demand_constraints(pd.DataFrame({'region': ['NSW', 'VIC'], 'demand': [40.0, 30.0]}))
+    assert market._results == {}
+    market.dispatch()
+    assert_frame_equal(market.get_interconnector_flows(),
+                       pd.DataFrame({'interconnector': ['inter'], 'link': ['inter'], 'flow': [37.5]}))
+    assert_frame_equal(market.get_region_dispatch_summary().loc[:, ['region', 'dispatch']],
+                       pd.DataFrame({'region': ['NSW', 'VIC'], 'dispatch': [73.75, 0.0]}))
+
+
+def test_dispatch_scenarios_match_dispatching_each_scenario_separately():
+    market = build_market_with_generic_constraints_x_y_z(with_losses=True)
+    generic_constraints = market._constraints_rhs_and_type['generic']
+    set_x_id = generic_constraints[generic_constraints['set'] == 'X']['constraint_id'].iloc[0]
+    bids = market._decision_variables['bids']
+    unit_c_id = bids[bids['unit'] == 'C']['variable_id'].iloc[0]
+    interconnector_id = market._decision_variables['interconnectors']['variable_id'].iloc[0]
+    scenarios = {
+        'base': {},
+        'demand': {'demand': pd.DataFrame({'region': ['VIC'], 'demand': [150.0]})},
+        'generic_rhs': {'rhs': pd.DataFrame({'constraint_id': [set_x_id], 'rhs': [90.0]})},
+        'expensive_c': {'costs': pd.DataFrame({'variable_id': [unit_c_id], 'cost': [60.0]})},
+        'interconnector_limit': {'bounds': pd.DataFrame({'variable_id': [interconnector_id], 'lower_bound': [-120.0],
+                                                         'upper_bound': [10.0]})},
+    }
+
+    def expected_results(name):
+        expected_market = build_market_with_generic_constraints_x_y_z(with_losses=True)
+        if name == 'demand':
+            expected_market.set_demand_constraints(pd.DataFrame({'region': ['NSW', 'VIC'], 'demand': [60.0, 150.0]}))
+        elif name == 'generic_rhs':
+            expected_market._constraints_rhs_and_type['generic'].loc[
+                expected_market._constraints_rhs_and_type['generic']['set'] == 'X', 'rhs'] = 90.0
+        elif name == 'expensive_c':
+            expected_market.set_unit_price_bids(pd.DataFrame({'unit': ['A', 'B', 'C'], '1': [50.0, 20.0, 60.0]}))
+        elif name == 'interconnector_limit':
+            interconnectors = expected_market._decision_variables['interconnectors']
+            interconnectors['upper_bound'] = 10.0
+        expected_market.dispatch()
+        return {'unit_dispatch': expected_market.get_unit_dispatch(),
+                'energy_prices': expected_market.get_energy_prices(),
+                'interconnector_flows': expected_market.get_interconnector_flows()}
+
+    for workers in [1, 2]:
+        results = market.dispatch_scenarios(scenarios, workers=workers)
+        assert set(results) == {'unit_dispatch', 'energy_prices', 'interconnector_flows'}
+        for name in scenarios:
+            expected = expected_results(name)
+            for result_name, result in results.items():
+                scenario_result = result[result['scenario'] == name].drop(columns=['scenario'])
+                assert_frame_equal(scenario_result.reset_index(drop=True),
+                                   expected[result_name].reset_index(drop=True))
+
+    # The market's own results are not changed.
+    assert 'value' not in market._decision_variables['bids'].columns
+
+    with pytest.raises(ValueError):
+        market.dispatch_scenarios({'bad': {'costs': pd.DataFrame({'variable_id': [999], 'cost': [1.0]})}})
+
+
+def test_sweep_demand_matches_dispatch_at_each_demand(monkeypatch):
+    market = build_market_with_load_and_interconnector_loss_factors(vic_demand=80.0)
+    market.set_unit_volume_bids(pd.DataFrame({'unit': ['A', 'L', 'C'], '1': [200.0, 20.0, 60.0],
+                                              '2': [0.0, 0.0, 60.0]}))
+    market.set_unit_price_bids(pd.DataFrame({'unit': ['A', 'L', 'C'], '1': [20.0, 500.0, 90.0],
+                                             '2': [0.0, 0.0, 120.0]}))
+
+    solves = []
+    optimize = solver_interface.InterfaceToSolver.optimize
+    monkeypatch.setattr(solver_interface.InterfaceToSolver, 'optimize',
+                        lambda si: solves.append(1) or optimize(si))
+    curve = market.sweep_demand('VIC', 10.0, 150.0)
+    number_of_solves = len(solves)
+
+    # VIC imports up to the interconnector limit, then C's bands are dispatched in turn.
+    assert list(curve['demand_start']) == pytest.approx([10.0, 40.0, 100.0])
+    assert list(curve['demand_end']) == pytest.approx([40.0, 100.0, 150.0])
+    assert list(curve['price']) == pytest.approx([20.0 * 0.9 * 1.25, 90.0, 120.0])
+    assert list(curve['marginal_unit']) == ['A', 'C', 'C']
+    assert number_of_solves < 20
+
+    for demand_start, demand_end, price in zip(curve['demand_start'], curve['demand_end'], curve['price']):
+        market.set_demand_constraints(pd.DataFrame({'region': ['NSW', 'VIC'],
+                                                    'demand': [40.0, (demand_start + demand_end) / 2]}))
+        market.dispatch()
+        energy_prices = market.get_energy_prices()
+        assert energy_prices.loc[energy_prices['region'] == 'VIC', 'price'].iloc[0] == pytest.approx(price)
+
+
+def test_saved_model_dispatches_the_same_as_the_built_market(tmp_path):
+    market = build_market_with_generic_constraints_x_y_z(with_losses=True)
+    market.dispatch()
+    market.save_model(tmp_path / 'market.npz')
+
+    loaded_market = markets.SpotMarket.load_model(tmp_path / 'market.npz')
+    assert loaded_market._results == {}
+    loaded_market.dispatch(lazy_generic_constraints=True)
+    assert_frame_equal(loaded_market.get_unit_dispatch(), market.get_unit_dispatch())
+    assert_frame_equal(loaded_market.get_energy_prices(), market.get_energy_prices())
+    assert_frame_equal(loaded_market.get_interconnector_flows(), market.get_interconnector_flows())
+    assert_frame_equal(loaded_market._constraints_rhs_and_type['generic'],
+                       market._constraints_rhs_and_type['generic'])
+    assert loaded_market.objective_value == pytest.approx(market.objective_value)
+    assert loaded_market._next_variable_id == market._next_variable_id
+
+    # The loaded market can be changed like any other before dispatch.
+    loaded_market.set_demand_constraints(pd.DataFrame({'region': ['NSW', 'VIC'], 'demand': [60.0, 120.0]}))
+    market.set_demand_constraints(pd.DataFrame({'region': ['NSW', 'VIC'], 'demand': [60.0, 120.0]}))
+    loaded_market.dispatch()
+    market.dispatch()
+    assert_frame_equal(loaded_market.get_unit_dispatch(), market.get_unit_dispatch())
+
+
+def test_model_cache_only_builds_each_interval_and_options_once(tmp_path):
+    builds = []
+
+    def build_market():
+        builds.append(1)
+        return build_market_with_load_and_interconnector_loss_factors(vic_demand=80.0)
+
+    cache = markets.ModelCache(tmp_path)
+    first = cache.get_market('2021/01/01 00:05:00', {'losses': True}, build_market)
+    second = cache.get_market('2021/01/01 00:05:00', {'losses': True}, build_market)
+    assert len(builds) == 1
+    cache.get_market('2021/01/01 00:05:00', {'losses': False}, build_market)
+    cache.get_market('2021/01/01 00:10:00', {'losses': True}, build_market)
+    assert len(builds) == 3
+
+    first.dispatch()
+    second.dispatch()
+    assert_frame_equal(second.get_region_dispatch_summary(), first.get_region_dispatch_summary())
+
+
+def build_energy_and_raise_reg_market():
+    market = markets.SpotMarket(unit_info=pd.DataFrame({'unit': ['A', 'B'], 'region': ['NSW', 'NSW']}),
+                                market_regions=['NSW'])
+    market.set_unit_volume_bids(pd.DataFrame({'unit': ['A', 'B', 'B'], 'service': ['energy', 'energy', 'raise_reg'],
+                                              '1': [100.0, 110.0, 15.0]}))
+    market.set_unit_price_bids(pd.DataFrame({'unit': ['A', 'B', 'B'], 'service': ['energy', 'energy', 'raise_reg'],
+                                             '1': [50.0, 60.0, 20.0]}))
+    fcas_trapeziums = pd.DataFrame({'unit': ['B'], 'service': ['raise_reg'], 'max_availability': [15.0],
+                                    'enablement_min': [50.0], 'low_break_point': [65.0], 'high_break_point': [95.0],
+                                    'enablement_max': [110.0]})
+    market.set_fcas_max_availability(fcas_trapeziums.loc[:, ['unit', 'service', 'max_availability']])
+    market.set_energy_and_regulation_capacity_constraints(fcas_trapeziums)
+    market.set_demand_constraints(pd.DataFrame({'region': ['NSW'], 'demand': [100.0]}))
+    market.set_fcas_requirements_constraints(pd.DataFrame({'set': ['nsw_regulation_requirement'], 'region': ['NSW'],
+                                                           'service': ['raise_reg'], 'volume': [10.0]}))
+    return market
+
+
+@pytest.mark.parametrize('compact', [False, True])
+def test_released_market_returns_the_same_results(compact):
+    markets_and_getters = [
+        (build_market_with_generic_constraints_x_y_z(with_losses=True),
+         ['get_unit_dispatch', 'get_energy_prices', 'get_interconnector_flows', 'get_region_dispatch_summary',
+          'get_constraint_set_names']),
+        (build_energy_and_raise_reg_market(),
+         ['get_unit_dispatch', 'get_energy_prices', 'get_fcas_prices', 'get_fcas_availability',
+          'get_region_dispatch_summary'])]
+    for market, getters in markets_and_getters:
+        with pytest.raises(markets.check.ModelBuildError):
+            market.release_model()
+        market.dispatch()
+        expected = {getter: getattr(market, getter)() for getter in getters}
+        violation_degree = market.get_elastic_constraints_violation_degree('generic')
+        model_memory = market.memory_usage()['bytes'].sum()
+
+        if compact:
+            market.compact()
+        else:
+            market.release_model()
+
+        assert set(market.memory_usage()['component']) == {'results'}
+        assert market.memory_usage()['bytes'].sum() < model_memory
+        for getter in getters:
+            result = getattr(market, getter)()
+            if isinstance(result, pd.DataFrame):
+                assert_frame_equal(result, expected[getter])
+            else:
+                assert result == expected[getter]
+        assert market.get_elastic_constraints_violation_degree('generic') == violation_degree
+        assert market.get_elastic_constraints_violation_degree('not_elastic') == 0.0
+
+        # Only results are left, so the market can't be changed, re-dispatched or saved.
+        with pytest.raises(markets.check.ModelBuildError):
+            market.set_demand_constraints(pd.DataFrame({'region': ['NSW'], 'demand': [10.0]}))
+        with pytest.raises(markets.check.ModelBuildError):
+            market.dispatch()
+        with pytest.raises(markets.check.ModelBuildError):
+            market.save_model('market.npz')
+
+
+def test_compact_stores_text_results_as_categoricals():
+    market = build_market_with_generic_constraints_x_y_z(with_losses=True)
+    market.dispatch()
+    market.compact()
+    assert isinstance(market._results['unit_dispatch']['unit'].dtype, pd.CategoricalDtype)
+    assert market.get_unit_dispatch()['unit'].dtype == object
+
+
+def test_dispatch_in_solver_process_pool_matches_in_process_dispatch():
+    market = build_market_with_generic_constraints_x_y_z(with_losses=True)
+    market.dispatch()
+    with solver_backends.SolverProcessPool(time_limit=60.0) as pool:
+        pool_market = build_market_with_generic_constraints_x_y_z(with_losses=True)
+        pool_market.solver_process_pool = pool
+        pool_market.dispatch()
+    assert_frame_equal(pool_market.get_unit_dispatch(), market.get_unit_dispatch())
+    assert_frame_equal(pool_market.get_energy_prices(), market.get_energy_prices())
+    assert_frame_equal(pool_market.get_interconnector_flows(), market.get_interconnector_flows())
+
+
+def test_dispatch_async_matches_dispatch():
+    market = build_market_with_generic_constraints_x_y_z(with_losses=True)
+    market.dispatch()
+
+    thread_market = build_market_with_generic_constraints_x_y_z(with_losses=True)
+    asyncio.run(thread_market.dispatch_async())
+    process_market = build_market_with_generic_constraints_x_y_z(with_losses=True)
+    with ProcessPoolExecutor(max_workers=1) as executor:
+        asyncio.run(process_market.dispatch_async(executor=executor))
+
+    for async_market in [thread_market, process_market]:
+        assert_frame_equal(async_market.get_unit_dispatch(), market.get_unit_dispatch())
+        assert_frame_equal(async_market.get_energy_prices(), market.get_energy_prices())
+        assert_frame_equal(async_market.get_interconnector_flows(), market.get_interconnector_flows())
+
+
+def test_async_dispatcher_limits_requests_and_can_cancel_them():
+    release = threading.Event()
+    started = []
+
+    def blocking_work(name):
+        started.append(name)
+        release.wait(timeout=30.0)
+        return name
+
+    async def make_requests(dispatcher):
+        running = asyncio.create_task(dispatcher.run(blocking_work, 'running'))
+        waiting = asyncio.create_task(dispatcher.run(blocking_work, 'waiting'))
+        await asyncio.sleep(0.1)
+        assert (dispatcher.in_flight, dispatcher.waiting) == (1, 1)
+
+        # The waiting request fills the queue, so further requests are turned away.
+        with pytest.raises(markets.DispatchQueueFull):
+            await dispatcher.run(blocking_work, 'rejected')
+
+        # A cancelled waiting request never starts, a cancelled running request keeps its slot until it finishes.
+        waiting.cancel()
+        running.cancel()
+        await asyncio.sleep(0.1)
+        assert (dispatcher.in_flight, dispatcher.waiting) == (1, 0)
+        release.set()
+        while dispatcher.in_flight > 0:
+            await asyncio.sleep(0.01)
+        return await dispatcher.run(blocking_work, 'next')
+
+    with markets.AsyncDispatcher(max_in_flight=1, max_waiting=1) as dispatcher:
+        assert asyncio.run(make_requests(dispatcher)) == 'next'
+    assert started == ['running', 'next']
+
+
+def build_market_short_of_capacity():
+    market = markets.SpotMarket(unit_info=pd.DataFrame({'unit': ['A', 'B', 'C'], 'region': ['NSW', 'NSW', 'VIC']}),
+                                market_regions=['NSW', 'VIC'])
+    market.set_unit_volume_bids(pd.DataFrame({'unit': ['A', 'B', 'C'], '1': [100.0, 100.0, 100.0]}))
+    market.set_unit_price_bids(pd.DataFrame({'unit': ['A', 'B', 'C'], '1': [50.0, 60.0, 70.0]}))
+    market.set_unit_bid_capacity_constraints(pd.DataFrame({'unit': ['A', 'B', 'C'], 'capacity': [30.0, 40.0, 90.0]}))
+    market.set_demand_constraints(pd.DataFrame({'region': ['NSW', 'VIC'], 'demand': [100.0, 50.0]}))
+    return market
+
+
+def test_diagnose_infeasibility_finds_the_conflicting_constraints():
+    market = build_market_short_of_capacity()
+    with pytest.raises(solver_interface.SolveError) as error:
+        market.dispatch()
+    assert error.value.status == 'infeasible'
+    assert error.value.infeasible_constraint_ids is None
+
+    # NSW demand can't be met by units A and B, VIC is not part of the problem.
+    market.diagnose_infeasibility = True
+    with pytest.raises(solver_interface.SolveError) as error:
+        market.dispatch()
+    capacity = market._constraints_rhs_and_type['unit_bid_capacity']
+    demand = market._market_constraints_rhs_and_type['demand']
+    expected_ids = (list(capacity.loc[capacity['unit'].isin(['A', 'B']), 'constraint_id']) +
+                    list(demand.loc[demand['region'] == 'NSW', 'constraint_id']))
+    assert sorted(error.value.infeasible_constraint_ids) == sorted(expected_ids)
+    assert error.value.diagnosis_complete
+
+
+def test_diagnose_infeasibility_with_interconnector_losses():
+    market = build_market_with_generic_constraints_x_y_z(with_losses=True)
+    market.set_demand_constraints(pd.DataFrame({'region': ['NSW', 'VIC'], 'demand': [60.0, 1000.0]}))
+    market.diagnose_infeasibility = True
+    with pytest.raises(solver_interface.SolveError) as error:
+        market.dispatch()
+
+    # VIC demand is more than the VIC bids and the interconnector limit allow.
+    demand = market._market_constraints_rhs_and_type['demand']
+    assert error.value.infeasible_constraint_ids == list(demand.loc[demand['region'] == 'VIC', 'constraint_id'])
+
+
+def test_diagnose_infeasibility_stops_at_the_solve_limit(monkeypatch):
+    solves = []
+    create_backend = solver_backends.create_backend
+    monkeypatch.setattr(solver_backends, 'create_backend', lambda *args: solves.append(1) or create_backend(*args))
+    si = solver_interface.InterfaceToSolver(diagnose_infeasibility=True, max_diagnostic_solves=2)
+    si.add_variables(pd.DataFrame({'variable_id': [0, 1], 'lower_bound': [0.0, 0.0], 'upper_bound': [5.0, 5.0],
+                                   'type': ['continuous', 'continuous']}))
+    si.add_constraints(pd.DataFrame({'constraint_id': [0, 0, 1, 2], 'variable_id': [0, 1, 0, 1],
+                                     'coefficient': [1.0, 1.0, 1.0, 1.0]}),
+                       pd.DataFrame({'constraint_id': [0, 1, 2], 'type': ['>=', '<=', '<='],
+                                     'rhs': [8.0, 3.0, 4.0]}))
+    solves.clear()
+    with pytest.raises(solver_interface.SolveError) as error:
+        si.optimize()
+    assert len(solves) == 2
+    assert not error.value.diagnosis_complete
@@ -0,0 +1,166 @@
+import sqlite3
+
+import numpy as np
+import pandas as pd
+import pytest
+from pandas._testing import assert_frame_equal
+
+from nempy.historical_inputs import mms_db
+
+
+@pytest.fixture
+def database(tmp_path):
+    con = sqlite3.connect(tmp_path / 'historical.db')
+    manager = mms_db.DBManager(con)
+    manager.create_tables()
+
+    intervals = ['2019/01/01 23:55:00', '2019/01/02 00:00:00', '2019/01/02 00:05:00', '2019/01/03 00:05:00']
+    pd.DataFrame({
+        'SETTLEMENTDATE': intervals + intervals,
+        'DUID': ['A'] * 4 + ['B'] * 4,
+        'INITIALMW': [1.0, 2.0, 3.0, 4.0, 5.0, 6.0, 7.0, 8.0]
+    }).to_sql('DISPATCHLOAD', con=con, if_exists='append', index=False)
+    pd.DataFrame({
+        'SETTLEMENTDATE': intervals,
+        'CONSTRAINTID': ['X', 'X', 'Y', 'X'],
+        'GENCONID_EFFECTIVEDATE': ['2019/01/01 00:00:00'] * 4,
+        'GENCONID_VERSIONNO': ['1', '1', '2', '1'],
+        'RHS': [1.0, 2.0, 3.0, 4.0]
+    }).to_sql('DISPATCHCONSTRAINT', con=con, if_exists='append', index=False)
+    pd.DataFrame({
+        'GENCONID': ['X', 'Y', 'Y'],
+        'EFFECTIVEDATE': ['2019/01/01 00:00:00'] * 3,
+        'VERSIONNO': ['1', '1', '2'],
+        'CONSTRAINTTYPE': ['<=', '>=', '=']
+    }).to_sql('GENCONDATA', con=con, if_exists='append', index=False)
+
+    yield manager, intervals + ['2019/01/02 00:10:00']
+    con.close()
+
+
+def count_queries(con):
+    queries = []
+    con.set_trace_callback(lambda statement: queries.append(statement) if statement.startswith('Select') else None)
+    return queries
+
+
+def test_window_cache_returns_the_same_data_as_the_database(database):
+    manager, intervals = database
+    tables = [manager.DISPATCHLOAD, manager.DISPATCHCONSTRAINT, manager.GENCONDATA]
+    expected = {(table.table_name, interval): table.get_data(interval) for table in tables for interval in intervals}
+
+    manager.enable_window_cache(window_hours=24)
+    queries = count_queries(manager.con)
+    for table in tables:
+        for interval in intervals:
+            assert_frame_equal(table.get_data(interval), expected[(table.table_name, interval)])
+
+    # Each table is queried once per day, the intervals span three days.
+    assert len(queries) == 3 * 3
+
+    manager.disable_window_cache()
+    assert_frame_equal(manager.DISPATCHLOAD.get_data(intervals[0]), expected[('DISPATCHLOAD', intervals[0])])
+    assert len(queries) == 3 * 3 + 1
+
+
+def test_window_cache_evicts_least_recently_used_windows(database):
+    manager, intervals = database
+    manager.enable_window_cache(window_hours=24, max_memory_mb=0.0)
+    queries = count_queries(manager.con)
+
+    # With no memory allowance only the most recently loaded window is kept.
+    manager.DISPATCHLOAD.get_data('2019/01/02 00:00:00')
+    manager.DISPATCHLOAD.get_data('2019/01/02 00:05:00')
+    assert len(queries) == 1
+    manager.DISPATCHLOAD.get_data('2019/01/03 00:05:00')
+    manager.DISPATCHLOAD.get_data('2019/01/02 00:05:00')
+    assert len(queries) == 3
+
+    manager.enable_window_cache(window_hours=6)
+    queries.clear()
+    for interval in intervals:
+        manager.DISPATCHLOAD.get_data(interval)
+    assert len(manager._window_cache._windows) == 3
+
+    # Recreating the tables clears the cache.
+    manager.create_tables()
+    assert len(manager._window_cache._windows) == 0
+    assert manager.DISPATCHLOAD.get_data(intervals[0]).empty
+
+
+@pytest.fixture
+def reference_database(tmp_path):
+    con = sqlite3.connect(tmp_path / 'historical.db')
+    manager = mms_db.DBManager(con)
+    manager.create_tables()
+
+    pd.DataFrame({
+        'DUID': ['A', 'A', 'B'],
+        'START_DATE': ['2019/01/01 00:00:00', '2019/02/01 00:00:00', '2019/01/15 00:00:00'],
+        'END_DATE': ['2019/02/01 00:00:00', '2019/03/01 00:00:00', '2019/03/01 00:00:00'],
+        'REGIONID': ['NSW1', 'VIC1', None],
+        'TRANSMISSIONLOSSFACTOR': [0.9, 0.95, 1.0]
+    }).to_sql('DUDETAILSUMMARY', con=con, if_exists='append', index=False)
+    pd.DataFrame({
+        'DUID': ['A', 'A', 'A', 'B'],
+        'EFFECTIVEDATE': ['2019/01/01 00:00:00', '2019/01/01 00:00:00', '2019/02/01 00:00:00', '2019/01/10 00:00:00'],
+        'VERSIONNO': ['1', '2', '1', '1'],
+        'REGISTEREDCAPACITY': [100.0, 110.0, 120.0, 50.0]
+    }).to_sql('DUDETAIL', con=con, if_exists='append', index=False)
+    pd.DataFrame({
+        'INTERCONNECTORID': ['I1', 'I1', 'I1', 'I2'],
+        'EFFECTIVEDATE': ['2019/01/01 00:00:00', '2019/01/01 00:00:00', '2019/02/01 00:00:00', '2019/01/20 00:00:00'],
+        'VERSIONNO': ['1', '2', '1', '1'],
+        'LOSSSEGMENT': ['1', '1', '1', '1'],
+        'MWBREAKPOINT': [-100.0, -120.0, 120.0, 10.0]
+    }).to_sql('LOSSMODEL', con=con, if_exists='append', index=False)
+    pd.DataFrame({
+        'INTERCONNECTORID': ['I1', 'I1', 'I2'],
+        'SETTLEMENTDATE': ['2019/01/10 00:05:00', '2019/02/10 00:05:00', '2019/02/10 00:05:00']
+    }).to_sql('DISPATCHINTERCONNECTORRES', con=con, if_exists='append', index=False)
+    pd.DataFrame({
+        'INTERCONNECTORID': ['I1', 'I2'],
+        'REGIONFROM': ['NSW1', 'VIC1'],
+        'REGIONTO': ['VIC1', 'SA1']
+    }).to_sql('INTERCONNECTOR', con=con, if_exists='append', index=False)
+
+    yield manager, tmp_path / 'snapshot'
+    con.close()
+
+
+def sort_rows(data):
+    return data.sort_values(list(data.columns)).reset_index(drop=True)
+
+
+def test_reference_snapshot_returns_the_same_data_as_the_database(reference_database):
+    manager, snapshot_directory = reference_database
+    date_times = ['2018/12/31 00:00:00', '2019/01/10 00:05:00', '2019/01/20 00:00:00', '2019/02/10 00:05:00',
+                  '2019/03/01 00:00:00']
+    tables = [manager.DUDETAILSUMMARY, manager.DUDETAIL, manager.LOSSMODEL, manager.MNSP_INTERCONNECTOR]
+    expected = {(table.table_name, date_time): table.get_data(date_time) for table in tables
+                for date_time in date_times}
+    expected_interconnectors = manager.INTERCONNECTOR.get_data()
+
+    version = manager.export_reference_snapshot(snapshot_directory)
+    assert version == manager.export_reference_snapshot(snapshot_directory)
+
+    worker = mms_db.DBManager(manager.con)
+    worker.attach_reference_snapshot(snapshot_directory)
+    snapshot = worker.DUDETAIL.snapshot
+    assert snapshot.version == version
+    assert isinstance(snapshot.tables['DUDETAIL']['columns']['REGISTEREDCAPACITY'][0], np.memmap)
+
+    queries = count_queries(manager.con)
+    for table in [worker.DUDETAILSUMMARY, worker.DUDETAIL, worker.LOSSMODEL, worker.MNSP_INTERCONNECTOR]:
+        for date_time in date_times:
+            result = table.get_data(date_time)
+            expected_result = expected[(table.table_name, date_time)]
+            assert list(result.columns) == list(expected_result.columns)
+            if not expected_result.empty:
+                assert_frame_equal(sort_rows(result), sort_rows(expected_result))
+            else:
+                assert result.empty
+    assert_frame_equal(worker.INTERCONNECTOR.get_data(), expected_interconnectors)
+
+    # Only the interconnectors used in each interval are queried from the database, for the LOSSMODEL table.
+    assert len(queries) == len(date_times)
@@ -0,0 +1,129 @@
+import json
+import shutil
+
+import numpy as np
+import pandas as pd
+import pytest
+from pandas._testing import assert_frame_equal
+
+from nempy import markets, results_store
+
+INTERVALS = ['2019/01/01 23:50:00', '2019/01/01 23:55:00', '2019/01/02 00:00:00', '2019/01/02 00:05:00',
+             '2019/01/02 00:10:00']
+
+
+def build_market(demand):
+    market = markets.SpotMarket(unit_info=pd.DataFrame({'unit': ['A', 'B'], 'region': ['NSW', 'NSW']}),
+                                market_regions=['NSW'])
+    market.set_unit_volume_bids(pd.DataFrame({'unit': ['A', 'B', 'B'], 'service': ['energy', 'energy', 'raise_reg'],
+                                              '1': [100.0, 110.0, 15.0]}))
+    market.set_unit_price_bids(pd.DataFrame({'unit': ['A', 'B', 'B'], 'service': ['energy', 'energy', 'raise_reg'],
+                                             '1': [50.0, 60.0, 20.0]}))
+    fcas_trapeziums = pd.DataFrame({'unit': ['B'], 'service': ['raise_reg'], 'max_availability': [15.0],
+                                    'enablement_min': [50.0], 'low_break_point': [65.0], 'high_break_point': [95.0],
+                                    'enablement_max': [110.0]})
+    market.set_fcas_max_availability(fcas_trapeziums.loc[:, ['unit', 'service', 'max_availability']])
+    market.set_energy_and_regulation_capacity_constraints(fcas_trapeziums)
+    market.set_demand_constraints(pd.DataFrame({'region': ['NSW'], 'demand': [demand]}))
+    market.set_fcas_requirements_constraints(pd.DataFrame({'set': ['nsw_regulation_requirement'], 'region': ['NSW'],
+                                                           'service': ['raise_reg'], 'volume': [10.0]}))
+    market.make_constraints_elastic('demand', violation_cost=1000.0)
+    return market
+
+
+def write_replay(directory, batch_intervals):
+    """Dispatch a market for each interval, writing its results to a store, returns the results of each interval."""
+    expected = []
+    with results_store.ResultsWriter(directory, batch_intervals=batch_intervals) as writer:
+        for interval, demand in zip(INTERVALS, [100.0, 120.0, 150.0, 200.0, 260.0]):
+            market = build_market(demand)
+            writer.attach(market, interval)
+            market.dispatch()
+            expected.append((interval, market))
+    return expected
+
+
+def with_interval(frame, interval, columns):
+    frame = frame.copy()
+    frame.insert(0, 'interval', pd.Timestamp(interval))
+    return frame.reindex(columns=columns)
+
+
+def test_written_results_match_the_market_results(tmp_path):
+    dispatched = write_replay(tmp_path / 'results', batch_intervals=2)
+    reader = results_store.ResultsReader(tmp_path / 'results')
+    assert reader.days() == ['2019-01-01', '2019-01-02']
+
+    for table in ['unit_dispatch', 'energy_prices', 'fcas_prices', 'constraint_slack']:
+        columns = [name for name, _ in results_store.SCHEMAS[table]]
+        expected = pd.concat([with_interval(getattr(market, 'get_' + table)(), interval, columns)
+                              for interval, market in dispatched], ignore_index=True)
+        result = reader.read(table)
+        assert_frame_equal(result, expected, check_dtype=False)
+
+    violation_degrees = reader.read('violation_degrees')
+    demand_violation = violation_degrees[violation_degrees['group'] == 'demand']['violation']
+    expected_violation = [market.get_elastic_constraints_violation_degree('demand') for _, market in dispatched]
+    np.testing.assert_allclose(demand_violation, expected_violation)
+    assert demand_violation.iloc[-1] > 0.0
+
+    # The interconnector table is empty as no market has interconnectors.
+    assert reader.read('interconnector_flows').empty
+    assert list(reader.read('interconnector_flows').columns) == ['interval', 'interconnector', 'link', 'flow',
+                                                                 'losses']
+
+
+def test_reader_filters_intervals_and_columns(tmp_path):
+    write_replay(tmp_path / 'results', batch_intervals=2)
+    reader = results_store.ResultsReader(tmp_path / 'results')
+
+    result = reader.read('energy_prices', start='2019/01/01 23:55:00', end='2019/01/02 00:05:00', columns=['price'])
+    assert list(result.columns) == ['interval', 'price']
+    assert list(result['interval']) == [pd.Timestamp(interval) for interval in INTERVALS[1:4]]
+    assert result['interval'].dtype == 'datetime64[ns]'
+
+    batches = list(reader.iter_batches('unit_dispatch', start='2019/01/02 00:00:00'))
+    # The second day's three intervals were written in batches of two and one.
+    assert len(batches) == 2
+    assert reader.read('unit_dispatch', start='2019/01/03 00:00:00').empty
+
+    with pytest.raises(ValueError):
+        reader.read('not_a_table')
+
+
+def test_written_batches_are_appended_and_partial_batches_ignored(tmp_path):
+    write_replay(tmp_path / 'results', batch_intervals=288)
+    batch = tmp_path / 'results' / '2019-01-02' / 'energy_prices' / '000000'
+    assert sorted(path.name for path in batch.iterdir()) == ['interval.npy', 'price.npy', 'region.npy']
+    # A batch left part written by an interrupted replay.
+    shutil.copytree(batch, batch.with_suffix('.tmp'))
+    reader = results_store.ResultsReader(tmp_path / 'results')
+    assert len(reader.read('energy_prices')) == 5
+
+    write_replay(tmp_path / 'results', batch_intervals=288)
+    assert len(reader.read('energy_prices')) == 10
+
+
+def test_writer_rejects_stores_with_a_different_schema(tmp_path):
+    results_store.ResultsWriter(tmp_path / 'results')
+    schema_path = tmp_path / 'results' / 'schema.json'
+    with open(schema_path) as file:
+        manifest = json.load(file)
+    manifest['tables']['energy_prices'].append(['volume', 'float'])
+    with open(schema_path, 'w') as file:
+        json.dump(manifest, file)
+    with pytest.raises(ValueError):
+        results_store.ResultsWriter(tmp_path / 'results')
+
+
+def test_missing_text_is_kept_as_none(tmp_path):
+    columns = {'interval': np.array(['2019-01-01T00:00:00'] * 2, dtype='datetime64[s]'),
+               'group': np.array(['demand', 'generic'], dtype=object),
+               'set': np.array([None, 'x'], dtype=object),
+               'constraint_id': np.array([0, 1]),
+               'rhs': np.array([np.nan, 5.0]), 'slack': np.array([0.0, 1.0]), 'price': np.array([np.nan, 2.0])}
+    results_store.ResultsWriter(tmp_path / 'results')
+    results_store._write_batch(tmp_path / 'results' / '2019-01-01' / 'constraint_slack', columns)
+    result = results_store.ResultsReader(tmp_path / 'results').read('constraint_slack')
+    assert list(result['set']) == [None, 'x']
+    assert list(result['group']) == ['demand', 'generic']
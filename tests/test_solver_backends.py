@@ -0,0 +1,160 @@
+import importlib.util
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+from pandas._testing import assert_frame_equal
+
+from nempy import markets
+from nempy.spot_markert_backend import solver_backends
+
+matrix_engine_installed = (importlib.util.find_spec('highspy') is not None or
+                           importlib.util.find_spec('scipy') is not None)
+
+
+def load_model(backend):
+    # min x0 + 2 x1 + 4 x2, s.t. x0 + x1 + x2 = 12, x1 + x2 >= 4, x0 - x2 <= 6.
+    backend.add_columns(lower_bounds=np.zeros(3), upper_bounds=np.array([10.0, 10.0, 10.0]),
+                        is_integer=np.array([False, False, False]))
+    backend.set_objective(columns=np.array([0, 1, 2]), costs=np.array([1.0, 2.0, 4.0]))
+    backend.add_rows(indptr=np.array([0, 3, 5]), indices=np.array([0, 1, 2, 1, 2]), data=np.ones(5),
+                     senses=np.array(['=', '>=']), rhs=np.array([12.0, 4.0]))
+    # Rows can also be added after the initial load.
+    backend.add_rows(indptr=np.array([0, 2]), indices=np.array([0, 2]), data=np.array([1.0, -1.0]),
+                     senses=np.array(['<=']), rhs=np.array([6.0]))
+
+
+def check_solution(backend):
+    assert backend.solve()
+    np.testing.assert_allclose(backend.get_primal(), [6.0, 6.0, 0.0], atol=1e-9)
+    np.testing.assert_allclose(backend.get_slack(), [0.0, 2.0, 0.0], atol=1e-9)
+    np.testing.assert_allclose(backend.get_dual(), [2.0, 0.0, -1.0], atol=1e-9)
+    assert backend.objective_value == pytest.approx(18.0)
+
+    # Modifying the model between solves.
+    backend.set_rhs(np.array([2]), np.array([8.0]))
+    np.testing.assert_allclose(backend.get_rhs(np.array([0, 2])), [12.0, 8.0])
+    backend.set_bounds(np.array([1]), np.array([0.0]), np.array([3.0]))
+    assert backend.solve()
+    np.testing.assert_allclose(backend.get_primal(), [8.0, 3.0, 1.0], atol=1e-9)
+    assert backend.objective_value == pytest.approx(18.0)
+
+
+def test_mip_backend():
+    backend = solver_backends.create_backend('CBC')
+    load_model(backend)
+    check_solution(backend)
+    assert str(backend.model.constr_by_name('2')) == '2: +1.0 0 -1.0 2 <= 8.0'
+
+
+@pytest.mark.skipif(not matrix_engine_installed, reason='Requires highspy or scipy.')
+def test_matrix_backend_matches_mip_backend():
+    backend = solver_backends.create_backend('HIGHS')
+    load_model(backend)
+    check_solution(backend)
+    with pytest.raises(NotImplementedError):
+        backend.add_special_ordered_sets(2, [([0, 1, 2], [1.0, 2.0, 3.0])])
+
+
+@pytest.fixture
+def process_pool():
+    pool = solver_backends.SolverProcessPool(workers=2, time_limit=60.0)
+    yield pool
+    pool.close()
+
+
+def test_subprocess_backend_matches_mip_backend(process_pool):
+    backend = solver_backends.create_backend('CBC', process_pool=process_pool)
+    load_model(backend)
+    check_solution(backend)
+    assert [attempt['status'] for attempt in backend.attempts] == ['optimal']
+
+
+def test_process_pool_replaces_workers_that_time_out_or_crash():
+    with solver_backends.SolverProcessPool(workers=1, time_limit=0.5) as pool:
+        start_time = time.perf_counter()
+        assert pool.run(time.sleep, (30.0,))[0] == 'timeout'
+        assert time.perf_counter() - start_time < 10.0
+        assert pool.run(os._exit, (3,)) == ('crashed', 'The solver process exited with code 3.')
+        assert pool.run(int, ('not a number',))[0] == 'error'
+        assert pool.run(abs, (-2,)) == ('ok', 2)
+
+
+def test_failed_solves_are_retried_with_each_lp_method():
+    # No solve can finish within the time limit, so every attempt times out.
+    with solver_backends.SolverProcessPool(time_limit=1e-6, retry_lp_methods=['primal', 'barrier']) as pool:
+        backend = solver_backends.create_backend('CBC', process_pool=pool)
+        load_model(backend)
+        assert not backend.solve()
+        assert backend.status == 'timeout'
+        assert [attempt['lp_method'] for attempt in backend.attempts] == [None, 'primal', 'barrier']
+
+
+def test_infeasible_solves_are_not_retried(process_pool):
+    process_pool.retry_lp_methods = ['primal']
+    backend = solver_backends.create_backend('CBC', process_pool=process_pool)
+    load_model(backend)
+    backend.set_rhs(np.array([1]), np.array([20.0]))
+    assert not backend.solve()
+    assert backend.status == 'infeasible'
+    assert len(backend.attempts) == 1
+
+
+def test_process_pool_rejects_unknown_lp_methods():
+    with pytest.raises(ValueError):
+        solver_backends.SolverProcessPool(retry_lp_methods=['simplex'])
+
+
+def test_create_backend_rejects_unknown_solvers():
+    with pytest.raises(ValueError):
+        solver_backends.create_backend('NOT_A_SOLVER')
+
+
+def build_market(solver_name):
+    unit_info = pd.DataFrame({
+        'unit': ['A', 'B', 'C'],
+        'region': ['NSW', 'NSW', 'VIC'],
+        'loss_factor': [0.9, 0.95, 1.0]})
+    volume_bids = pd.DataFrame({
+        'unit': ['A', 'B', 'C'],
+        '1': [20.0, 20.0, 50.0],
+        '2': [50.0, 100.0, 50.0]})
+    price_bids = pd.DataFrame({
+        'unit': ['A', 'B', 'C'],
+        '1': [50.0, 52.0, 30.0],
+        '2': [53.0, 60.0, 70.0]})
+    unit_limits = pd.DataFrame({
+        'unit': ['A', 'B', 'C'],
+        'capacity': [55.0, 90.0, 80.0]})
+    demand = pd.DataFrame({
+        'region': ['NSW', 'VIC'],
+        'demand': [120.0, 20.0]})
+    interconnectors = pd.DataFrame({
+        'interconnector': ['inter_one'],
+        'to_region': ['VIC'],
+        'from_region': ['NSW'],
+        'max': [100.0],
+        'min': [-100.0]})
+
+    market = markets.SpotMarket(unit_info=unit_info, market_regions=['NSW', 'VIC'])
+    market.solver_name = solver_name
+    market.set_unit_volume_bids(volume_bids)
+    market.set_unit_price_bids(price_bids)
+    market.set_unit_bid_capacity_constraints(unit_limits)
+    market.set_demand_constraints(demand)
+    market.set_interconnectors(interconnectors)
+    return market
+
+
+@pytest.mark.skipif(not matrix_engine_installed, reason='Requires highspy or scipy.')
+def test_spot_market_dispatch_with_highs_matches_cbc():
+    cbc_market = build_market('CBC')
+    cbc_market.dispatch()
+    highs_market = build_market('HIGHS')
+    highs_market.dispatch()
+    assert_frame_equal(highs_market.get_unit_dispatch(), cbc_market.get_unit_dispatch(), atol=1e-6)
+    assert_frame_equal(highs_market.get_energy_prices(), cbc_market.get_energy_prices(), atol=1e-6)
+    assert_frame_equal(highs_market.get_interconnector_flows(), cbc_market.get_interconnector_flows(), atol=1e-6)
+    assert highs_market.objective_value == pytest.approx(cbc_market.objective_value)
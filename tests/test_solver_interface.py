@@ -1,5 +1,6 @@
+import pytest
 import pandas as pd
-from pandas._testing import assert_frame_equal
+from pandas._testing import assert_frame_equal, assert_series_equal
 from nempy.spot_markert_backend import solver_interface
 
 
@@ -73,3 +74,156 @@ def test_dispatch():
 
     assert_frame_equal(decision_variables, expected_decision_variables)
     assert_frame_equal(market_rhs_and_type, expected_market_rhs_and_type)
+
+
+def test_add_constraints_sums_repeated_terms_and_orders_rows():
+    si = solver_interface.InterfaceToSolver()
+
+    decision_variables = pd.DataFrame({
+            'variable_id': [0, 1, 2],
+            'lower_bound': [0.0, 0.0, 0.0],
+            'upper_bound': [10.0, 10.0, 10.0],
+            'type': ['continuous', 'continuous', 'continuous'],
+    })
+
+    si.add_variables(decision_variables)
+
+    constraints_lhs = pd.DataFrame({
+        'constraint_id': [5, 3, 5, 3, 5],
+        'variable_id': [2, 1, 0, 1, 2],
+        'coefficient': [1.0, 0.5, 2.0, 0.5, -1.0]
+    })
+
+    constraints_type_and_rhs = pd.DataFrame({
+            'constraint_id': [3, 5],
+            'type': ['>=', '<='],
+            'rhs': [4.0, 6.0]
+        })
+
+    si.add_constraints(constraints_lhs, constraints_type_and_rhs)
+
+    assert [constraint.name for constraint in si.mip_model.constrs] == ['3', '5']
+    assert str(si.mip_model.constr_by_name('3')) == '3: +1.0 1 >= 4.0'
+    assert str(si.mip_model.constr_by_name('5')) == '5: +2.0 0 +0.0 2 <= 6.0'
+
+
+def test_generic_constraint_lhs_matches_merge_based_mapping():
+    generic_constraint_units = pd.DataFrame({
+        'set': ['X', 'X', 'Y', 'Z', 'Y'],
+        'unit': ['A', 'B', 'A', 'C', 'D'],
+        'service': ['energy', 'energy', 'raise_reg', 'energy', 'energy'],
+        'coefficient': [1.0, 2.0, 3.0, 4.0, 5.0]})
+
+    # Set Y has two constraint ids, set Z has none.
+    generic_constraint_ids = pd.DataFrame({
+        'constraint_id': [7, 8, 9],
+        'set': ['X', 'Y', 'Y']})
+
+    unit_bids_to_constraint_map = pd.DataFrame({
+        'variable_id': [0, 1, 2, 3, 4, 5],
+        'unit': ['A', 'A', 'B', 'A', 'C', 'D'],
+        'service': ['energy', 'energy', 'energy', 'raise_reg', 'energy', 'raise_reg']})
+
+    lhs = solver_interface.create_unit_level_generic_constraint_lhs(generic_constraint_units, generic_constraint_ids,
+                                                                    unit_bids_to_constraint_map)
+
+    expected_lhs = pd.merge(generic_constraint_units, unit_bids_to_constraint_map, on=['unit', 'service'])
+    expected_lhs = pd.merge(expected_lhs, generic_constraint_ids, on='set')
+    expected_lhs = expected_lhs.loc[:, ['constraint_id', 'variable_id', 'coefficient']]
+
+    sort_columns = ['constraint_id', 'variable_id']
+    assert_frame_equal(lhs.sort_values(sort_columns).reset_index(drop=True),
+                       expected_lhs.sort_values(sort_columns).reset_index(drop=True))
+
+
+def build_two_component_model(si):
+    # Variables 0 and 1 form one component, 2 and 3 another, variable 4 is fixed and links both.
+    decision_variables = pd.DataFrame({
+        'variable_id': [0, 1, 2, 3, 4],
+        'lower_bound': [0.0, 0.0, 0.0, 0.0, 2.0],
+        'upper_bound': [5.0, 5.0, 5.0, 5.0, 2.0],
+        'type': ['continuous', 'continuous', 'continuous', 'continuous', 'continuous']})
+
+    objective_function = pd.DataFrame({
+        'variable_id': [0, 1, 2, 3, 4],
+        'cost': [1.0, 2.0, 2.0, 1.0, 10.0]})
+
+    constraints_lhs = pd.DataFrame({
+        'constraint_id': [0, 0, 0, 1, 1, 1, 2],
+        'variable_id': [0, 1, 4, 2, 3, 4, 4],
+        'coefficient': [1.0, 1.0, 1.0, 1.0, 1.0, -1.0, 1.0]})
+
+    constraints_type_and_rhs = pd.DataFrame({
+        'constraint_id': [0, 1, 2],
+        'type': ['=', '=', '<='],
+        'rhs': [9.0, 1.0, 3.0]})
+
+    si.add_variables(decision_variables)
+    si.add_objective_function(objective_function)
+    si.add_constraints(constraints_lhs, constraints_type_and_rhs)
+    si.optimize()
+    return decision_variables, constraints_type_and_rhs
+
+
+def test_decomposed_interface_matches_single_model():
+    si = solver_interface.InterfaceToSolver()
+    decision_variables, constraints_type_and_rhs = build_two_component_model(si)
+
+    for workers in [1, 2]:
+        decomposed_si = solver_interface.DecomposedInterfaceToSolver(workers=workers)
+        build_two_component_model(decomposed_si)
+
+        assert len(decomposed_si.components) == 2
+        assert_series_equal(decomposed_si.get_optimal_values_of_decision_variables(decision_variables),
+                            si.get_optimal_values_of_decision_variables(decision_variables), check_names=False)
+        assert_series_equal(decomposed_si.get_slack_in_constraints(constraints_type_and_rhs),
+                            si.get_slack_in_constraints(constraints_type_and_rhs).astype(float), check_names=False)
+        assert decomposed_si.objective_value == si.objective_value
+
+        si.optimize_linear()
+        decomposed_si.optimize_linear()
+        assert decomposed_si.price_constraints([0, 1, 2]) == si.price_constraints([0, 1, 2])
+
+
+def test_decomposed_interface_routes_constraints_added_after_decomposition():
+    si = solver_interface.DecomposedInterfaceToSolver()
+    decision_variables, _ = build_two_component_model(si)
+
+    # Limit variable 0, in the first component, which pushes variable 1 up.
+    si.add_constraints(pd.DataFrame({'constraint_id': [3], 'variable_id': [0], 'coefficient': [1.0]}),
+                       pd.DataFrame({'constraint_id': [3], 'type': ['<='], 'rhs': [4.0]}))
+    si.optimize()
+
+    values = si.get_optimal_values_of_decision_variables(decision_variables)
+    assert list(values) == [4.0, 3.0, 0.0, 3.0, 2.0]
+
+    # Constraints linking the components can't be added once they are being solved separately.
+    with pytest.raises(ValueError):
+        si.add_constraints(pd.DataFrame({'constraint_id': [4, 4], 'variable_id': [0, 2], 'coefficient': [1.0, 1.0]}),
+                           pd.DataFrame({'constraint_id': [4], 'type': ['<='], 'rhs': [4.0]}))
+
+
+def test_decomposed_interface_keeps_linked_variables_together():
+    si = solver_interface.DecomposedInterfaceToSolver()
+    si.link_variables(pd.DataFrame({'constraint_id': [4, 4], 'variable_id': [0, 2]}))
+    decision_variables, _ = build_two_component_model(si)
+
+    assert len(si.components) == 1
+
+    si.add_constraints(pd.DataFrame({'constraint_id': [4, 4], 'variable_id': [0, 2], 'coefficient': [1.0, 1.0]}),
+                       pd.DataFrame({'constraint_id': [4], 'type': ['<='], 'rhs': [4.0]}))
+    si.optimize()
+
+    values = si.get_optimal_values_of_decision_variables(decision_variables)
+    assert list(values) == [4.0, 3.0, 0.0, 3.0, 2.0]
+
+
+def test_find_independent_components_joins_long_chains():
+    # A chain 0 - 1 - 2 - ... - 9 linked by consecutive pairs, plus an isolated variable 10.
+    constraints_lhs = pd.DataFrame({
+        'constraint_id': [i // 2 for i in range(18)],
+        'variable_id': [i // 2 + i % 2 for i in range(18)]})
+
+    components = solver_interface.find_independent_components(list(range(11)), constraints_lhs)
+
+    assert list(components) == [0] * 10 + [1]
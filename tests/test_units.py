@@ -0,0 +1,189 @@
+import numpy as np
+import pandas as pd
+import pytest
+from pandas._testing import assert_frame_equal
+
+from nempy.historical_inputs import units
+
+
+def make_interval_inputs():
+    bands = {'BANDAVAIL{}'.format(band): [10.0, 0.0, 5.0, 20.0, 5.0, 30.0] for band in range(1, 11)}
+    BIDPEROFFER_D = pd.DataFrame(dict({
+        'DUID': ['A', 'A', 'A', 'B', 'B', 'C'],
+        'BIDTYPE': ['ENERGY', 'RAISEREG', 'LOWERREG', 'ENERGY', 'RAISE60SEC', 'ENERGY'],
+        'MAXAVAIL': [100.0, 20.0, 20.0, 80.0, 15.0, 50.0],
+        'ENABLEMENTMIN': [0.0, 20.0, 30.0, 0.0, 10.0, 0.0],
+        'LOWBREAKPOINT': [0.0, 40.0, 50.0, 0.0, 20.0, 0.0],
+        'HIGHBREAKPOINT': [0.0, 80.0, 70.0, 0.0, 60.0, 0.0],
+        'ENABLEMENTMAX': [0.0, 100.0, 90.0, 0.0, 80.0, 0.0]}, **bands))
+    prices = {'PRICEBAND{}'.format(band): [band * 10.0, band * 1.0, band * 2.0, band * 20.0, band * 3.0, band * 30.0]
+              for band in range(1, 11)}
+    BIDDAYOFFER_D = pd.DataFrame(dict({'DUID': BIDPEROFFER_D['DUID'], 'BIDTYPE': BIDPEROFFER_D['BIDTYPE']}, **prices))
+    agc_enablement_limits = pd.DataFrame({
+        'DUID': ['A', 'B', 'C'],
+        'RAISEREGENABLEMENTMAX': [90.0, 0.0, 0.0],
+        'RAISEREGENABLEMENTMIN': [30.0, 0.0, 0.0],
+        'LOWERREGENABLEMENTMAX': [80.0, 0.0, 0.0],
+        'LOWERREGENABLEMENTMIN': [40.0, 0.0, 0.0]})
+    initial_conditions = pd.DataFrame({
+        'DUID': ['A', 'B', 'C'],
+        'INITIALMW': [50.0, 40.0, 20.0],
+        'RAMPUPRATE': [120.0, np.nan, np.nan],
+        'RAMPDOWNRATE': [120.0, np.nan, np.nan],
+        'AGCSTATUS': [1.0, 0.0, 0.0]})
+    uigf_values = pd.DataFrame({'DUID': ['B'], 'UIGF': [70.0]})
+    unit_availability = pd.DataFrame({'unit': ['A', 'B', 'C'], 'capacity': [100.0, 70.0, 50.0]})
+    return [BIDPEROFFER_D, BIDDAYOFFER_D, agc_enablement_limits, initial_conditions, uigf_values, unit_availability]
+
+
+def sort_rows(data):
+    return data.sort_values(['DUID', 'BIDTYPE']).reset_index(drop=True)
+
+
+def test_bid_store_only_processes_units_with_changed_inputs():
+    first_interval = make_interval_inputs()
+    # Unit A rebids, unit C's initial output changes but it only has energy bids, and B's UIGF changes.
+    second_interval = make_interval_inputs()
+    second_interval[0].loc[1, 'MAXAVAIL'] = 10.0
+    second_interval[3].loc[2, 'INITIALMW'] = 30.0
+    second_interval[4].loc[0, 'UIGF'] = 60.0
+    # Nothing changes.
+    third_interval = [table.copy() for table in second_interval]
+
+    bid_store = units.BidStore()
+    for inputs, units_processed in [(first_interval, 3), (second_interval, 2), (third_interval, 0)]:
+        volume_bids, price_bids = bid_store.process_bids(*inputs)
+        expected_volume_bids, expected_price_bids = units._process_bids(*inputs)
+        assert bid_store.units_processed == units_processed
+        assert bid_store.units_reused == 3 - units_processed
+        assert_frame_equal(sort_rows(volume_bids), sort_rows(expected_volume_bids.loc[:, volume_bids.columns]))
+        assert_frame_equal(sort_rows(price_bids), sort_rows(expected_price_bids))
+
+    # Processed bids are returned in the order of the raw bids.
+    assert list(zip(volume_bids['DUID'], volume_bids['BIDTYPE'])) == \
+        [(duid, bid_type) for duid, bid_type in zip(inputs[0]['DUID'], inputs[0]['BIDTYPE'])
+         if ((volume_bids['DUID'] == duid) & (volume_bids['BIDTYPE'] == bid_type)).any()]
+
+
+class FakeRawInputsLoader:
+    """Stands in for the RawInputsLoader, returning the unit inputs of each interval from a dictionary."""
+
+    def __init__(self, inputs_by_interval):
+        self.inputs_by_interval = inputs_by_interval
+        self.interval = None
+
+    def set_interval(self, interval):
+        self.interval = interval
+
+    def _inputs(self):
+        return [table.copy() for table in self.inputs_by_interval[self.interval]]
+
+    def get_unit_volume_bids(self):
+        return self._inputs()[0].assign(RAMPDOWNRATE=600.0, RAMPUPRATE=600.0)
+
+    def get_unit_price_bids(self):
+        return self._inputs()[1]
+
+    def get_agc_enablement_limits(self):
+        return self._inputs()[2]
+
+    def get_unit_initial_conditions(self):
+        return self._inputs()[3]
+
+    def get_UIGF_values(self):
+        return self._inputs()[4]
+
+    def get_unit_details(self):
+        return pd.DataFrame({
+            'DUID': ['A', 'B', 'C'],
+            'DISPATCHTYPE': ['GENERATOR', 'GENERATOR', 'LOAD'],
+            'CONNECTIONPOINTID': ['X', 'Y', 'Z'],
+            'REGIONID': ['NSW1', 'NSW1', 'VIC1'],
+            'TRANSMISSIONLOSSFACTOR': [0.9, 1.0, 0.95],
+            'DISTRIBUTIONLOSSFACTOR': [1.0, 0.98, 1.0]})
+
+    def get_unit_fast_start_parameters(self):
+        return pd.DataFrame({'DUID': ['A'], 'MinLoadingMW': [10.0]})
+
+
+def test_unit_data_range_matches_unit_data_of_each_interval():
+    intervals = ['2019/01/10 12:05:00', '2019/01/10 12:10:00', '2019/01/10 12:15:00']
+    inputs_by_interval = {interval: make_interval_inputs() for interval in intervals}
+    # Unit A rebids, B's UIGF drops below its enablement max, and in the last interval A's AGC status is off.
+    inputs_by_interval[intervals[1]][0].loc[1, 'MAXAVAIL'] = 5.0
+    inputs_by_interval[intervals[1]][4].loc[0, 'UIGF'] = 60.0
+    inputs_by_interval[intervals[2]][3].loc[0, 'AGCSTATUS'] = 0.0
+    loader = FakeRawInputsLoader(inputs_by_interval)
+
+    unit_data_range = units.UnitDataRange(loader, intervals)
+    for interval in reversed(intervals):
+        unit_data = unit_data_range.get_unit_data(interval)
+        loader.set_interval(interval)
+        expected_unit_data = units.UnitData(loader)
+
+        for result, expected in zip(unit_data.get_processed_bids(), expected_unit_data.get_processed_bids()):
+            assert_frame_equal(result, expected.reset_index(drop=True))
+        unit_data.add_fcas_trapezium_constraints()
+        expected_unit_data.add_fcas_trapezium_constraints()
+        assert_frame_equal(unit_data.get_fcas_max_availability().reset_index(drop=True),
+                           expected_unit_data.get_fcas_max_availability().reset_index(drop=True))
+        assert_frame_equal(unit_data.get_unit_bid_availability(), expected_unit_data.get_unit_bid_availability())
+        assert_frame_equal(unit_data.get_unit_info(), expected_unit_data.get_unit_info())
+
+    with pytest.raises(ValueError):
+        unit_data_range.get_unit_data('2019/01/10 12:20:00')
+
+
+def make_random_interval_inputs(seed, n_units=40):
+    rng = np.random.default_rng(seed)
+    duids = ['U{}'.format(unit) for unit in range(n_units)]
+    bid_types = ['ENERGY', 'RAISEREG', 'LOWERREG', 'RAISE6SEC', 'LOWER60SEC']
+    bids = pd.DataFrame([(duid, bid_type) for duid in duids for bid_type in bid_types if rng.random() < 0.7],
+                        columns=['DUID', 'BIDTYPE'])
+    n_bids = len(bids)
+    enablement_min = rng.choice([0.0, 10.0, 20.0], n_bids)
+    bids['MAXAVAIL'] = rng.choice([0.0, 5.0, 15.0, 30.0], n_bids)
+    bids['ENABLEMENTMIN'] = enablement_min
+    bids['LOWBREAKPOINT'] = enablement_min + rng.choice([0.0, 20.0], n_bids)
+    bids['HIGHBREAKPOINT'] = bids['LOWBREAKPOINT'] + rng.choice([30.0, 50.0], n_bids)
+    bids['ENABLEMENTMAX'] = bids['HIGHBREAKPOINT'] + rng.choice([0.0, 20.0], n_bids)
+    for band in range(1, 11):
+        bids['BANDAVAIL{}'.format(band)] = rng.choice([0.0, 0.0, 5.0], n_bids)
+    # Shuffle the bids and give them a non default index.
+    bids = bids.sample(frac=1.0, random_state=seed)
+    prices = bids.loc[:, ['DUID', 'BIDTYPE']].sample(frac=1.0, random_state=seed + 1)
+    for band in range(1, 11):
+        prices['PRICEBAND{}'.format(band)] = band * 10.0
+
+    def unit_subset(fraction):
+        return [duid for duid in duids if rng.random() < fraction]
+
+    agc_units = unit_subset(0.8)
+    agc_enablement_limits = pd.DataFrame({
+        'DUID': agc_units,
+        'RAISEREGENABLEMENTMAX': rng.choice([0.0, 60.0, 90.0, np.nan], len(agc_units)),
+        'RAISEREGENABLEMENTMIN': rng.choice([0.0, 15.0, 30.0], len(agc_units)),
+        'LOWERREGENABLEMENTMAX': rng.choice([0.0, 70.0, 100.0], len(agc_units)),
+        'LOWERREGENABLEMENTMIN': rng.choice([0.0, 5.0, 25.0], len(agc_units))})
+    ic_units = unit_subset(0.9)
+    initial_conditions = pd.DataFrame({
+        'DUID': ic_units,
+        'INITIALMW': rng.choice([-1.0, 0.0, 25.0, 40.000001, 70.0, np.nan], len(ic_units)),
+        'RAMPUPRATE': rng.choice([0.0, 60.0, 240.0, np.nan], len(ic_units)),
+        'RAMPDOWNRATE': rng.choice([0.0, 120.0, 600.0, np.nan], len(ic_units)),
+        'AGCSTATUS': rng.choice([0.0, 1.0], len(ic_units))})
+    uigf_units = unit_subset(0.3)
+    uigf_values = pd.DataFrame({'DUID': uigf_units, 'UIGF': rng.choice([10.0, 45.0, 80.0], len(uigf_units))})
+    capacity_units = unit_subset(0.8)
+    unit_availability = pd.DataFrame({'unit': capacity_units,
+                                      'capacity': rng.choice([0.0, 15.0, 100.0, np.nan], len(capacity_units))})
+    return [bids, prices, agc_enablement_limits, initial_conditions, uigf_values, unit_availability]
+
+
+@pytest.mark.parametrize('seed', range(10))
+def test_fused_bid_processing_matches_processing_in_steps(seed):
+    inputs = make_random_interval_inputs(seed)
+    volume_bids, price_bids = units._process_bids(*inputs)
+    expected_volume_bids, expected_price_bids = units._process_bids_in_steps(*inputs)
+    assert_frame_equal(volume_bids, expected_volume_bids.loc[:, volume_bids.columns])
+    assert_frame_equal(price_bids, expected_price_bids)
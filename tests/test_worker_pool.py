@@ -0,0 +1,72 @@
+import os
+import shutil
+import sqlite3
+
+import numpy as np
+import pandas as pd
+import pytest
+from pandas._testing import assert_frame_equal
+
+from nempy.historical_inputs import loaders, mms_db, worker_pool, xml_cache
+
+
+def dispatch_unit_details(raw_inputs_loader, interval):
+    unit_details = raw_inputs_loader.mms_db.DUDETAILSUMMARY.get_data(interval)
+    worker = pd.DataFrame({'pid': [os.getpid()], 'initialised': [worker_pool._worker_state is not None]})
+    return {'unit_details': unit_details, 'worker': worker}
+
+
+def fail_to_dispatch(raw_inputs_loader, interval):
+    raise ValueError('No inputs for {}.'.format(interval))
+
+
+def shared_memory_blocks():
+    return set(os.listdir('/dev/shm')) if os.path.isdir('/dev/shm') else set()
+
+
+@pytest.fixture
+def database_file(tmp_path):
+    database_file = tmp_path / 'market_management_system.db'
+    shutil.copy('market_management_system.db', database_file)
+    return database_file
+
+
+def test_worker_pool_matches_dispatching_in_process(tmp_path, database_file):
+    intervals = ['2019/01/10 12:{:02d}:00'.format(minute) for minute in range(0, 30, 5)]
+    blocks_before = shared_memory_blocks()
+    with worker_pool.IntervalWorkerPool(dispatch_unit_details, tmp_path / 'cache', database_file,
+                                        workers=2) as pool:
+        results = list(pool.map(intervals))
+        single_result = pool.dispatch(intervals[0])
+
+    con = sqlite3.connect(database_file)
+    raw_inputs_loader = loaders.RawInputsLoader(xml_cache.XMLCacheManager(tmp_path / 'cache'),
+                                                mms_db.DBManager(connection=con))
+    for interval, result in zip(intervals, results):
+        expected = dispatch_unit_details(raw_inputs_loader, interval)['unit_details']
+        assert_frame_equal(result['unit_details'], expected.reset_index(drop=True))
+    con.close()
+    assert_frame_equal(single_result['unit_details'], results[0]['unit_details'])
+
+    # Intervals were dispatched by the initialised workers, and their shared memory freed.
+    workers = pd.concat([result['worker'] for result in results])
+    assert workers['initialised'].all()
+    assert workers['pid'].nunique() <= 2
+    assert os.getpid() not in workers['pid'].to_list()
+    assert shared_memory_blocks() == blocks_before
+
+
+def test_worker_pool_raises_dispatch_errors(tmp_path, database_file):
+    with worker_pool.IntervalWorkerPool(fail_to_dispatch, tmp_path / 'cache', database_file, workers=1,
+                                        start_method='spawn') as pool:
+        with pytest.raises(ValueError, match='No inputs for 2019/01/10 12:00:00.'):
+            pool.dispatch('2019/01/10 12:00:00')
+
+
+def test_shared_frames_keep_column_types():
+    frames = {'dispatch': pd.DataFrame({'unit': ['A', None, 'B'], 'dispatch': [1.0, np.nan, 3.0],
+                                        'count': np.array([1, 2, 3], dtype=np.int32), 'binding': [True, False, True]}),
+              'empty': pd.DataFrame({'unit': pd.Series([], dtype=object), 'price': pd.Series([], dtype=float)})}
+    result = worker_pool._read_shared_frames(worker_pool._write_shared_frames(frames))
+    assert_frame_equal(result['dispatch'], frames['dispatch'])
+    assert_frame_equal(result['empty'], frames['empty'])
@@ -0,0 +1,70 @@
+import copy
+import zipfile
+
+import pytest
+
+from nempy.historical_inputs import xml_cache
+
+
+def make_case(number):
+    return '<NEMSPDCaseFile><Case><Number>{}</Number></Case></NEMSPDCaseFile>'.format(number)
+
+
+def make_case_dict(number):
+    return {'NEMSPDCaseFile': {'Case': {'Number': str(number)}}}
+
+
+@pytest.fixture
+def caches(tmp_path):
+    files = {'NEMSPDOutputs_2018123124000.loaded': make_case(1),
+             'NEMSPDOutputs_2018123123900_OCD.loaded': make_case(2),
+             'NEMSPDOutputs_2019010100100.loaded': make_case(3)}
+    extracted_folder = tmp_path / 'extracted'
+    extracted_folder.mkdir()
+    zip_folder = tmp_path / 'zip'
+    zip_folder.mkdir()
+    archives = {'NemSpdOutputs_20181231_loaded.zip': zipfile.ZIP_DEFLATED,
+                'NemSpdOutputs_20190101_loaded.zip': zipfile.ZIP_LZMA}
+    for archive_name, compression in archives.items():
+        with zipfile.ZipFile(zip_folder / archive_name, 'w', compression=compression) as archive:
+            for name, content in files.items():
+                if name[14:22] == archive_name[14:22]:
+                    archive.writestr(name, content)
+                    (extracted_folder / name).write_text(content)
+    return xml_cache.XMLCacheManager(str(extracted_folder)), xml_cache.XMLCacheManager(str(zip_folder), storage='zip')
+
+
+def test_zip_storage_reads_the_same_data_as_extracted_storage(caches):
+    extracted, archived = caches
+    for interval in ['2019/01/01 00:00:00', '2019/01/01 04:05:00', '2018/12/31 23:55:00']:
+        extracted.load_interval(interval)
+        archived.load_interval(interval)
+        assert archived.interval_inputs_in_cache()
+        assert archived.get_file_name() == extracted.get_file_name()
+        assert archived.xml == extracted.xml
+    assert archived.get_file_name() == 'NEMSPDOutputs_2018123123900_OCD.loaded'
+    assert archived.get_file_path().name == 'NemSpdOutputs_20181231_loaded.zip'
+
+    # Intervals from the same day are read through the same archive handle.
+    handle = archived._archive
+    archived.load_interval('2019/01/01 00:00:00')
+    assert archived._archive is handle
+
+    # Copies open their own handle.
+    copied = copy.copy(archived)
+    copied.load_interval('2019/01/01 04:05:00')
+    assert archived._archive is handle
+    assert copied.xml == make_case_dict(3)
+
+    archived.close()
+    assert handle.fp is None
+
+
+def test_zip_storage_reports_intervals_missing_from_the_archive(caches):
+    extracted, archived = caches
+    archived.interval = '2019/01/01 04:15:00'
+    assert not archived.interval_inputs_in_cache()
+    archived.interval = '2019/01/05 04:15:00'
+    assert not archived.interval_inputs_in_cache()
+    with pytest.raises(ValueError):
+        xml_cache.XMLCacheManager(archived.cache_folder, storage='tar')